@@ -0,0 +1,118 @@
+"""Building blocks for the streaming bulk export (many recordings -> one ZIP).
+
+- :func:`map_unordered` runs a blocking fetch for each item on a small
+  thread pool (greenlets under gevent) and yields results as they finish.
+  Submission is driven by the consumer, so at most ``max_workers`` results
+  are in flight or waiting at any time, however many items there are.
+- :func:`stream_zip` writes entries through :mod:`zipfile` into a
+  non-seekable sink and yields the bytes after every entry. zipfile then
+  uses data descriptors instead of seeking back to patch headers, so only
+  the current entry is held in memory, never the archive.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_UNSAFE_NAME_RE = re.compile(r'[\x00-\x1f\x7f/\\:*?"<>|]+')
+MAX_STEM_CHARS = 120
+
+
+def map_unordered(
+    fn: Callable[[T], R], items: Iterable[T], *, max_workers: int = 8
+) -> Iterator[Tuple[T, Optional[R], Optional[BaseException]]]:
+    """Yield ``(item, result, error)`` in completion order with at most ``max_workers`` calls outstanding.
+
+    Closing the generator early (client went away) cancels calls that have not started.
+    """
+    max_workers = max(1, int(max_workers))
+    source = iter(items)
+    pending: Dict[Any, T] = {}
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bulk-export")
+
+    def fill() -> None:
+        while len(pending) < max_workers:
+            try:
+                item = next(source)
+            except StopIteration:
+                return
+            pending[pool.submit(fn, item)] = item
+
+    try:
+        fill()
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            finished = [(fut, pending.pop(fut)) for fut in done]
+            # Start the next fetches before handing results to the (possibly slow) consumer.
+            fill()
+            for fut, item in finished:
+                error = fut.exception()
+                yield item, (None if error is not None else fut.result()), error
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def safe_entry_stem(name: Any, default: str = "recording") -> str:
+    """File-name-safe stem for a ZIP entry: no path separators or control characters, bounded length."""
+    stem = _UNSAFE_NAME_RE.sub("_", str(name or "")).strip(" ._")
+    return stem[:MAX_STEM_CHARS].rstrip(" ._") or default
+
+
+def unique_entry_name(name: str, used: Set[str]) -> str:
+    """``name``, or ``stem (2).ext``, ``stem (3).ext``... if an earlier entry took it (case-insensitive)."""
+    stem, dot, ext = name.rpartition(".")
+    if not dot:
+        stem, ext = name, ""
+    candidate, n = name, 1
+    while candidate.lower() in used:
+        n += 1
+        candidate = f"{stem} ({n}){dot}{ext}"
+    used.add(candidate.lower())
+    return candidate
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object collecting what zipfile writes until :meth:`take`."""
+
+    def __init__(self) -> None:
+        self._parts: list = []
+
+    def write(self, data: bytes) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts.clear()
+        return out
+
+
+def stream_zip(
+    entries: Iterable[Tuple[str, bytes]],
+    *,
+    compression: int = zipfile.ZIP_DEFLATED,
+    compresslevel: Optional[int] = 6,
+) -> Iterator[bytes]:
+    """Yield a ZIP archive of ``(name, data)`` entries piece by piece: one chunk per entry, then the directory."""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=compression, compresslevel=compresslevel) as zf:
+        for name, data in entries:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = compression
+            zf.writestr(info, data, compresslevel=compresslevel)
+            chunk = sink.take()
+            if chunk:
+                yield chunk
+    tail = sink.take()
+    if tail:
+        yield tail
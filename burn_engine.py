@@ -0,0 +1,434 @@
+"""Subtitle burn engine: one ffmpeg process, or keyframe-aligned chunks encoded in parallel.
+
+A single ``libx264 -preset veryfast`` process keeps only a few cores busy,
+whatever the worker has. :func:`burn_subtitles` can instead:
+
+1. probe the video keyframes (packet flags, no decoding) with
+   :func:`probe_media` and cut the timeline at keyframes near even splits
+   (:func:`plan_chunks`), so every chunk seeks straight to a keyframe;
+2. split the ASS/SRT cues per chunk, shifted to the chunk start and clipped
+   to it (:func:`split_subtitles`);
+3. encode the chunks in parallel ffmpeg processes (video only, a few x264
+   threads each) while one more process encodes the audio track;
+4. join the chunks with the concat demuxer and mux the audio, both as
+   stream copies.
+
+Chunks use the same encoder arguments as the single-process command, so the
+output differs only at chunk starts (each begins a new GOP). Inputs that are
+too short, lack keyframe information or fail to probe take the single path.
+Progress snapshots have the :class:`burn_queue.FfmpegProgress` shape either way.
+
+The input may be an HTTP(S) URL (a presigned GET): ffmpeg reads it with
+range requests, so nothing is downloaded up front. Keyframes are not probed
+then (that would read the whole file); chunks are cut at even splits and
+ffmpeg's accurate seek decodes from the preceding keyframe. With an
+``output_sink`` the result is written as fragmented MP4 to a pipe and handed
+over block by block (e.g. to a multipart upload) instead of to a file.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import os
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from burn_queue import FfmpegResult, run_ffmpeg
+
+FASTSTART_MOVFLAGS = "+faststart"
+# Playable while written and needs no seek back: fits a pipe (no faststart pass possible there).
+FRAGMENTED_MOVFLAGS = "+frag_keyframe+empty_moov+default_base_moof"
+URL_INPUT_ARGS = ("-reconnect", "1", "-reconnect_streamed", "1", "-reconnect_delay_max", "10")
+VIDEO_ARGS = ("-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-pix_fmt", "yuv420p")
+AUDIO_ARGS = ("-c:a", "aac", "-b:a", "128k")
+DEFAULT_MIN_CHUNK_SEC = 30.0
+DEFAULT_CHUNKS_PER_WORKER = 2  # a little over-splitting evens out chunks that encode slower than others
+
+Range = Tuple[float, float]
+
+
+class MediaInfo:
+    __slots__ = ("duration_sec", "start_sec", "has_audio", "keyframes")
+
+    def __init__(
+        self, duration_sec: float, start_sec: float, has_audio: bool, keyframes: Optional[Sequence[float]]
+    ) -> None:
+        self.duration_sec = float(duration_sec)
+        self.start_sec = float(start_sec)
+        self.has_audio = bool(has_audio)
+        # Seconds from the start of the input, ascending; None when not probed (cut anywhere).
+        self.keyframes = list(keyframes) if keyframes is not None else None
+
+
+def is_url(path: str) -> bool:
+    return str(path).startswith(("http://", "https://"))
+
+
+def input_args(path: str) -> List[str]:
+    """Options placed before ``-i path``: reconnects for network inputs."""
+    return list(URL_INPUT_ARGS) if is_url(path) else []
+
+
+def parse_keyframes(packets_csv: str, start_sec: float = 0.0) -> List[float]:
+    """Keyframe times from ``ffprobe -show_entries packet=pts_time,flags -of csv=p=0`` output."""
+    out = set()
+    for line in packets_csv.splitlines():
+        pts, _sep, flags = line.strip().partition(",")
+        if "K" not in flags:
+            continue
+        try:
+            t = float(pts) - start_sec
+        except ValueError:
+            continue
+        if t >= 0:
+            out.add(round(t, 6))
+    return sorted(out)
+
+
+def probe_media(
+    ffprobe: str,
+    path: str,
+    *,
+    keyframes: bool = True,
+    timeout_sec: float = 300.0,
+    run: Callable[..., Any] = subprocess.run,
+) -> Optional[MediaInfo]:
+    """Duration, start offset, audio presence and (``keyframes=True``) video keyframes of ``path``.
+
+    ``None`` if ffprobe fails. The keyframe scan reads every packet, the rest only the header.
+    """
+    try:
+        fmt = run(
+            [ffprobe, "-v", "error", "-show_entries", "format=duration,start_time:stream=codec_type", "-of", "json", path],
+            capture_output=True, text=True, timeout=timeout_sec,
+        )
+        meta = json.loads(fmt.stdout or "{}")
+        duration = float((meta.get("format") or {}).get("duration") or 0)
+        start = float((meta.get("format") or {}).get("start_time") or 0)
+        kinds = {s.get("codec_type") for s in meta.get("streams") or []}
+        if duration <= 0 or "video" not in kinds:
+            return None
+        if not keyframes:
+            return MediaInfo(duration, start, "audio" in kinds, None)
+        packets = run(
+            [ffprobe, "-v", "error", "-select_streams", "v:0", "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path],
+            capture_output=True, text=True, timeout=timeout_sec,
+        )
+        if packets.returncode != 0:
+            return None
+    except (OSError, ValueError, subprocess.SubprocessError) as e:
+        logging.warning("burn probe failed for %s: %s", path, e)
+        return None
+    return MediaInfo(duration, start, "audio" in kinds, parse_keyframes(packets.stdout or "", start))
+
+
+def plan_chunks(
+    keyframes: Optional[Sequence[float]],
+    duration_sec: float,
+    *,
+    workers: int,
+    min_chunk_sec: float = DEFAULT_MIN_CHUNK_SEC,
+    chunks_per_worker: int = DEFAULT_CHUNKS_PER_WORKER,
+) -> List[Range]:
+    """``(start, end)`` ranges covering ``[0, duration_sec)``, cut at the keyframe nearest each even split.
+
+    A cut that would leave a piece shorter than half of ``min_chunk_sec`` is
+    skipped, so sparse keyframes yield fewer (never degenerate) chunks.
+    ``keyframes=None`` (not probed) cuts at the even splits themselves.
+    """
+    duration_sec = float(duration_sec)
+    n = min(max(1, workers) * max(1, chunks_per_worker), int(duration_sec // max(min_chunk_sec, 1e-3)))
+    if keyframes is None:
+        kf = [round(duration_sec * i / n, 3) for i in range(1, n)] if n >= 2 else []
+    else:
+        kf = [k for k in keyframes if 0 < k < duration_sec]
+    if n < 2 or not kf:
+        return [(0.0, duration_sec)]
+    floor = min_chunk_sec / 2
+    cuts: List[float] = []
+    for i in range(1, n):
+        ideal = duration_sec * i / n
+        j = bisect.bisect_left(kf, ideal)
+        pick = min(kf[max(0, j - 1):j + 1], key=lambda k: abs(k - ideal))
+        if pick - (cuts[-1] if cuts else 0.0) >= floor and duration_sec - pick >= floor:
+            cuts.append(pick)
+    bounds = [0.0, *cuts, duration_sec]
+    return list(zip(bounds, bounds[1:]))
+
+
+# --- subtitle splitting -------------------------------------------------------
+
+_SRT_TIME_RE = re.compile(r"(\d+):(\d{2}):(\d{2})[,.](\d{3})\s*-->\s*(\d+):(\d{2}):(\d{2})[,.](\d{3})")
+
+
+def _ass_sec(value: str) -> float:
+    h, m, s = value.strip().split(":")
+    return int(h) * 3600 + int(m) * 60 + float(s)
+
+
+def _ass_ts(sec: float) -> str:
+    cs = int(round(max(0.0, sec) * 100))
+    return f"{cs // 360000}:{cs // 6000 % 60:02d}:{cs // 100 % 60:02d}.{cs % 100:02d}"
+
+
+def _srt_ts(sec: float) -> str:
+    ms = int(round(max(0.0, sec) * 1000))
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d},{ms % 1000:03d}"
+
+
+def _clip(start: float, end: float, rng: Range) -> Optional[Range]:
+    lo, hi = rng
+    if end <= lo or start >= hi:
+        return None
+    return max(start, lo) - lo, min(end, hi) - lo
+
+
+def _split_ass(text: str, ranges: Sequence[Range]) -> List[str]:
+    header: List[str] = []
+    events: List[Tuple[float, float, str, str]] = []
+    for line in text.splitlines():
+        if line.startswith("Dialogue:"):
+            parts = line.split(",", 3)
+            try:
+                events.append((_ass_sec(parts[1]), _ass_sec(parts[2]), parts[0], parts[3]))
+                continue
+            except (IndexError, ValueError):
+                pass
+        header.append(line)
+    out = []
+    for rng in ranges:
+        lines = list(header)
+        for start, end, layer, rest in events:
+            clipped = _clip(start, end, rng)
+            if clipped is not None:
+                lines.append(f"{layer},{_ass_ts(clipped[0])},{_ass_ts(clipped[1])},{rest}")
+        out.append("\n".join(lines) + "\n")
+    return out
+
+
+def _split_srt(text: str, ranges: Sequence[Range]) -> List[str]:
+    cues: List[Tuple[float, float, str]] = []
+    for block in re.split(r"\r?\n\s*\r?\n", text.strip()):
+        lines = block.splitlines()
+        for i, line in enumerate(lines[:2]):
+            m = _SRT_TIME_RE.search(line)
+            if m:
+                g = [int(x) for x in m.groups()]
+                start = g[0] * 3600 + g[1] * 60 + g[2] + g[3] / 1000
+                end = g[4] * 3600 + g[5] * 60 + g[6] + g[7] / 1000
+                cues.append((start, end, "\n".join(lines[i + 1:])))
+                break
+    out = []
+    for rng in ranges:
+        rows = []
+        for start, end, body in cues:
+            clipped = _clip(start, end, rng)
+            if clipped is not None:
+                rows.append(f"{len(rows) + 1}\n{_srt_ts(clipped[0])} --> {_srt_ts(clipped[1])}\n{body}\n\n")
+        out.append("".join(rows))
+    return out
+
+
+def split_subtitles(fmt: str, text: str, ranges: Sequence[Range]) -> List[str]:
+    """One subtitle document per range: cues overlapping it, clipped and shifted to start at 0."""
+    return (_split_ass if fmt == "ass" else _split_srt)(text or "", ranges)
+
+
+def subtitle_filter(fmt: str, path: str) -> str:
+    """``-vf`` value burning ``path`` (libass ``ass`` filter for ASS, ``subtitles`` for SRT)."""
+    escaped = path.replace("\\", "/").replace(":", "\\:").replace("'", "\\'")
+    return f"{'ass' if fmt == 'ass' else 'subtitles'}='{escaped}'"
+
+
+# --- running ------------------------------------------------------------------
+
+
+class _ChunkProgress:
+    """Folds per-chunk ffmpeg snapshots into one whole-video snapshot."""
+
+    def __init__(self, ranges: Sequence[Range], on_progress: Optional[Callable[[Dict[str, Any]], None]],
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self._lengths = [end - start for start, end in ranges]
+        self._total = sum(self._lengths) or 1.0
+        self._done = [0.0] * len(ranges)
+        self._fps: Dict[int, float] = {}
+        self._speed: Dict[int, float] = {}
+        self._on_progress = on_progress
+        self._clock = clock
+        self._started = clock()
+        self._lock = threading.Lock()
+        self.latest: Dict[str, Any] = {"percent": 0.0}
+
+    def callback(self, index: int) -> Callable[[Dict[str, Any]], None]:
+        return lambda snap: self.update(index, snap)
+
+    def update(self, index: int, snap: Dict[str, Any]) -> None:
+        with self._lock:
+            length = self._lengths[index]
+            finished = bool(snap.get("done"))
+            self._done[index] = length if finished else min(length, float(snap.get("out_time_sec") or 0.0))
+            for store, key in ((self._fps, "fps"), (self._speed, "speed")):
+                if finished or not snap.get(key):
+                    store.pop(index, None)
+                else:
+                    store[index] = float(snap[key])
+            done = sum(self._done)
+            elapsed = self._clock() - self._started
+            speed = sum(self._speed.values()) or None
+            if speed:
+                eta = (self._total - done) / speed
+            else:
+                eta = (self._total - done) * elapsed / done if done > 0 else None
+            out = {
+                "out_time_sec": round(done, 3),
+                "fps": round(sum(self._fps.values()), 1) or None,
+                "speed": round(speed, 2) if speed else None,
+                "frame": None,
+                "done": False,
+                # The join/mux step follows the last chunk; hold 100 until it finishes.
+                "percent": round(min(99.9, 100.0 * done / self._total), 1),
+                "eta_sec": round(eta, 1) if eta is not None else None,
+                "chunks": len(self._lengths),
+            }
+            self.latest = out
+            if self._on_progress is not None:
+                try:
+                    self._on_progress(out)
+                except Exception as e:
+                    logging.warning("burn progress callback failed: %s", e)
+
+
+def _output_args(output_path: Optional[str], piped: bool) -> List[str]:
+    if piped:
+        return ["-movflags", FRAGMENTED_MOVFLAGS, "-f", "mp4", "pipe:1"]
+    return ["-movflags", FASTSTART_MOVFLAGS, output_path]
+
+
+def single_pass_command(ffmpeg: str, input_path: str, vf: str, output_path: Optional[str], *, piped: bool = False) -> List[str]:
+    return [
+        ffmpeg, "-y", *input_args(input_path), "-i", input_path, "-vf", vf, *VIDEO_ARGS, *AUDIO_ARGS,
+        *_output_args(output_path, piped),
+    ]
+
+
+def _fmt_sec(sec: float) -> str:
+    return f"{sec:.6f}"
+
+
+def burn_subtitles(
+    ffmpeg: str,
+    input_path: str,
+    subtitle_format: str,
+    subtitle_text: str,
+    output_path: Optional[str],
+    *,
+    workdir: str,
+    ffprobe: Optional[str] = None,
+    workers: int = 1,
+    threads_per_worker: int = 2,
+    min_chunk_sec: float = DEFAULT_MIN_CHUNK_SEC,
+    duration_sec: Optional[float] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    should_cancel: Callable[[], bool] = lambda: False,
+    stall_sec: float = 180.0,
+    probe: Optional[Callable[[str], Optional[MediaInfo]]] = None,
+    output_sink: Optional[Callable[[bytes], None]] = None,
+    popen: Callable[..., Any] = subprocess.Popen,
+) -> FfmpegResult:
+    """Burn ``subtitle_text`` into ``input_path``; parallel chunks when ``workers > 1`` and the input allows.
+
+    ``probe`` defaults to :func:`probe_media` with ``ffprobe`` (no ffprobe: single pass).
+    With ``output_sink`` the MP4 goes to the sink instead of ``output_path``.
+    The result's ``progress`` carries ``chunks`` (1 for the single pass).
+    """
+    ext = "ass" if subtitle_format == "ass" else "srt"
+    piped = output_sink is not None
+    info = None
+    if workers > 1 and (probe is not None or ffprobe):
+        info = (probe or (lambda p: probe_media(ffprobe, p, keyframes=not is_url(p))))(input_path)
+    ranges = plan_chunks(info.keyframes, info.duration_sec, workers=workers, min_chunk_sec=min_chunk_sec) if info else []
+
+    if len(ranges) < 2:
+        subs_path = os.path.join(workdir, f"subtitles.{ext}")
+        with open(subs_path, "w", encoding="utf-8") as f:
+            f.write(subtitle_text or "")
+        result = run_ffmpeg(
+            single_pass_command(ffmpeg, input_path, subtitle_filter(subtitle_format, subs_path), output_path, piped=piped),
+            duration_sec=duration_sec, on_progress=on_progress, should_cancel=should_cancel,
+            stall_sec=stall_sec, output_sink=output_sink, popen=popen,
+        )
+        result.progress = dict(result.progress or {}, chunks=1)
+        return result
+
+    progress = _ChunkProgress(ranges, on_progress)
+    stop = threading.Event()
+    failures: List[FfmpegResult] = []
+    fail_lock = threading.Lock()
+
+    def cancelled() -> bool:
+        return stop.is_set() or should_cancel()
+
+    def run_step(cmd: List[str], length: float, on_step: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+        if cancelled():
+            return
+        result = run_ffmpeg(cmd, duration_sec=length, on_progress=on_step, should_cancel=cancelled,
+                            stall_sec=stall_sec, popen=popen)
+        if not result.ok:
+            with fail_lock:
+                failures.append(result)
+            stop.set()
+
+    steps = []
+    chunk_paths = []
+    for i, (text, (start, end)) in enumerate(zip(split_subtitles(subtitle_format, subtitle_text, ranges), ranges)):
+        subs_path = os.path.join(workdir, f"chunk{i:03d}.{ext}")
+        with open(subs_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        chunk_path = os.path.join(workdir, f"chunk{i:03d}.mp4")
+        chunk_paths.append(chunk_path)
+        # Input-side -ss at a keyframe seeks without decoding the skipped span; -t ends at the next cut.
+        cmd = [
+            ffmpeg, "-y", "-ss", _fmt_sec(start), "-t", _fmt_sec(end - start), *input_args(input_path), "-i", input_path,
+            "-an", "-sn", "-dn", "-vf", subtitle_filter(subtitle_format, subs_path),
+            *VIDEO_ARGS, "-threads", str(max(1, threads_per_worker)), chunk_path,
+        ]
+        steps.append((cmd, end - start, progress.callback(i)))
+    audio_path = os.path.join(workdir, "audio.m4a")
+    if info.has_audio:
+        steps.append(([ffmpeg, "-y", *input_args(input_path), "-i", input_path, "-vn", "-sn", "-dn", *AUDIO_ARGS, audio_path],
+                      info.duration_sec, None))
+
+    logging.info("burn: %d chunks x %d workers for %.0fs of video", len(ranges), workers, info.duration_sec)
+    # Chunks go longest-first into the pool so a long tail chunk does not start last.
+    order = sorted(range(len(steps)), key=lambda k: -steps[k][1])
+    with ThreadPoolExecutor(max_workers=workers + (1 if info.has_audio else 0), thread_name_prefix="burn-chunk") as pool:
+        for future in [pool.submit(run_step, *steps[k]) for k in order]:
+            future.result()
+
+    if should_cancel():
+        return FfmpegResult(None, "cancelled", "", progress.latest)
+    if failures:
+        return failures[0]
+
+    list_path = os.path.join(workdir, "chunks.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in chunk_paths:
+            f.write("file '" + path.replace("'", "'\\''") + "'\n")
+    cmd = [ffmpeg, "-y", "-f", "concat", "-safe", "0", "-i", list_path]
+    if info.has_audio:
+        cmd += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0"]
+    cmd += ["-c", "copy", *_output_args(output_path, piped)]
+    result = run_ffmpeg(cmd, duration_sec=info.duration_sec, should_cancel=should_cancel,
+                        stall_sec=stall_sec, output_sink=output_sink, popen=popen)
+    if result.ok:
+        final = dict(progress.latest, percent=100.0, eta_sec=0.0, done=True)
+        if on_progress is not None:
+            on_progress(final)
+        result.progress = final
+    return result
@@ -0,0 +1,583 @@
+"""Durable subtitle-burn tasks: task records, a per-host slot limit and ffmpeg progress.
+
+``burn_tasks`` used to be a process-local dict and the local burn ran
+``ffmpeg`` under a flat ``subprocess.run(timeout=600)``: a restart lost every
+task, long videos timed out and status polls had nothing to report.
+
+- :class:`BurnTaskStore` keeps task records in a :mod:`shared_state` backend
+  (SQLite file per host or Redis), so status survives restarts and is
+  visible to every worker. Records carry a lease that the running worker
+  renews; a task whose lease ran out was orphaned and is resumed by
+  :func:`watch_orphans`. Leases are taken with an atomic backend write, so
+  only one worker resumes an orphan.
+  Cancellation is a separate key, so it is never lost to a concurrent
+  progress write.
+- :class:`HostSlots` caps concurrent burns per host with ``flock`` on slot
+  files (every gunicorn worker shares them; a crashed holder releases its
+  slot). Without ``fcntl`` the cap is per process.
+- Identical burns (same input object, captions and style) share one task:
+  :func:`burn_dedupe_key` hashes the normalized request, and the store maps
+  that key to the task that renders it, in flight or finished.
+- :class:`FfmpegProgress` parses ``-progress pipe:1`` blocks into
+  percent / ETA / fps / speed, and :func:`run_ffmpeg` runs the command with
+  a watchdog for cancellation, a duration-scaled timeout
+  (:func:`burn_timeout_sec`) and a stall timeout.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import subprocess
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: per-process limit only
+    fcntl = None
+
+QUEUED = "queued"
+PROCESSING = "processing"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL_STATUSES = frozenset({COMPLETED, FAILED, CANCELLED})
+
+DEFAULT_TTL_SEC = 7 * 24 * 3600
+DEFAULT_LEASE_SEC = 90.0
+
+
+class BurnTaskStore:
+    """Burn task records (JSON dicts) in one namespace of a shared_state backend.
+
+    Terminal records are final: later updates (a late RunPod callback, a
+    runner finishing after a cancel) leave them unchanged.
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        *,
+        namespace: str = "burn_tasks",
+        ttl_sec: float = DEFAULT_TTL_SEC,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._backend = backend
+        self._ns = namespace
+        self._cancel_ns = namespace + "_cancel"
+        self._dedupe_ns = namespace + "_dedupe"
+        self._ttl = float(ttl_sec)
+        self._clock = clock
+
+    @property
+    def durable(self) -> bool:
+        return bool(getattr(self._backend, "shared", False))
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        value = self._backend.get(self._ns, str(task_id))
+        return value if isinstance(value, dict) else None
+
+    def create(self, task_id: str, status: str = QUEUED, **fields: Any) -> Dict[str, Any]:
+        now = self._clock()
+        record = {**fields, "task_id": str(task_id), "status": status, "created_at": now, "updated_at": now}
+        self._backend.set(self._ns, str(task_id), record, self._ttl)
+        return record
+
+    def update(self, task_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        """Merge ``fields`` into the record; returns the stored record (None if it does not exist).
+
+        The terminal-status check runs inside the backend's atomic
+        read-modify-write, so a progress write from another worker cannot
+        overwrite a cancel or failure that landed first.
+        """
+
+        def merge(record: Any) -> Optional[Dict[str, Any]]:
+            if not isinstance(record, dict) or record.get("status") in TERMINAL_STATUSES:
+                return None
+            return {**record, **fields, "updated_at": self._clock()}
+
+        record = self._backend.mutate(self._ns, str(task_id), merge, self._ttl)
+        return record if isinstance(record, dict) else None
+
+    def request_cancel(self, task_id: str) -> None:
+        self._backend.set(self._cancel_ns, str(task_id), True, self._ttl)
+
+    def cancel_requested(self, task_id: str) -> bool:
+        return bool(self._backend.get(self._cancel_ns, str(task_id)))
+
+    def discard(self, task_id: str) -> None:
+        self._backend.delete(self._ns, str(task_id))
+
+    def is_stale(self, record: Dict[str, Any]) -> bool:
+        """True for a non-terminal record nobody is advancing.
+
+        Local tasks renew ``lease_until`` while they run; RunPod tasks only move
+        on callbacks, so one silent for longer than its burn timeout is presumed
+        lost (the callback never came).
+        """
+        if record.get("status") in TERMINAL_STATUSES:
+            return False
+        now = self._clock()
+        if record.get("mode") == "runpod":
+            timeout = float(record.get("timeout_sec") or burn_timeout_sec(record.get("duration_sec")))
+            return float(record.get("updated_at") or 0) + timeout < now
+        lease_until = record.get("lease_until")
+        return lease_until is not None and float(lease_until) < now
+
+    def find_duplicate(self, dedupe_key: str) -> Optional[Dict[str, Any]]:
+        """The live or completed task registered for ``dedupe_key``.
+
+        Failed, cancelled and stale (:meth:`is_stale`) tasks do not count, so a
+        retry starts a new burn instead of following a dead one. A stale task is
+        left as is: a late callback or the orphan watcher may still finish it.
+        """
+        task_id = self._backend.get(self._dedupe_ns, dedupe_key)
+        record = self.get(task_id) if task_id else None
+        if record is None or record.get("status") in (FAILED, CANCELLED) or self.is_stale(record):
+            return None
+        return record
+
+    def claim_duplicate(self, dedupe_key: str, task_id: str) -> str:
+        """Register ``task_id`` (already created) for ``dedupe_key`` unless a live queued or running task holds it.
+
+        Returns the owner. A completed task is replaced: the caller only gets
+        here after rejecting its output (see :meth:`find_duplicate`).
+
+        The key is swapped with a compare-and-set against the owner that was
+        judged replaceable, so of several concurrent identical requests exactly
+        one registers and the rest follow it. The caller discards its own
+        record when it is not the owner.
+        """
+        task_id = str(task_id)
+        while True:
+            current = self._backend.get(self._dedupe_ns, dedupe_key)
+            if current is not None and str(current) != task_id:
+                existing = self.find_duplicate(dedupe_key)
+                if existing is not None and existing["status"] != COMPLETED and existing["task_id"] == str(current):
+                    return existing["task_id"]
+            swapped = False
+
+            def swap(value: Any) -> Optional[str]:
+                nonlocal swapped
+                swapped = value == current
+                return task_id if swapped else None
+
+            stored = self._backend.mutate(self._dedupe_ns, dedupe_key, swap, self._ttl)
+            if swapped or str(stored) == task_id:
+                return task_id
+            # Another request registered in between: judge its task instead.
+
+    def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        out = []
+        for task_id in self._backend.keys(self._ns):
+            record = self.get(task_id)
+            if record is not None:
+                out.append((task_id, record))
+        return out
+
+    def orphaned(self, mode: str = "local") -> List[Tuple[str, Dict[str, Any]]]:
+        """Non-terminal ``mode`` tasks whose lease expired (their worker is gone)."""
+        now = self._clock()
+        return [
+            (task_id, record)
+            for task_id, record in self.items()
+            if record.get("mode") == mode
+            and record.get("status") not in TERMINAL_STATUSES
+            and float(record.get("lease_until") or 0) < now
+        ]
+
+    def next_lease_expiry(self, mode: str = "local") -> Optional[float]:
+        """Earliest still-live ``lease_until`` of a non-terminal ``mode`` task: when the next orphan can appear."""
+        now = self._clock()
+        leases = [
+            float(record.get("lease_until") or 0)
+            for _task_id, record in self.items()
+            if record.get("mode") == mode and record.get("status") not in TERMINAL_STATUSES
+        ]
+        live = [lease for lease in leases if lease >= now]
+        return min(live) if live else None
+
+    def claim(self, task_id: str, owner: str, lease_sec: float = DEFAULT_LEASE_SEC) -> bool:
+        """Take the lease for ``owner`` if it expired (or is already ``owner``'s).
+
+        Check and write are one atomic backend operation (``mutate``), so two
+        workers racing on an orphan cannot both win.
+        """
+        won = False
+
+        def take(record: Any) -> Optional[Dict[str, Any]]:
+            nonlocal won
+            now = self._clock()
+            won = (
+                isinstance(record, dict)
+                and record.get("status") not in TERMINAL_STATUSES
+                and (float(record.get("lease_until") or 0) < now or record.get("lease_owner") == owner)
+            )
+            if not won:
+                return None
+            return {**record, "lease_owner": owner, "lease_until": now + lease_sec, "updated_at": now}
+
+        self._backend.mutate(self._ns, str(task_id), take, self._ttl)
+        return won
+
+    def stats(self) -> Dict[str, Any]:
+        return {"durable": self.durable, "tasks": len(self._backend.keys(self._ns))}
+
+
+def watch_orphans(
+    store: BurnTaskStore,
+    resume: Callable[[str, Dict[str, Any]], Any],
+    *,
+    mode: str = "local",
+    interval_sec: float = 60.0,
+    stop: Optional[threading.Event] = None,
+    sleep: Optional[Callable[[float], Any]] = None,
+) -> None:
+    """Call ``resume(task_id, record)`` for every ``mode`` orphan, now and for as long as the process runs.
+
+    A deploy or crash restart comes back well inside the previous worker's
+    leases, so a single scan at start-up finds nothing. After each scan this
+    sleeps until just past the earliest live lease, or ``interval_sec`` if that
+    is sooner (tasks created later, leases renewed meanwhile).
+    """
+    while stop is None or not stop.is_set():
+        for task_id, record in store.orphaned(mode):
+            try:
+                resume(task_id, record)
+            except Exception:
+                logging.exception("Resuming burn task %s failed", task_id)
+        if stop is not None and stop.is_set():
+            return
+        delay = float(interval_sec)
+        expiry = store.next_lease_expiry(mode)
+        if expiry is not None:
+            delay = min(delay, max(1.0, expiry - store._clock() + 1.0))
+        if sleep is not None:
+            sleep(delay)
+        elif stop is not None:
+            stop.wait(delay)
+        else:
+            time.sleep(delay)
+
+
+_VOLATILE_SEGMENT_KEYS = frozenset({"id", "uuid", "key", "index", "selected", "edited", "editing", "confidence"})
+
+
+def normalize_burn_segments(value: Any) -> Any:
+    """Segments reduced to what the render depends on: numbers to ms floats, text stripped, UI-only and empty fields dropped."""
+    if isinstance(value, dict):
+        out = {}
+        for k, v in value.items():
+            if k in _VOLATILE_SEGMENT_KEYS or str(k).startswith("_"):
+                continue
+            v = normalize_burn_segments(v)
+            if v not in (None, "", [], {}):
+                out[str(k)] = v
+        return out
+    if isinstance(value, (list, tuple)):
+        return [normalize_burn_segments(v) for v in value]
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return round(float(value), 3)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def burn_dedupe_key(
+    owner: Optional[str],
+    source: str,
+    segments: Any,
+    *,
+    subtitle_style: str,
+    subtitle_color: str,
+    is_portrait: bool,
+) -> str:
+    """``burn-<hash>`` of the input identity (object ETag or content digest), normalized segments and style.
+
+    ``owner`` scopes the key (outputs live under the user's prefix, so users never share them).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    head = {"owner": owner or "", "source": source, "style": subtitle_style, "color": subtitle_color,
+            "portrait": bool(is_portrait)}
+    h.update(json.dumps(head, sort_keys=True).encode("utf-8"))
+    h.update(b"\0")
+    h.update(json.dumps(normalize_burn_segments(segments), sort_keys=True, ensure_ascii=False,
+                        separators=(",", ":")).encode("utf-8"))
+    return f"burn-{h.hexdigest()}"
+
+
+def new_owner_id() -> str:
+    return f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+class HostSlots:
+    """At most ``limit`` concurrent holders per host, shared by every process using ``directory``."""
+
+    def __init__(self, directory: str, limit: int, *, name: str = "burn") -> None:
+        self.limit = max(1, int(limit))
+        self._paths = [os.path.join(directory, f"qs_{name}_slot_{i}.lock") for i in range(self.limit)]
+        self._local = threading.BoundedSemaphore(self.limit)
+        self._held = 0
+        self._lock = threading.Lock()
+        if fcntl is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _try_slot(self) -> Optional[Any]:
+        if fcntl is None:
+            return self._local if self._local.acquire(blocking=False) else None
+        for path in self._paths:
+            fh = open(path, "a+")
+            try:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fh
+            except OSError:
+                fh.close()
+        return None
+
+    @staticmethod
+    def _release(slot: Any) -> None:
+        if isinstance(slot, threading.BoundedSemaphore):
+            slot.release()
+            return
+        try:
+            fcntl.flock(slot.fileno(), fcntl.LOCK_UN)
+        finally:
+            slot.close()
+
+    @contextlib.contextmanager
+    def acquire(
+        self,
+        should_stop: Callable[[], bool] = lambda: False,
+        poll_sec: float = 1.0,
+        on_wait: Optional[Callable[[], None]] = None,
+    ) -> Iterator[bool]:
+        """Yield True once a slot is held, or False if ``should_stop`` fired while waiting."""
+        slot = self._try_slot()
+        while slot is None:
+            if should_stop():
+                yield False
+                return
+            if on_wait is not None:
+                on_wait()
+            time.sleep(poll_sec)
+            slot = self._try_slot()
+        with self._lock:
+            self._held += 1
+        try:
+            yield True
+        finally:
+            with self._lock:
+                self._held -= 1
+            self._release(slot)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"limit": self.limit, "held_here": self._held, "host_wide": fcntl is not None}
+
+
+def burn_timeout_sec(
+    duration_sec: Optional[float],
+    *,
+    base_sec: float = 600.0,
+    per_media_sec: float = 3.0,
+    max_sec: float = 6 * 3600.0,
+) -> float:
+    """Wall-clock budget for one burn: ``base_sec`` floor, else 2 min + ``per_media_sec`` per media second."""
+    if not duration_sec or duration_sec <= 0:
+        return float(base_sec)
+    return float(min(max_sec, max(base_sec, 120.0 + float(duration_sec) * per_media_sec)))
+
+
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+
+
+def _clock_to_sec(value: str) -> Optional[float]:
+    try:
+        h, m, s = value.strip().split(":")
+        return int(h) * 3600 + int(m) * 60 + float(s)
+    except (ValueError, AttributeError):
+        return None
+
+
+def _num(value: Optional[str]) -> Optional[float]:
+    try:
+        out = float(str(value).strip().rstrip("x"))
+    except (TypeError, ValueError):
+        return None
+    return out if out == out and out >= 0 else None
+
+
+class FfmpegProgress:
+    """Folds ``-progress`` ``key=value`` lines into snapshots (one per ``progress=`` line)."""
+
+    def __init__(self, duration_sec: Optional[float] = None, clock: Callable[[], float] = time.monotonic) -> None:
+        self.duration_sec = float(duration_sec) if duration_sec and duration_sec > 0 else None
+        self._clock = clock
+        self._started = clock()
+        self.last_update = self._started
+        self._block: Dict[str, str] = {}
+        self.latest: Dict[str, Any] = {"percent": 0.0}
+
+    def note_stderr(self, line: str) -> None:
+        """Picks the input duration from ffmpeg's banner when the caller did not know it."""
+        if self.duration_sec is None:
+            m = _DURATION_RE.search(line)
+            if m:
+                self.duration_sec = int(m.group(1)) * 3600 + int(m.group(2)) * 60 + float(m.group(3)) or None
+
+    def feed(self, line: str) -> Optional[Dict[str, Any]]:
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            return None
+        if key != "progress":
+            self._block[key] = value.strip()
+            return None
+        block, self._block = self._block, {}
+        self.last_update = self._clock()
+        out_us = _num(block.get("out_time_us")) or _num(block.get("out_time_ms"))
+        out_sec = out_us / 1e6 if out_us is not None else _clock_to_sec(block.get("out_time", ""))
+        snap: Dict[str, Any] = {
+            "out_time_sec": round(out_sec, 3) if out_sec is not None else None,
+            "fps": _num(block.get("fps")),
+            "speed": _num(block.get("speed")),
+            "frame": int(_num(block.get("frame")) or 0) or None,
+            "done": value.strip() == "end",
+        }
+        percent, eta = None, None
+        if self.duration_sec and out_sec is not None:
+            percent = max(0.0, min(100.0, 100.0 * out_sec / self.duration_sec))
+            remaining = max(0.0, self.duration_sec - out_sec)
+            if snap["speed"]:
+                eta = remaining / snap["speed"]
+            elif out_sec > 0:
+                eta = remaining * (self.last_update - self._started) / out_sec
+        if snap["done"]:
+            percent, eta = 100.0, 0.0
+        snap["percent"] = round(percent, 1) if percent is not None else self.latest.get("percent")
+        snap["eta_sec"] = round(eta, 1) if eta is not None else None
+        self.latest = snap
+        return snap
+
+
+class FfmpegResult:
+    __slots__ = ("returncode", "reason", "stderr_tail", "progress")
+
+    def __init__(self, returncode: Optional[int], reason: str, stderr_tail: str, progress: Dict[str, Any]) -> None:
+        self.returncode = returncode
+        self.reason = reason  # ok | failed | cancelled | timeout | stalled
+        self.stderr_tail = stderr_tail
+        self.progress = progress
+
+    @property
+    def ok(self) -> bool:
+        return self.reason == "ok"
+
+
+_PROGRESS_LINE_RE = re.compile(r"^[a-z0-9_]+=\S*$")
+OUTPUT_BLOCK_BYTES = 256 * 1024
+
+
+def run_ffmpeg(
+    cmd: List[str],
+    *,
+    duration_sec: Optional[float] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    should_cancel: Callable[[], bool] = lambda: False,
+    timeout_sec: Optional[float] = None,
+    stall_sec: float = 180.0,
+    poll_sec: float = 1.0,
+    output_sink: Optional[Callable[[bytes], None]] = None,
+    popen: Callable[..., Any] = subprocess.Popen,
+) -> FfmpegResult:
+    """Run ``cmd`` (ffmpeg argv) with ``-progress pipe:1`` and a watchdog.
+
+    The watchdog kills ffmpeg on cancel, after ``timeout_sec`` (default:
+    :func:`burn_timeout_sec` of the known or probed duration) or when no
+    progress block arrived for ``stall_sec``.
+
+    With ``output_sink``, ``cmd`` writes its output to ``pipe:1``: stdout is
+    handed to the sink in blocks (a slow sink holds ffmpeg back through the
+    pipe) and the progress report moves to stderr. A sink error stops ffmpeg.
+    """
+    progress = FfmpegProgress(duration_sec)
+    streaming = output_sink is not None
+    argv = [cmd[0], "-nostats", "-progress", "pipe:2" if streaming else "pipe:1", *cmd[1:]]
+    if streaming:
+        proc = popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    else:
+        proc = popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, errors="replace", bufsize=1)
+    tail: deque = deque(maxlen=60)
+    stopped: Dict[str, str] = {}
+    started = time.monotonic()
+
+    def _report(line: str) -> None:
+        snap = progress.feed(line)
+        if snap is not None and on_progress is not None:
+            try:
+                on_progress(snap)
+            except Exception as e:
+                logging.warning("ffmpeg progress callback failed: %s", e)
+
+    def _drain_stderr() -> None:
+        for line in proc.stderr:
+            if streaming:
+                line = line.decode("utf-8", "replace")
+                if _PROGRESS_LINE_RE.match(line.strip()):
+                    _report(line)
+                    continue
+            progress.note_stderr(line)
+            tail.append(line)
+
+    def _watchdog() -> None:
+        while proc.poll() is None:
+            now = time.monotonic()
+            limit = timeout_sec if timeout_sec is not None else burn_timeout_sec(progress.duration_sec)
+            reason = None
+            try:
+                if should_cancel():
+                    reason = "cancelled"
+            except Exception as e:
+                logging.debug("ffmpeg cancel check failed: %s", e)
+            if reason is None and now - started > limit:
+                reason = "timeout"
+            elif reason is None and now - progress.last_update > stall_sec:
+                reason = "stalled"
+            if reason:
+                stopped["reason"] = reason
+                proc.kill()
+                return
+            time.sleep(poll_sec)
+
+    err_thread = threading.Thread(target=_drain_stderr, name="ffmpeg-stderr", daemon=True)
+    dog = threading.Thread(target=_watchdog, name="ffmpeg-watchdog", daemon=True)
+    err_thread.start()
+    dog.start()
+    if streaming:
+        while True:
+            block = proc.stdout.read(OUTPUT_BLOCK_BYTES)
+            if not block:
+                break
+            try:
+                output_sink(block)
+            except Exception as e:
+                logging.warning("ffmpeg output sink failed: %s", e)
+                tail.append(f"output failed: {e}\n")
+                stopped.setdefault("reason", "failed")
+                proc.kill()
+                proc.stdout.read()
+                break
+    else:
+        for line in proc.stdout:
+            _report(line)
+    returncode = proc.wait()
+    err_thread.join(timeout=5)
+    reason = stopped.get("reason") or ("ok" if returncode == 0 else "failed")
+    return FfmpegResult(returncode, reason, "".join(tail), progress.latest)
@@ -425,25 +425,13 @@ def _cardcom_parse_supabase_user(user_data: dict) -> Optional[dict]:
 
 
 def _cardcom_authenticated_user(req) -> Optional[dict]:
-    """Single Supabase auth round-trip: user id + invoice contact fields."""
+    """User id + invoice contact fields (local JWT verification, /auth/v1/user fallback)."""
     token = _cardcom_bearer_token(req)
     if not token:
         return None
     try:
-        supabase_url, service_key, _headers = _supabase_deps()
-    except RuntimeError:
-        return None
-    if not supabase_url or not service_key:
-        return None
-    try:
-        r_user = requests.get(
-            f"{supabase_url.rstrip('/')}/auth/v1/user",
-            headers={'Authorization': f'Bearer {token}', 'apikey': service_key},
-            timeout=8,
-        )
-        if r_user.status_code != 200:
-            return None
-        return _cardcom_parse_supabase_user(r_user.json() if r_user.text else {})
+        import siteapp as sa
+        return _cardcom_parse_supabase_user(sa._supabase_auth_user_for_token(token) or {})
     except Exception as e:
         logger.warning('cardcom auth lookup failed: %s', e)
         return None
@@ -0,0 +1,325 @@
+"""Single-pass streaming RTL / right-alignment patcher for DOCX packages.
+
+Injects per paragraph (``w:pPr``) ``<w:bidi w:val="1"/><w:jc w:val="right"/>``
+(after ``w:pStyle``, which must stay first) and per run (``w:rPr``)
+``<w:rtl w:val="1"/>`` in the document body, footnotes, endnotes, comments,
+headers and footers; in ``word/styles.xml`` paragraph styles and
+``w:docDefaults`` get the same defaults so new paragraphs are RTL too.
+
+Parts are decoded incrementally and scanned once for the handful of tags
+that matter; everything between them is written straight to the output
+entry and only the contents of a ``w:pPr`` / ``w:rPr`` / paragraph
+``w:style`` / ``w:docDefaults`` element are buffered. XML is never
+re-serialized, so namespace prefixes and everything outside those elements
+stay byte-for-byte. Untouched parts (media, rels, settings, ...) are copied
+as their compressed bytes without recompressing.
+
+The rules are those of the earlier whole-part regex passes, applied per
+buffered element: an element opened by the literal ``<w:pPr>`` / ``<w:rPr>``
+runs to the first matching close tag, ``<w:rtl`` anywhere in a run's
+properties means "already RTL", and a paragraph style without a literal
+``<w:pPr>`` gets one appended.
+"""
+
+from __future__ import annotations
+
+import codecs
+import copy
+import re
+import shutil
+import struct
+import zipfile
+from io import BytesIO
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, Union
+
+BIDI = '<w:bidi w:val="1"/>'
+JC = '<w:jc w:val="right"/>'
+RTL_RUN = '<w:rtl w:val="1"/>'
+PPR_RTL = '<w:pPr>' + BIDI + JC + '</w:pPr>'
+RPR_RTL = '<w:rPr>' + RTL_RUN + '</w:rPr>'
+
+BODY_PARTS = frozenset({'word/document.xml', 'word/footnotes.xml', 'word/endnotes.xml', 'word/comments.xml'})
+STYLES_PART = 'word/styles.xml'
+
+_CHUNK = 64 * 1024
+# One shared literal prefix lets the regex engine skip straight to candidate tags.
+_BODY_RE = re.compile(
+    r'<w:(?:pPr>(?P<ppr>.*?)</w:pPr>|rPr>(?P<rpr>.*?)</w:rPr>|(?P<empty>[pr]Pr/>)|(?P<open>[pr]Pr>))', re.DOTALL
+)
+_STYLES_MARK_RE = re.compile(r'</?w:docDefaults>|<w:style\b[^>]*>|</w:style>')
+_PARAGRAPH_STYLE_RE = re.compile(r'<w:style\b[^>]*w:type="paragraph"[^>]*>')
+_PPR_RE = re.compile(r'<w:pPr>(.*?)</w:pPr>', re.DOTALL)
+_RPR_RE = re.compile(r'<w:rPr>(.*?)</w:rPr>', re.DOTALL)
+_PPR_DEFAULT_RE = re.compile(r'(<w:pPrDefault[^>]*>.*?)<w:pPr>(.*?)</w:pPr>', re.DOTALL)
+_RPR_DEFAULT_RE = re.compile(r'(<w:rPrDefault[^>]*>.*?)<w:rPr>(.*?)</w:rPr>', re.DOTALL)
+_PSTYLE_RE = re.compile(r'(\s*<w:pStyle\b[^/]*/>\s*)')
+_STRIP_RES = tuple(
+    (re.compile(r'<' + tag + r'(?:\s[^/]*)*/>'), re.compile(r'<' + tag + r'(?:\s[^>]*)?>.*?</' + tag + r'>', re.DOTALL))
+    for tag in ('w:bidi', 'w:jc')
+)
+
+
+def _whole_tags(chunks: Iterable[str]) -> Iterator[str]:
+    """Re-cut text chunks so that no markup ``<...>`` is split between two of them."""
+    carry = ''
+    for chunk in chunks:
+        text = carry + chunk
+        cut = text.rfind('<')
+        if cut >= 0 and text.find('>', cut) < 0:
+            text, carry = text[:cut], text[cut:]
+        else:
+            carry = ''
+        if text:
+            yield text
+    if carry:
+        yield carry
+
+
+def _patch_ppr_inner(inner: str) -> str:
+    """bidi + jc first in the paragraph properties; w:pStyle must stay first or Word drops the paragraph."""
+    for self_closing, element in _STRIP_RES:
+        inner = element.sub('', self_closing.sub('', inner))
+    m = _PSTYLE_RE.match(inner)
+    if m:
+        return m.group(0) + BIDI + JC + inner[m.end():]
+    return BIDI + JC + inner
+
+
+def _patch_rpr_inner(inner: str) -> str:
+    if '<w:rtl' not in inner:
+        return inner + RTL_RUN
+    return inner
+
+
+def _patch_ppr(m: 're.Match[str]') -> str:
+    return '<w:pPr>' + _patch_ppr_inner(m.group(1)) + '</w:pPr>'
+
+
+def _patch_rpr(m: 're.Match[str]') -> str:
+    return '<w:rPr>' + _patch_rpr_inner(m.group(1)) + '</w:rPr>'
+
+
+class _BodyPatcher:
+    """Every w:pPr / w:rPr in a body-like part (document, notes, comments, headers, footers).
+
+    Complete elements in a chunk are matched and patched by one regex scan;
+    an element whose close tag has not arrived yet is carried into the next
+    chunk, so at most one open element is ever buffered.
+    """
+
+    def __init__(self, write: Callable[[str], None]) -> None:
+        self._write = write
+        self._carry = ''
+
+    def feed(self, text: str) -> None:
+        if self._carry:
+            text, self._carry = self._carry + text, ''
+        self._write(self._scan(text, final=False))
+
+    def _scan(self, text: str, final: bool) -> str:
+        out: List[str] = []
+        pos = 0
+        for m in _BODY_RE.finditer(text):
+            out.append(text[pos:m.start()])
+            pos = m.end()
+            ppr, rpr = m.group('ppr'), m.group('rpr')
+            if ppr is not None:
+                # A paragraph-mark w:rPr inside is patched after bidi / jc are stripped.
+                inner = _patch_ppr_inner(ppr).replace('<w:pPr/>', PPR_RTL)
+                out.append('<w:pPr>' + _RPR_RE.sub(_patch_rpr, inner).replace('<w:rPr/>', RPR_RTL) + '</w:pPr>')
+            elif rpr is not None:
+                inner = _patch_rpr_inner(rpr.replace('<w:pPr/>', PPR_RTL))
+                out.append('<w:rPr>' + inner.replace('<w:rPr/>', RPR_RTL) + '</w:rPr>')
+            elif m.lastgroup == 'empty':
+                out.append(PPR_RTL if m.group(0) == '<w:pPr/>' else RPR_RTL)
+            elif final:
+                out.append(m.group(0))  # unterminated at the end of the part: left as it was
+            else:
+                self._carry = text[m.start():]
+                return ''.join(out)
+        out.append(text[pos:])
+        return ''.join(out)
+
+    def close(self) -> None:
+        if self._carry:
+            text, self._carry = self._carry, ''
+            self._write(self._scan(text, final=True))
+
+
+class _StylesPatcher:
+    """Paragraph styles and docDefaults in word/styles.xml."""
+
+    def __init__(self, write: Callable[[str], None]) -> None:
+        self._write = write
+        self._buf: Optional[List[str]] = None
+        self._close = ''
+
+    def feed(self, text: str) -> None:
+        pos = 0
+        for m in _STYLES_MARK_RE.finditer(text):
+            tok = m.group(0)
+            if self._buf is not None:
+                self._buf.append(text[pos:m.end()])
+                if tok == self._close:
+                    block = ''.join(self._buf)
+                    self._buf = None
+                    self._write(self._fix_style(block) if tok == '</w:style>' else self._fix_defaults(block))
+            elif tok == '<w:docDefaults>' or _PARAGRAPH_STYLE_RE.fullmatch(tok):
+                self._write(text[pos:m.start()])
+                self._buf = [tok]
+                self._close = '</w:docDefaults>' if tok == '<w:docDefaults>' else '</w:style>'
+            else:
+                self._write(text[pos:m.end()])
+            pos = m.end()
+        if pos < len(text):
+            if self._buf is not None:
+                self._buf.append(text[pos:])
+            else:
+                self._write(text[pos:])
+
+    @staticmethod
+    def _fix_style(block: str) -> str:
+        if '<w:pPr>' in block:
+            return _PPR_RE.sub(_patch_ppr, block).replace('<w:pPr/>', PPR_RTL)
+        return block.replace('</w:style>', PPR_RTL + '</w:style>')
+
+    @staticmethod
+    def _fix_defaults(block: str) -> str:
+        if '<w:pPrDefault' in block:
+            if '<w:pPr>' in block:
+                block = _PPR_DEFAULT_RE.sub(lambda m: m.group(1) + '<w:pPr>' + _patch_ppr_inner(m.group(2)) + '</w:pPr>', block)
+            else:
+                block = block.replace('</w:pPrDefault>', PPR_RTL + '</w:pPrDefault>')
+        else:
+            block = block.replace('</w:docDefaults>', '<w:pPrDefault>' + PPR_RTL + '</w:pPrDefault></w:docDefaults>')
+        if '<w:rPrDefault' in block:
+            if '<w:rPr>' in block:
+                block = _RPR_DEFAULT_RE.sub(lambda m: m.group(1) + '<w:rPr>' + _patch_rpr_inner(m.group(2)) + '</w:rPr>', block)
+            else:
+                block = block.replace('</w:rPrDefault>', RPR_RTL + '</w:rPrDefault>')
+        else:
+            block = block.replace('</w:docDefaults>', '<w:rPrDefault>' + RPR_RTL + '</w:rPrDefault></w:docDefaults>')
+        return block
+
+    def close(self) -> None:
+        if self._buf is not None:
+            self._write(''.join(self._buf))
+            self._buf = None
+
+
+def _patcher_for(name: str):
+    lower = name.lower()
+    if (
+        lower in BODY_PARTS
+        or (lower.startswith('word/header') and lower.endswith('.xml'))
+        or (lower.startswith('word/footer') and lower.endswith('.xml'))
+    ):
+        return _BodyPatcher
+    if lower == STYLES_PART:
+        return _StylesPatcher
+    return None
+
+
+def patch_xml_stream(src: BinaryIO, dst: BinaryIO, patcher_cls) -> None:
+    """Stream one XML part through a patcher (UTF-8, undecodable bytes replaced like before)."""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    pending: List[str] = []
+    size = 0
+
+    def write(text: str) -> None:
+        nonlocal size
+        pending.append(text)
+        size += len(text)
+        if size >= _CHUNK:
+            flush()
+
+    def flush() -> None:
+        nonlocal size
+        if pending:
+            dst.write(''.join(pending).encode('utf-8'))
+            pending.clear()
+            size = 0
+
+    def chunks() -> Iterator[str]:
+        while True:
+            raw = src.read(_CHUNK)
+            if not raw:
+                tail = decoder.decode(b'', final=True)
+                if tail:
+                    yield tail
+                return
+            yield decoder.decode(raw)
+
+    patcher = patcher_cls(write)
+    for text in _whole_tags(chunks()):
+        patcher.feed(text)
+    patcher.close()
+    flush()
+
+
+def patch_xml_text(xml: str, patcher_cls) -> str:
+    out: List[str] = []
+    patcher = patcher_cls(out.append)
+    patcher.feed(xml)
+    patcher.close()
+    return ''.join(out)
+
+
+def _can_copy_raw(zout: zipfile.ZipFile) -> bool:
+    return all(hasattr(zout, attr) for attr in ('fp', 'start_dir', 'filelist', 'NameToInfo', '_lock', '_writecheck'))
+
+
+def _copy_entry_raw(zin: zipfile.ZipFile, zout: zipfile.ZipFile, info: zipfile.ZipInfo) -> None:
+    """Append ``info``'s compressed bytes unchanged (what ZipFile.open('w') does minus the compressor)."""
+    zin.fp.seek(info.header_offset)
+    header = zin.fp.read(zipfile.sizeFileHeader)
+    if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f'bad local header for {info.filename}')
+    name_len, extra_len = struct.unpack('<HH', header[26:30])
+    zin.fp.seek(name_len + extra_len, 1)
+
+    out = copy.copy(info)
+    out.flag_bits &= ~0x08  # sizes and CRC go into the local header, no data descriptor
+    strip_extra = getattr(zipfile, '_strip_extra', None)
+    if strip_extra is not None and out.extra:
+        out.extra = strip_extra(out.extra, (1,))  # zip64 sizes are re-derived on write
+    with zout._lock:
+        if getattr(zout, '_writing', False):
+            raise ValueError("Can't copy into a ZIP archive while a write handle is open")
+        zout.fp.seek(zout.start_dir)
+        out.header_offset = zout.fp.tell()
+        zout._writecheck(out)
+        zout._didModify = True
+        zout.fp.write(out.FileHeader())
+        remaining = info.compress_size
+        while remaining > 0:
+            block = zin.fp.read(min(_CHUNK * 16, remaining))
+            if not block:
+                raise zipfile.BadZipFile(f'truncated entry {info.filename}')
+            zout.fp.write(block)
+            remaining -= len(block)
+        zout.filelist.append(out)
+        zout.NameToInfo[out.filename] = out
+        zout.start_dir = zout.fp.tell()
+
+
+def force_docx_rtl(src: Union[str, BinaryIO], dst: BinaryIO) -> None:
+    """Write an RTL/right-aligned copy of the DOCX ``src`` (path or seekable file) to ``dst``."""
+    with zipfile.ZipFile(src, 'r') as zin, zipfile.ZipFile(dst, 'w', compression=zipfile.ZIP_DEFLATED) as zout:
+        raw_ok = _can_copy_raw(zout)
+        for item in zin.infolist():
+            patcher_cls = _patcher_for(item.filename)
+            if patcher_cls is not None:
+                with zin.open(item) as part_in, zout.open(copy.copy(item), 'w') as part_out:
+                    patch_xml_stream(part_in, part_out, patcher_cls)
+            elif raw_ok and not item.flag_bits & 0x01:
+                _copy_entry_raw(zin, zout, item)
+            else:
+                with zin.open(item) as part_in, zout.open(copy.copy(item), 'w') as part_out:
+                    shutil.copyfileobj(part_in, part_out, _CHUNK)
+
+
+def force_docx_rtl_bytes(docx_bytes: bytes) -> bytes:
+    out = BytesIO()
+    force_docx_rtl(BytesIO(docx_bytes), out)
+    return out.getvalue()
@@ -0,0 +1,244 @@
+"""Content-addressed cache of generated export artifacts (DOCX, subtitles, RTL-fixed DOCX).
+
+Exports are pure functions of their input: the DOCX builder of its body
+lines, the SRT/ASS builders of the segments plus options, the RTL patcher of
+the uploaded bytes. :func:`export_key` hashes that input and the options
+(plus :data:`EXPORT_FORMAT_VERSION`, bumped whenever a builder's output
+changes), so a repeated download is a lookup:
+
+- tier 1 is a bounded in-process namespace (TTL + LRU + byte budget);
+- tier 2 (optional) stores the bytes under ``<prefix><key>`` in S3/R2, so a
+  repeat on another worker or after a restart skips the build too. Expire
+  that prefix with a bucket lifecycle rule; nothing here deletes objects.
+
+The key doubles as a strong ETag. Because the key is the content hash, a new
+transcript version can never be served stale bytes; entries are also tagged
+with the transcript they came from (``source``) so a save drops them from
+memory right away (:meth:`ExportArtifactCache.invalidate_source`).
+
+Concurrent requests for a key that is being built wait for that build
+instead of starting their own (origin ``shared``).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import pickle
+import threading
+from typing import Any, BinaryIO, Callable, Dict, Hashable, Mapping, MutableMapping, Optional, Tuple, Union
+
+EXPORT_FORMAT_VERSION = 1
+DEFAULT_S3_PREFIX = "exports/"
+DEFAULT_S3_MAX_BYTES = 32 * 1024 * 1024
+_HASH_CHUNK = 256 * 1024
+
+
+def _hasher(kind: str, version: int) -> "hashlib._Hash":
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{kind}\0{version}\0".encode("utf-8"))
+    return h
+
+
+def _options_bytes(options: Optional[Mapping[str, Any]]) -> bytes:
+    return json.dumps(dict(options or {}), sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def export_key(kind: str, content: Any, options: Optional[Mapping[str, Any]] = None, *, version: int = EXPORT_FORMAT_VERSION) -> str:
+    """``<kind>-<hash>`` of ``content`` (JSON-like values) and ``options``.
+
+    ``content`` is serialized with pickle, several times faster than sorted JSON
+    for a multi-hour segment list. The encoding is exact, so different values
+    never share a key; equal values built differently (dict key order, 1 vs
+    1.0) may get different keys, which only costs a rebuild.
+    """
+    h = _hasher(kind, version)
+    h.update(_options_bytes(options))
+    h.update(b"\0")
+    h.update(pickle.dumps(content, protocol=5))
+    return f"{kind}-{h.hexdigest()}"
+
+
+def bytes_export_key(kind: str, data: Union[bytes, BinaryIO], options: Optional[Mapping[str, Any]] = None, *, version: int = EXPORT_FORMAT_VERSION) -> str:
+    """Like :func:`export_key` for raw input bytes; a seekable stream is hashed in chunks and rewound."""
+    h = _hasher(kind, version)
+    h.update(_options_bytes(options))
+    h.update(b"\0")
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        h.update(data)
+    else:
+        start = data.tell()
+        while True:
+            block = data.read(_HASH_CHUNK)
+            if not block:
+                break
+            h.update(block)
+        data.seek(start)
+    return f"{kind}-{h.hexdigest()}"
+
+
+class ExportArtifact:
+    __slots__ = ("key", "body", "source")
+
+    def __init__(self, key: str, body: bytes, source: Optional[str] = None) -> None:
+        self.key = key
+        self.body = body
+        self.source = source
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.key}"'
+
+
+def export_artifact_sizeof(entry: Any) -> int:
+    return len(getattr(entry, "body", b"") or b"") + 128
+
+
+def _error_code(exc: Exception) -> str:
+    response = getattr(exc, "response", None) or {}
+    return str((response.get("Error") or {}).get("Code") or "")
+
+
+class _Build:
+    __slots__ = ("done", "artifact", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.artifact: Optional[ExportArtifact] = None
+        self.error: Optional[BaseException] = None
+
+
+class ExportArtifactCache:
+    """Memory tier ``store`` plus an optional S3/R2 tier (``s3_client_factory`` and ``bucket``)."""
+
+    def __init__(
+        self,
+        store: MutableMapping[Hashable, ExportArtifact],
+        *,
+        s3_client_factory: Optional[Callable[[], Any]] = None,
+        bucket: Optional[str] = None,
+        prefix: str = DEFAULT_S3_PREFIX,
+        s3_max_bytes: int = DEFAULT_S3_MAX_BYTES,
+    ) -> None:
+        self._store = store
+        self._s3_client_factory = s3_client_factory if bucket else None
+        self._bucket = bucket
+        self._prefix = prefix
+        self._s3_max_bytes = int(s3_max_bytes)
+        self._lock = threading.Lock()
+        self._building: Dict[str, _Build] = {}
+        self._stats: Dict[str, int] = {
+            "memory_hits": 0, "s3_hits": 0, "builds": 0, "shared_builds": 0, "s3_writes": 0, "s3_errors": 0,
+            "invalidated": 0,
+        }
+
+    def _bump(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += n
+
+    @property
+    def persistent(self) -> bool:
+        return self._s3_client_factory is not None
+
+    def _s3_get(self, key: str) -> Optional[bytes]:
+        try:
+            resp = self._s3_client_factory().get_object(Bucket=self._bucket, Key=self._prefix + key)
+            return resp["Body"].read()
+        except Exception as e:
+            if _error_code(e) not in ("NoSuchKey", "404"):
+                self._bump("s3_errors")
+                logging.warning("export cache: S3 read %s failed: %s", key, e)
+            return None
+
+    def _s3_put(self, key: str, body: bytes, content_type: str) -> None:
+        if len(body) > self._s3_max_bytes:
+            return
+        try:
+            self._s3_client_factory().put_object(
+                Bucket=self._bucket, Key=self._prefix + key, Body=body, ContentType=content_type
+            )
+            self._bump("s3_writes")
+        except Exception as e:
+            self._bump("s3_errors")
+            logging.warning("export cache: S3 write %s failed: %s", key, e)
+
+    def get_or_build(
+        self,
+        key: str,
+        build: Callable[[], bytes],
+        *,
+        source: Optional[str] = None,
+        persistent: bool = True,
+        content_type: str = "application/octet-stream",
+    ) -> Tuple[ExportArtifact, str]:
+        """``(artifact, origin)`` with origin ``memory`` / ``s3`` / ``build`` / ``shared``.
+
+        ``persistent=False`` keeps the artifact out of the S3 tier (e.g. medical
+        exports, which must stay under the KMS-encrypted transcript layout).
+        ``shared``: another caller was building the key; its result (or error) is returned.
+        """
+        artifact = self._store.get(key)
+        if artifact is not None:
+            self._bump("memory_hits")
+            return artifact, "memory"
+        with self._lock:
+            flight = self._building.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._building[key] = _Build()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            self._bump("shared_builds")
+            return flight.artifact, "shared"
+        try:
+            flight.artifact, origin = self._load_or_build(key, build, source, persistent, content_type)
+            return flight.artifact, origin
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._building.pop(key, None)
+            flight.done.set()
+
+    def _load_or_build(
+        self, key: str, build: Callable[[], bytes], source: Optional[str], persistent: bool, content_type: str
+    ) -> Tuple[ExportArtifact, str]:
+        use_s3 = persistent and self.persistent
+        body = self._s3_get(key) if use_s3 else None
+        origin = "s3"
+        if body is None:
+            body = bytes(build())
+            origin = "build"
+        artifact = ExportArtifact(key, body, source)
+        self._store[key] = artifact
+        if origin == "s3":
+            self._bump("s3_hits")
+        else:
+            self._bump("builds")
+            if use_s3:
+                self._s3_put(key, body, content_type)
+        return artifact, origin
+
+    def invalidate_source(self, source: Optional[str]) -> int:
+        """Drop every memory entry built from ``source``; returns how many."""
+        if not source:
+            return 0
+        stale = [key for key, artifact in list(self._store.items()) if getattr(artifact, "source", None) == source]
+        for key in stale:
+            self._store.pop(key, None)
+        if stale:
+            self._bump("invalidated", len(stale))
+        return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+        out["persistent"] = self.persistent
+        store_stats = getattr(self._store, "stats", None)
+        if callable(store_stats):
+            out["store"] = store_stats()
+        return out
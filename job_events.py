@@ -0,0 +1,170 @@
+"""In-process job event bus feeding push status channels (Socket.IO, SSE, long-poll).
+
+Producers (gpu_callback, gpu_started, trigger state changes, CPU preprocess
+callbacks) call :meth:`JobEventBus.publish`. Each job keeps only its latest
+small snapshot plus a monotonically increasing version, so subscribers can
+resume from a version (SSE ``Last-Event-ID`` / long-poll ``If-None-Match``)
+without the server re-reading Supabase or R2.
+
+When a shared :mod:`shared_state` backend is configured, snapshots are also
+written there and waiters re-check it periodically, so an event published on
+one gunicorn worker reaches a subscriber parked on another.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+
+TERMINAL_STATUSES = frozenset({"completed", "failed", "cancelled"})
+
+_SHARED_NAMESPACE = "job_events"
+
+
+def etag_for(job_id: str, version: int) -> str:
+    return f'"{job_id}:{int(version)}"'
+
+
+def version_from_etag(etag: Optional[str], job_id: str) -> Optional[int]:
+    """Parse our own ETag / Last-Event-ID back into a version (None if foreign)."""
+    raw = str(etag or "").strip()
+    if raw.startswith("W/"):
+        raw = raw[2:]
+    raw = raw.strip('"')
+    if ":" in raw:
+        jid, _, ver = raw.rpartition(":")
+        if jid != str(job_id):
+            return None
+        raw = ver
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+class JobEventBus:
+    def __init__(
+        self,
+        *,
+        max_jobs: int = 5000,
+        ttl_sec: float = 6 * 3600,
+        backend: Any = None,
+        shared_poll_sec: float = 2.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._cond = threading.Condition(threading.Lock())
+        self._latest: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._max_jobs = max(1, int(max_jobs))
+        self._ttl = float(ttl_sec)
+        self._backend = backend if getattr(backend, "shared", False) else None
+        self._shared_poll = max(0.2, float(shared_poll_sec))
+        self._clock = clock
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._published = 0
+        self._waits = 0
+        self._wait_hits = 0
+
+    def add_listener(self, fn: Callable[[Dict[str, Any]], None]) -> None:
+        self._listeners.append(fn)
+
+    def publish(self, job_id: str, event: str, status: Optional[str] = None, **fields: Any) -> Dict[str, Any]:
+        jid = str(job_id or "").strip()
+        if not jid:
+            return {}
+        # Another worker may have published earlier versions; continue its sequence.
+        shared_prev = self._shared_snapshot(jid) or {}
+        with self._cond:
+            prev = self._latest.get(jid) or {}
+            if int(shared_prev.get("version") or 0) > int(prev.get("version") or 0):
+                prev = shared_prev
+            version = int(prev.get("version") or 0) + 1
+            snap = {
+                "job_id": jid,
+                "version": version,
+                "event": event,
+                "status": status or prev.get("status"),
+                "at": self._clock(),
+                **{k: v for k, v in fields.items() if v is not None},
+            }
+            snap["terminal"] = str(snap.get("status") or "").lower() in TERMINAL_STATUSES
+            self._latest[jid] = snap
+            self._latest.move_to_end(jid)
+            self._evict_locked()
+            self._published += 1
+            self._cond.notify_all()
+        if self._backend is not None:
+            try:
+                self._backend.set(_SHARED_NAMESPACE, jid, snap, self._ttl)
+            except Exception as e:
+                logging.warning("job event shared write failed job_id=%s: %s", jid, e)
+        for fn in list(self._listeners):
+            try:
+                fn(dict(snap))
+            except Exception as e:
+                logging.warning("job event listener failed job_id=%s: %s", jid, e)
+        return dict(snap)
+
+    def snapshot(self, job_id: str) -> Optional[Dict[str, Any]]:
+        jid = str(job_id or "").strip()
+        with self._cond:
+            local = self._latest.get(jid)
+            if local is not None and (self._clock() - float(local.get("at") or 0)) > self._ttl:
+                self._latest.pop(jid, None)
+                local = None
+        shared = self._shared_snapshot(jid)
+        if shared and (not local or int(shared.get("version") or 0) > int(local.get("version") or 0)):
+            return dict(shared)
+        return dict(local) if local else None
+
+    def wait(self, job_id: str, after_version: int, timeout: float) -> Optional[Dict[str, Any]]:
+        """Block until the job's version exceeds ``after_version`` or ``timeout`` elapses."""
+        jid = str(job_id or "").strip()
+        deadline = self._clock() + max(0.0, float(timeout))
+        self._waits += 1
+        while True:
+            snap = self.snapshot(jid)
+            if snap and int(snap.get("version") or 0) > int(after_version or 0):
+                self._wait_hits += 1
+                return snap
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                return snap
+            step = min(remaining, self._shared_poll) if self._backend is not None else remaining
+            with self._cond:
+                local = self._latest.get(jid)
+                if local is None or int(local.get("version") or 0) <= int(after_version or 0):
+                    self._cond.wait(step)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "jobs": len(self._latest),
+                "published": self._published,
+                "waits": self._waits,
+                "wait_hits": self._wait_hits,
+                "listeners": len(self._listeners),
+                "shared": self._backend is not None,
+            }
+
+    def _evict_locked(self) -> None:
+        now = self._clock()
+        while self._latest:
+            jid, snap = next(iter(self._latest.items()))
+            if len(self._latest) > self._max_jobs or (now - float(snap.get("at") or 0)) > self._ttl:
+                self._latest.popitem(last=False)
+                continue
+            break
+
+    def _shared_snapshot(self, jid: str) -> Optional[Dict[str, Any]]:
+        if self._backend is None:
+            return None
+        try:
+            snap = self._backend.get(_SHARED_NAMESPACE, jid)
+        except Exception as e:
+            logging.warning("job event shared read failed job_id=%s: %s", jid, e)
+            return None
+        return snap if isinstance(snap, dict) else None
@@ -0,0 +1,206 @@
+"""Job status payloads with each transcript array once, served as cached bytes.
+
+Completed-job payloads historically carried ``segments`` / ``words`` /
+``captions`` / ``formatted`` twice: at the top level and again under
+``result``. In memory both point at the same lists, but every
+``check_status`` poll ran ``jsonify`` over the whole payload and put both
+copies on the wire (then flask-compress gzipped it again).
+
+- :func:`completed_job_payload` builds recovery payloads with the arrays at
+  the top level only (``payload_shape: "single"``); :func:`dedupe_job_payload`
+  normalizes callback payloads the same way and :func:`expand_job_payload`
+  restores the duplicated shape for clients that still read ``result.X``.
+- :func:`serialize_job_payload` encodes once (compact UTF-8 JSON, optional
+  gzip) and derives a strong ETag from the body.
+- :class:`JobPayloadBytesCache` keeps those bytes keyed by job id and the
+  write version of the ``job_results_cache`` entry, so repeat polls are a
+  dict lookup (or a 304) instead of an encode.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, MutableMapping, Optional, Tuple
+
+TRANSCRIPT_KEYS = ("segments", "words", "captions", "formatted", "word_segments")
+SHAPE_KEY = "payload_shape"
+SHAPE_SINGLE = "single"
+
+DEFAULT_GZIP_MIN_BYTES = 1024
+DEFAULT_GZIP_LEVEL = 6
+
+
+def completed_job_payload(job_id: str, transcript: Dict[str, Any], result_s3_key: str) -> Dict[str, Any]:
+    """Completed payload recovered from a stored transcript (arrays at the top level only)."""
+    segments = transcript.get("segments") if isinstance(transcript.get("segments"), list) else []
+    payload: Dict[str, Any] = {
+        "jobId": job_id,
+        "status": "completed",
+        "result_s3_key": result_s3_key,
+        "result": {"result_s3_key": result_s3_key},
+        "segments": segments,
+        SHAPE_KEY: SHAPE_SINGLE,
+    }
+    if isinstance(transcript.get("formatted"), dict):
+        payload["formatted"] = transcript["formatted"]
+    if isinstance(transcript.get("words"), list):
+        payload["words"] = transcript["words"]
+    if isinstance(transcript.get("captions"), list):
+        payload["captions"] = transcript["captions"]
+    return payload
+
+
+def dedupe_job_payload(payload: Any) -> Any:
+    """Copy of ``payload`` whose ``result`` no longer repeats top-level transcript arrays.
+
+    Arrays only present under ``result`` are hoisted; a ``result`` value that
+    differs from the top-level one is kept (it is not a duplicate).
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get("result"), dict):
+        return payload
+    out = dict(payload)
+    result = dict(payload["result"])
+    for key in TRANSCRIPT_KEYS:
+        if key not in result:
+            continue
+        if key not in out:
+            out[key] = result.pop(key)
+        elif result[key] is out[key] or result[key] == out[key]:
+            del result[key]
+    out["result"] = result
+    out[SHAPE_KEY] = SHAPE_SINGLE
+    return out
+
+
+def expand_job_payload(payload: Any) -> Any:
+    """Legacy duplicated shape: top-level transcript arrays mirrored under ``result`` (shared, not copied)."""
+    if not isinstance(payload, dict):
+        return payload
+    out = {k: v for k, v in payload.items() if k != SHAPE_KEY}
+    present = [k for k in TRANSCRIPT_KEYS if k in out]
+    if not present:
+        return out
+    result = dict(out.get("result")) if isinstance(out.get("result"), dict) else {}
+    for key in present:
+        result.setdefault(key, out[key])
+    out["result"] = result
+    return out
+
+
+class SerializedJobPayload:
+    __slots__ = ("body", "gzip_body", "etag")
+
+    def __init__(self, body: bytes, gzip_body: Optional[bytes], etag: str) -> None:
+        self.body = body
+        self.gzip_body = gzip_body
+        self.etag = etag
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.body) + len(self.gzip_body or b"")
+
+    def representation(self, gzip_ok: bool) -> Tuple[bytes, str, Optional[str]]:
+        """``(body, etag, content_encoding)``; the gzip variant gets its own strong ETag."""
+        if gzip_ok and self.gzip_body is not None:
+            return self.gzip_body, self.etag[:-1] + '-gz"', "gzip"
+        return self.body, self.etag, None
+
+
+def serialize_job_payload(
+    payload: Any,
+    *,
+    gzip_min_bytes: Optional[int] = DEFAULT_GZIP_MIN_BYTES,
+    level: int = DEFAULT_GZIP_LEVEL,
+) -> SerializedJobPayload:
+    """Compact UTF-8 JSON (Hebrew stays 2 bytes/char instead of a 6-byte ``\\uXXXX``) plus gzip."""
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    gzip_body = None
+    if gzip_min_bytes is not None and len(body) >= gzip_min_bytes:
+        gzip_body = gzip.compress(body, compresslevel=level, mtime=0)
+    return SerializedJobPayload(body, gzip_body, etag)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak If-None-Match comparison; either content-coding variant of ``etag`` matches."""
+    raw = str(if_none_match or "").strip()
+    if not raw:
+        return False
+    if raw == "*":
+        return True
+    base = etag.strip('"')
+    for tag in raw.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag.endswith("-gz"):
+            tag = tag[:-3]
+        if tag == base:
+            return True
+    return False
+
+
+class _CachedBytes:
+    __slots__ = ("version", "serialized")
+
+    def __init__(self, version: int, serialized: SerializedJobPayload) -> None:
+        self.version = version
+        self.serialized = serialized
+
+
+def payload_bytes_sizeof(entry: Any) -> int:
+    serialized = getattr(entry, "serialized", None)
+    return serialized.nbytes if serialized is not None else 0
+
+
+class JobPayloadBytesCache:
+    """Serialized payloads keyed by ``(job_id, variant)`` and valid for one source version."""
+
+    def __init__(
+        self,
+        store: MutableMapping[Hashable, _CachedBytes],
+        *,
+        gzip_min_bytes: Optional[int] = DEFAULT_GZIP_MIN_BYTES,
+        level: int = DEFAULT_GZIP_LEVEL,
+    ) -> None:
+        self._store = store
+        self._gzip_min_bytes = gzip_min_bytes
+        self._level = level
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"hits": 0, "builds": 0, "uncached_builds": 0}
+
+    def _bump(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, job_id: str, version: int, variant: str, build: Callable[[], Any]) -> SerializedJobPayload:
+        """Cached bytes for ``version`` of the job's payload; ``build()`` runs only on a miss.
+
+        ``version`` 0 means the payload is not tracked by a versioned store:
+        serialize without caching.
+        """
+        key = (job_id, variant)
+        if version:
+            entry = self._store.get(key)
+            if entry is not None and entry.version == version:
+                self._bump("hits")
+                return entry.serialized
+        serialized = serialize_job_payload(build(), gzip_min_bytes=self._gzip_min_bytes, level=self._level)
+        if version:
+            self._store[key] = _CachedBytes(version, serialized)
+            self._bump("builds")
+        else:
+            self._bump("uncached_builds")
+        return serialized
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+        store_stats = getattr(self._store, "stats", None)
+        if callable(store_stats):
+            out["store"] = store_stats()
+        return out
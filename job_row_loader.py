@@ -0,0 +1,153 @@
+"""Single-flight, micro-batched lookups of ``jobs`` rows by ``runpod_job_id``.
+
+Status pollers, Socket.IO joins and GPU callbacks all resolve the same few
+job rows. Without coordination every caller issued its own Supabase GET
+(two, when the plain id missed and the quoted form was retried), and a
+burst of pollers for one job multiplied that by the number of tabs.
+
+:class:`JobRowLoader` gives callers one entry point:
+
+- concurrent lookups for the same ``(select, runpod_job_id)`` share one
+  in-flight request (single flight);
+- lookups for different ids with the same ``select`` arriving within a
+  few milliseconds are collapsed into one ``runpod_job_id=in.(...)`` query
+  (micro-batching).
+
+The actual query is injected as ``fetch_many(ids, select, timeout)`` and
+must return ``{runpod_job_id: row}`` for the ids it found.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+DEFAULT_BATCH_WINDOW_SEC = 0.005
+DEFAULT_MAX_BATCH = 50
+
+
+def job_row_batch_window_sec() -> float:
+    """JOB_ROW_BATCH_WINDOW_MS (default 5 ms; 0 disables batching, single flight stays on)."""
+    try:
+        ms = float(os.environ.get("JOB_ROW_BATCH_WINDOW_MS", "") or DEFAULT_BATCH_WINDOW_SEC * 1000)
+    except (TypeError, ValueError):
+        ms = DEFAULT_BATCH_WINDOW_SEC * 1000
+    return max(0.0, min(ms, 100.0)) / 1000.0
+
+
+def job_row_max_batch() -> int:
+    try:
+        value = int(os.environ.get("JOB_ROW_BATCH_MAX", "") or DEFAULT_MAX_BATCH)
+    except (TypeError, ValueError):
+        value = DEFAULT_MAX_BATCH
+    return max(1, min(value, 200))
+
+
+class _Batch:
+    __slots__ = ("select", "timeout", "ids", "done", "results")
+
+    def __init__(self, select: str, timeout: Optional[float]) -> None:
+        self.select = select
+        self.timeout = timeout
+        self.ids: List[str] = []
+        self.done = threading.Event()
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+
+class JobRowLoader:
+    def __init__(
+        self,
+        fetch_many: Callable[[List[str], str, Optional[float]], Dict[str, Dict[str, Any]]],
+        *,
+        batch_window_sec: float = DEFAULT_BATCH_WINDOW_SEC,
+        max_batch: int = DEFAULT_MAX_BATCH,
+    ) -> None:
+        self._fetch_many = fetch_many
+        self._window = max(0.0, float(batch_window_sec))
+        self._max_batch = max(1, int(max_batch))
+        self._lock = threading.Lock()
+        self._open: Dict[str, _Batch] = {}
+        self._inflight: Dict[Tuple[str, str], _Batch] = {}
+        self._counters = {
+            "requests": 0,
+            "coalesced": 0,
+            "batched": 0,
+            "batches": 0,
+            "batched_ids": 0,
+            "rows": 0,
+            "errors": 0,
+            "wait_timeouts": 0,
+        }
+
+    def load(self, runpod_job_id: str, select: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Return a copy of the row, or None when it does not exist or the query failed."""
+        jid = str(runpod_job_id or "").strip()
+        if not jid:
+            return None
+        key = (select, jid)
+        with self._lock:
+            self._counters["requests"] += 1
+            batch = self._inflight.get(key)
+            leader = False
+            if batch is not None:
+                self._counters["coalesced"] += 1
+            else:
+                batch = self._open.get(select)
+                if batch is None or len(batch.ids) >= self._max_batch:
+                    batch = _Batch(select, timeout)
+                    self._open[select] = batch
+                    leader = True
+                else:
+                    self._counters["batched"] += 1
+                batch.ids.append(jid)
+                self._inflight[key] = batch
+        if leader:
+            self._run(batch)
+        elif not batch.done.wait(self._wait_budget(batch.timeout)):
+            with self._lock:
+                self._counters["wait_timeouts"] += 1
+            return None
+        row = batch.results.get(jid)
+        return dict(row) if row is not None else None
+
+    def _wait_budget(self, timeout: Optional[float]) -> float:
+        # The leader's HTTP call is already bounded; this only guards against a lost wakeup.
+        return self._window + 2.0 * float(timeout or 10.0) + 1.0
+
+    def _run(self, batch: _Batch) -> None:
+        if self._window > 0:
+            time.sleep(self._window)
+        with self._lock:
+            if self._open.get(batch.select) is batch:
+                del self._open[batch.select]
+            ids = list(batch.ids)
+            self._counters["batches"] += 1
+            self._counters["batched_ids"] += len(ids)
+        results: Dict[str, Dict[str, Any]] = {}
+        try:
+            results = self._fetch_many(ids, batch.select, batch.timeout) or {}
+        except Exception as e:
+            logging.warning("job row batch failed (%d ids): %s", len(ids), e)
+            with self._lock:
+                self._counters["errors"] += 1
+        finally:
+            batch.results = results
+            with self._lock:
+                self._counters["rows"] += len(results)
+                for jid in ids:
+                    if self._inflight.get((batch.select, jid)) is batch:
+                        del self._inflight[(batch.select, jid)]
+            batch.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+            out["in_flight"] = len(self._inflight)
+        batches = out["batches"] or 0
+        out["avg_batch_size"] = round(out["batched_ids"] / batches, 2) if batches else 0.0
+        out["batch_window_ms"] = round(self._window * 1000, 2)
+        return out
@@ -0,0 +1,311 @@
+"""Bounded, TTL-evicting in-process job state.
+
+siteapp keeps per-job handshake state (trigger status, pending job info,
+cached results, burn tasks, ...) in module-level mappings. Plain dicts only
+ever grow; this store gives every namespace a TTL, an entry cap and an
+optional byte budget, evicts least-recently-used entries first, and never
+evicts a key the owner reports as in flight (a job still waiting on its GPU
+callback).
+
+Namespaces are ``MutableMapping`` objects so existing ``d[k] = v`` /
+``d.get(k)`` / ``d.pop(k, None)`` / ``k in d`` call sites keep working.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterator, MutableMapping, Optional, Tuple
+
+
+DEFAULT_IN_FLIGHT_MAX_AGE_SEC = 24 * 3600
+
+_MISSING = object()
+
+
+def shallow_sizeof(value: Any) -> int:
+    """Cheap size estimate for small scalar / flat dict entries."""
+    try:
+        size = sys.getsizeof(value)
+    except TypeError:
+        return 64
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += sys.getsizeof(k) + sys.getsizeof(v)
+    return size
+
+
+def json_sizeof(value: Any) -> int:
+    """Serialized-size estimate for large nested payloads (segments, words, ...)."""
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return shallow_sizeof(value)
+
+
+class _Entry:
+    __slots__ = ("value", "written_at", "size", "version")
+
+    def __init__(self, value: Any, written_at: float, size: int, version: int = 0) -> None:
+        self.value = value
+        self.written_at = written_at
+        self.size = size
+        self.version = version
+
+
+class BoundedNamespace(MutableMapping):
+    """One LRU/TTL-bounded mapping inside a :class:`JobStateStore`."""
+
+    def __init__(
+        self,
+        store: "JobStateStore",
+        name: str,
+        *,
+        ttl_sec: Optional[float],
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = shallow_sizeof,
+    ) -> None:
+        self._store = store
+        self.name = name
+        self.ttl_sec = float(ttl_sec) if ttl_sec else None
+        self.max_entries = int(max_entries) if max_entries else None
+        self.max_bytes = int(max_bytes) if max_bytes else None
+        self._sizeof = sizeof
+        self._data: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._evictions = {"ttl": 0, "lru": 0}
+        self._hits = 0
+        self._misses = 0
+
+    # -- internal helpers (caller holds store lock) -------------------------
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return bool(self.ttl_sec) and (now - entry.written_at) > self.ttl_sec
+
+    def _drop(self, key: Hashable, reason: Optional[str] = None) -> None:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        if reason:
+            self._evictions[reason] += 1
+
+    def _live_entry(self, key: Hashable, now: float) -> Optional[_Entry]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if self._expired(entry, now) and not self._store._pinned(key, entry, now):
+            self._drop(key, "ttl")
+            return None
+        return entry
+
+    def _enforce_limits(self, now: float, keep: Hashable = _MISSING) -> None:
+        over_entries = self.max_entries and len(self._data) > self.max_entries
+        over_bytes = self.max_bytes and self._bytes > self.max_bytes
+        if not (over_entries or over_bytes) and not self.ttl_sec:
+            return
+        # Walk from the LRU end: expired first, then oldest until within budget.
+        for key in list(self._data.keys()):
+            entry = self._data.get(key)
+            if entry is None:
+                continue
+            within = (not self.max_entries or len(self._data) <= self.max_entries) and (
+                not self.max_bytes or self._bytes <= self.max_bytes
+            )
+            expired = self._expired(entry, now)
+            if within and not expired:
+                # Everything after this is more recently used; stop scanning.
+                break
+            if key == keep or self._store._pinned(key, entry, now):
+                continue
+            self._drop(key, "ttl" if expired else "lru")
+
+    # -- MutableMapping -------------------------------------------------------
+
+    def __getitem__(self, key: Hashable) -> Any:
+        with self._store._lock:
+            entry = self._live_entry(key, self._store._clock())
+            if entry is None:
+                self._misses += 1
+                raise KeyError(key)
+            self._hits += 1
+            self._data.move_to_end(key)
+            return entry.value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        size = max(0, int(self._sizeof(value)))
+        with self._store._lock:
+            now = self._store._clock()
+            self._drop(key)
+            self._data[key] = _Entry(value, now, size, next(self._store._versions))
+            self._bytes += size
+            self._enforce_limits(now, keep=key)
+
+    def __delitem__(self, key: Hashable) -> None:
+        with self._store._lock:
+            if key not in self._data:
+                raise KeyError(key)
+            self._drop(key)
+
+    def __contains__(self, key: object) -> bool:
+        with self._store._lock:
+            return self._live_entry(key, self._store._clock()) is not None
+
+    def __iter__(self) -> Iterator[Hashable]:
+        with self._store._lock:
+            now = self._store._clock()
+            keys = [k for k in list(self._data.keys()) if self._live_entry(k, now) is not None]
+        return iter(keys)
+
+    def __len__(self) -> int:
+        with self._store._lock:
+            return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def get_versioned(self, key: Hashable, default: Any = None) -> Tuple[Any, int]:
+        """``(value, version)``: the version changes on every write (0 when missing), so
+        callers can key derived data (e.g. serialized bytes) on it."""
+        with self._store._lock:
+            entry = self._live_entry(key, self._store._clock())
+            if entry is None:
+                self._misses += 1
+                return default, 0
+            self._hits += 1
+            self._data.move_to_end(key)
+            return entry.value, entry.version
+
+    def pop(self, key: Hashable, default: Any = _MISSING) -> Any:
+        with self._store._lock:
+            entry = self._live_entry(key, self._store._clock())
+            if entry is None:
+                self._data.pop(key, None)
+                if default is _MISSING:
+                    raise KeyError(key)
+                return default
+            self._drop(key)
+            return entry.value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Read without LRU promotion, TTL eviction or hit accounting (for in-flight predicates)."""
+        with self._store._lock:
+            entry = self._data.get(key)
+            return default if entry is None else entry.value
+
+    def items(self):
+        with self._store._lock:
+            now = self._store._clock()
+            out = []
+            for key in list(self._data.keys()):
+                entry = self._live_entry(key, now)
+                if entry is not None:
+                    out.append((key, entry.value))
+            return out
+
+    # set-style helpers so a namespace can replace ``set()`` globals
+    def add(self, key: Hashable) -> None:
+        self[key] = True
+
+    def discard(self, key: Hashable) -> None:
+        self.pop(key, None)
+
+    def touch(self, key: Hashable) -> None:
+        """Refresh TTL for an entry mutated in place."""
+        with self._store._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                entry.written_at = self._store._clock()
+                self._data.move_to_end(key)
+
+    def purge_expired(self) -> int:
+        with self._store._lock:
+            before = len(self._data)
+            now = self._store._clock()
+            for key in list(self._data.keys()):
+                self._live_entry(key, now)
+            return before - len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._store._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "evictions": dict(self._evictions),
+                "hits": self._hits,
+                "misses": self._misses,
+                "ttl_sec": self.ttl_sec,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class JobStateStore:
+    """Registry of bounded namespaces sharing one lock and one in-flight predicate.
+
+    ``in_flight(key)`` is consulted before any eviction; it runs under the
+    store lock and may read other namespaces of the same store.
+    """
+
+    def __init__(
+        self,
+        in_flight: Optional[Callable[[Hashable], bool]] = None,
+        *,
+        in_flight_max_age_sec: float = DEFAULT_IN_FLIGHT_MAX_AGE_SEC,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._lock = threading.RLock()
+        self._in_flight = in_flight
+        self._in_flight_max_age = float(in_flight_max_age_sec or 0)
+        self._clock = clock
+        self._namespaces: Dict[str, BoundedNamespace] = {}
+        self._checking_pin = False
+        self._versions = itertools.count(1)
+
+    def set_in_flight_predicate(self, fn: Optional[Callable[[Hashable], bool]]) -> None:
+        with self._lock:
+            self._in_flight = fn
+
+    def namespace(self, name: str, **limits: Any) -> BoundedNamespace:
+        with self._lock:
+            ns = self._namespaces.get(name)
+            if ns is None:
+                ns = BoundedNamespace(self, name, **limits)
+                self._namespaces[name] = ns
+            return ns
+
+    def _pinned(self, key: Hashable, entry: _Entry, now: float) -> bool:
+        if self._in_flight is None or self._checking_pin:
+            return False
+        if self._in_flight_max_age and (now - entry.written_at) > self._in_flight_max_age:
+            return False
+        # The predicate reads other namespaces; guard against it triggering
+        # eviction (and thus another predicate call) recursively.
+        self._checking_pin = True
+        try:
+            return bool(self._in_flight(key))
+        except Exception:
+            return False
+        finally:
+            self._checking_pin = False
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return sum(ns.purge_expired() for ns in self._namespaces.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            per_ns = {name: ns.stats() for name, ns in self._namespaces.items()}
+        return {
+            "namespaces": per_ns,
+            "total_entries": sum(s["entries"] for s in per_ns.values()),
+            "total_bytes": sum(s["bytes"] for s in per_ns.values()),
+        }
@@ -0,0 +1,561 @@
+"""Ranged, container-aware media probing (duration + decodable prefix) without full downloads.
+
+Upload-time checks used to pull whole objects from S3/R2: the credit duration
+probe downloaded up to 220 MB so ffprobe could reach an MP4 ``moov`` atom at
+the end of the file, and the audio-profile detector separately downloaded
+48-96 MB prefixes (and sometimes the whole file again).
+
+:class:`MediaProbe` reads the head and tail of the object with ranged GETs
+and parses container metadata directly:
+
+- MP4 / MOV / M4A: top-level box walk to ``moov`` → ``mvhd`` (or ``mehd``)
+- MP3: Xing/Info or VBRI frame counts, CBR size/bitrate otherwise
+- WAV: ``fmt `` byte rate and ``data`` size
+- WebM / Matroska: ``Info/Duration``, else the last ``Cues`` time or the last
+  cluster's block timecodes in the tail
+
+The same bytes feed the audio-profile decoder: :meth:`MediaProbe.materialize`
+writes a sparse local copy with the head prefix, the tail and any metadata
+ranges at their real offsets, so ffmpeg can open MP4s whose ``moov`` sits at
+the end without downloading ``mdat``.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+DEFAULT_HEAD_BYTES = 1024 * 1024
+DEFAULT_TAIL_BYTES = 1024 * 1024
+MAX_METADATA_BYTES = 64 * 1024 * 1024
+MATERIALIZE_CHUNK_BYTES = 8 * 1024 * 1024
+
+_MP4_TOP_LEVEL = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot", b"uuid", b"styp", b"sidx", b"moof", b"mfra", b"meta"}
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, int] = {"probes": 0, "ranged_gets": 0, "bytes_fetched": 0, "parsed": 0, "unparsed": 0}
+
+
+def probe_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _count(**deltas: int) -> None:
+    with _stats_lock:
+        for k, v in deltas.items():
+            _stats[k] = _stats.get(k, 0) + v
+
+
+class MediaProbe:
+    """Probe one object of ``size`` bytes through ``fetch(start, end_inclusive) -> bytes``."""
+
+    def __init__(
+        self,
+        fetch: Callable[[int, int], bytes],
+        size: int,
+        name: str = "",
+        *,
+        head_bytes: int = DEFAULT_HEAD_BYTES,
+        tail_bytes: int = DEFAULT_TAIL_BYTES,
+    ) -> None:
+        self._fetch_range = fetch
+        self.size = int(size)
+        self.name = str(name or "")
+        self.bytes_fetched = 0
+        self.ranged_gets = 0
+        self._head = b""
+        self._tail = b""
+        self._tail_start = self.size
+        self._extras: Dict[int, bytes] = {}
+        self._duration: Optional[Tuple[float, str, str]] = None
+        self._parsed = False
+        self._want_head = max(4096, int(head_bytes))
+        self._want_tail = max(0, int(tail_bytes))
+        self._lock = threading.RLock()
+        _count(probes=1)
+
+    # -- byte access -------------------------------------------------------------
+
+    def _fetch(self, start: int, end: int) -> bytes:
+        if end < start or start >= self.size:
+            return b""
+        end = min(end, self.size - 1)
+        data = self._fetch_range(start, end) or b""
+        self.bytes_fetched += len(data)
+        self.ranged_gets += 1
+        _count(ranged_gets=1, bytes_fetched=len(data))
+        return data
+
+    @property
+    def cached_bytes(self) -> int:
+        """Bytes this probe keeps in memory, counting the tail it may still fetch."""
+        tail = len(self._tail) if self._tail or len(self._head) >= self.size else self._want_tail
+        return len(self._head) + tail + sum(len(d) for d in self._extras.values())
+
+    def head(self, n: Optional[int] = None) -> bytes:
+        want = min(self.size, self._want_head if n is None else int(n))
+        if len(self._head) < want:
+            self._head += self._fetch(len(self._head), want - 1)
+        return self._head[:want]
+
+    def tail(self) -> bytes:
+        """Last ``tail_bytes`` of the object (small objects are fetched whole into the head)."""
+        if len(self._head) >= self.size:
+            return self._head[-self._want_tail:] if self._want_tail else b""
+        if not self._tail and self._want_tail:
+            if self.size <= self._want_head + self._want_tail:
+                self.head(self.size)
+                return self._head[-self._want_tail:]
+            start = max(len(self._head), self.size - self._want_tail)
+            self._tail = self._fetch(start, self.size - 1)
+            self._tail_start = start
+        return self._tail
+
+    def read(self, offset: int, n: int) -> bytes:
+        """Bytes [offset, offset+n) from cached head/tail/extras, fetching the rest as one range."""
+        offset, n = int(offset), int(n)
+        if n <= 0 or offset >= self.size:
+            return b""
+        n = min(n, self.size - offset)
+        end = offset + n
+        if end <= len(self._head):
+            return self._head[offset:end]
+        if offset >= self.size - self._want_tail:
+            self.tail()
+            if end <= len(self._head):
+                return self._head[offset:end]
+        if self._tail and offset >= self._tail_start:
+            return self._tail[offset - self._tail_start:end - self._tail_start]
+        for start, data in self._extras.items():
+            if start <= offset and end <= start + len(data):
+                return data[offset - start:end - start]
+        data = self._fetch(offset, end - 1)
+        if len(data) >= 64:
+            self._extras[offset] = data
+        return data
+
+    # -- duration ----------------------------------------------------------------
+
+    def duration(self) -> Tuple[float, str, str]:
+        """(seconds, container, basis); seconds is 0.0 when the container could not be parsed."""
+        with self._lock:
+            return self._duration_locked()
+
+    def _duration_locked(self) -> Tuple[float, str, str]:
+        if self._parsed:
+            return self._duration or (0.0, "unknown", "unparsed")
+        self._parsed = True
+        head = self.head()
+        result: Optional[Tuple[float, str, str]] = None
+        try:
+            if len(head) >= 12 and head[4:8] in _MP4_TOP_LEVEL:
+                result = self._mp4_duration()
+            elif head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+                result = self._wav_duration()
+            elif head[:4] == b"\x1a\x45\xdf\xa3":
+                result = self._ebml_duration()
+            elif head[:3] == b"ID3" or _mp3_sync_at(head, 0) or self.name.lower().endswith(".mp3"):
+                result = self._mp3_duration()
+        except (struct.error, IndexError, ValueError) as e:
+            logging.info("media probe parse failed name=%s: %s", self.name[-48:], e)
+            result = None
+        if result and result[0] > 0:
+            self._duration = result
+            _count(parsed=1)
+            return result
+        _count(unparsed=1)
+        return 0.0, "unknown", "unparsed"
+
+    def _mp4_duration(self) -> Optional[Tuple[float, str, str]]:
+        off = 0
+        moov = None
+        for _ in range(4096):
+            if off + 8 > self.size:
+                break
+            hdr = self.read(off, 16)
+            if len(hdr) < 8:
+                break
+            box_size, typ = struct.unpack(">I4s", hdr[:8])
+            hlen = 8
+            if box_size == 1:
+                box_size = struct.unpack(">Q", hdr[8:16])[0]
+                hlen = 16
+            elif box_size == 0:
+                box_size = self.size - off
+            if box_size < hlen:
+                return None
+            if typ == b"moov":
+                moov = (off, box_size, hlen)
+                break
+            off += box_size
+        if moov is None:
+            return None
+        off, box_size, hlen = moov
+        if box_size > MAX_METADATA_BYTES:
+            return None
+        body = self.read(off + hlen, box_size - hlen)
+        mvhd = _find_box(body, b"mvhd")
+        if mvhd is not None:
+            version = mvhd[0]
+            if version == 1:
+                timescale, dur = struct.unpack(">IQ", mvhd[20:32])
+                unknown = dur == 0xFFFFFFFFFFFFFFFF
+            else:
+                timescale, dur = struct.unpack(">II", mvhd[12:20])
+                unknown = dur == 0xFFFFFFFF
+            if timescale and dur and not unknown:
+                return dur / float(timescale), "mp4", "mvhd"
+            mvex = _find_box(body, b"mvex")
+            mehd = _find_box(mvex, b"mehd") if mvex is not None else None
+            if timescale and mehd is not None:
+                frag = struct.unpack(">Q", mehd[4:12])[0] if mehd[0] == 1 else struct.unpack(">I", mehd[4:8])[0]
+                if frag:
+                    return frag / float(timescale), "mp4", "mehd"
+        return None
+
+    def _wav_duration(self) -> Optional[Tuple[float, str, str]]:
+        pos = 12
+        byte_rate = 0
+        for _ in range(64):
+            hdr = self.read(pos, 8)
+            if len(hdr) < 8:
+                return None
+            cid, csize = struct.unpack("<4sI", hdr)
+            if cid == b"fmt ":
+                fmt = self.read(pos + 8, 16)
+                byte_rate = struct.unpack("<I", fmt[8:12])[0]
+            elif cid == b"data":
+                if csize in (0, 0xFFFFFFFF) or pos + 8 + csize > self.size:
+                    csize = self.size - pos - 8
+                return (csize / float(byte_rate), "wav", "riff") if byte_rate else None
+            pos += 8 + csize + (csize & 1)
+        return None
+
+    def _mp3_duration(self) -> Optional[Tuple[float, str, str]]:
+        pos = 0
+        head = self.head()
+        if head[:3] == b"ID3" and len(head) >= 10:
+            tag = ((head[6] & 0x7F) << 21) | ((head[7] & 0x7F) << 14) | ((head[8] & 0x7F) << 7) | (head[9] & 0x7F)
+            pos = 10 + tag + (10 if head[5] & 0x10 else 0)
+        buf = self.read(pos, 64 * 1024)
+        for i in range(0, max(0, len(buf) - 4)):
+            frame = _mp3_frame_header(buf, i)
+            if frame is None:
+                continue
+            # Require a second valid header where the first frame ends, to skip false syncs.
+            nxt = i + frame["frame_len"]
+            if nxt + 4 <= len(buf) and _mp3_frame_header(buf, nxt) is None:
+                continue
+            spf, sr = frame["samples_per_frame"], frame["sample_rate"]
+            x_off = i + frame["xing_offset"]
+            if buf[x_off:x_off + 4] in (b"Xing", b"Info"):
+                flags = struct.unpack(">I", buf[x_off + 4:x_off + 8])[0]
+                if flags & 1:
+                    frames = struct.unpack(">I", buf[x_off + 8:x_off + 12])[0]
+                    if frames:
+                        return frames * spf / float(sr), "mp3", "xing"
+            if buf[i + 36:i + 40] == b"VBRI":
+                frames = struct.unpack(">I", buf[i + 36 + 14:i + 36 + 18])[0]
+                if frames:
+                    return frames * spf / float(sr), "mp3", "vbri"
+            audio_bytes = self.size - (pos + i)
+            tail = self.tail()
+            if len(tail) >= 128 and tail[-128:-125] == b"TAG":
+                audio_bytes -= 128
+            return audio_bytes * 8.0 / (frame["bitrate_kbps"] * 1000.0), "mp3", "cbr"
+        return None
+
+    def _ebml_duration(self) -> Optional[Tuple[float, str, str]]:
+        head = self.head()
+        eid, pos = _ebml_id(head, 0)
+        size, pos, _unk = _ebml_size(head, pos)
+        pos += size
+        eid, pos = _ebml_id(head, pos)
+        if eid != 0x18538067:
+            return None
+        seg_size, pos, seg_unknown = _ebml_size(head, pos)
+        seg_start = pos
+        seg_end = self.size if seg_unknown else min(self.size, seg_start + seg_size)
+        scale = 1_000_000
+        cues_pos = None
+        for _ in range(256):
+            if pos >= seg_end:
+                break
+            chunk = self.read(pos, 16)
+            if len(chunk) < 2:
+                break
+            eid, p = _ebml_id(chunk, 0)
+            size, p, unknown = _ebml_size(chunk, p)
+            data_start = pos + p
+            if eid == 0x1F43B675 or unknown:  # first Cluster: metadata section is over
+                break
+            if eid == 0x1549A966 and size <= MAX_METADATA_BYTES:  # Info
+                info = self.read(data_start, size)
+                duration = None
+                for cid, cdata in _ebml_children(info):
+                    if cid == 0x2AD7B1:
+                        scale = int.from_bytes(cdata, "big") or scale
+                    elif cid == 0x4489:
+                        duration = struct.unpack(">f" if len(cdata) == 4 else ">d", cdata)[0]
+                if duration:
+                    return duration * scale / 1e9, "webm", "info"
+            elif eid == 0x114D9B74 and size <= MAX_METADATA_BYTES:  # SeekHead
+                for cid, seek in _ebml_children(self.read(data_start, size)):
+                    if cid != 0x4DBB:
+                        continue
+                    target = position = None
+                    for sid, sdata in _ebml_children(seek):
+                        if sid == 0x53AB:
+                            target = int.from_bytes(sdata, "big")
+                        elif sid == 0x53AC:
+                            position = int.from_bytes(sdata, "big")
+                    if target == 0x1C53BB6B and position is not None:
+                        cues_pos = seg_start + position
+            pos = data_start + size
+        best = 0.0
+        if cues_pos is not None and cues_pos < self.size:
+            chunk = self.read(cues_pos, 16)
+            eid, p = _ebml_id(chunk, 0)
+            size, p, _unk = _ebml_size(chunk, p)
+            if eid == 0x1C53BB6B and size <= MAX_METADATA_BYTES:
+                for cid, point in _ebml_children(self.read(cues_pos + p, size)):
+                    if cid == 0xBB:
+                        for pid, pdata in _ebml_children(point):
+                            if pid == 0xB3:
+                                best = max(best, int.from_bytes(pdata, "big") * scale / 1e9)
+        tail_time = _last_cluster_time(self.tail(), scale)
+        if tail_time > best:
+            return tail_time, "webm", "last_cluster"
+        if best > 0:
+            return best, "webm", "cues"
+        return None
+
+    # -- decoder input -----------------------------------------------------------
+
+    def profile_prefix_bytes(self, seconds: float, floor: int, cap: int) -> int:
+        """Bytes of head likely to hold the first ``seconds`` of media (proportional to duration)."""
+        dur, _container, _basis = self.duration()
+        if dur <= 0:
+            return min(cap, self.size)
+        est = int(self.size * min(1.0, (float(seconds) + 2.0) / dur) * 1.25) + 256 * 1024
+        return max(min(floor, self.size), min(cap, est, self.size))
+
+    def materialize(self, path: str, prefix_bytes: int, sparse_max_bytes: int = 8 * 1024 ** 3) -> int:
+        """Write head prefix + tail + metadata ranges at their offsets into ``path``; returns bytes written.
+
+        The prefix is never shorter than the probe's head, and the tail is
+        fetched if the duration parse did not need it, so ffprobe sees real
+        bytes at both ends of containers this module does not parse. Prefix
+        bytes past the cached head are streamed into the file in
+        ``MATERIALIZE_CHUNK_BYTES`` ranges and not kept on the probe.
+        """
+        with self._lock:
+            return self._materialize_locked(path, prefix_bytes, sparse_max_bytes)
+
+    def _materialize_locked(self, path: str, prefix_bytes: int, sparse_max_bytes: int) -> int:
+        self.head()
+        if self.size <= sparse_max_bytes:
+            self.tail()
+        head = self._head  # may extend past prefix_bytes (small objects are fetched whole)
+        prefix_end = min(self.size, int(prefix_bytes or 0))
+        with open(path, "wb") as f:
+            written = 0
+            if self.size <= sparse_max_bytes:
+                f.truncate(self.size)
+                pieces: List[Tuple[int, bytes]] = [(self._tail_start, self._tail)] if self._tail else []
+                pieces.extend(self._extras.items())
+                for start, data in pieces:
+                    if start + len(data) > len(head):
+                        f.seek(start)
+                        f.write(data)
+                        written += len(data)
+            f.seek(0)
+            f.write(head)
+            written += len(head)
+            pos = len(head)
+            while pos < prefix_end:
+                data = self._fetch(pos, min(prefix_end, pos + MATERIALIZE_CHUNK_BYTES) - 1)
+                if not data:
+                    break
+                f.write(data)
+                pos += len(data)
+                written += len(data)
+        return written
+
+
+# -- helpers ---------------------------------------------------------------------
+
+def _find_box(body: Optional[bytes], typ: bytes) -> Optional[bytes]:
+    if not body:
+        return None
+    pos = 0
+    while pos + 8 <= len(body):
+        size, t = struct.unpack(">I4s", body[pos:pos + 8])
+        hlen = 8
+        if size == 1:
+            size = struct.unpack(">Q", body[pos + 8:pos + 16])[0]
+            hlen = 16
+        elif size == 0:
+            size = len(body) - pos
+        if size < hlen:
+            return None
+        if t == typ:
+            return body[pos + hlen:pos + size]
+        pos += size
+    return None
+
+
+_MP3_BITRATES = {
+    (3, 3): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (3, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (3, 1): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 3): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_BITRATES[(2, 1)] = _MP3_BITRATES[(2, 2)]
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+def _mp3_sync_at(buf: bytes, i: int) -> bool:
+    return len(buf) >= i + 2 and buf[i] == 0xFF and (buf[i + 1] & 0xE0) == 0xE0
+
+
+def _mp3_frame_header(buf: bytes, i: int) -> Optional[dict]:
+    if not _mp3_sync_at(buf, i) or len(buf) < i + 4:
+        return None
+    h = int.from_bytes(buf[i:i + 4], "big")
+    version = (h >> 19) & 3  # 3: MPEG1, 2: MPEG2, 0: MPEG2.5
+    layer = (h >> 17) & 3  # 3: I, 2: II, 1: III
+    br_idx = (h >> 12) & 0xF
+    sr_idx = (h >> 10) & 3
+    if version == 1 or layer == 0 or br_idx in (0, 15) or sr_idx == 3:
+        return None
+    padding = (h >> 9) & 1
+    mono = ((h >> 6) & 3) == 3
+    bitrate = _MP3_BITRATES[(3 if version == 3 else 2, layer)][br_idx]
+    sr = _MP3_SAMPLE_RATES[version][sr_idx]
+    if layer == 3:
+        spf = 384
+        frame_len = (12 * bitrate * 1000 // sr + padding) * 4
+    else:
+        spf = 1152 if (layer == 2 or version == 3) else 576
+        frame_len = (spf // 8) * bitrate * 1000 // sr + padding
+    if version == 3:
+        xing = 4 + (17 if mono else 32)
+    else:
+        xing = 4 + (9 if mono else 17)
+    return {
+        "bitrate_kbps": bitrate,
+        "sample_rate": sr,
+        "samples_per_frame": spf,
+        "frame_len": max(frame_len, 1),
+        "xing_offset": xing,
+    }
+
+
+def _ebml_id(buf: bytes, pos: int) -> Tuple[int, int]:
+    first = buf[pos]
+    length = 1
+    mask = 0x80
+    while length <= 4 and not (first & mask):
+        mask >>= 1
+        length += 1
+    if length > 4:
+        raise ValueError("bad EBML id")
+    return int.from_bytes(buf[pos:pos + length], "big"), pos + length
+
+
+def _ebml_size(buf: bytes, pos: int) -> Tuple[int, int, bool]:
+    first = buf[pos]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not (first & mask):
+        mask >>= 1
+        length += 1
+    if length > 8:
+        raise ValueError("bad EBML size")
+    value = first & (mask - 1)
+    for b in buf[pos + 1:pos + length]:
+        value = (value << 8) | b
+    unknown = value == (1 << (7 * length)) - 1
+    return value, pos + length, unknown
+
+
+def _ebml_children(buf: bytes):
+    pos = 0
+    while pos + 2 <= len(buf):
+        try:
+            eid, p = _ebml_id(buf, pos)
+            size, p, unknown = _ebml_size(buf, p)
+        except (ValueError, IndexError):
+            return
+        if unknown:
+            size = len(buf) - p
+        yield eid, buf[p:p + size]
+        pos = p + size
+
+
+def _last_cluster_time(tail: bytes, scale: int) -> float:
+    """Largest block time in the last parseable Cluster of ``tail`` (seconds, 0.0 if none)."""
+    marker = b"\x1f\x43\xb6\x75"
+    end = len(tail)
+    for _ in range(32):
+        idx = tail.rfind(marker, 0, end)
+        if idx < 0:
+            return 0.0
+        end = idx
+        try:
+            size, p, unknown = _ebml_size(tail, idx + 4)
+            body = tail[p:] if unknown or p + size > len(tail) else tail[p:p + size]
+            cluster_tc = None
+            max_rel = 0
+            for cid, cdata in _ebml_children(body):
+                if cid == 0xE7:
+                    cluster_tc = int.from_bytes(cdata, "big")
+                elif cid in (0xA3, 0xA0):
+                    block = cdata
+                    if cid == 0xA0:
+                        block = next((d for i, d in _ebml_children(cdata) if i == 0xA1), b"")
+                    if len(block) >= 4:
+                        _track, q, _u = _ebml_size(block, 0)
+                        max_rel = max(max_rel, struct.unpack(">h", block[q:q + 2])[0])
+            if cluster_tc is not None:
+                return (cluster_tc + max_rel) * scale / 1e9
+        except (ValueError, IndexError, struct.error):
+            continue
+    return 0.0
+
+
+def media_probe_sizeof(probe: Any) -> int:
+    """Byte budget of a cached :class:`MediaProbe` (for ``BoundedNamespace(sizeof=...)``)."""
+    return int(getattr(probe, "cached_bytes", 0) or 0)
+
+
+def s3_media_probe(s3_client, bucket: str, key: str, **kwargs) -> Optional[MediaProbe]:
+    """MediaProbe over an S3/R2 object (None when HEAD fails)."""
+    try:
+        ho = s3_client.head_object(Bucket=bucket, Key=key)
+        size = int(ho.get("ContentLength") or 0)
+    except Exception as e:
+        logging.info("media probe head failed key=%s: %s", str(key)[-48:], e)
+        return None
+    if size <= 0:
+        return None
+
+    def _fetch(start: int, end: int) -> bytes:
+        resp = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}")
+        return resp["Body"].read()
+
+    return MediaProbe(_fetch, size, key, **kwargs)
+
+
+def media_probe_sparse_max_bytes() -> int:
+    try:
+        return int(os.environ.get("MEDIA_PROBE_SPARSE_MAX_BYTES", "") or 8 * 1024 ** 3)
+    except (TypeError, ValueError):
+        return 8 * 1024 ** 3
@@ -262,20 +262,9 @@ def medical_entitlement_for_access_token(access_token: str) -> Tuple[bool, Optio
         return False, None, "medical_auth_required"
     try:
         sa = _sa()
-        supabase_url, service_key, _ = sa._supabase_rest_config()
-        r = sa._supabase_http_request(
-            "GET",
-            f"{supabase_url}/auth/v1/user",
-            headers={
-                "Authorization": f"Bearer {token}",
-                "apikey": service_key,
-            },
-            timeout=8,
-            retries=1,
-        )
-        if r.status_code != 200:
+        user = sa._supabase_auth_user_for_token(token)
+        if not user:
             return False, None, "medical_auth_invalid"
-        user = r.json() if r.text else {}
         user_id = str((user or {}).get("id") or "").strip()
         if not user_id:
             return False, None, "medical_auth_invalid"
@@ -1,3 +1,6 @@
+import array
+import math
+import mmap
 import os
 import pathlib
 import re
@@ -5,8 +8,15 @@ import shlex
 import struct
 import subprocess
 import sys
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+try:
+    import numpy as _np
+except ImportError:  # optional: pure-Python crossfade in _crossfade_frames
+    _np = None
+
 
 def _split_command(command):
     return shlex.split(command, posix=(os.name != "nt"))
@@ -159,108 +169,432 @@ def _is_htdemucs_model(model_name):
     return name.startswith("htdemucs")
 
 
-def _build_demucs_command(demucs_input, out_root, model_name, device=None, jobs=None):
+def _demucs_settings(model_name, device=None, jobs=None):
     device = (device or os.environ.get("TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_DEVICE") or "cpu").strip() or "cpu"
     jobs = max(1, int(jobs if jobs is not None else _env_int("TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_JOBS", 1)))
     shifts = max(0, _env_int("TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_SHIFTS", 0))
+    segment = None
+    if not _is_htdemucs_model(model_name):
+        segment = _env_float("TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_SEGMENT", 8.0)
+        segment = max(1, int(round(segment))) if segment > 0 else None
+    return {"device": device, "jobs": jobs, "shifts": shifts, "segment": segment}
+
+
+def _build_demucs_command(demucs_input, out_root, model_name, device=None, jobs=None):
     model = str(model_name or "mdx_extra_q")
+    settings = _demucs_settings(model, device=device, jobs=jobs)
     cmd = [
         os.environ.get("PYTHON", sys.executable or "python"),
         "-m",
         "demucs",
         "--two-stems=vocals",
         "-d",
-        device,
+        settings["device"],
         "-j",
-        str(jobs),
+        str(settings["jobs"]),
         "--shifts",
-        str(shifts),
+        str(settings["shifts"]),
         "-n",
         model,
         "--out",
         str(out_root),
     ]
-    if not _is_htdemucs_model(model):
-        segment = _env_float("TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_SEGMENT", 8.0)
-        if segment > 0:
-            cmd += ["--segment", str(max(1, int(round(segment))))]
+    if settings["segment"] is not None:
+        cmd += ["--segment", str(settings["segment"])]
     cmd.append(str(demucs_input))
     return cmd
 
 
-def _split_wav_into_chunks(ffmpeg_path, wav_path, work_dir, chunk_sec, timeout_sec, env):
-    duration = _probe_media_duration_sec(ffmpeg_path, wav_path, timeout_sec=min(120, timeout_sec)) or 0.0
-    chunk_sec = max(30.0, float(chunk_sec or 0))
-    if duration <= 0 or duration <= chunk_sec + 1.0:
+_WAV_COPY_BLOCK_BYTES = 4 * 1024 * 1024
+_WAV_FORMAT_PCM = 1
+_WAV_FORMAT_FLOAT = 3
+_WAV_FORMAT_EXTENSIBLE = 0xFFFE
+# array typecodes for the sample formats we can crossfade; anything else is cut mid-overlap.
+_WAV_ARRAY_CODES = {
+    (_WAV_FORMAT_PCM, 16): "h",
+    (_WAV_FORMAT_PCM, 32): "i",
+    (_WAV_FORMAT_FLOAT, 32): "f",
+    (_WAV_FORMAT_FLOAT, 64): "d",
+}
+
+
+def _read_wav_layout(wav_path):
+    """Locate the fmt and data chunks of a PCM/float RIFF WAV without decoding it."""
+    size = os.path.getsize(wav_path)
+    with open(wav_path, "rb") as f:
+        head = f.read(12)
+        if len(head) < 12 or head[:4] not in (b"RIFF", b"RF64") or head[8:12] != b"WAVE":
+            raise ValueError(f"not a RIFF/WAVE file: {wav_path}")
+        fmt = None
+        pos = 12
+        while True:
+            f.seek(pos)
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"no data chunk in {wav_path}")
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = f.read(chunk_size)
+            elif chunk_id == b"data":
+                break
+            pos += 8 + chunk_size + (chunk_size & 1)
+    if fmt is None or len(fmt) < 16:
+        raise ValueError(f"missing fmt chunk in {wav_path}")
+    format_tag, channels, sample_rate, _byte_rate, block_align, bits = struct.unpack("<HHIIHH", fmt[:16])
+    if format_tag == _WAV_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        format_tag = struct.unpack("<H", fmt[24:26])[0]
+    if format_tag not in (_WAV_FORMAT_PCM, _WAV_FORMAT_FLOAT) or not channels or not block_align or not sample_rate:
+        raise ValueError(f"unsupported WAV format tag={format_tag} channels={channels} in {wav_path}")
+    data_offset = pos + 8
+    # Sizes are 0 / 0xFFFFFFFF when the writer could not seek back or the data passed 4 GiB (RF64).
+    if chunk_size in (0, 0xFFFFFFFF) or data_offset + chunk_size > size:
+        chunk_size = size - data_offset
+    return {
+        "fmt": fmt,
+        "format_tag": format_tag,
+        "channels": channels,
+        "sample_rate": sample_rate,
+        "bits": bits,
+        "block_align": block_align,
+        "data_offset": data_offset,
+        "frames": chunk_size // block_align,
+    }
+
+
+def _wav_header(fmt, data_bytes):
+    pad = b"\0" if len(fmt) & 1 else b""
+    data_bytes = min(int(data_bytes), 0xFFFFFFFF - 20 - len(fmt) - len(pad))
+    riff_size = 4 + 8 + len(fmt) + len(pad) + 8 + data_bytes
+    return (
+        b"RIFF" + struct.pack("<I", riff_size) + b"WAVE"
+        + b"fmt " + struct.pack("<I", len(fmt)) + fmt + pad
+        + b"data" + struct.pack("<I", data_bytes)
+    )
+
+
+def _copy_range(src, lo, hi, out):
+    for pos in range(lo, hi, _WAV_COPY_BLOCK_BYTES):
+        out.write(src[pos:min(hi, pos + _WAV_COPY_BLOCK_BYTES)])
+
+
+def _plan_wav_chunks(total_frames, sample_rate, chunk_sec, overlap_sec=0.0):
+    """Frame ranges [(start, end), ...] of chunk_sec, each overlapping the previous by overlap_sec.
+
+    A tail shorter than a quarter chunk is folded into the last chunk instead of
+    becoming a sliver that Demucs separates badly.
+    """
+    chunk = int(round(max(30.0, float(chunk_sec or 0)) * sample_rate))
+    if total_frames <= chunk + sample_rate:
+        return [(0, total_frames)]
+    overlap = min(int(round(max(0.0, float(overlap_sec or 0)) * sample_rate)), chunk // 4)
+    ranges = []
+    start = 0
+    while True:
+        end = start + chunk
+        if total_frames - end <= chunk // 4:
+            ranges.append((start, total_frames))
+            return ranges
+        ranges.append((start, end))
+        start = end - overlap
+
+
+def _split_wav_into_chunks(wav_path, work_dir, chunk_sec, overlap_sec=0.0):
+    """Cut a PCM WAV into overlapping chunk WAVs in one pass; returns [(path, start_sec), ...].
+
+    Slices the data chunk through mmap and copies each range verbatim, so every
+    byte of the input is read once (plus the overlaps) and no ffmpeg is spawned.
+    """
+    layout = _read_wav_layout(wav_path)
+    sample_rate = layout["sample_rate"]
+    block_align = layout["block_align"]
+    ranges = _plan_wav_chunks(layout["frames"], sample_rate, chunk_sec, overlap_sec)
+    if len(ranges) == 1:
         return [(str(wav_path), 0.0)]
 
-    ff = ffmpeg_path or "ffmpeg"
     chunks = []
-    start = 0.0
-    idx = 0
-    while start < duration - 0.05:
-        seg_dur = min(chunk_sec, max(0.0, duration - start))
-        if seg_dur <= 0.05:
-            break
-        chunk_path = pathlib.Path(work_dir) / f"demucs_chunk_{idx:04d}.wav"
-        cmd = [
-            ff,
-            "-hide_banner",
-            "-loglevel", "error",
-            "-y",
-            "-i", str(wav_path),
-            "-ss", f"{start:.6f}",
-            "-t", f"{seg_dur:.6f}",
-            "-vn",
-            "-ac", "2",
-            "-ar", "44100",
-            "-c:a", "pcm_s16le",
-            str(chunk_path),
-        ]
-        conv = _run_command(cmd, timeout_sec, env=env)
-        if conv.returncode != 0 or not chunk_path.is_file() or chunk_path.stat().st_size < 1024:
-            raise RuntimeError(_format_subprocess_failure("demucs chunk split failed", cmd, conv))
-        chunks.append((str(chunk_path), start))
-        start += seg_dur
-        idx += 1
-    return chunks or [(str(wav_path), 0.0)]
+    with open(wav_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as src:
+        if hasattr(src, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            src.madvise(mmap.MADV_SEQUENTIAL)
+        for idx, (start, end) in enumerate(ranges):
+            chunk_path = pathlib.Path(work_dir) / f"demucs_chunk_{idx:04d}.wav"
+            lo = layout["data_offset"] + start * block_align
+            hi = layout["data_offset"] + end * block_align
+            with open(chunk_path, "wb") as out:
+                out.write(_wav_header(layout["fmt"], hi - lo))
+                _copy_range(src, lo, hi, out)
+            chunks.append((str(chunk_path), start / sample_rate))
+    return chunks
+
+
+def _crossfade_frames(fading_out, fading_in, layout):
+    """Mix two equal-length overlap regions with a raised-cosine crossfade.
+
+    The fade gains sum to 1 at every frame, which keeps the level flat for two
+    estimates of the same vocal (an equal-power fade would bump it by up to 3 dB).
+    """
+    code = _WAV_ARRAY_CODES.get((layout["format_tag"], layout["bits"]))
+    if code is None:
+        half = (len(fading_out) // layout["block_align"] // 2) * layout["block_align"]
+        return fading_out[:half] + fading_in[half:]
+    channels = layout["channels"]
+    frames = len(fading_out) // layout["block_align"]
+    is_int = code in ("h", "i")
+    if _np is not None:
+        dtype = _np.dtype(code).newbyteorder("<")
+        a = _np.frombuffer(fading_out, dtype=dtype).reshape(frames, channels).astype(_np.float64)
+        b = _np.frombuffer(fading_in, dtype=dtype).reshape(frames, channels).astype(_np.float64)
+        w = 0.5 - 0.5 * _np.cos(_np.pi * (_np.arange(frames) + 0.5) / frames)
+        mixed = a + (b - a) * w[:, None]
+        return (_np.rint(mixed) if is_int else mixed).astype(dtype).tobytes()
+    a = array.array(code, fading_out)
+    b = array.array(code, fading_in)
+    if sys.byteorder == "big":
+        a.byteswap()
+        b.byteswap()
+    weights = [0.5 - 0.5 * math.cos(math.pi * (j + 0.5) / frames) for j in range(frames)]
+    if channels > 1:
+        weights = [w for w in weights for _ in range(channels)]
+    # A convex mix of two in-range samples is in range, so integers need no clamping.
+    if is_int:
+        mixed = array.array(code, [round(x + (y - x) * w) for x, y, w in zip(a, b, weights)])
+    else:
+        mixed = array.array(code, [x + (y - x) * w for x, y, w in zip(a, b, weights)])
+    if sys.byteorder == "big":
+        mixed.byteswap()
+    return mixed.tobytes()
+
 
+def _overlap_add_wav_files(wav_paths, offsets_sec, out_path):
+    """Merge per-chunk WAVs placed at offsets_sec, crossfading wherever neighbours overlap.
 
-def _concat_wav_files(ffmpeg_path, wav_paths, out_path, timeout_sec, env):
+    Gaps (a chunk came back shorter than planned) are filled with silence so the
+    merged stem stays on the source timeline.
+    """
     paths = [str(p) for p in (wav_paths or []) if p]
     if not paths:
-        raise RuntimeError("no vocal chunks to concatenate")
+        raise RuntimeError("no vocal chunks to merge")
     if len(paths) == 1:
         return paths[0]
 
-    ff = ffmpeg_path or "ffmpeg"
+    layouts = [_read_wav_layout(p) for p in paths]
+    first = layouts[0]
+    shape = (first["format_tag"], first["channels"], first["sample_rate"], first["bits"])
+    for path, layout in zip(paths, layouts):
+        if (layout["format_tag"], layout["channels"], layout["sample_rate"], layout["bits"]) != shape:
+            raise ValueError(f"vocal chunk format differs from the first chunk: {path}")
+    block_align = first["block_align"]
+    starts = [int(round(float(off) * first["sample_rate"])) for off in offsets_sec]
+    frames = [layout["frames"] for layout in layouts]
+
+    # overlaps[i]: frames shared by chunk i and chunk i + 1.
+    overlaps = []
+    head = 0
+    for i in range(len(paths) - 1):
+        shared = starts[i] + frames[i] - starts[i + 1]
+        shared = max(0, min(shared, frames[i] - head, frames[i + 1]))
+        overlaps.append(shared)
+        head = shared
+    overlaps.append(0)
+
     out_path = str(out_path)
-    list_path = pathlib.Path(out_path).with_suffix(".concat.txt")
-    lines = []
-    for path in paths:
-        escaped = str(path).replace("'", "'\\''")
-        lines.append(f"file '{escaped}'")
-    list_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
-    cmd = [
-        ff,
-        "-hide_banner",
-        "-loglevel", "error",
-        "-y",
-        "-f", "concat",
-        "-safe", "0",
-        "-i", str(list_path),
-        "-c:a", "pcm_s16le",
-        out_path,
-    ]
-    conv = _run_command(cmd, timeout_sec, env=env)
-    if conv.returncode != 0 or not os.path.isfile(out_path) or os.path.getsize(out_path) < 1024:
-        raise RuntimeError(_format_subprocess_failure("vocals chunk concat failed", cmd, conv))
+    written = 0
+    tail = b""
+    with open(out_path, "wb") as out:
+        out.write(_wav_header(first["fmt"], 0))
+        for i, (path, layout) in enumerate(zip(paths, layouts)):
+            head = overlaps[i - 1] if i else 0
+            if i and not head:
+                gap = starts[i] - (starts[i - 1] + frames[i - 1])
+                if gap > 0:
+                    out.write(b"\0" * (gap * block_align))
+                    written += gap * block_align
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as src:
+                base = layout["data_offset"]
+                body_lo = base + head * block_align
+                body_hi = base + (frames[i] - overlaps[i]) * block_align
+                if head:
+                    mixed = _crossfade_frames(tail, src[base:body_lo], first)
+                    out.write(mixed)
+                    written += len(mixed)
+                _copy_range(src, body_lo, body_hi, out)
+                written += body_hi - body_lo
+                tail = src[body_hi:base + frames[i] * block_align]
+        out.write(tail)
+        written += len(tail)
+        out.seek(0)
+        out.write(_wav_header(first["fmt"], written))
     return out_path
 
 
-def _run_demucs_once(demucs_input, out_root, model_name, timeout_sec, env, command_template=None):
+# Demucs in-process: the model is loaded once per (model, device) and shared by
+# every chunk and job this process runs; apply_model only reads the weights.
+_DEMUCS_MODELS = {}
+_DEMUCS_MODELS_LOCK = threading.Lock()
+_DEMUCS_API = None
+_DEMUCS_API_ERROR = None
+# Set when an in-process chunk overran its timeout; its thread cannot be killed, so later chunks use the CLI.
+_DEMUCS_IN_PROCESS_STUCK = False
+
+
+def _demucs_api():
+    """(torch, get_model, apply_model, audio helpers) or None when demucs is not importable here."""
+    global _DEMUCS_API, _DEMUCS_API_ERROR
+    if _DEMUCS_API is None and _DEMUCS_API_ERROR is None:
+        try:
+            import torch
+            from demucs import audio as demucs_audio
+            from demucs.apply import apply_model
+            from demucs.pretrained import get_model
+
+            _DEMUCS_API = (torch, get_model, apply_model, demucs_audio)
+        except Exception as e:  # ImportError, or a broken torch/diffq install
+            _DEMUCS_API_ERROR = e
+            print(f"[separate_vocals] in-process demucs unavailable, using the CLI: {e}", flush=True)
+    return _DEMUCS_API
+
+
+def _use_in_process_demucs(command_template=None):
+    # Opt-in until bench_demucs_worker.py has been run against real torch/demucs on the worker image.
+    if command_template or _DEMUCS_IN_PROCESS_STUCK or not _env_bool("TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_IN_PROCESS", False):
+        return False
+    # Under gevent (siteapp) inference would hold the hub for minutes; keep the subprocess CLI there.
+    gevent_monkey = sys.modules.get("gevent.monkey")
+    if gevent_monkey is not None and gevent_monkey.is_module_patched("threading"):
+        return False
+    # The WAV <-> tensor conversion goes through numpy (always installed alongside torch in practice).
+    return _np is not None and _demucs_api() is not None
+
+
+def _demucs_threads_per_chunk(parallel):
+    """Torch intra-op threads per concurrently running chunk (default: CPUs split across the pool)."""
+    threads = _env_int("TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_THREADS", 0)
+    if threads > 0:
+        return threads
+    return max(1, (os.cpu_count() or 1) // max(1, int(parallel or 1)))
+
+
+def _load_demucs_model(model_name, device=None):
+    """Load (or return the already loaded) Demucs model for this process."""
+    model_name = str(model_name or "mdx_extra_q")
+    device = _demucs_settings(model_name)["device"] if device is None else device
+    key = (model_name, device)
+    with _DEMUCS_MODELS_LOCK:
+        model = _DEMUCS_MODELS.get(key)
+        if model is None:
+            api = _demucs_api()
+            if api is None:
+                raise RuntimeError(f"demucs is not importable: {_DEMUCS_API_ERROR}")
+            _torch, get_model, _apply_model, _audio = api
+            started = time.monotonic()
+            model = get_model(model_name)
+            # Keep the weights on the target device so apply_model's .to(device) calls are no-ops
+            # and concurrent chunks never move a shared sub-model under each other.
+            model.to(device)
+            model.eval()
+            _DEMUCS_MODELS[key] = model
+            print(
+                f"[separate_vocals] demucs model loaded model={model_name} device={device} "
+                f"load_sec={time.monotonic() - started:.2f}",
+                flush=True,
+            )
+    return model
+
+
+def preload_demucs_model(model_name=None):
+    """Warm the in-process model at worker start; returns False when the CLI path will be used."""
+    if not _use_in_process_demucs():
+        return False
+    _load_demucs_model(model_name or os.environ.get("TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_MODEL") or "mdx_extra_q")
+    return True
+
+
+def _read_wav_tensor(torch, wav_path):
+    layout = _read_wav_layout(wav_path)
+    code = _WAV_ARRAY_CODES.get((layout["format_tag"], layout["bits"]))
+    if code is None:
+        raise ValueError(f"unsupported demucs chunk sample format in {wav_path}")
+    with open(wav_path, "rb") as f:
+        f.seek(layout["data_offset"])
+        raw = f.read(layout["frames"] * layout["block_align"])
+    samples = _np.frombuffer(raw, dtype=_np.dtype(code).newbyteorder("<")).astype(_np.float32)
+    if code in ("h", "i"):
+        samples /= float(2 ** (layout["bits"] - 1))
+    wav = torch.from_numpy(samples.reshape(-1, layout["channels"]).T.copy())
+    return wav, layout["sample_rate"]
+
+
+def _run_demucs_in_process(demucs_input, out_root, model_name, threads=None):
+    """Same steps and output layout as `python -m demucs --two-stems=vocals`, minus the start-up."""
+    torch, _get_model, apply_model, demucs_audio = _demucs_api()
+    settings = _demucs_settings(model_name)
+    model = _load_demucs_model(model_name, settings["device"])
+    if threads:
+        torch.set_num_threads(int(threads))
+
+    wav, sample_rate = _read_wav_tensor(torch, demucs_input)
+    if sample_rate != model.samplerate or wav.shape[0] != model.audio_channels:
+        wav = demucs_audio.convert_audio(wav, sample_rate, model.samplerate, model.audio_channels)
+    ref = wav.mean(0)
+    mean, std = ref.mean(), ref.std() + 1e-8  # epsilon: a silent chunk would otherwise turn into NaNs
+    with torch.no_grad():
+        sources = apply_model(
+            model,
+            ((wav - mean) / std)[None],
+            device=settings["device"],
+            shifts=settings["shifts"],
+            split=True,
+            overlap=0.25,
+            progress=False,
+            num_workers=settings["jobs"],
+            segment=settings["segment"],
+        )[0]
+    vocals = sources[model.sources.index("vocals")] * std + mean
+
+    pcm = demucs_audio.i16_pcm(demucs_audio.prevent_clip(vocals.cpu(), mode="rescale"))
+    data = pcm.t().contiguous().numpy().astype("<i2").tobytes()
+    channels = pcm.shape[0]
+    block_align = channels * 2
+    fmt = struct.pack("<HHIIHH", _WAV_FORMAT_PCM, channels, model.samplerate, model.samplerate * block_align, block_align, 16)
+    out_dir = pathlib.Path(out_root) / str(model_name) / pathlib.Path(demucs_input).stem
+    out_dir.mkdir(parents=True, exist_ok=True)
+    vocals_path = out_dir / "vocals.wav"
+    with open(vocals_path, "wb") as f:
+        f.write(_wav_header(fmt, len(data)))
+        f.write(data)
+    return str(vocals_path)
+
+
+def _run_demucs_in_process_with_timeout(demucs_input, out_root, model_name, timeout_sec, threads=None):
+    """_run_demucs_in_process on a watchdog thread; raises RuntimeError after timeout_sec like the CLI path.
+
+    A thread cannot be killed, so an overrunning chunk is abandoned (daemon) and this process stops
+    using in-process Demucs: the remaining chunks and jobs go through the killable subprocess.
+    """
+    global _DEMUCS_IN_PROCESS_STUCK
+    outcome = {}
+
+    def _infer():
+        try:
+            outcome["path"] = _run_demucs_in_process(demucs_input, out_root, model_name, threads=threads)
+        except BaseException as e:
+            outcome["error"] = e
+
+    worker = threading.Thread(target=_infer, name="demucs-inference", daemon=True)
+    worker.start()
+    worker.join(timeout_sec)
+    if worker.is_alive():
+        _DEMUCS_IN_PROCESS_STUCK = True
+        raise RuntimeError(f"vocal separation timed out after {timeout_sec}s (in-process demucs)")
+    if "error" in outcome:
+        raise RuntimeError(f"vocal separation failed (in-process demucs): {outcome['error']}") from outcome["error"]
+    return outcome["path"]
+
+
+def _run_demucs_once(demucs_input, out_root, model_name, timeout_sec, env, command_template=None, threads=None):
     out_root = pathlib.Path(out_root)
     out_root.mkdir(parents=True, exist_ok=True)
+    if _use_in_process_demucs(command_template):
+        return _run_demucs_in_process_with_timeout(demucs_input, out_root, model_name, timeout_sec, threads=threads)
     if command_template:
         rendered = command_template.format(
             input=str(demucs_input),
@@ -428,12 +762,20 @@ def _chunk_parallel_workers(num_chunks):
 
 
 def _run_demucs_chunks(chunks, out_root, model_name, per_chunk_timeout, demucs_env, command_template=None):
-    """Run Demucs on each audio chunk; process up to CHUNK_PARALLEL chunks concurrently."""
+    """Run Demucs on each audio chunk; process up to CHUNK_PARALLEL chunks concurrently.
+
+    In-process, the pool's threads share one loaded model and split the CPUs between
+    them; otherwise each chunk is a `python -m demucs` subprocess.
+    """
     if not chunks:
         return []
 
     parallel = _chunk_parallel_workers(len(chunks))
     use_custom_template = command_template if len(chunks) == 1 else None
+    threads = None
+    if _use_in_process_demucs(use_custom_template):
+        threads = _demucs_threads_per_chunk(parallel)
+        print(f"[separate_vocals] demucs in-process threads_per_chunk={threads}", flush=True)
 
     def _one(idx_chunk):
         idx, chunk_path, _chunk_offset = idx_chunk
@@ -445,6 +787,7 @@ def _run_demucs_chunks(chunks, out_root, model_name, per_chunk_timeout, demucs_e
             per_chunk_timeout,
             demucs_env,
             command_template=use_custom_template,
+            threads=threads,
         )
         return idx, vocals_path
 
@@ -529,7 +872,8 @@ def separate_vocals(input_path, work_dir, ffmpeg_path="ffmpeg", timeout_sec=1800
     Uses Demucs by default:
       python -m demucs --two-stems=vocals -d cpu --shifts 0 -n mdx_extra_q --out <work_dir>/separator <input>
 
-    Long tracks are split into short chunks on CPU to avoid OOM on small servers.
+    Long tracks are split into short overlapping chunks on CPU to avoid OOM on small servers;
+    the chunk stems are merged back with crossfades over the overlaps.
     """
     src = pathlib.Path(input_path)
     out_root = pathlib.Path(work_dir) / "separator"
@@ -555,11 +899,14 @@ def separate_vocals(input_path, work_dir, ffmpeg_path="ffmpeg", timeout_sec=1800
 
     demucs_env = _subprocess_env_with_ffmpeg(ff, work_dir)
     chunk_sec = _env_float("TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_CHUNK_SEC", 120.0)
-    chunks = _split_wav_into_chunks(ff, demucs_input, work_dir, chunk_sec, min(600, timeout_sec), demucs_env)
+    overlap_sec = _env_float("TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_CHUNK_OVERLAP_SEC", 4.0)
+    split_started = time.monotonic()
+    chunks = _split_wav_into_chunks(demucs_input, work_dir, chunk_sec, overlap_sec)
     parallel = _chunk_parallel_workers(len(chunks))
     print(
         f"[separate_vocals] source_duration_sec={source_duration_sec:.1f} "
-        f"chunk_sec={chunk_sec} chunks={len(chunks)} parallel={parallel}",
+        f"chunk_sec={chunk_sec} overlap_sec={overlap_sec} chunks={len(chunks)} parallel={parallel} "
+        f"split_sec={time.monotonic() - split_started:.2f}",
         flush=True,
     )
 
@@ -576,12 +923,10 @@ def separate_vocals(input_path, work_dir, ffmpeg_path="ffmpeg", timeout_sec=1800
     if len(vocals_paths) == 1:
         vocals_path = vocals_paths[0]
     else:
-        vocals_path = _concat_wav_files(
-            ff,
+        vocals_path = _overlap_add_wav_files(
             vocals_paths,
+            [offset for _path, offset in chunks],
             pathlib.Path(work_dir) / "vocals_merged.wav",
-            timeout_sec=min(600, timeout_sec),
-            env=demucs_env,
         )
 
     raw_duration_sec = _probe_media_duration_sec(ff, vocals_path, timeout_sec=min(120, timeout_sec)) or 0.0
@@ -2,7 +2,9 @@
 
 Wire into your existing RunPod handler:
 
-    from runpod_cpu_separate_vocals import handle_separate_vocals_task
+    from runpod_cpu_separate_vocals import handle_separate_vocals_task, preload_separator
+
+    preload_separator()  # once per worker process; the model is reused by every job
 
     def handler(job):
         inp = job.get("input") or {}
@@ -42,6 +44,19 @@ def _post_callback(callback_url, payload, timeout_sec=30):
         logger.exception("vocal separation callback failed url=%s", callback_url)
 
 
+def preload_separator(model_name=None):
+    """Load the Demucs model before the first job so no request pays the weight loading."""
+    try:
+        from music_vocal_separator import preload_demucs_model
+
+        loaded = preload_demucs_model(model_name)
+    except Exception:
+        logger.exception("demucs preload failed; the first job will load the model")
+        return False
+    print(f"[separate_vocals] preload in_process={loaded}", flush=True)
+    return loaded
+
+
 def handle_separate_vocals_task(inp):
     """Run Demucs on RunPod CPU and upload vocals WAV via presigned PUT."""
     job_id = str(inp.get("job_id") or inp.get("jobId") or "").strip()
@@ -0,0 +1,123 @@
+"""Process-wide registry of pooled S3 / R2 boto3 clients.
+
+Building a boto3 client resolves credentials, endpoints and loads botocore
+service models; on the hot paths (media streaming, presigns, transcript
+reads/writes) that cost dominated the actual request. Clients are
+thread-safe once built, so one client per (bucket profile, backend,
+accelerate) key is shared by every request and greenlet in the process,
+together with its urllib3 connection pool.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+
+
+def s3_max_pool_connections() -> int:
+    """Connection pool size per client (S3_MAX_POOL_CONNECTIONS, default 50)."""
+    try:
+        value = int(os.environ.get("S3_MAX_POOL_CONNECTIONS", "") or DEFAULT_MAX_POOL_CONNECTIONS)
+    except (TypeError, ValueError):
+        value = DEFAULT_MAX_POOL_CONNECTIONS
+    return max(1, min(value, 1000))
+
+
+def s3_client_registry_enabled() -> bool:
+    """S3_CLIENT_REGISTRY=0 restores one fresh client per call (debug escape hatch)."""
+    v = (os.environ.get("S3_CLIENT_REGISTRY") or "1").strip().lower()
+    return v not in ("0", "false", "no", "off")
+
+
+def credentials_fingerprint(access_key_id: Optional[str], secret_access_key: Optional[str]) -> str:
+    """Short digest so rotated credentials get a new client without keeping secrets in keys."""
+    raw = f"{access_key_id or ''}\0{secret_access_key or ''}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+class S3ClientRegistry:
+    """Lazily builds and caches one client per key.
+
+    ``factory`` is only called while holding the per-key build lock, so
+    concurrent first requests for the same key produce a single client.
+    """
+
+    def __init__(self) -> None:
+        self._clients: Dict[Hashable, Any] = {}
+        self._build_locks: Dict[Hashable, threading.Lock] = {}
+        self._guard = threading.Lock()
+        self._hits = 0
+        self._builds = 0
+        self._build_seconds = 0.0
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        client = self._clients.get(key)
+        if client is not None:
+            with self._guard:
+                self._hits += 1
+            return client
+        with self._guard:
+            lock = self._build_locks.get(key)
+            if lock is None:
+                lock = threading.Lock()
+                self._build_locks[key] = lock
+        with lock:
+            client = self._clients.get(key)
+            if client is not None:
+                with self._guard:
+                    self._hits += 1
+                return client
+            t0 = time.perf_counter()
+            client = factory()
+            elapsed = time.perf_counter() - t0
+            with self._guard:
+                self._clients[key] = client
+                self._builds += 1
+                self._build_seconds += elapsed
+            return client
+
+    def clear(self) -> None:
+        with self._guard:
+            self._clients.clear()
+            self._build_locks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._guard:
+            return {
+                "clients": len(self._clients),
+                "hits": self._hits,
+                "builds": self._builds,
+                "build_seconds": round(self._build_seconds, 4),
+                "keys": [_describe_key(k) for k in self._clients],
+            }
+
+
+def _describe_key(key: Hashable) -> Any:
+    """Stats-safe key: drop the credential fingerprint slot if present."""
+    if isinstance(key, tuple):
+        return [k for k in key if not (isinstance(k, str) and k.startswith("cred:"))]
+    return key
+
+
+def client_key(
+    profile: str,
+    use_r2: bool,
+    accelerate: bool,
+    region: str,
+    endpoint: Optional[str],
+    fingerprint: str,
+) -> Tuple[Any, ...]:
+    return (
+        str(profile or "default"),
+        "r2" if use_r2 else "aws",
+        bool(accelerate),
+        str(region or ""),
+        str(endpoint or ""),
+        f"cred:{fingerprint}",
+    )
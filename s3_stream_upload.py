@@ -0,0 +1,130 @@
+"""Multipart upload fed by a stream of unknown length (e.g. ffmpeg writing to a pipe).
+
+``upload_file`` needs the finished file on disk. :class:`StreamingMultipartUpload`
+instead takes bytes as they are produced, cuts them into fixed-size parts
+(R2 requires every part but the last to be the same size) and uploads up to
+``max_concurrency`` parts in parallel while the producer keeps writing.
+
+Memory is bounded by about ``(max_concurrency + 1) * part_size``: once that
+many parts are in flight, :meth:`write` blocks, which in turn holds back the
+producer. A failed part is retried; if it still fails, the next
+:meth:`write` or :meth:`complete` raises and the upload should be aborted.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+MIN_PART_BYTES = 5 * 1024 * 1024  # S3 / R2 minimum for every part but the last
+DEFAULT_PART_BYTES = 8 * 1024 * 1024
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+class StreamingMultipartUpload:
+    """``create_multipart_upload`` on construction; :meth:`write` ... :meth:`complete` (or :meth:`abort`)."""
+
+    def __init__(
+        self,
+        client: Any,
+        bucket: str,
+        key: str,
+        *,
+        part_size: int = DEFAULT_PART_BYTES,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        extra_args: Optional[Mapping[str, Any]] = None,
+        retries: int = 2,
+        on_part: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = max(MIN_PART_BYTES, int(part_size))
+        self.retries = max(0, int(retries))
+        self._on_part = on_part
+        self.upload_id = client.create_multipart_upload(Bucket=bucket, Key=key, **dict(extra_args or {}))["UploadId"]
+        concurrency = max(1, int(max_concurrency))
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="s3-part")
+        self._buffer = bytearray()
+        self._futures: List[Any] = []
+        self._parts: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self.bytes_written = 0
+        self.bytes_uploaded = 0
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _upload_part(self, number: int, body: bytes) -> None:
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    resp = self.client.upload_part(
+                        Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, PartNumber=number, Body=body
+                    )
+                    break
+                except Exception as e:
+                    if attempt >= self.retries:
+                        raise
+                    logging.warning("upload_part %s of %s failed (attempt %d): %s", number, self.key, attempt + 1, e)
+                    time.sleep(0.5 * (attempt + 1))
+            with self._lock:
+                self._parts[number] = resp["ETag"]
+                self.bytes_uploaded += len(body)
+            if self._on_part is not None:
+                self._on_part(len(body))
+        except BaseException as e:
+            with self._lock:
+                self._error = self._error or e
+        finally:
+            self._slots.release()
+
+    def _submit(self, body: bytes) -> None:
+        self._slots.acquire()
+        if self._error is not None:
+            self._slots.release()
+            self._raise_if_failed()
+        self._futures.append(self._pool.submit(self._upload_part, len(self._futures) + 1, body))
+
+    def write(self, data: bytes) -> int:
+        if self._closed:
+            raise ValueError("upload already finished")
+        self._raise_if_failed()
+        self._buffer += data
+        self.bytes_written += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._submit(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+        return len(data)
+
+    def complete(self) -> int:
+        """Upload the remainder, wait for every part and complete the upload; returns the object size."""
+        if self._buffer or not self._futures:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        self._closed = True
+        for future in self._futures:
+            future.result()
+        self._pool.shutdown(wait=True)
+        self._raise_if_failed()
+        parts = [{"PartNumber": n, "ETag": self._parts[n]} for n in sorted(self._parts)]
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, MultipartUpload={"Parts": parts}
+        )
+        return self.bytes_written
+
+    def abort(self) -> None:
+        """Drop the upload (pending parts are cancelled, uploaded ones discarded by the store)."""
+        self._closed = True
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        try:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+        except Exception as e:
+            logging.warning("abort_multipart_upload %s failed: %s", self.key, e)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Benchmark + equivalence check: streaming audio-profile energy stats vs the old per-sample loops.
+
+Synthetic 45 s / 16 kHz fixtures (speech-like bursts, sustained music, speech
+intro then music, noisy speech, quiet AAC-level music) are classified by the
+legacy implementation (verbatim loops formerly in _infer_audio_profile_from_s3)
+and by audio_profile.EnergyAccumulator fed in ffmpeg-pipe-sized chunks. The
+script exits non-zero if any classification differs.
+
+  python scripts/bench_audio_profile.py --seconds 45 --repeat 3
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from array import array
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import audio_profile  # noqa: E402
+
+SR = 16000
+THRESHOLDS = {"base": 0.002, "audio": 0.002 * 4.0, "video": 0.002 * 2.5}
+
+
+def _fixture(kind, seconds, seed):
+    rnd = random.Random(seed)
+    n = SR * seconds
+    out = array("f", bytes(4 * n))
+    two_pi = 2 * math.pi
+    for i in range(n):
+        t = i / SR
+        if kind == "music" or (kind == "intro_music" and t >= 6.0):
+            v = 0.3 * math.sin(two_pi * 220 * t) + 0.2 * math.sin(two_pi * 277 * t) + 0.1 * math.sin(two_pi * 330 * t)
+            v *= 0.8 + 0.2 * math.sin(two_pi * 0.5 * t)
+        elif kind == "quiet_music":
+            v = 0.02 * math.sin(two_pi * 440 * t) + 0.01 * math.sin(two_pi * 660 * t)
+        else:
+            # ~4 syllables/s with pauses between phrases
+            syl = (t * 4.0) % 1.0
+            phrase_gap = (t % 3.0) > 2.4
+            env = 0.0 if phrase_gap else max(0.0, math.sin(math.pi * syl)) ** 2
+            v = env * (0.5 * math.sin(two_pi * 180 * t) + 0.3 * rnd.uniform(-1, 1))
+            if kind == "noisy_speech":
+                v += 0.05 * rnd.uniform(-1, 1)
+        out[i] = v
+    return out.tobytes()
+
+
+def legacy_stats(pcm, skip_intro_sec=5.0):
+    samples = array("f")
+    samples.frombytes(pcm[: (len(pcm) // 4) * 4])
+    peak = 0.0
+    for x in samples:
+        ax = abs(float(x))
+        if ax > peak:
+            peak = ax
+    inv_peak = 1.0 / peak
+    for i in range(len(samples)):
+        samples[i] = float(samples[i]) * inv_peak
+    frame = max(800, int(SR * 0.1))
+    rms_vals = []
+    for i in range(0, len(samples), frame):
+        chunk = samples[i:i + frame]
+        if not chunk:
+            continue
+        s2 = 0.0
+        for x in chunk:
+            fx = float(x)
+            s2 += fx * fx
+        rms_vals.append(math.sqrt(s2 / len(chunk)))
+    return audio_profile.window_variances(rms_vals, skip_intro_sec)
+
+
+def streaming_stats(pcm, skip_intro_sec=5.0, chunk=256 * 1024):
+    acc = audio_profile.EnergyAccumulator(sr=SR)
+    for i in range(0, len(pcm), chunk):
+        acc.feed(pcm[i:i + chunk])
+    acc.finish()
+    return audio_profile.window_variances(acc.rms_values(), skip_intro_sec)
+
+
+def classify(stats, thr):
+    var, post, tail = stats
+    if var is not None and var < thr:
+        return "music/full"
+    if post is not None and post < thr:
+        return "music/post_intro"
+    if tail is not None and tail < thr:
+        return "music/tail"
+    return "speech"
+
+
+def _best(fn, pcm, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(pcm)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=int, default=45)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--no-numpy", action="store_true", help="force the memoryview fallback")
+    args = ap.parse_args()
+    if args.no_numpy:
+        audio_profile._np = None
+    backend = "numpy" if audio_profile._np is not None else "memoryview"
+    mismatches = 0
+    print(f"backend={backend} seconds={args.seconds}")
+    for seed, kind in enumerate(("speech", "music", "intro_music", "noisy_speech", "quiet_music")):
+        pcm = _fixture(kind, args.seconds, seed)
+        t_old, old = _best(legacy_stats, pcm, args.repeat)
+        t_new, new = _best(streaming_stats, pcm, args.repeat)
+        labels_old = {k: classify(old, thr) for k, thr in THRESHOLDS.items()}
+        labels_new = {k: classify(new, thr) for k, thr in THRESHOLDS.items()}
+        same = labels_old == labels_new
+        mismatches += 0 if same else 1
+        diff = abs(old[0] - new[0])
+        print(
+            f"{kind:13s} legacy={t_old * 1000:8.1f}ms streaming={t_new * 1000:7.1f}ms "
+            f"speedup={t_old / max(t_new, 1e-9):6.1f}x var={new[0]:.3e} abs_diff={diff:.1e} "
+            f"labels={labels_new} {'OK' if same else 'MISMATCH ' + str(labels_old)}"
+        )
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
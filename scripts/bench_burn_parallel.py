@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Benchmark: subtitle burn, one ffmpeg process vs keyframe-aligned parallel chunks.
+
+Generates a synthetic input per length (lavfi testsrc2 + a sine tone, x264
+with a 2 s GOP like phone recordings) and an ASS file with a cue every
+2.5 s, then burns it with burn_engine.burn_subtitles twice:
+
+- single:   workers=1 (the previous single-process command);
+- parallel: --workers ffmpeg processes with --threads x264 threads each.
+
+Reports wall time, speed-up, the video frame count of both outputs, and
+SSIM / PSNR of each output against the source (the subtitles are identical,
+so the scores should match) and of parallel against single.
+Needs ffmpeg and ffprobe with libx264 and libass on PATH (or --ffmpeg /
+--ffprobe).
+
+  python scripts/bench_burn_parallel.py --minutes 10 30 60 --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from burn_engine import burn_subtitles  # noqa: E402
+
+_ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+PlayResX: 1280
+PlayResY: 720
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Arial,48,&H00FFFFFF,&H000000FF,&H00000000,&H80000000,1,0,0,0,100,100,0,0,1,3,0,2,40,40,60,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+_WORDS = "שלום עולם זהו מבחן של כתוביות צרובות בווידאו ארוך מאוד".split()
+
+
+def _ts(sec):
+    cs = int(round(sec * 100))
+    return f"{cs // 360000}:{cs // 6000 % 60:02d}:{cs // 100 % 60:02d}.{cs % 100:02d}"
+
+
+def make_ass(seconds, step=2.5):
+    lines, t, i = [], 0.0, 0
+    while t < seconds:
+        text = " ".join(_WORDS[(i + k) % len(_WORDS)] for k in range(5))
+        lines.append(f"Dialogue: 0,{_ts(t)},{_ts(min(seconds, t + step - 0.2))},Default,,0,0,0,,{{\\an2}}{text}")
+        t += step
+        i += 1
+    return _ASS_HEADER + "\n".join(lines) + "\n"
+
+
+def make_input(ffmpeg, path, seconds, size, fps):
+    subprocess.run(
+        [ffmpeg, "-y", "-v", "error",
+         "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={fps}:duration={seconds}",
+         "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={seconds}",
+         "-c:v", "libx264", "-preset", "ultrafast", "-g", str(fps * 2), "-pix_fmt", "yuv420p",
+         "-c:a", "aac", "-b:a", "128k", "-shortest", path],
+        check=True,
+    )
+
+
+def frame_count(ffprobe, path):
+    out = subprocess.run(
+        [ffprobe, "-v", "error", "-select_streams", "v:0", "-count_packets",
+         "-show_entries", "stream=nb_read_packets", "-of", "default=nw=1:nk=1", path],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return int(out.split()[0])
+
+
+def compare(ffmpeg, a, b):
+    """(SSIM All, PSNR average) of ``a`` against reference ``b``."""
+    graph = "[0:v]split[a0][a1];[1:v]split[b0][b1];[a0][b0]ssim;[a1][b1]psnr"
+    err = subprocess.run(
+        [ffmpeg, "-v", "info", "-nostats", "-i", a, "-i", b, "-lavfi", graph, "-f", "null", "-"],
+        capture_output=True, text=True, check=True,
+    ).stderr
+    ssim = re.search(r"SSIM .*All:([\d.]+)", err)
+    psnr = re.search(r"PSNR .*average:([\d.]+|inf)", err)
+    return float(ssim.group(1)) if ssim else float("nan"), float(psnr.group(1)) if psnr else float("nan")
+
+
+def burn(ffmpeg, ffprobe, src, ass, out, workdir, workers, threads):
+    os.makedirs(workdir, exist_ok=True)
+    t0 = time.perf_counter()
+    result = burn_subtitles(ffmpeg, src, "ass", ass, out, workdir=workdir, ffprobe=ffprobe,
+                            workers=workers, threads_per_worker=threads)
+    elapsed = time.perf_counter() - t0
+    if not result.ok:
+        raise RuntimeError(f"burn failed ({result.reason}): {result.stderr_tail[-500:]}")
+    return elapsed, result.progress.get("chunks", 1)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--minutes", type=float, nargs="+", default=[10, 30, 60])
+    ap.add_argument("--workers", type=int, default=max(2, (os.cpu_count() or 2) // 2))
+    ap.add_argument("--threads", type=int, default=2, help="x264 threads per parallel worker")
+    ap.add_argument("--size", default="1280x720")
+    ap.add_argument("--fps", type=int, default=30)
+    ap.add_argument("--ffmpeg", default=shutil.which("ffmpeg") or "ffmpeg")
+    ap.add_argument("--ffprobe", default=shutil.which("ffprobe") or "ffprobe")
+    ap.add_argument("--keep", help="directory to keep inputs and outputs in (default: a temp dir)")
+    args = ap.parse_args()
+
+    print(f"workers={args.workers} threads/worker={args.threads} cpus={os.cpu_count()}")
+    print(f"{'min':>5s} {'single':>8s} {'parallel':>8s} {'chunks':>6s} {'x':>5s} {'frames s/p':>13s}"
+          f" {'ssim s':>7s} {'ssim p':>7s} {'psnr s':>7s} {'psnr p':>7s} {'ssim p/s':>8s} {'psnr p/s':>8s}")
+    base = args.keep or tempfile.mkdtemp(prefix="bench_burn_")
+    try:
+        for minutes in args.minutes:
+            seconds = int(minutes * 60)
+            d = os.path.join(base, f"{seconds}s")
+            os.makedirs(d, exist_ok=True)
+            src = os.path.join(d, "input.mp4")
+            if not os.path.exists(src):
+                make_input(args.ffmpeg, src, seconds, args.size, args.fps)
+            ass = make_ass(seconds)
+            single_out, parallel_out = os.path.join(d, "single.mp4"), os.path.join(d, "parallel.mp4")
+            t_single, _ = burn(args.ffmpeg, args.ffprobe, src, ass, single_out, os.path.join(d, "w1"), 1, args.threads)
+            t_par, chunks = burn(args.ffmpeg, args.ffprobe, src, ass, parallel_out, os.path.join(d, "wn"),
+                                 args.workers, args.threads)
+            frames_s = frame_count(args.ffprobe, single_out)
+            frames_p = frame_count(args.ffprobe, parallel_out)
+            ssim_s, psnr_s = compare(args.ffmpeg, single_out, src)
+            ssim_p, psnr_p = compare(args.ffmpeg, parallel_out, src)
+            ssim_ps, psnr_ps = compare(args.ffmpeg, parallel_out, single_out)
+            print(
+                f"{minutes:5.0f} {t_single:7.1f}s {t_par:7.1f}s {chunks:6d} {t_single / t_par:5.2f}"
+                f" {frames_s:6d}/{frames_p:<6d} {ssim_s:7.4f} {ssim_p:7.4f} {psnr_s:7.2f} {psnr_p:7.2f}"
+                f" {ssim_ps:8.4f} {psnr_ps:8.2f}"
+            )
+    finally:
+        if not args.keep:
+            shutil.rmtree(base, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Benchmark: Demucs per-chunk subprocesses vs the in-process worker (CPU only).
+
+Splits a track into chunks the way separate_vocals does, then separates the
+chunks with music_vocal_separator._run_demucs_chunks three times:
+
+- subprocess: TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_IN_PROCESS=0, one
+              `python -m demucs` per chunk (interpreter start-up, torch import
+              and weight loading every time);
+- cold:       in-process, first job of the process (includes the one model load);
+- warm:       in-process again, the model already resident (every later job on
+              a long-lived RunPod worker).
+
+Reports wall time and seconds per audio minute. The input is --input (a
+stereo 44.1 kHz PCM WAV, e.g. a normalized demucs_input.wav) or a
+synthetic track (tones plus noise). Needs torch and demucs; the model is
+downloaded on first use.
+
+  python scripts/bench_demucs_worker.py --minutes 6 --chunk-sec 120 --parallel 4
+"""
+from __future__ import annotations
+
+import argparse
+import array
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+os.environ["TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_DEVICE"] = "cpu"
+
+import music_vocal_separator as mvs  # noqa: E402
+
+RATE = 44100
+
+
+def make_track(path, seconds):
+    rng = random.Random(7)
+    fmt = b"\x01\x00\x02\x00" + RATE.to_bytes(4, "little") + (RATE * 4).to_bytes(4, "little") + b"\x04\x00\x10\x00"
+    with open(path, "wb") as f:
+        f.write(mvs._wav_header(fmt, seconds * RATE * 4))
+        for s in range(seconds):
+            freq = (220, 277, 330, 440)[s % 4]
+            block = array.array("h")
+            for i in range(RATE):
+                t = (s * RATE + i) / RATE
+                v = 6000 * math.sin(2 * math.pi * freq * t) + 3000 * math.sin(2 * math.pi * 2 * freq * t)
+                v += rng.uniform(-1500, 1500)
+                block.append(int(v))
+                block.append(int(v * 0.8))
+            if sys.byteorder == "big":
+                block.byteswap()
+            f.write(block.tobytes())
+
+
+def run(chunks, work_dir, label, model, in_process):
+    os.environ["TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_IN_PROCESS"] = "1" if in_process else "0"
+    out_root = mvs.pathlib.Path(work_dir) / label
+    env = mvs._subprocess_env_with_ffmpeg(shutil.which("ffmpeg"))
+    t0 = time.perf_counter()
+    paths = mvs._run_demucs_chunks(chunks, out_root, model, 3600, env)
+    elapsed = time.perf_counter() - t0
+    if len(paths) != len(chunks) or not all(paths):
+        raise RuntimeError(f"{label}: missing vocal stems")
+    return elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--input", help="stereo 44.1 kHz PCM WAV (default: synthetic)")
+    ap.add_argument("--minutes", type=float, default=6.0, help="length of the synthetic track")
+    ap.add_argument("--model", default="mdx_extra_q")
+    ap.add_argument("--chunk-sec", type=float, default=120.0)
+    ap.add_argument("--overlap", type=float, default=4.0)
+    ap.add_argument("--parallel", type=int, default=4, help="TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_CHUNK_PARALLEL")
+    args = ap.parse_args()
+
+    if mvs._demucs_api() is None:
+        print("torch/demucs are not importable in this interpreter", file=sys.stderr)
+        return 1
+    os.environ["TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_CHUNK_PARALLEL"] = str(args.parallel)
+
+    with tempfile.TemporaryDirectory(prefix="bench_demucs_") as d:
+        src = args.input
+        if not src:
+            src = os.path.join(d, "track.wav")
+            make_track(src, int(args.minutes * 60))
+        layout = mvs._read_wav_layout(src)
+        audio_min = layout["frames"] / layout["sample_rate"] / 60.0
+        chunks = mvs._split_wav_into_chunks(src, d, args.chunk_sec, args.overlap)
+        parallel = mvs._chunk_parallel_workers(len(chunks))
+        print(f"model={args.model} audio={audio_min:.2f} min chunks={len(chunks)} parallel={parallel} "
+              f"threads/chunk={mvs._demucs_threads_per_chunk(parallel)} cpus={os.cpu_count()}")
+        print(f"{'mode':>10s} {'wall':>8s} {'s/audio-min':>11s}")
+        results = [
+            ("subprocess", run(chunks, d, "subprocess", args.model, in_process=False)),
+            ("cold", run(chunks, d, "cold", args.model, in_process=True)),
+            ("warm", run(chunks, d, "warm", args.model, in_process=True)),
+        ]
+        for label, elapsed in results:
+            print(f"{label:>10s} {elapsed:7.1f}s {elapsed / audio_min:11.2f}")
+        print(f"warm speed-up vs subprocess: {results[0][1] / results[2][1]:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
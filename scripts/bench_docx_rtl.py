@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Benchmark: DOCX RTL patching, whole-part regex passes vs the streaming tokenizer.
+
+Builds an RTL transcript document from bench_transcript_codec.make_transcript
+(one paragraph per segment with a heading style, a timestamp run and a text
+run, plus headers, footers, styles and an embedded image) and compares:
+
+- legacy:    the previous regex implementation (tests/test_docx_rtl.py),
+             which reads, decodes and rewrites every part in memory and
+             recompresses every entry;
+- streaming: docx_rtl.force_docx_rtl (patched parts stream through, the rest
+             is copied as compressed bytes).
+
+Reports best wall time and tracemalloc peak (Python allocations) and checks that
+every part decompresses to the same bytes.
+
+  python scripts/bench_docx_rtl.py --minutes 60 240 --image-mb 8
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+import zipfile
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for p in (ROOT, os.path.dirname(os.path.abspath(__file__)), os.path.join(ROOT, "tests")):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+from bench_transcript_codec import make_transcript  # noqa: E402
+from docx_rtl import force_docx_rtl  # noqa: E402
+from test_docx_rtl import W, _entries, _legacy_force_docx_rtl_bytes  # noqa: E402
+
+
+def make_docx(minutes, image_mb, seed=0):
+    paras = []
+    for seg in make_transcript(minutes, seed)["segments"]:
+        stamp = f"{int(seg['start']) // 60:02d}:{int(seg['start']) % 60:02d}"
+        paras.append(
+            '<w:p><w:pPr><w:pStyle w:val="Transcript"/><w:jc w:val="left"/><w:spacing w:after="120"/></w:pPr>'
+            f'<w:r><w:rPr><w:b/><w:color w:val="808080"/></w:rPr><w:t>{stamp} </w:t></w:r>'
+            f'<w:r><w:rPr><w:sz w:val="24"/></w:rPr><w:t xml:space="preserve">{seg["text"]}</w:t></w:r></w:p>'
+        )
+    document = f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<w:document {W}><w:body>{"".join(paras)}<w:sectPr/></w:body></w:document>'
+    styles = (
+        f'<w:styles {W}><w:docDefaults><w:rPrDefault><w:rPr><w:lang w:val="he-IL"/></w:rPr></w:rPrDefault></w:docDefaults>'
+        '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>'
+        '<w:style w:type="paragraph" w:styleId="Transcript"><w:name w:val="Transcript"/><w:pPr><w:jc w:val="left"/></w:pPr></w:style>'
+        '</w:styles>'
+    )
+    image = random.Random(seed).randbytes(int(image_mb * 1024 * 1024))
+    buf = BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", "<Types/>")
+        zf.writestr("word/document.xml", document)
+        zf.writestr("word/styles.xml", styles)
+        zf.writestr("word/header1.xml", f'<w:hdr {W}><w:p><w:pPr/><w:r><w:t>header</w:t></w:r></w:p></w:hdr>')
+        zf.writestr("word/footer1.xml", f'<w:ftr {W}><w:p><w:r><w:rPr/><w:t>footer</w:t></w:r></w:p></w:ftr>')
+        zf.writestr("word/media/image1.png", image, compress_type=zipfile.ZIP_STORED)
+    return buf.getvalue(), len(document.encode("utf-8"))
+
+
+def _measure(fn, repeat):
+    """Best wall time of ``repeat`` untraced runs, then one tracemalloc run for the peak."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, out
+
+
+def _streaming(src):
+    out = BytesIO()
+    force_docx_rtl(BytesIO(src), out)
+    return out.getvalue()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--minutes", type=int, nargs="+", default=[30, 120, 360])
+    ap.add_argument("--image-mb", type=float, default=4.0)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    mb = 1024 * 1024
+    print(f"{'minutes':>7s} {'docx':>8s} {'xml':>8s} {'legacy':>9s} {'peak':>8s} {'stream':>9s} {'peak':>8s} {'same':>5s}")
+    for minutes in args.minutes:
+        src, xml_bytes = make_docx(minutes, args.image_mb)
+        t_old, peak_old, old = _measure(lambda: _legacy_force_docx_rtl_bytes(src), args.repeat)
+        t_new, peak_new, new = _measure(lambda: _streaming(src), args.repeat)
+        same = _entries(old) == _entries(new)
+        print(
+            f"{minutes:7d} {len(src) / mb:7.1f}M {xml_bytes / mb:7.1f}M {t_old * 1000:7.0f}ms {peak_old / mb:7.1f}M"
+            f" {t_new * 1000:7.0f}ms {peak_new / mb:7.1f}M {str(same):>5s}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Benchmark: check_status wire bytes and per-poll CPU, duplicated jsonify vs cached single-copy bytes.
+
+Builds the gpu_callback payload shape (transcript arrays at the top level and
+again under ``result``) from the synthetic transcripts in
+bench_transcript_codec and compares:
+
+- legacy:  json.dumps like Flask's jsonify (ensure_ascii, sort_keys) + gzip-6
+           on every poll (what flask-compress did);
+- single:  dedupe_job_payload + serialize_job_payload once, then a cache hit.
+
+  python scripts/bench_job_payload.py --minutes 10 120
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for p in (ROOT, os.path.dirname(os.path.abspath(__file__))):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+from bench_transcript_codec import make_transcript  # noqa: E402
+from job_payload import JobPayloadBytesCache, dedupe_job_payload, expand_job_payload  # noqa: E402
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--minutes", type=int, nargs="+", default=[10, 30, 120])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    for minutes in args.minutes:
+        doc = make_transcript(minutes)
+        payload = expand_job_payload({"jobId": "bench", "status": "completed", **doc})
+
+        def legacy_poll():
+            raw = json.dumps(payload, ensure_ascii=True, sort_keys=True).encode("utf-8")
+            return raw, gzip.compress(raw, 6)
+
+        cache = JobPayloadBytesCache({})
+        t_legacy = _best(legacy_poll, args.repeat)
+        t_first = _best(lambda: JobPayloadBytesCache({}).get("bench", 1, "single", lambda: dedupe_job_payload(payload)), args.repeat)
+        cache.get("bench", 1, "single", lambda: dedupe_job_payload(payload))
+        t_hit = _best(lambda: cache.get("bench", 1, "single", lambda: dedupe_job_payload(payload)), args.repeat)
+        raw, gz = legacy_poll()
+        single = cache.get("bench", 1, "single", lambda: dedupe_job_payload(payload))
+        print(f"\n{minutes} min: {len(doc['segments'])} segments")
+        print(f"  legacy  json={len(raw) / 1024:8.0f} KiB gzip={len(gz) / 1024:7.0f} KiB per-poll={t_legacy * 1000:7.1f}ms")
+        print(
+            f"  single  json={len(single.body) / 1024:8.0f} KiB gzip={len(single.gzip_body or b'') / 1024:7.0f} KiB "
+            f"first={t_first * 1000:7.1f}ms repeat={t_hit * 1e6:5.1f}us (304: no body)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: per-request cost of building an S3 client vs the pooled registry.
+
+No network access is needed: presigning is local, so the benchmark measures
+exactly the client-construction overhead that presign / status routes paid.
+
+  python scripts/bench_s3_client_registry.py --iterations 200
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import boto3
+from botocore.config import Config
+
+from s3_client_registry import S3ClientRegistry, client_key, credentials_fingerprint
+
+
+def _new_client():
+    return boto3.client(
+        's3',
+        aws_access_key_id='AKIABENCHMARK',
+        aws_secret_access_key='bench-secret',
+        region_name='auto',
+        endpoint_url='https://example.r2.cloudflarestorage.com',
+        config=Config(signature_version='s3v4', max_pool_connections=50),
+    )
+
+
+def _presign(client):
+    return client.generate_presigned_url(
+        'get_object',
+        Params={'Bucket': 'bench-bucket', 'Key': 'users/u/input/file.mp3'},
+        ExpiresIn=3600,
+    )
+
+
+def _run(label, get_client, iterations):
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        _presign(get_client())
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{label:<22} mean={statistics.mean(samples):8.3f} ms  p50={statistics.median(samples):8.3f} ms  p95={p95:8.3f} ms")
+    return statistics.mean(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument('--iterations', type=int, default=200)
+    args = ap.parse_args()
+
+    before = _run('fresh client/request', _new_client, args.iterations)
+    registry = S3ClientRegistry()
+    key = client_key('standard', True, False, 'auto', 'https://example.r2.cloudflarestorage.com',
+                     credentials_fingerprint('AKIABENCHMARK', 'bench-secret'))
+    after = _run('pooled registry', lambda: registry.get(key, _new_client), args.iterations)
+    if after > 0:
+        print(f"speedup: {before / after:.1f}x")
+    print(registry.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Benchmark: anchored token alignment vs difflib.SequenceMatcher for clean-transcript projection.
+
+Original token streams are synthetic transcripts; the "clean" side simulates
+the GPT cleanup pass (filler deletions, spelling fixes, punctuation attached
+to words, inserted and merged words). For each size the script reports
+alignment time of both engines and how many entries of the replacement map
+(``align_replacements``) agree. Corpora:
+
+- zipf:       Zipf-distributed vocabulary of 8k word forms (typical speech);
+- repetitive: the 33-word vocabulary of bench_transcript_codec (no unique
+              tokens at all, exercises the windowed fallback);
+- real:       tokens of bench_transcript_codec.make_transcript(minutes).
+
+  python scripts/bench_token_align.py --tokens 2000 8000 20000 50000
+  python scripts/bench_token_align.py --tokens 100000 --skip-difflib-above 30000
+"""
+from __future__ import annotations
+
+import argparse
+import difflib
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for p in (ROOT, os.path.dirname(os.path.abspath(__file__))):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+from bench_transcript_codec import _HEBREW_WORDS, make_transcript  # noqa: E402
+from token_align import align_replacements, anchored_opcodes  # noqa: E402
+
+_LETTERS = "אבגדהוזחטיכלמנסעפצקרשת"
+_FILLERS = ("אה", "אמ", "כאילו", "יעני")
+
+
+def _vocab(n, rnd):
+    return ["".join(rnd.choice(_LETTERS) for _ in range(rnd.randint(2, 7))) for _ in range(n)]
+
+
+def zipf_tokens(n, seed=0):
+    rnd = random.Random(seed)
+    vocab = _vocab(8000, rnd)
+    weights = [1.0 / (r + 1) for r in range(len(vocab))]
+    out = rnd.choices(vocab, weights=weights, k=n)
+    for k in range(0, n, 9):
+        out[k] = rnd.choice(_FILLERS)
+    return out
+
+
+def repetitive_tokens(n, seed=0):
+    rnd = random.Random(seed)
+    return [rnd.choice(_HEBREW_WORDS) for _ in range(n)]
+
+
+def real_tokens(n, seed=0):
+    minutes = max(1, n // 160 + 1)
+    text = " ".join(s["text"] for s in make_transcript(minutes, seed)["segments"])
+    return text.split()[:n]
+
+
+def cleanup(tokens, seed=1):
+    """Simulated GPT cleanup: local edits only, as the projection assumes."""
+    rnd = random.Random(seed)
+    out = []
+    k = 0
+    while k < len(tokens):
+        tok = tokens[k]
+        r = rnd.random()
+        if tok in _FILLERS and r < 0.8:
+            pass
+        elif r < 0.03:
+            out.append(tok[::-1])
+        elif r < 0.08:
+            out.append(tok + rnd.choice(",.?"))
+        elif r < 0.09:
+            out.extend((tok, rnd.choice(_LETTERS) * 3))
+        elif r < 0.095 and k + 1 < len(tokens):
+            out.append(tok + tokens[k + 1])
+            k += 1
+        else:
+            out.append(tok)
+        k += 1
+    return out
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--tokens", type=int, nargs="+", default=[2000, 8000, 20000, 50000])
+    ap.add_argument("--corpus", nargs="+", default=["zipf", "repetitive", "real"])
+    ap.add_argument("--skip-difflib-above", type=int, default=60000)
+    args = ap.parse_args()
+    makers = {"zipf": zipf_tokens, "repetitive": repetitive_tokens, "real": real_tokens}
+    for corpus in args.corpus:
+        print(f"\n{corpus}")
+        print(f"  {'tokens':>7s} {'difflib':>10s} {'anchored':>10s} {'us/token':>9s} {'map agree':>10s}")
+        for n in args.tokens:
+            orig = makers[corpus](n)
+            clean = cleanup(orig)
+            t_new, new_ops = _timed(lambda: anchored_opcodes(orig, clean))
+            new_map = align_replacements(orig, clean, new_ops)
+            if len(orig) <= args.skip_difflib_above:
+                t_old, old_ops = _timed(
+                    lambda: difflib.SequenceMatcher(a=orig, b=clean, autojunk=False).get_opcodes()
+                )
+                old_map = align_replacements(orig, clean, old_ops)
+                same = sum(1 for i in range(len(orig)) if old_map.get(i) == new_map.get(i))
+                old_s, agree = f"{t_old * 1000:8.0f}ms", f"{100.0 * same / len(orig):9.2f}%"
+            else:
+                old_s, agree = f"{'skipped':>10s}", f"{'-':>10s}"
+            print(f"  {len(orig):7d} {old_s} {t_new * 1000:8.0f}ms {t_new * 1e6 / len(orig):9.2f} {agree}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
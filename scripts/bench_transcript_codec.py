@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Benchmark: stored bytes, encode/decode time and (optionally) PUT/GET latency per transcript codec.
+
+Synthetic Hebrew transcripts shaped like real saves (segments with per-word
+``words``, flat ``words`` / ``captions``, a GPT ``formatted`` block) are
+encoded as plain JSON, gzip at several levels and zstd (when ``zstandard``
+is installed). Every encoded body is decoded through the sniffing reader and
+compared with the source document.
+
+  python scripts/bench_transcript_codec.py --minutes 10 30 120
+  python scripts/bench_transcript_codec.py --minutes 120 --bucket my-bucket   # real PUT/GET via siteapp S3 client
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import transcript_codec  # noqa: E402
+from transcript_codec import CODEC_GZIP, CODEC_NONE, CODEC_ZSTD, decode_json_body, encode_json_body  # noqa: E402
+
+_HEBREW_WORDS = (
+    "שלום", "אני", "רוצה", "לדבר", "על", "הפרויקט", "שלנו", "היום", "בעצם", "זה", "מאוד", "חשוב",
+    "כי", "אנחנו", "צריכים", "להבין", "את", "הלקוחות", "והצרכים", "שלהם", "בסדר", "אז", "בוא",
+    "נתחיל", "מהתחלה", "והמטרה", "היא", "לשפר", "תהליך", "העבודה", "בצוות", "ירושלים", "תל-אביב",
+)
+
+
+def make_transcript(minutes, seed=0):
+    rnd = random.Random(seed)
+    t = 0.0
+    segments = []
+    flat_words = []
+    captions = []
+    while t < minutes * 60:
+        seg_words = []
+        for _ in range(rnd.randint(6, 16)):
+            dur = rnd.uniform(0.15, 0.6)
+            w = {"word": rnd.choice(_HEBREW_WORDS), "start": round(t, 3), "end": round(t + dur, 3), "score": round(rnd.random(), 3)}
+            seg_words.append(w)
+            t += dur + rnd.uniform(0.0, 0.25)
+        start_idx = len(flat_words)
+        for w in seg_words:
+            flat_words.append({"id": f"w{len(flat_words)}", "text": w["word"], "start": w["start"], "end": w["end"]})
+        captions.append({"id": f"c{len(captions)}", "wordStartIndex": start_idx, "wordEndIndex": len(flat_words) - 1})
+        segments.append({
+            "start": seg_words[0]["start"],
+            "end": seg_words[-1]["end"],
+            "text": " ".join(w["word"] for w in seg_words),
+            "speaker": f"SPEAKER_{rnd.randint(0, 2):02d}",
+            "words": seg_words,
+        })
+        t += rnd.uniform(0.2, 1.5)
+    clean = " ".join(s["text"] for s in segments)
+    return {
+        "segments": segments,
+        "words": flat_words,
+        "captions": captions,
+        "formatted": {"clean_transcript": clean, "summary": clean[:2000], "bullets": [clean[i:i + 120] for i in range(0, 2400, 120)]},
+    }
+
+
+def _variants():
+    out = [("plain", CODEC_NONE, None)]
+    for level in (1, 6, 9):
+        out.append((f"gzip-{level}", CODEC_GZIP, level))
+    if transcript_codec._zstd is not None:
+        for level in (3, 9, 19):
+            out.append((f"zstd-{level}", CODEC_ZSTD, level))
+    return out
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def _network(s3_client, bucket, body, extra, repeat):
+    key = f"bench/transcript_codec/{uuid.uuid4().hex}.json"
+    puts, gets = [], []
+    try:
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            s3_client.put_object(Bucket=bucket, Key=key, Body=body, **extra)
+            puts.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            transcript_codec.read_json_object(s3_client.get_object(Bucket=bucket, Key=key))
+            gets.append(time.perf_counter() - t0)
+    finally:
+        s3_client.delete_object(Bucket=bucket, Key=key)
+    return statistics.median(puts), statistics.median(gets)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--minutes", type=int, nargs="+", default=[10, 30, 120])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--bucket", default="", help="measure real PUT/GET latency against this bucket")
+    args = ap.parse_args()
+
+    s3_client = None
+    if args.bucket:
+        import siteapp
+
+        s3_client = siteapp._s3_boto_client(bucket=args.bucket)
+
+    failures = 0
+    for minutes in args.minutes:
+        doc = make_transcript(minutes)
+        plain_len = len(json.dumps(doc, ensure_ascii=False).encode("utf-8"))
+        print(f"\n{minutes} min transcript: {len(doc['words'])} words, plain JSON {plain_len / 1024:.0f} KiB")
+        for label, codec, level in _variants():
+            t_enc, (body, extra, _raw_len) = _best(lambda: encode_json_body(doc, codec, level=level, min_bytes=0), args.repeat)
+            t_dec, back = _best(lambda: decode_json_body(body, extra.get("ContentEncoding")), args.repeat)
+            ok = back == doc
+            failures += 0 if ok else 1
+            line = (
+                f"  {label:8s} stored={len(body) / 1024:8.0f} KiB ratio={plain_len / len(body):5.2f}x "
+                f"encode={t_enc * 1000:7.1f}ms decode={t_dec * 1000:7.1f}ms {'OK' if ok else 'MISMATCH'}"
+            )
+            if s3_client is not None:
+                put_s, get_s = _network(s3_client, args.bucket, body, extra, args.repeat)
+                line += f" put={put_s * 1000:7.1f}ms get+decode={get_s * 1000:7.1f}ms"
+            print(line)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
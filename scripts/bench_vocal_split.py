@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Benchmark: Demucs chunk split (and stem merge) time versus track length.
+
+Writes a synthetic 44.1 kHz stereo s16 WAV per length (a tone, like the
+normalized demucs_input.wav) and times:
+
+- split:   music_vocal_separator._split_wav_into_chunks, one pass over the
+           file through mmap with --overlap seconds of shared context;
+- merge:   _overlap_add_wav_files over those chunks (standing in for the
+           per-chunk vocal stems), checked to reproduce the input exactly;
+- legacy:  the previous splitter, one ffmpeg process per chunk with output
+           seeking (-i wav -ss start), which decodes the track from the start
+           for every chunk, and the ffmpeg concat join. Only when ffmpeg is
+           available (PATH or --ffmpeg); otherwise those columns show "-".
+
+  python scripts/bench_vocal_split.py --minutes 3 10 30 60 --chunk-sec 120 --overlap 4
+"""
+from __future__ import annotations
+
+import argparse
+import array
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from music_vocal_separator import (  # noqa: E402
+    _overlap_add_wav_files,
+    _read_wav_layout,
+    _split_wav_into_chunks,
+    _wav_header,
+)
+
+RATE = 44100
+
+
+def make_wav(path, seconds):
+    second = array.array("h", (int(8000 * math.sin(2 * math.pi * 220 * (i // 2) / RATE)) for i in range(RATE * 2)))
+    if sys.byteorder == "big":
+        second.byteswap()
+    block = second.tobytes()
+    fmt = b"\x01\x00\x02\x00" + RATE.to_bytes(4, "little") + (RATE * 4).to_bytes(4, "little") + b"\x04\x00\x10\x00"
+    with open(path, "wb") as f:
+        f.write(_wav_header(fmt, len(block) * seconds))
+        for _ in range(seconds):
+            f.write(block)
+
+
+def legacy_split(ffmpeg, wav_path, work_dir, chunk_sec, seconds):
+    chunks, start, idx = [], 0.0, 0
+    while start < seconds - 0.05:
+        seg = min(chunk_sec, seconds - start)
+        path = os.path.join(work_dir, f"legacy_{idx:04d}.wav")
+        subprocess.run(
+            [ffmpeg, "-hide_banner", "-loglevel", "error", "-y", "-i", wav_path, "-ss", f"{start:.6f}",
+             "-t", f"{seg:.6f}", "-vn", "-ac", "2", "-ar", "44100", "-c:a", "pcm_s16le", path],
+            check=True,
+        )
+        chunks.append(path)
+        start += seg
+        idx += 1
+    return chunks
+
+
+def legacy_concat(ffmpeg, paths, out_path):
+    list_path = out_path + ".concat.txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        f.write("".join(f"file '{p}'\n" for p in paths))
+    subprocess.run(
+        [ffmpeg, "-hide_banner", "-loglevel", "error", "-y", "-f", "concat", "-safe", "0", "-i", list_path,
+         "-c:a", "pcm_s16le", out_path],
+        check=True,
+    )
+
+
+def same_samples(a, b):
+    la, lb = _read_wav_layout(a), _read_wav_layout(b)
+    if la["frames"] != lb["frames"]:
+        return False
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        fa.seek(la["data_offset"])
+        fb.seek(lb["data_offset"])
+        while True:
+            x, y = fa.read(1 << 22), fb.read(1 << 22)
+            if x != y:
+                return False
+            if not x:
+                return True
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--minutes", type=float, nargs="+", default=[3, 10, 30, 60])
+    ap.add_argument("--chunk-sec", type=float, default=120.0)
+    ap.add_argument("--overlap", type=float, default=4.0)
+    ap.add_argument("--ffmpeg", default=shutil.which("ffmpeg"))
+    args = ap.parse_args()
+
+    print(f"chunk_sec={args.chunk_sec:g} overlap={args.overlap:g}s ffmpeg={args.ffmpeg or 'n/a'}")
+    print(f"{'min':>5s} {'MiB':>7s} {'chunks':>6s} {'split':>8s} {'merge':>8s} {'exact':>5s}"
+          f" {'legacy split':>12s} {'legacy join':>11s} {'x split':>7s}")
+    for minutes in args.minutes:
+        seconds = int(minutes * 60)
+        with tempfile.TemporaryDirectory(prefix="bench_vocal_split_") as d:
+            src = os.path.join(d, "demucs_input.wav")
+            make_wav(src, seconds)
+            size_mib = os.path.getsize(src) / (1 << 20)
+
+            t0 = time.perf_counter()
+            chunks = _split_wav_into_chunks(src, d, args.chunk_sec, args.overlap)
+            t_split = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            merged = _overlap_add_wav_files([p for p, _o in chunks], [o for _p, o in chunks],
+                                            os.path.join(d, "merged.wav"))
+            t_merge = time.perf_counter() - t0
+            exact = "yes" if same_samples(src, merged) else "NO"
+
+            legacy = "-"
+            join = "-"
+            speedup = "-"
+            if args.ffmpeg:
+                legacy_dir = os.path.join(d, "legacy")
+                os.makedirs(legacy_dir)
+                t0 = time.perf_counter()
+                paths = legacy_split(args.ffmpeg, src, legacy_dir, args.chunk_sec, seconds)
+                t_legacy = time.perf_counter() - t0
+                t0 = time.perf_counter()
+                legacy_concat(args.ffmpeg, paths, os.path.join(legacy_dir, "merged.wav"))
+                t_join = time.perf_counter() - t0
+                legacy, join = f"{t_legacy:11.2f}s", f"{t_join:10.2f}s"
+                speedup = f"{t_legacy / max(t_split, 1e-6):7.1f}"
+            print(f"{minutes:5.0f} {size_mib:7.1f} {len(chunks):6d} {t_split:7.3f}s {t_merge:7.3f}s {exact:>5s}"
+                  f" {legacy:>12s} {join:>11s} {speedup:>7s}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Benchmark: JSON size, parsed memory and conversion time of legacy vs columnar word timings.
+
+Uses the synthetic Hebrew transcripts from bench_transcript_codec (segments
+with per-word dicts, flat words/captions, formatted block). Each columnar
+document is converted back and compared with the original; the script exits
+non-zero on any mismatch.
+
+  python scripts/bench_word_columns.py --minutes 10 120
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for p in (ROOT, os.path.dirname(os.path.abspath(__file__))):
+    if p not in sys.path:
+        sys.path.insert(0, p)
+
+from bench_transcript_codec import make_transcript  # noqa: E402
+from word_columns import from_columnar, to_columnar  # noqa: E402
+
+
+def _parsed_bytes(text):
+    tracemalloc.start()
+    obj = json.loads(text)
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return current
+
+
+def _timed(fn, repeat):
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--minutes", type=int, nargs="+", default=[10, 30, 120])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    failures = 0
+    for minutes in args.minutes:
+        doc = make_transcript(minutes)
+        t_to, col = _timed(lambda: to_columnar(doc), args.repeat)
+        t_from, back = _timed(lambda: from_columnar(col), args.repeat)
+        ok = back == doc
+        failures += 0 if ok else 1
+        legacy_json = json.dumps(doc, ensure_ascii=False)
+        col_json = json.dumps(col, ensure_ascii=False)
+        print(f"\n{minutes} min: {len(doc['words'])} words  roundtrip={'OK' if ok else 'MISMATCH'}")
+        for label, text in (("legacy", legacy_json), ("columnar", col_json)):
+            raw = text.encode("utf-8")
+            print(
+                f"  {label:9s} json={len(raw) / 1024:8.0f} KiB gzip={len(gzip.compress(raw, 6, mtime=0)) / 1024:7.0f} KiB "
+                f"parsed={_parsed_bytes(text) / 1024 / 1024:7.2f} MiB"
+            )
+        print(f"  to_columnar={t_to * 1000:.1f}ms from_columnar={t_from * 1000:.1f}ms")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
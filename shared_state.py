@@ -0,0 +1,513 @@
+"""Cross-worker state backends for the trigger / worker handoff.
+
+The upload → RunPod handshake (trigger status, upload-complete flag, GPU
+start time, pending job info, CPU preprocessing handoffs) used to live in
+process memory, which pinned gunicorn to ``--workers 1``. A backend stores
+JSON values per (namespace, key) with a TTL:
+
+- ``memory``  — process-local dict (single worker; the default)
+- ``sqlite``  — one SQLite file shared by every worker on the host
+- ``redis``   — any server speaking the Redis protocol (RESP2), shared
+                across hosts; implemented on a raw socket so no client
+                library is required
+
+Select with ``STATE_BACKEND`` (``memory`` | ``sqlite`` | ``redis``),
+``STATE_BACKEND_PATH`` for SQLite and ``REDIS_URL`` for Redis.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import ssl
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, MutableMapping, Optional
+from urllib.parse import unquote, urlparse
+
+
+_MISSING = object()
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str, separators=(",", ":"))
+
+
+class StateBackend:
+    """Namespaced JSON key/value store with per-key TTL."""
+
+    name = "base"
+    shared = False
+
+    def get(self, namespace: str, key: str) -> Any:
+        raise NotImplementedError
+
+    def set(self, namespace: str, key: str, value: Any, ttl_sec: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str) -> bool:
+        raise NotImplementedError
+
+    def keys(self, namespace: str) -> List[str]:
+        raise NotImplementedError
+
+    def mutate(
+        self, namespace: str, key: str, fn: Callable[[Any], Any], ttl_sec: Optional[float] = None
+    ) -> Any:
+        """Atomic read-modify-write: store ``fn(current)`` (``None`` = leave it) and return what is stored.
+
+        ``current`` is ``None`` for a missing key. ``fn`` may run more than once
+        (optimistic backends retry after a concurrent write), so it must not have
+        side effects. This fallback is only as atomic as get + set.
+        """
+        current = self.get(namespace, key)
+        value = fn(current)
+        if value is None:
+            return current
+        self.set(namespace, key, value, ttl_sec)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "shared": self.shared}
+
+
+class MemoryStateBackend(StateBackend):
+    name = "memory"
+
+    def __init__(self, clock=time.time) -> None:
+        self._data: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+        self._clock = clock
+
+    def _live(self, k: tuple, now: float):
+        item = self._data.get(k)
+        if item is None:
+            return _MISSING
+        value, expires_at = item
+        if expires_at and now >= expires_at:
+            self._data.pop(k, None)
+            return _MISSING
+        return value
+
+    def get(self, namespace, key):
+        with self._lock:
+            value = self._live((namespace, str(key)), self._clock())
+        return None if value is _MISSING else json.loads(value)
+
+    def set(self, namespace, key, value, ttl_sec=None):
+        expires_at = (self._clock() + float(ttl_sec)) if ttl_sec else 0.0
+        with self._lock:
+            self._data[(namespace, str(key))] = (_dumps(value), expires_at)
+
+    def delete(self, namespace, key):
+        with self._lock:
+            return self._data.pop((namespace, str(key)), None) is not None
+
+    def keys(self, namespace):
+        now = self._clock()
+        with self._lock:
+            return [k for (ns, k) in list(self._data) if ns == namespace and self._live((ns, k), now) is not _MISSING]
+
+    def mutate(self, namespace, key, fn, ttl_sec=None):
+        k = (namespace, str(key))
+        with self._lock:
+            now = self._clock()
+            raw = self._live(k, now)
+            current = None if raw is _MISSING else json.loads(raw)
+            value = fn(current)
+            if value is None:
+                return current
+            self._data[k] = (_dumps(value), (now + float(ttl_sec)) if ttl_sec else 0.0)
+        return json.loads(_dumps(value))
+
+    def stats(self):
+        with self._lock:
+            entries = len(self._data)
+        return {**super().stats(), "entries": entries}
+
+
+class SQLiteStateBackend(StateBackend):
+    """One WAL-mode SQLite file; safe for several gunicorn workers on one host."""
+
+    name = "sqlite"
+    shared = True
+
+    def __init__(self, path: str, clock=time.time) -> None:
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS qs_state ("
+            " ns TEXT NOT NULL, k TEXT NOT NULL, v TEXT NOT NULL, expires_at REAL NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (ns, k))"
+        )
+        self._writes = 0
+
+    def get(self, namespace, key):
+        now = self._clock()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT v FROM qs_state WHERE ns=? AND k=? AND (expires_at=0 OR expires_at>?)",
+                (namespace, str(key), now),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, namespace, key, value, ttl_sec=None):
+        expires_at = (self._clock() + float(ttl_sec)) if ttl_sec else 0.0
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO qs_state (ns, k, v, expires_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(ns, k) DO UPDATE SET v=excluded.v, expires_at=excluded.expires_at",
+                (namespace, str(key), _dumps(value), expires_at),
+            )
+            self._writes += 1
+            if self._writes % 500 == 0:
+                self._conn.execute("DELETE FROM qs_state WHERE expires_at>0 AND expires_at<=?", (self._clock(),))
+
+    def delete(self, namespace, key):
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM qs_state WHERE ns=? AND k=?", (namespace, str(key)))
+            return cur.rowcount > 0
+
+    def mutate(self, namespace, key, fn, ttl_sec=None):
+        # BEGIN IMMEDIATE takes the write lock up front, so no other worker can
+        # write between our read and our write.
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = self._clock()
+                row = self._conn.execute(
+                    "SELECT v FROM qs_state WHERE ns=? AND k=? AND (expires_at=0 OR expires_at>?)",
+                    (namespace, str(key), now),
+                ).fetchone()
+                current = json.loads(row[0]) if row else None
+                value = fn(current)
+                if value is not None:
+                    self._conn.execute(
+                        "INSERT INTO qs_state (ns, k, v, expires_at) VALUES (?, ?, ?, ?)"
+                        " ON CONFLICT(ns, k) DO UPDATE SET v=excluded.v, expires_at=excluded.expires_at",
+                        (namespace, str(key), _dumps(value), (now + float(ttl_sec)) if ttl_sec else 0.0),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return current if value is None else json.loads(_dumps(value))
+
+    def keys(self, namespace):
+        now = self._clock()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT k FROM qs_state WHERE ns=? AND (expires_at=0 OR expires_at>?)",
+                (namespace, now),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM qs_state").fetchone()[0]
+        return {**super().stats(), "path": self.path, "entries": entries}
+
+
+class RedisProtocolError(RuntimeError):
+    pass
+
+
+class _RespConnection:
+    def __init__(self, host: str, port: int, *, password: Optional[str], db: int, use_ssl: bool, timeout: float) -> None:
+        sock = socket.create_connection((host, port), timeout=timeout)
+        if use_ssl:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+        self._sock = sock
+        self._buf = sock.makefile("rb")
+        if password:
+            self.command("AUTH", password)
+        if db:
+            self.command("SELECT", str(db))
+
+    def close(self) -> None:
+        try:
+            self._buf.close()
+            self._sock.close()
+        except OSError:
+            pass
+
+    def command(self, *args: Any) -> Any:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for a in args:
+            b = a if isinstance(a, bytes) else str(a).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(b), b))
+        self._sock.sendall(b"".join(parts))
+        return self._read()
+
+    def _read(self) -> Any:
+        line = self._buf.readline()
+        if not line:
+            raise ConnectionError("redis connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RedisProtocolError(body.decode(errors="replace"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            n = int(body)
+            if n < 0:
+                return None
+            data = self._buf.read(n + 2)
+            return data[:-2]
+        if kind == b"*":
+            n = int(body)
+            if n < 0:
+                return None
+            return [self._read() for _ in range(n)]
+        raise RedisProtocolError(f"unexpected reply {line!r}")
+
+
+# Compare-and-set for RedisStateBackend.mutate: write ARGV[3] only if the key
+# still holds ARGV[2] (ARGV[1] == "0": only if it is still missing).
+_CAS_SCRIPT = """
+local cur = redis.call('GET', KEYS[1])
+if (ARGV[1] == '0' and cur == false) or (ARGV[1] == '1' and cur == ARGV[2]) then
+  if ARGV[4] == '0' then
+    redis.call('SET', KEYS[1], ARGV[3])
+  else
+    redis.call('SET', KEYS[1], ARGV[3], 'PX', ARGV[4])
+  end
+  return 1
+end
+return 0
+"""
+
+
+class RedisStateBackend(StateBackend):
+    """Minimal RESP2 client (GET / SET EX / DEL / SCAN / EVAL) with a small connection pool."""
+
+    name = "redis"
+    shared = True
+
+    def __init__(self, url: str, *, prefix: str = "qs:", timeout: float = 2.0, pool_size: int = 8) -> None:
+        parsed = urlparse(url)
+        if parsed.scheme not in ("redis", "rediss"):
+            raise ValueError(f"unsupported redis url scheme: {parsed.scheme!r}")
+        self._host = parsed.hostname or "localhost"
+        self._port = parsed.port or 6379
+        self._password = unquote(parsed.password) if parsed.password else None
+        path = (parsed.path or "").strip("/")
+        self._db = int(path) if path.isdigit() else 0
+        self._ssl = parsed.scheme == "rediss"
+        self._timeout = timeout
+        self._prefix = prefix
+        self._pool: List[_RespConnection] = []
+        self._pool_size = max(1, int(pool_size))
+        self._lock = threading.Lock()
+
+    def _k(self, namespace: str, key: str) -> str:
+        return f"{self._prefix}{namespace}:{key}"
+
+    def _acquire(self) -> _RespConnection:
+        with self._lock:
+            if self._pool:
+                return self._pool.pop()
+        return _RespConnection(
+            self._host, self._port, password=self._password, db=self._db, use_ssl=self._ssl, timeout=self._timeout
+        )
+
+    def _release(self, conn: _RespConnection) -> None:
+        with self._lock:
+            if len(self._pool) < self._pool_size:
+                self._pool.append(conn)
+                return
+        conn.close()
+
+    def _command(self, *args: Any) -> Any:
+        conn = self._acquire()
+        try:
+            reply = conn.command(*args)
+        except (OSError, ConnectionError):
+            conn.close()
+            # One retry on a fresh connection (server restart / idle timeout).
+            conn = self._acquire()
+            try:
+                reply = conn.command(*args)
+            except Exception:
+                conn.close()
+                raise
+        except RedisProtocolError:
+            self._release(conn)
+            raise
+        self._release(conn)
+        return reply
+
+    def get(self, namespace, key):
+        raw = self._command("GET", self._k(namespace, str(key)))
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, namespace, key, value, ttl_sec=None):
+        args = ["SET", self._k(namespace, str(key)), _dumps(value)]
+        if ttl_sec:
+            args += ["PX", str(max(1, int(float(ttl_sec) * 1000)))]
+        self._command(*args)
+
+    def delete(self, namespace, key):
+        return bool(self._command("DEL", self._k(namespace, str(key))))
+
+    def mutate(self, namespace, key, fn, ttl_sec=None):
+        k = self._k(namespace, str(key))
+        px = str(max(1, int(float(ttl_sec) * 1000))) if ttl_sec else "0"
+        while True:
+            raw = self._command("GET", k)
+            current = json.loads(raw) if raw is not None else None
+            value = fn(current)
+            if value is None:
+                return current
+            data = _dumps(value)
+            if self._command("EVAL", _CAS_SCRIPT, "1", k, "0" if raw is None else "1", raw or b"", data, px):
+                return json.loads(data)
+            # Another worker wrote in between: re-read and re-apply.
+
+    def keys(self, namespace):
+        prefix = self._k(namespace, "")
+        cursor = "0"
+        out: List[str] = []
+        while True:
+            reply = self._command("SCAN", cursor, "MATCH", prefix + "*", "COUNT", "500")
+            cursor = reply[0].decode() if isinstance(reply[0], bytes) else str(reply[0])
+            out.extend(k.decode()[len(prefix):] for k in reply[1])
+            if cursor == "0":
+                return out
+
+    def stats(self):
+        with self._lock:
+            idle = len(self._pool)
+        return {**super().stats(), "host": self._host, "port": self._port, "db": self._db, "idle_connections": idle}
+
+
+class SharedStateMapping(MutableMapping):
+    """Dict-like view of one backend namespace (drop-in for module-level job dicts).
+
+    Values are JSON round-tripped: mutate a copy and assign it back rather
+    than changing a returned dict in place, or use :meth:`mutate` when other
+    workers may write the same key.
+    """
+
+    def __init__(
+        self, backend: StateBackend, namespace: str, ttl_sec: Optional[float] = None, seen_max_entries: int = 4096
+    ) -> None:
+        self._backend = backend
+        self.namespace = namespace
+        self.ttl_sec = ttl_sec
+        # Last value this process read or wrote per key, for peek() (bounded, never authoritative).
+        self._seen: "OrderedDict[str, Any]" = OrderedDict()
+        self._seen_max = max(1, int(seen_max_entries))
+        self._seen_lock = threading.Lock()
+
+    def _remember(self, key, value) -> None:
+        with self._seen_lock:
+            self._seen.pop(str(key), None)
+            if value is not None:
+                self._seen[str(key)] = value
+                while len(self._seen) > self._seen_max:
+                    self._seen.popitem(last=False)
+
+    def __getitem__(self, key):
+        value = self._backend.get(self.namespace, key)
+        self._remember(key, value)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._backend.set(self.namespace, key, value, self.ttl_sec)
+        self._remember(key, value)
+
+    def __delitem__(self, key):
+        self._remember(key, None)
+        if not self._backend.delete(self.namespace, key):
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return self._backend.get(self.namespace, key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._backend.keys(self.namespace))
+
+    def __len__(self) -> int:
+        return len(self._backend.keys(self.namespace))
+
+    def get(self, key, default=None):
+        value = self._backend.get(self.namespace, key)
+        self._remember(key, value)
+        return default if value is None else value
+
+    def peek(self, key, default=None):
+        """Last value this process saw for ``key``, without a backend round trip.
+
+        For in-flight predicates that run under another lock; may be stale
+        when a different worker wrote the key since.
+        """
+        with self._seen_lock:
+            return self._seen.get(str(key), default)
+
+    def mutate(self, key, fn: Callable[[Any], Any]) -> Any:
+        """Atomic read-modify-write of one key (see :meth:`StateBackend.mutate`)."""
+        value = self._backend.mutate(self.namespace, key, fn, self.ttl_sec)
+        self._remember(key, value)
+        return value
+
+    def items(self):
+        out = []
+        for key in self._backend.keys(self.namespace):
+            value = self._backend.get(self.namespace, key)
+            if value is not None:
+                out.append((key, value))
+        return out
+
+    def pop(self, key, default=_MISSING):
+        value = self._backend.get(self.namespace, key)
+        if value is None:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        self._remember(key, None)
+        self._backend.delete(self.namespace, key)
+        return value
+
+    def add(self, key) -> None:
+        self[key] = True
+
+    def discard(self, key) -> None:
+        self._remember(key, None)
+        self._backend.delete(self.namespace, key)
+
+
+def state_backend_from_env(env: Optional[Dict[str, str]] = None) -> StateBackend:
+    """Build the configured backend; falls back to memory (logged) when misconfigured."""
+    env = os.environ if env is None else env
+    kind = (env.get("STATE_BACKEND") or "memory").strip().lower()
+    try:
+        if kind == "sqlite":
+            path = (env.get("STATE_BACKEND_PATH") or "").strip() or os.path.join(
+                tempfile.gettempdir(), "qs_shared_state.sqlite3"
+            )
+            return SQLiteStateBackend(path)
+        if kind == "redis":
+            url = (env.get("REDIS_URL") or "").strip()
+            if not url:
+                raise ValueError("STATE_BACKEND=redis requires REDIS_URL")
+            return RedisStateBackend(url, prefix=(env.get("STATE_BACKEND_PREFIX") or "qs:"))
+    except Exception as e:
+        logging.error("State backend %s unavailable, using memory: %s", kind, e)
+        return MemoryStateBackend()
+    if kind not in ("", "memory"):
+        logging.warning("Unknown STATE_BACKEND=%s; using memory", kind)
+    return MemoryStateBackend()
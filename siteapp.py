@@ -10,11 +10,10 @@ except ImportError:
 
 from flask import Flask, render_template, request, jsonify, redirect, send_from_directory, Response, stream_with_context, url_for
 from flask_socketio import SocketIO, join_room
-import difflib
+import atexit
 import hashlib
 import json
 import math
-from array import array
 import requests  # Added for RunPod API calls
 import time
 import logging
@@ -42,6 +41,67 @@ from email.message import EmailMessage
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 
 from email_risk_check import assess_email_risk, log_email_risk_event
+from job_state_store import JobStateStore, json_sizeof as job_state_json_sizeof
+from supabase_jwt import (
+    EXPIRED as JWT_EXPIRED,
+    INVALID as JWT_INVALID,
+    VERIFIED as JWT_VERIFIED,
+    SupabaseTokenVerifier,
+    unverified_claims as unverified_jwt_claims,
+    user_from_claims as supabase_user_from_claims,
+)
+from job_row_loader import JobRowLoader, job_row_batch_window_sec, job_row_max_batch
+from write_behind_queue import WriteBehindQueue, qs_trigger_flush_interval_sec
+from task_executor import OVERFLOW_REJECT, QueueConfig, TaskExecutor, install_shutdown_hooks
+from audio_profile import EnergyAccumulator as AudioEnergyAccumulator, window_variances as audio_window_variances
+from media_probe import (
+    media_probe_sizeof,
+    media_probe_sparse_max_bytes,
+    probe_stats as media_probe_stats,
+    s3_media_probe,
+)
+from transcript_codec import encode_json_body
+from transcript_cache import TranscriptCache, transcript_entry_sizeof
+from transcript_patch import TranscriptPatchError, apply_transcript_patch
+from token_align import align_replacements
+from docx_rtl import force_docx_rtl
+from export_cache import ExportArtifactCache, bytes_export_key, export_artifact_sizeof, export_key
+from bulk_export import map_unordered, safe_entry_stem, stream_zip, unique_entry_name
+from burn_queue import (
+    CANCELLED as BURN_CANCELLED,
+    COMPLETED as BURN_COMPLETED,
+    FAILED as BURN_FAILED,
+    PROCESSING as BURN_PROCESSING,
+    QUEUED as BURN_QUEUED,
+    TERMINAL_STATUSES as BURN_TERMINAL_STATUSES,
+    BurnTaskStore,
+    FfmpegResult,
+    HostSlots,
+    burn_dedupe_key,
+    burn_timeout_sec,
+    new_owner_id,
+    watch_orphans as watch_orphaned_burn_tasks,
+)
+import burn_engine
+from s3_stream_upload import StreamingMultipartUpload
+from word_columns import from_columnar, to_columnar, to_columnar_payload
+from job_payload import (
+    JobPayloadBytesCache,
+    completed_job_payload,
+    dedupe_job_payload,
+    etag_matches,
+    expand_job_payload,
+    payload_bytes_sizeof,
+)
+from job_events import JobEventBus, etag_for, version_from_etag
+from shared_state import MemoryStateBackend, SQLiteStateBackend, SharedStateMapping, state_backend_from_env
+from s3_client_registry import (
+    S3ClientRegistry,
+    client_key as s3_client_key,
+    credentials_fingerprint,
+    s3_client_registry_enabled,
+    s3_max_pool_connections,
+)
 
 
 # --- CONFIGURATION ---
@@ -170,33 +230,73 @@ def _s3_upload_accelerate_enabled_for_bucket(bucket):
     return v in ('1', 'true', 'yes', 'on')
 
 
-def _s3_boto_client(for_upload=False, bucket=None):
-    """S3-compatible client: R2 for S3_BUCKET (RunPod), AWS for medical / SageMaker manifests."""
-    use_r2 = _bucket_uses_r2(bucket)
-    region = _s3_region_for_bucket(bucket)
-    if not use_r2:
-        region = _sanitize_aws_region(region, 'eu-north-1')
-    config_kw = {'signature_version': 's3v4'}
-    if for_upload and bucket and _s3_upload_accelerate_enabled_for_bucket(bucket):
+def _s3_bucket_profile(bucket):
+    """Registry profile name for a bucket: standard (RunPod/R2), medical (HIPAA), or the raw bucket."""
+    b = str(bucket or '').strip()
+    if not b:
+        return 'default'
+    medical = _medical_s3_bucket_name()
+    if medical and b == medical:
+        return 'medical'
+    if b == _standard_s3_bucket_name():
+        return 'standard'
+    return f'bucket:{b}'
+
+
+_s3_client_registry = S3ClientRegistry()
+
+
+def _build_s3_boto_client(use_r2, region, accelerate, endpoint, access_key_id, secret_access_key):
+    config_kw = {
+        'signature_version': 's3v4',
+        'max_pool_connections': s3_max_pool_connections(),
+    }
+    if accelerate:
         config_kw['s3'] = {'use_accelerate_endpoint': True}
     client_kw = {
         'service_name': 's3',
-        'aws_access_key_id': (
-            os.environ.get('R2_ACCESS_KEY_ID') if use_r2 else os.environ.get('AWS_ACCESS_KEY_ID')
-        ),
-        'aws_secret_access_key': (
-            os.environ.get('R2_SECRET_ACCESS_KEY') if use_r2 else os.environ.get('AWS_SECRET_ACCESS_KEY')
-        ),
+        'aws_access_key_id': access_key_id,
+        'aws_secret_access_key': secret_access_key,
         'region_name': region,
         'config': Config(**config_kw),
     }
     # Never attach R2 endpoint_url to AWS/medical clients (that yields s3.auto.amazonaws.com).
-    endpoint = _r2_endpoint_url() if use_r2 else None
-    if endpoint:
+    if use_r2 and endpoint:
         client_kw['endpoint_url'] = endpoint
     return boto3.client(**client_kw)
 
 
+def _s3_boto_client(for_upload=False, bucket=None):
+    """S3-compatible client: R2 for S3_BUCKET (RunPod), AWS for medical / SageMaker manifests.
+
+    Clients are shared process-wide (see s3_client_registry) keyed by bucket profile,
+    backend and accelerate flag; boto3 clients are thread/greenlet-safe once built.
+    """
+    use_r2 = _bucket_uses_r2(bucket)
+    region = _s3_region_for_bucket(bucket)
+    if not use_r2:
+        region = _sanitize_aws_region(region, 'eu-north-1')
+    accelerate = bool(for_upload and bucket and _s3_upload_accelerate_enabled_for_bucket(bucket))
+    access_key_id = os.environ.get('R2_ACCESS_KEY_ID') if use_r2 else os.environ.get('AWS_ACCESS_KEY_ID')
+    secret_access_key = os.environ.get('R2_SECRET_ACCESS_KEY') if use_r2 else os.environ.get('AWS_SECRET_ACCESS_KEY')
+    endpoint = _r2_endpoint_url() if use_r2 else None
+
+    def _factory():
+        return _build_s3_boto_client(use_r2, region, accelerate, endpoint, access_key_id, secret_access_key)
+
+    if not s3_client_registry_enabled():
+        return _factory()
+    key = s3_client_key(
+        _s3_bucket_profile(bucket),
+        use_r2,
+        accelerate,
+        region,
+        endpoint,
+        credentials_fingerprint(access_key_id, secret_access_key),
+    )
+    return _s3_client_registry.get(key, _factory)
+
+
 def _s3_cdn_media_get_enabled():
     cdn = _s3_cdn_base_url()
     if not cdn or not cdn.lower().startswith('https://'):
@@ -1749,9 +1849,11 @@ def _guess_upload_content_type(filename, file_type):
 
 
 def _ffmpeg_audio_profile_pcm(ffmpeg_path, input_src, seconds, sr):
-    """Decode first `seconds` of audio to mono f32le PCM via ffmpeg.
+    """Decode first `seconds` of audio to mono f32le PCM via ffmpeg and stream it into an AudioEnergyAccumulator.
     `input_src` may be a local path or an HTTP(S) URL (presigned). Prefer local files — URL pulls often fail on
-    minimal ffmpeg builds or long Unicode URLs."""
+    minimal ffmpeg builds or long Unicode URLs.
+
+    Returns (CompletedProcess without stdout, cmd, accumulator); PCM is never buffered whole."""
     tail = ['-t', str(seconds), '-vn', '-ac', '1', '-ar', str(sr), '-f', 'f32le', '-']
     probe = str(os.environ.get('AUDIO_PROFILE_FFPROBE_BYTES', str(8 * 1024 * 1024)) or str(8 * 1024 * 1024))
     head = [
@@ -1772,10 +1874,32 @@ def _ffmpeg_audio_profile_pcm(ffmpeg_path, input_src, seconds, sr):
     ff_timeout = max(55, int(seconds or 20) + 50)
     last = None
     for cmd in attempts:
-        last = subprocess.run(cmd, capture_output=True, timeout=ff_timeout)
-        if last.returncode == 0 and last.stdout:
-            return last, cmd
-    return last, attempts[-1]
+        acc = AudioEnergyAccumulator(sr=sr)
+        # stderr goes to a temp file so a chatty decoder cannot block on a full pipe while we read stdout.
+        with tempfile.TemporaryFile() as err_f:
+            proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=err_f)
+            killer = threading.Timer(ff_timeout, proc.kill)
+            killer.start()
+            try:
+                while True:
+                    chunk = proc.stdout.read(256 * 1024)
+                    if not chunk:
+                        break
+                    acc.feed(chunk)
+                returncode = proc.wait()
+            finally:
+                killer.cancel()
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+                proc.stdout.close()
+            err_f.seek(0)
+            stderr = err_f.read()
+        acc.finish()
+        last = (subprocess.CompletedProcess(cmd, returncode, stdout=None, stderr=stderr), cmd, acc)
+        if returncode == 0 and acc.total_bytes:
+            return last
+    return last
 
 
 def _infer_audio_profile_from_s3(bucket, s3_key, seconds=20):
@@ -1798,113 +1922,55 @@ def _infer_audio_profile_from_s3(bucket, s3_key, seconds=20):
 
         prefix_a = max(2 * 1024 * 1024, int(os.environ.get('AUDIO_PROFILE_S3_PREFIX_BYTES', str(48 * 1024 * 1024)) or (48 * 1024 * 1024)))
         prefix_b = max(prefix_a, int(os.environ.get('AUDIO_PROFILE_S3_PREFIX_BYTES_RETRY', str(96 * 1024 * 1024)) or (96 * 1024 * 1024)))
-        prefix_attempts = []
-        for pb in (prefix_a, prefix_b):
-            if pb not in prefix_attempts:
-                prefix_attempts.append(pb)
 
-        suffix = pathlib.Path(str(s3_key)).suffix.lower() or '.bin'
-        pcm = b''
+        energy = None
         last_run = None
         last_cmd = None
 
-        for prefix_bytes in prefix_attempts:
-            tmp_path = None
-            try:
-                rng = f"bytes=0-{prefix_bytes - 1}"
-                resp = s3_client.get_object(Bucket=bucket, Key=s3_key, Range=rng)
-                chunk = resp['Body'].read()
-                if len(chunk) < 4096:
-                    continue
-                fd, tmp_path = tempfile.mkstemp(suffix=suffix)
-                try:
-                    os.write(fd, chunk)
-                finally:
-                    try:
-                        os.close(fd)
-                    except OSError:
-                        pass
-                    fd = None
-                run, cmd_used = _ffmpeg_audio_profile_pcm(ffmpeg_path, tmp_path, seconds, sr)
-                last_run, last_cmd = run, cmd_used
-                if run.returncode == 0 and run.stdout and len(run.stdout) >= 4096:
-                    pcm = run.stdout
-                    break
-            except ClientError as ce:
-                err_code = (ce.response.get('Error') or {}).get('Code')
-                # Rare: empty object or bad range — try full object once.
-                if err_code in ('416', 'InvalidRange'):
-                    try:
-                        resp = s3_client.get_object(Bucket=bucket, Key=s3_key)
-                        chunk = resp['Body'].read()
-                        if len(chunk) < 4096:
-                            continue
-                        fd, tmp_path = tempfile.mkstemp(suffix=suffix)
-                        try:
-                            os.write(fd, chunk)
-                        finally:
-                            try:
-                                os.close(fd)
-                            except OSError:
-                                pass
-                        run, cmd_used = _ffmpeg_audio_profile_pcm(ffmpeg_path, tmp_path, seconds, sr)
-                        last_run, last_cmd = run, cmd_used
-                        if run.returncode == 0 and run.stdout and len(run.stdout) >= 4096:
-                            pcm = run.stdout
-                            break
-                    except Exception:
-                        continue
-                continue
-            finally:
-                if tmp_path:
-                    try:
-                        os.unlink(tmp_path)
-                    except OSError:
-                        pass
-
-        # MP4 often has moov atom at end of file — prefix Range GET may be undecodable. Full GET when object is small enough.
-        if not pcm:
-            max_full = int(os.environ.get('AUDIO_PROFILE_S3_MAX_FULL_DOWNLOAD_BYTES', str(220 * 1024 * 1024)) or (220 * 1024 * 1024))
-            try:
-                ho = s3_client.head_object(Bucket=bucket, Key=s3_key)
-                content_len = int(ho.get('ContentLength') or 0)
-            except Exception:
-                content_len = 0
-            if content_len > 0 and content_len <= max_full:
+        # Same ranged probe as the credit duration check: the head prefix is sized from the parsed duration
+        # (first `seconds` of media, not a fixed 48 MB) and the sparse copy carries the tail, so MP4s with
+        # moov at the end decode without a full download.
+        probe = _s3_media_probe(bucket, s3_key, s3_client=s3_client)
+        if probe is not None:
+            prefix_attempts = []
+            for pb in (probe.profile_prefix_bytes(seconds, 2 * 1024 * 1024, prefix_a), min(prefix_b, probe.size)):
+                if pb not in prefix_attempts and (not prefix_attempts or pb > prefix_attempts[-1]):
+                    prefix_attempts.append(pb)
+            for prefix_bytes in prefix_attempts:
                 tmp_path = None
                 try:
-                    resp = s3_client.get_object(Bucket=bucket, Key=s3_key)
-                    chunk = resp['Body'].read()
-                    if len(chunk) >= 4096:
-                        fd, tmp_path = tempfile.mkstemp(suffix=suffix)
-                        try:
-                            os.write(fd, chunk)
-                        finally:
-                            try:
-                                os.close(fd)
-                            except OSError:
-                                pass
-                        run, cmd_used = _ffmpeg_audio_profile_pcm(ffmpeg_path, tmp_path, seconds, sr)
-                        last_run, last_cmd = run, cmd_used
-                        if run.returncode == 0 and run.stdout and len(run.stdout) >= 4096:
-                            pcm = run.stdout
+                    tmp_path = _media_probe_materialize(probe, s3_key, prefix_bytes)
+                    run, cmd_used, acc = _ffmpeg_audio_profile_pcm(ffmpeg_path, tmp_path, seconds, sr)
+                    last_run, last_cmd = run, cmd_used
+                    if run.returncode == 0 and acc.total_bytes >= 4096:
+                        energy = acc
+                        break
+                except Exception as e:
+                    logging.info("audio profile ranged decode failed key=%s prefix=%s: %s", str(s3_key)[-48:], prefix_bytes, e)
                 finally:
                     if tmp_path:
                         try:
                             os.unlink(tmp_path)
                         except OSError:
                             pass
+            logging.info(
+                "audio profile ranged probe key=%s fetched=%s attempts=%s ok=%s",
+                str(s3_key)[-48:],
+                probe.bytes_fetched,
+                prefix_attempts,
+                energy is not None,
+            )
 
         # Fallback: presigned URL (may still fail on stripped ffmpeg TLS — kept for non-file edge cases).
-        if not pcm:
+        if energy is None:
             src_url = s3_client.generate_presigned_url(
                 'get_object',
                 Params={'Bucket': bucket, 'Key': s3_key},
                 ExpiresIn=900,
             )
-            run, cmd_used = _ffmpeg_audio_profile_pcm(ffmpeg_path, src_url, seconds, sr)
+            run, cmd_used, acc = _ffmpeg_audio_profile_pcm(ffmpeg_path, src_url, seconds, sr)
             last_run, last_cmd = run, cmd_used
-            if run.returncode != 0 or not run.stdout or len(run.stdout) < 4096:
+            if run.returncode != 0 or acc.total_bytes < 4096:
                 stderr_txt = (last_run.stderr.decode('utf-8', errors='ignore') if last_run and last_run.stderr else '')
                 return {
                     "profile": "unknown",
@@ -1912,50 +1978,22 @@ def _infer_audio_profile_from_s3(bucket, s3_key, seconds=20):
                     "stderr": stderr_txt[-400:],
                     "ffmpeg_stderr_tail": stderr_txt[-400:],
                     "ffmpeg_args_tail": ' '.join(cmd_used[-10:]) if cmd_used else '',
-                    "decode_attempt": "s3_prefix_full_then_url",
+                    "decode_attempt": "s3_ranged_probe_then_url",
                 }
-            pcm = run.stdout or b''
-        if len(pcm) < 4096:
+            energy = acc
+        if energy.total_bytes < 4096:
             return {"profile": "unknown", "reason": "audio_too_short"}
-
-        samples = array('f')
-        samples.frombytes(pcm[: (len(pcm) // 4) * 4])
-        if not samples:
+        if not energy.samples:
             return {"profile": "unknown", "reason": "no_samples"}
 
-        # Peak-normalize so MP3 vs AAC-in-video level differences don't dominate the metric.
-        peak = 0.0
-        for x in samples:
-            ax = abs(float(x))
-            if ax > peak:
-                peak = ax
-        if peak < 1e-10:
+        # Peak-normalized 100ms window RMS (normalization keeps MP3 vs AAC-in-video level differences
+        # from dominating the metric); computed while PCM streamed out of ffmpeg.
+        if energy.peak < 1e-10:
             return {"profile": "unknown", "reason": "silent_or_near_silent"}
-        inv_peak = 1.0 / peak
-        for i in range(len(samples)):
-            samples[i] = float(samples[i]) * inv_peak
-
-        frame = max(800, int(sr * 0.1))  # 100ms windows
-        rms_vals = []
-        for i in range(0, len(samples), frame):
-            chunk = samples[i:i + frame]
-            if not chunk:
-                continue
-            s2 = 0.0
-            for x in chunk:
-                fx = float(x)
-                s2 += fx * fx
-            rms_vals.append(math.sqrt(s2 / len(chunk)))
+        rms_vals = energy.rms_values()
         if len(rms_vals) < 4:
             return {"profile": "unknown", "reason": "not_enough_frames"}
 
-        def _variance(vals):
-            if not vals:
-                return None
-            m = sum(vals) / len(vals)
-            return sum((v - m) * (v - m) for v in vals) / len(vals)
-
-        var = _variance(rms_vals)
         thr_base = float(os.environ.get('AUDIO_PROFILE_MUSIC_RMS_VAR_THRESHOLD', '0.002') or 0.002)
         video_mult = 1.0
         if _s3_key_likely_video_container(s3_key):
@@ -1966,11 +2004,7 @@ def _infer_audio_profile_from_s3(bucket, s3_key, seconds=20):
             video_mult = float(os.environ.get('AUDIO_PROFILE_AUDIO_MUSIC_THRESHOLD_MULT', '4.0') or 4.0)
         thr = thr_base * video_mult
         skip_intro_sec = max(0.0, float(os.environ.get('AUDIO_PROFILE_SKIP_INTRO_SECONDS', '5') or 5))
-        post_intro_start = min(len(rms_vals), int(round(skip_intro_sec / 0.1)))
-        post_intro_vals = rms_vals[post_intro_start:] if post_intro_start < len(rms_vals) else []
-        post_intro_var = _variance(post_intro_vals) if len(post_intro_vals) >= 4 else None
-        tail_vals = rms_vals[len(rms_vals) // 2:]
-        tail_var = _variance(tail_vals) if len(tail_vals) >= 4 else None
+        var, post_intro_var, tail_var = audio_window_variances(rms_vals, skip_intro_sec)
 
         profile = 'speech'
         basis = 'full_sample'
@@ -2128,12 +2162,50 @@ def _get_worker_handoff(job_id):
     }
 
 
+# Handshake entries are written by the RunPod callback, status polls and watchers, possibly in different
+# gunicorn workers: read-modify-writes go through the backend's compare-and-set (a lock is enough in memory).
+_handshake_local_lock = threading.Lock()
+
+
+def _handshake_mutate(mapping, job_id, fn):
+    """Atomic ``fn(current) -> new value`` (None keeps it) on one handshake entry; returns the stored value."""
+    if isinstance(mapping, SharedStateMapping):
+        return mapping.mutate(job_id, fn)
+    with _handshake_local_lock:
+        current = mapping.get(job_id)
+        value = fn(current)
+        if value is None:
+            return current
+        mapping[job_id] = value
+        return value
+
+
+def _finish_handoff_once(mapping, job_id, handoff, **fields):
+    """Mark a CPU preprocessing handoff finished exactly once; returns the record, or None if already finished."""
+    won = False
+
+    def _finish(current):
+        nonlocal won
+        current = current if isinstance(current, dict) else {}
+        won = not (current.get('finished') or handoff.get('finished'))
+        if not won:
+            return None
+        merged = {**handoff, **{k: v for k, v in current.items() if v is not None}}
+        return {**merged, 'finished': True, 'finished_at': time.time(), **fields}
+
+    finished = _handshake_mutate(mapping, job_id, _finish)
+    return finished if won else None
+
+
+def _merge_pending_job_info(job_id, fields):
+    """Merge ``fields`` into ``pending_job_info[job_id]`` atomically; returns the stored dict."""
+    return _handshake_mutate(pending_job_info, job_id, lambda current: {**(current or {}), **fields})
+
+
 def _set_worker_handoff(job_id, **fields):
-    pinfo = dict(pending_job_info.get(job_id) or {})
-    for key, val in fields.items():
-        if val is not None or key == "worker_pending_reason":
-            pinfo[key] = val
-    pending_job_info[job_id] = pinfo
+    _merge_pending_job_info(
+        job_id, {k: v for k, v in fields.items() if v is not None or k == "worker_pending_reason"}
+    )
     persist = {}
     for key in (
         "options_finalized",
@@ -2158,7 +2230,7 @@ def _set_worker_handoff(job_id, **fields):
         if "worker_ready" in fields:
             _run()
         else:
-            threading.Thread(target=_run, daemon=True).start()
+            _merge_job_qs_trigger_async(job_id, persist, update_job_status=None)
 
 
 def _job_upload_complete_from_db(job_id_value: str) -> bool:
@@ -2281,21 +2353,18 @@ def _recover_stale_audio_preprocess_gate(job_id, handoff):
         )
         return False
 
-    with _audio_preprocess_finish_lock:
-        latest = _load_audio_preprocess_handoff(job_id)
-        if latest.get("finished"):
-            return False
-        recovered = {
-            **latest,
-            "status": "failed_open",
-            "finished": True,
-            "finished_at": time.time(),
-            "source_s3_key": source_key,
-            "error": f"stale audio preprocessing gate recovered after {age_sec:.1f}s",
-            "recovery_reason": "worker_handoff_poll",
-        }
-        audio_preprocess_jobs[job_id] = recovered
-        _persist_audio_preprocess_handoff(job_id, recovered)
+    recovered = _finish_handoff_once(
+        audio_preprocess_jobs,
+        job_id,
+        _load_audio_preprocess_handoff(job_id),
+        status="failed_open",
+        source_s3_key=source_key,
+        error=f"stale audio preprocessing gate recovered after {age_sec:.1f}s",
+        recovery_reason="worker_handoff_poll",
+    )
+    if recovered is None:
+        return False
+    _persist_audio_preprocess_handoff(job_id, recovered)
 
     options = dict(handoff.get("transcription_options") or {})
     options.update({
@@ -2474,14 +2543,12 @@ def _apply_vocal_separation_success(trigger_payload, job_id, source_s3_key, voca
     })
     input_payload['s3Key'] = vocals_s3_key
     input_payload['transcription_options'] = options
-    pinfo = dict(pending_job_info.get(job_id) or {})
-    pinfo.update({
+    _merge_pending_job_info(job_id, {
         'input_s3_key': source_s3_key,
         'transcription_s3_key': vocals_s3_key,
         'preprocessed_audio': True,
         'transcription_options': options,
     })
-    pending_job_info[job_id] = pinfo
     return trigger_payload
 
 
@@ -2501,9 +2568,6 @@ def _apply_vocal_separation_failure(trigger_payload, source_s3_key, error_text):
     return trigger_payload
 
 
-_vocal_separation_finish_lock = threading.Lock()
-
-
 def _s3_object_exists(bucket, key):
     if not bucket or not key:
         return False
@@ -2658,14 +2722,12 @@ def _fetch_runpod_job_status(endpoint_id, run_id, api_key=None):
 
 
 def _mark_vocal_separation_finished(job_id, status):
-    with _vocal_separation_finish_lock:
-        handoff = _load_vocal_separation_handoff(job_id)
-        if handoff.get('finished'):
-            return False
-        finished = {**handoff, 'finished': True, 'status': status, 'finished_at': time.time()}
-        vocal_separation_jobs[job_id] = finished
-        _persist_vocal_separation_handoff(job_id, finished)
-        return True
+    finished = _finish_handoff_once(vocal_separation_jobs, job_id, _load_vocal_separation_handoff(job_id), status=status)
+    if finished is None:
+        return False
+    _persist_vocal_separation_handoff(job_id, finished)
+    _publish_job_event(job_id, 'preprocess', preprocess='vocal_separation', preprocess_status=status)
+    return True
 
 
 def _complete_vocal_separation_job(job_id, handoff, result, reason=''):
@@ -2720,13 +2782,11 @@ def _fail_vocal_separation_job(job_id, handoff, error_text, reason=''):
         handoff.get('source_s3_key'),
         error_text,
     )
-    pinfo = dict(pending_job_info.get(job_id) or {})
-    pinfo.update({
+    _merge_pending_job_info(job_id, {
         'input_s3_key': handoff.get('source_s3_key'),
         'transcription_s3_key': handoff.get('source_s3_key'),
         'transcription_options': (trigger_payload.get('input') or {}).get('transcription_options') or {},
     })
-    pending_job_info[job_id] = pinfo
     _finish_vocal_separation_and_trigger_gpu(
         job_id,
         trigger_payload,
@@ -2790,9 +2850,6 @@ def _watch_runpod_vocal_separation(job_id):
         logging.exception("_watch_runpod_vocal_separation failed job_id=%s", job_id)
 
 
-_audio_preprocess_finish_lock = threading.Lock()
-
-
 def _get_audio_preprocess_meta_from_db(job_id):
     try:
         row = _get_job_row_by_runpod_job_id(job_id, select="metadata")
@@ -2829,14 +2886,12 @@ def _load_audio_preprocess_handoff(job_id):
 
 
 def _mark_audio_preprocess_finished(job_id, status):
-    with _audio_preprocess_finish_lock:
-        handoff = _load_audio_preprocess_handoff(job_id)
-        if handoff.get('finished'):
-            return False
-        finished = {**handoff, 'finished': True, 'status': status, 'finished_at': time.time()}
-        audio_preprocess_jobs[job_id] = finished
-        _persist_audio_preprocess_handoff(job_id, finished)
-        return True
+    finished = _finish_handoff_once(audio_preprocess_jobs, job_id, _load_audio_preprocess_handoff(job_id), status=status)
+    if finished is None:
+        return False
+    _persist_audio_preprocess_handoff(job_id, finished)
+    _publish_job_event(job_id, 'preprocess', preprocess='audio_preprocess', preprocess_status=status)
+    return True
 
 
 def _apply_audio_preprocess_result(trigger_payload, job_id, source_s3_key, output_s3_key, *, timing=None, error=None):
@@ -2859,14 +2914,12 @@ def _apply_audio_preprocess_result(trigger_payload, job_id, source_s3_key, outpu
     transcription_key = output_s3_key if succeeded else source_s3_key
     input_payload['s3Key'] = transcription_key
     input_payload['transcription_options'] = options
-    pinfo = dict(pending_job_info.get(job_id) or {})
-    pinfo.update({
+    _merge_pending_job_info(job_id, {
         'input_s3_key': source_s3_key,
         'transcription_s3_key': transcription_key,
         'audio_preprocessed_s3_key': output_s3_key if succeeded else None,
         'transcription_options': options,
     })
-    pending_job_info[job_id] = pinfo
     return trigger_payload
 
 
@@ -2907,9 +2960,7 @@ def _complete_audio_preprocess_job(job_id, handoff, result=None, reason=''):
         timing = (result or {}).get('timing') if isinstance(result, dict) else {}
         input_dur = float((timing or {}).get('input_duration_sec') or 0)
         if input_dur > 0:
-            pinfo = dict(pending_job_info.get(job_id) or {})
-            pinfo['credit_file_duration_sec'] = input_dur
-            pending_job_info[job_id] = pinfo
+            pinfo = _merge_pending_job_info(job_id, {'credit_file_duration_sec': input_dur})
             uid = str(pinfo.get('user_id') or 'anonymous').strip() or 'anonymous'
             src = str(handoff.get('source_s3_key') or pinfo.get('input_s3_key') or '').strip()
             if src:
@@ -3654,171 +3705,150 @@ def _build_rtl_docx(lines, bold_first=False):
     return out.getvalue()
 
 
-def _force_docx_rtl_bytes(docx_bytes):
-    """
-    Patch RTL/right-alignment directly in the DOCX ZIP using regex string
-    substitution — never re-parses XML so all OOXML namespace prefixes are
-    preserved exactly (ElementTree re-serialisation was mangling them).
+# Strict settings to keep connections alive
+socketio = SocketIO(app,
+    cors_allowed_origins="*",
+    async_mode='gevent',
+    # Polling + websocket: clients that cannot keep WSS (hospital proxies) stay on long-polling.
+    transports=['polling', 'websocket'],
+    ping_timeout=600,
+    ping_interval=20,
+    manage_session=False
+)
 
-    What we inject per paragraph (w:pPr):
-      <w:bidi/>                  — paragraph base direction = RTL
-      <w:jc w:val="right"/>      — paragraph alignment = right  (= Ctrl+R)
+# --- GLOBAL CACHE ---
+# Per-job process state lives in bounded namespaces (TTL + LRU, in-flight jobs never evicted).
+def _job_state_env_float(name, default):
+    try:
+        return max(0.0, float(os.environ.get(name, '') or default))
+    except (TypeError, ValueError):
+        return float(default)
 
-    What we inject per run (w:rPr):
-      <w:rtl/>                   — run direction = RTL (needed for mixed text)
 
-    We also patch word/styles.xml so the Normal style and docDefaults
-    inherit the same defaults, which means a new empty paragraph is also RTL.
-    """
+_JOB_STATE_TTL_SEC = _job_state_env_float('JOB_STATE_TTL_SEC', 24 * 3600)
+_JOB_STATE_MAX_ENTRIES = int(_job_state_env_float('JOB_STATE_MAX_ENTRIES', 20000))
+_job_state = JobStateStore(
+    in_flight_max_age_sec=_job_state_env_float('JOB_STATE_IN_FLIGHT_MAX_AGE_SEC', 24 * 3600),
+)
 
-    _BIDI    = '<w:bidi w:val="1"/>'
-    _JC      = '<w:jc w:val="right"/>'
-    _RTL_RUN = '<w:rtl w:val="1"/>'
-
-    # --- helpers --------------------------------------------------------
-
-    def _strip(tag, xml):
-        """Remove all occurrences of <tag .../> or <tag...>...</tag>."""
-        xml = re.sub(r'<' + tag + r'(?:\s[^/]*)*/>', '', xml)
-        xml = re.sub(r'<' + tag + r'(?:\s[^>]*)?>.*?</' + tag + r'>', '', xml, flags=re.DOTALL)
-        return xml
-
-    def _patch_ppr_inner(inner):
-        """Given the content between <w:pPr> and </w:pPr>, enforce bidi+jc.
-        w:pStyle MUST stay first in pPr — Word silently drops paragraphs otherwise."""
-        inner = _strip('w:bidi', inner)
-        inner = _strip('w:jc',   inner)
-        # Keep pStyle first if present; insert bidi+jc immediately after it
-        m = re.match(r'(\s*<w:pStyle\b[^/]*/>\s*)', inner)
-        if m:
-            return m.group(0) + _BIDI + _JC + inner[m.end():]
-        return _BIDI + _JC + inner
-
-    def _patch_rpr_inner(inner):
-        """Given the content between <w:rPr> and </w:rPr>, enforce rtl."""
-        if '<w:rtl' not in inner:
-            return inner + _RTL_RUN
-        return inner
-
-    def patch_body_xml(xml):
-        # Non-empty <w:pPr>...</w:pPr>
-        xml = re.sub(
-            r'<w:pPr>(.*?)</w:pPr>',
-            lambda m: '<w:pPr>' + _patch_ppr_inner(m.group(1)) + '</w:pPr>',
-            xml, flags=re.DOTALL
-        )
-        # Self-closing <w:pPr/>
-        xml = xml.replace('<w:pPr/>', '<w:pPr>' + _BIDI + _JC + '</w:pPr>')
-        # Non-empty <w:rPr>...</w:rPr>
-        xml = re.sub(
-            r'<w:rPr>(.*?)</w:rPr>',
-            lambda m: '<w:rPr>' + _patch_rpr_inner(m.group(1)) + '</w:rPr>',
-            xml, flags=re.DOTALL
-        )
-        # Self-closing <w:rPr/>
-        xml = xml.replace('<w:rPr/>', '<w:rPr>' + _RTL_RUN + '</w:rPr>')
-        return xml
-
-    def patch_styles_xml(xml):
-        # Patch every paragraph style block
-        def _fix_style(m):
-            block = m.group(0)
-            if '<w:pPr>' in block:
-                block = re.sub(
-                    r'<w:pPr>(.*?)</w:pPr>',
-                    lambda pm: '<w:pPr>' + _patch_ppr_inner(pm.group(1)) + '</w:pPr>',
-                    block, flags=re.DOTALL
-                )
-                block = block.replace('<w:pPr/>', '<w:pPr>' + _BIDI + _JC + '</w:pPr>')
-            else:
-                block = block.replace('</w:style>', '<w:pPr>' + _BIDI + _JC + '</w:pPr></w:style>')
-            return block
 
-        xml = re.sub(
-            r'<w:style\b[^>]*w:type="paragraph"[^>]*>.*?</w:style>',
-            _fix_style, xml, flags=re.DOTALL
-        )
+def _job_state_namespace(name, ttl_sec=None, max_entries=None, **limits):
+    return _job_state.namespace(
+        name,
+        ttl_sec=_JOB_STATE_TTL_SEC if ttl_sec is None else ttl_sec,
+        max_entries=_JOB_STATE_MAX_ENTRIES if max_entries is None else max_entries,
+        **limits,
+    )
 
-        # Patch docDefaults pPrDefault and rPrDefault
-        def _fix_defaults(m):
-            block = m.group(0)
-            # pPrDefault
-            if '<w:pPrDefault' in block:
-                if '<w:pPr>' in block:
-                    block = re.sub(
-                        r'(<w:pPrDefault[^>]*>.*?)<w:pPr>(.*?)</w:pPr>',
-                        lambda pm: pm.group(1) + '<w:pPr>' + _patch_ppr_inner(pm.group(2)) + '</w:pPr>',
-                        block, flags=re.DOTALL
-                    )
-                else:
-                    block = block.replace('</w:pPrDefault>',
-                        '<w:pPr>' + _BIDI + _JC + '</w:pPr></w:pPrDefault>')
-            else:
-                block = block.replace('</w:docDefaults>',
-                    '<w:pPrDefault><w:pPr>' + _BIDI + _JC + '</w:pPr></w:pPrDefault></w:docDefaults>')
-            # rPrDefault
-            if '<w:rPrDefault' in block:
-                if '<w:rPr>' in block:
-                    block = re.sub(
-                        r'(<w:rPrDefault[^>]*>.*?)<w:rPr>(.*?)</w:rPr>',
-                        lambda rm: rm.group(1) + '<w:rPr>' + _patch_rpr_inner(rm.group(2)) + '</w:rPr>',
-                        block, flags=re.DOTALL
-                    )
-                else:
-                    block = block.replace('</w:rPrDefault>',
-                        '<w:rPr>' + _RTL_RUN + '</w:rPr></w:rPrDefault>')
-            else:
-                block = block.replace('</w:docDefaults>',
-                    '<w:rPrDefault><w:rPr>' + _RTL_RUN + '</w:rPr></w:rPrDefault></w:docDefaults>')
-            return block
 
-        xml = re.sub(r'<w:docDefaults>.*?</w:docDefaults>', _fix_defaults, xml, flags=re.DOTALL)
-        return xml
+job_results_cache = _job_state_namespace(
+    'job_results',
+    ttl_sec=_job_state_env_float('JOB_RESULTS_CACHE_TTL_SEC', 2 * 3600),
+    max_entries=int(_job_state_env_float('JOB_RESULTS_CACHE_MAX_ENTRIES', 2000)),
+    max_bytes=int(_job_state_env_float('JOB_RESULTS_CACHE_MAX_MB', 256) * 1024 * 1024),
+    sizeof=job_state_json_sizeof,
+)
+# check_status response bytes per (job_id, shape variant), valid for one job_results_cache write.
+_job_payload_bytes = JobPayloadBytesCache(
+    _job_state_namespace(
+        'job_payload_bytes',
+        ttl_sec=_job_state_env_float('JOB_PAYLOAD_BYTES_TTL_SEC', 1800),
+        max_entries=int(_job_state_env_float('JOB_PAYLOAD_BYTES_MAX_ENTRIES', 1000)),
+        max_bytes=int(_job_state_env_float('JOB_PAYLOAD_BYTES_MAX_MB', 128) * 1024 * 1024),
+        sizeof=payload_bytes_sizeof,
+    ),
+    gzip_min_bytes=int(_job_state_env_float('JOB_PAYLOAD_GZIP_MIN_BYTES', 1024)),
+)
+transcription_email_sent = _job_state_namespace('transcription_email_sent', ttl_sec=7 * 24 * 3600, max_entries=50000)
+# Parsed transcript JSON by (bucket, key): revalidated with IfNoneMatch, written through on save.
+_transcript_cache = TranscriptCache(
+    _job_state_namespace(
+        'transcript_json',
+        ttl_sec=_job_state_env_float('TRANSCRIPT_CACHE_TTL_SEC', 3600),
+        max_entries=int(_job_state_env_float('TRANSCRIPT_CACHE_MAX_ENTRIES', 500)),
+        max_bytes=int(_job_state_env_float('TRANSCRIPT_CACHE_MAX_MB', 128) * 1024 * 1024),
+        sizeof=transcript_entry_sizeof,
+    ),
+    fresh_sec=_job_state_env_float('TRANSCRIPT_CACHE_FRESH_SEC', 2.0),
+    transform=from_columnar,
+)
+# Generated export bytes (DOCX, subtitles, RTL-fixed DOCX) by content hash; EXPORT_CACHE_S3 adds an R2 tier.
+_export_artifacts = ExportArtifactCache(
+    _job_state_namespace(
+        'export_artifacts',
+        ttl_sec=_job_state_env_float('EXPORT_CACHE_TTL_SEC', 3600),
+        max_entries=int(_job_state_env_float('EXPORT_CACHE_MAX_ENTRIES', 500)),
+        max_bytes=int(_job_state_env_float('EXPORT_CACHE_MAX_MB', 64) * 1024 * 1024),
+        sizeof=export_artifact_sizeof,
+    ),
+    s3_client_factory=lambda: _s3_boto_client(bucket=os.environ.get('S3_BUCKET')),
+    bucket=os.environ.get('S3_BUCKET') if str(os.environ.get('EXPORT_CACHE_S3') or '').strip().lower() in ('1', 'true', 'yes', 'on') else None,
+    prefix=(os.environ.get('EXPORT_CACHE_S3_PREFIX') or 'exports/'),
+)
+_EXPORT_CACHE_MAX_INPUT_BYTES = int(_job_state_env_float('EXPORT_CACHE_MAX_INPUT_MB', 16) * 1024 * 1024)
+_DOCX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
 
-    # --- zip pass -------------------------------------------------------
+# Trigger handshake state must be visible to every gunicorn worker when more than one runs:
+# STATE_BACKEND=sqlite (one host) or redis (any host). Memory keeps the bounded local namespaces.
+_shared_state = state_backend_from_env()
 
-    in_mem  = BytesIO(docx_bytes)
-    out_mem = BytesIO()
-    BODY_PARTS = {
-        'word/document.xml', 'word/footnotes.xml',
-        'word/endnotes.xml', 'word/comments.xml',
-    }
 
-    with zipfile.ZipFile(in_mem, 'r') as zin, \
-         zipfile.ZipFile(out_mem, 'w', compression=zipfile.ZIP_DEFLATED) as zout:
-        for item in zin.infolist():
-            data = zin.read(item.filename)
-            name = item.filename.lower()
-            try:
-                if name in BODY_PARTS \
-                        or (name.startswith('word/header') and name.endswith('.xml')) \
-                        or (name.startswith('word/footer') and name.endswith('.xml')):
-                    data = patch_body_xml(data.decode('utf-8', errors='replace')).encode('utf-8')
-                elif name == 'word/styles.xml':
-                    data = patch_styles_xml(data.decode('utf-8', errors='replace')).encode('utf-8')
-            except Exception as e:
-                logging.warning('RTL patch skipped for %s: %s', item.filename, e)
-            zout.writestr(item, data)
+def _handshake_namespace(name, ttl_sec=None):
+    if _shared_state.shared:
+        return SharedStateMapping(_shared_state, name, ttl_sec=_JOB_STATE_TTL_SEC if ttl_sec is None else ttl_sec)
+    return _job_state_namespace(name, ttl_sec=ttl_sec)
 
-    out_mem.seek(0)
-    return out_mem.getvalue()
 
+# Push status channel: producers publish small per-job snapshots; Socket.IO rooms, SSE
+# (/api/job_events/<id>) and long-poll (/api/job_status_wait/<id>) subscribers read them
+# instead of re-polling Supabase / R2.
+_job_events = JobEventBus(backend=_shared_state)
 
 
-# Strict settings to keep connections alive
-socketio = SocketIO(app,
-    cors_allowed_origins="*",
-    async_mode='gevent',
-    # Polling + websocket: clients that cannot keep WSS (hospital proxies) stay on long-polling.
-    transports=['polling', 'websocket'],
-    ping_timeout=600,
-    ping_interval=20,
-    manage_session=False
-)
+def _job_event_socketio_listener(snap):
+    socketio.emit('job_event', snap, room=snap.get('job_id'))
 
-# --- GLOBAL CACHE ---
-job_results_cache = {}
-transcription_email_sent = set()
+
+_job_events.add_listener(_job_event_socketio_listener)
+
+
+def _publish_job_event(job_id, event, status=None, **fields):
+    if not job_id or _is_medical_session_warmup_job(job_id):
+        return None
+    try:
+        return _job_events.publish(job_id, event, status=status, **fields)
+    except Exception as e:
+        logging.warning("_publish_job_event failed job_id=%s event=%s: %s", job_id, event, e)
+        return None
+
+
+def _emit_job_status_update(job_id, payload):
+    """Full result to the Socket.IO room plus a small bus event for SSE / long-poll subscribers."""
+    socketio.emit('job_status_update', _job_payload_shaped(payload), room=job_id)
+    status = str((payload or {}).get('status') or '').strip().lower() if isinstance(payload, dict) else ''
+    _publish_job_event(
+        job_id,
+        'result',
+        status=status or 'completed',
+        has_result=True,
+        server_gpt_pending=bool(isinstance(payload, dict) and payload.get('server_gpt_pending')) or None,
+    )
+
+
+# Background work runs on bounded named queues instead of one daemon thread per task.
+# critical: callback finalization, trigger dispatch, persistence (backpressure runs inline, and so
+# does anything submitted after SIGTERM); gpt: post-processing and medical training; notifications:
+# e-mail / Meta CAPI (dropped when full); watchers: long-lived RunPod / SageMaker pollers; media:
+# local ffmpeg fallbacks. Only critical runs inline during shutdown; the others reject new work.
+_background_tasks = TaskExecutor([
+    QueueConfig.from_env('critical', max_workers=32, max_pending=500, default_priority=1, inline_on_shutdown=True),
+    QueueConfig.from_env('gpt', max_workers=8, max_pending=200),
+    QueueConfig.from_env('notifications', max_workers=4, max_pending=200, overflow=OVERFLOW_REJECT),
+    QueueConfig.from_env('watchers', max_workers=64, idle_sec=5.0),
+    # Burns wait for a host-wide slot (BURN_MAX_CONCURRENT_PER_HOST) inside their worker, renewing their lease.
+    QueueConfig.from_env('media', max_workers=16, max_pending=100, overflow=OVERFLOW_REJECT),
+])
+install_shutdown_hooks(_background_tasks, timeout=_job_state_env_float('TASK_EXECUTOR_DRAIN_SEC', 20))
 
 logging.basicConfig(level=logging.INFO)
 
@@ -3977,6 +4007,8 @@ def stream_s3_media(token):
         h['Content-Range'] = obj['ContentRange']
     if obj.get('ETag'):
         h['ETag'] = obj['ETag']
+    if obj.get('ContentEncoding'):
+        h['Content-Encoding'] = obj['ContentEncoding']
 
     body = obj['Body']
 
@@ -4142,57 +4174,12 @@ def _set_word_token(w, token):
 
 
 def _align_orig_tokens_to_clean(orig_tokens, clean_tokens):
-    """Map each original token index -> replacement string ('' means delete)."""
-    replacements = {}
-    if not orig_tokens:
-        return replacements
-    if not clean_tokens:
-        for i in range(len(orig_tokens)):
-            replacements[i] = ''
-        return replacements
-
-    sm = difflib.SequenceMatcher(a=orig_tokens, b=clean_tokens, autojunk=False)
-    for tag, i1, i2, j1, j2 in sm.get_opcodes():
-        if tag == 'equal':
-            for k in range(i2 - i1):
-                replacements[i1 + k] = clean_tokens[j1 + k]
-        elif tag == 'replace':
-            n_old = i2 - i1
-            n_new = j2 - j1
-            for k in range(n_old):
-                if k < n_new:
-                    replacements[i1 + k] = clean_tokens[j1 + k]
-                else:
-                    replacements[i1 + k] = ''
-            if n_new > n_old and n_old > 0:
-                extras = clean_tokens[j1 + n_old : j2]
-                last = i1 + n_old - 1
-                base = replacements.get(last) or ''
-                replacements[last] = (base + ' ' + ' '.join(extras)).strip()
-            elif n_new > 0 and n_old == 0 and i1 > 0:
-                extras = ' '.join(clean_tokens[j1:j2])
-                prev = i1 - 1
-                replacements[prev] = ((replacements.get(prev) or orig_tokens[prev]) + ' ' + extras).strip()
-        elif tag == 'delete':
-            for k in range(i1, i2):
-                replacements[k] = ''
-        elif tag == 'insert':
-            extras = ' '.join(clean_tokens[j1:j2])
-            if not extras:
-                continue
-            if i1 > 0:
-                prev = i1 - 1
-                base = replacements.get(prev)
-                if base is None:
-                    base = orig_tokens[prev]
-                replacements[prev] = (base + ' ' + extras).strip()
-            else:
-                # Prepend to first original token when available.
-                base = replacements.get(0)
-                if base is None:
-                    base = orig_tokens[0]
-                replacements[0] = (extras + ' ' + base).strip()
-    return replacements
+    """Map each original token index -> replacement string ('' means delete).
+
+    Anchored alignment (token_align): near-linear on multi-hour transcripts, identical to
+    SequenceMatcher for short ones.
+    """
+    return align_replacements(orig_tokens, clean_tokens)
 
 
 def _apply_clean_transcript_to_segments(segments, clean_text, is_music=False):
@@ -4401,7 +4388,12 @@ def _flatten_words_from_segments(segments):
 
 
 def _put_transcript_json_to_s3(user_id, input_s3_key, transcript, stage='gpt', is_medical=None):
-    """Low-level helper to write transcript JSON.
+    """Write transcript JSON; returns the result_s3_key (see _put_transcript_json_to_s3_with_etag)."""
+    return _put_transcript_json_to_s3_with_etag(user_id, input_s3_key, transcript, is_medical=is_medical)[0]
+
+
+def _put_transcript_json_to_s3_with_etag(user_id, input_s3_key, transcript, is_medical=None, if_match=None):
+    """Low-level helper to write transcript JSON; returns (result_s3_key, etag).
 
     transcript can include:
       - segments: legacy list[{start,end,text,...}]
@@ -4412,22 +4404,28 @@ def _put_transcript_json_to_s3(user_id, input_s3_key, transcript, stage='gpt', i
     Medical keys:
       - canonical result -> transcripts/users/{id}/{stem}.json
       - GPT summary mirror -> summaries/users/{id}/{stem}.json (when formatted present)
+
+    if_match makes the write conditional on the current object ETag (S3 answers
+    412 PreconditionFailed / 409 ConditionalRequestConflict when it changed).
     """
     if transcript is None or not isinstance(transcript, dict):
         raise ValueError("transcript must be an object")
     profile = _resolve_storage_profile(user_id, input_s3_key=input_s3_key, is_medical=is_medical)
     base = _derive_output_key_base(user_id, input_s3_key, is_medical=profile["is_medical"])
     # Keep a single canonical transcript object key.
-    # `stage` is accepted for backward compatibility, but ignored.
     result_s3_key = base + '.json'
 
-    body = json.dumps(transcript, ensure_ascii=False).encode('utf-8')
+    # gzip (TRANSCRIPT_S3_CODEC) + Content-Encoding; readers sniff magic bytes so legacy plain objects still load.
+    # TRANSCRIPT_S3_COLUMNAR stores word timings as columns; only enable once every reader (incl. the
+    # browser's presigned-URL fetch) understands words_format=columnar/1. Server reads convert back.
+    stored = to_columnar(transcript) if _env_truthy('TRANSCRIPT_S3_COLUMNAR', False) else transcript
+    body, encoding_kw, json_len = encode_json_body(stored)
     s3_client = _s3_boto_client(bucket=profile["bucket"])
     put_kw = {
         'Bucket': profile["bucket"],
         'Key': result_s3_key,
         'Body': body,
-        'ContentType': 'application/json',
+        **encoding_kw,
     }
     if profile["is_medical"]:
         kms_arn = _kms_key_arn()
@@ -4436,7 +4434,16 @@ def _put_transcript_json_to_s3(user_id, input_s3_key, transcript, stage='gpt', i
             put_kw['SSEKMSKeyId'] = kms_arn
     else:
         kms_arn = ''
-    s3_client.put_object(**put_kw)
+    if if_match:
+        put_kw['IfMatch'] = if_match
+    try:
+        put_resp = s3_client.put_object(**put_kw)
+    except ClientError:
+        _transcript_cache.invalidate(profile["bucket"], result_s3_key)
+        raise
+    etag = (put_resp or {}).get('ETag')
+    _transcript_cache.put(profile["bucket"], result_s3_key, etag, transcript, json_len)
+    _export_artifacts.invalidate_source(str(input_s3_key))
 
     # Medical: also persist GPT summary under summaries/ for the HIPAA layout.
     if profile["is_medical"] and isinstance(transcript.get('formatted'), dict):
@@ -4444,20 +4451,21 @@ def _put_transcript_json_to_s3(user_id, input_s3_key, transcript, stage='gpt', i
             summary_base = _derive_summary_key_base(user_id, input_s3_key, is_medical=True)
             summary_key = summary_base + '.json'
             if summary_key != result_s3_key:
-                summary_body = json.dumps(
-                    {"formatted": transcript.get('formatted')},
-                    ensure_ascii=False,
-                ).encode('utf-8')
+                summary_doc = {"formatted": transcript.get('formatted')}
+                summary_body, summary_encoding_kw, summary_len = encode_json_body(summary_doc)
                 summary_kw = {
                     'Bucket': profile["bucket"],
                     'Key': summary_key,
                     'Body': summary_body,
-                    'ContentType': 'application/json',
+                    **summary_encoding_kw,
                 }
                 if kms_arn:
                     summary_kw['ServerSideEncryption'] = 'aws:kms'
                     summary_kw['SSEKMSKeyId'] = kms_arn
-                s3_client.put_object(**summary_kw)
+                summary_resp = s3_client.put_object(**summary_kw)
+                _transcript_cache.put(
+                    profile["bucket"], summary_key, (summary_resp or {}).get('ETag'), summary_doc, summary_len
+                )
         except Exception as sum_err:
             logging.warning(
                 "_put_transcript_json_to_s3: summary mirror failed input=%s: %s",
@@ -4475,7 +4483,7 @@ def _put_transcript_json_to_s3(user_id, input_s3_key, transcript, stage='gpt', i
         )
     except Exception as e:
         logging.debug("_put_transcript_json_to_s3: could not delete legacy key=%s: %s", legacy_pre_align_key, e)
-    return result_s3_key
+    return result_s3_key, etag
 
 
 def _get_transcript_json_from_s3(user_id, input_s3_key, stage='gpt', is_medical=None):
@@ -4503,9 +4511,7 @@ def _get_transcript_json_from_s3(user_id, input_s3_key, stage='gpt', is_medical=
         s3_client = _s3_boto_client(bucket=bucket)
         for key in keys_to_try:
             try:
-                resp = s3_client.get_object(Bucket=bucket, Key=key)
-                raw = resp['Body'].read().decode('utf-8')
-                data = json.loads(raw)
+                data = _transcript_cache.get_json(s3_client, bucket, key)
                 if isinstance(data, dict):
                     return data
             except ClientError as e:
@@ -4577,11 +4583,17 @@ def _existing_formatted_norm_for_merge(user_id, input_s3_key):
 
 @app.route('/api/save_job_result', methods=['POST'])
 def save_job_result():
-    """Save transcript JSON to S3; return the result_s3_key. Store only the key in DB, not the full JSON."""
+    """Save transcript JSON to S3; return the result_s3_key. Store only the key in DB, not the full JSON.
+
+    Optional base_etag (or If-Match header: the etag of the last save/patch this client saw) makes the
+    write conditional, so a transcript changed meanwhile from another tab yields 409 like
+    /api/patch_job_result. Without it the save overwrites unconditionally (legacy clients).
+    """
     try:
         data = request.json or {}
         user_id = data.get('userId') or data.get('user_id')
         input_s3_key = data.get('input_s3_key') or data.get('s3Key')
+        base_etag = str(data.get('base_etag') or request.headers.get('If-Match') or '').strip()
         segments = data.get('segments')
         words = data.get('words')
         captions = data.get('captions')
@@ -4639,13 +4651,105 @@ def save_job_result():
                 transcript["words"] = w
                 transcript["captions"] = c
 
-        result_s3_key = _put_transcript_json_to_s3(user_id, input_s3_key, transcript, stage=stage, is_medical=is_medical)
-        return jsonify({"result_s3_key": result_s3_key, "isMedical": is_medical})
+        try:
+            result_s3_key, etag = _put_transcript_json_to_s3_with_etag(
+                user_id, input_s3_key, transcript, is_medical=is_medical, if_match=base_etag or None
+            )
+        except ClientError as e:
+            code = (e.response or {}).get('Error', {}).get('Code', '')
+            if base_etag and code in ('PreconditionFailed', 'ConditionalRequestConflict', '412', '409', 'NoSuchKey', '404'):
+                return _transcript_conflict_response()
+            raise
+        # etag is the base version for /api/patch_job_result and the next conditional save.
+        return jsonify({"result_s3_key": result_s3_key, "etag": etag, "isMedical": is_medical})
     except Exception as e:
         logging.exception("save_job_result failed")
         return jsonify({"error": str(e)}), 500
 
 
+def _transcript_conflict_response(current_etag=None):
+    return jsonify({
+        "error": "conflict",
+        "message": "Transcript changed since the base version; reload it and re-apply the edit",
+        "current_etag": current_etag,
+    }), 409
+
+
+@app.route('/api/patch_job_result', methods=['POST'])
+def patch_job_result():
+    """Apply segment/word edit ops (transcript_patch) to the stored transcript and write it once.
+
+    Body: userId, input_s3_key (or s3Key), base_etag (or If-Match header: the etag returned by
+    save_job_result / the previous patch) and ops. The write is conditional on base_etag, so an
+    edit saved meanwhile from another tab yields 409 instead of being overwritten.
+    """
+    try:
+        data = request.json or {}
+        user_id = data.get('userId') or data.get('user_id')
+        input_s3_key = data.get('input_s3_key') or data.get('s3Key')
+        base_etag = str(data.get('base_etag') or request.headers.get('If-Match') or '').strip()
+        is_medical = bool(data.get('isMedical')) or _is_medical_s3_key(str(input_s3_key or ''))
+        if not user_id or not input_s3_key:
+            return jsonify({"error": "userId and input_s3_key (or s3Key) required"}), 400
+        if not base_etag:
+            return jsonify({"error": "base_etag (or If-Match) required"}), 428
+        _require_medical_kms_or_raise(is_medical)
+
+        profile = _resolve_storage_profile(user_id, input_s3_key=input_s3_key, is_medical=is_medical)
+        bucket = profile["bucket"]
+        key = _derive_output_key_base(user_id, input_s3_key, is_medical=profile["is_medical"]) + '.json'
+        try:
+            current, current_etag = _transcript_cache.get_json_with_etag(
+                _s3_boto_client(bucket=bucket), bucket, key, revalidate=True
+            )
+        except ClientError as e:
+            code = (e.response or {}).get('Error', {}).get('Code', '')
+            if code in ('NoSuchKey', '404'):
+                return jsonify({"error": "transcript not found; save the full transcript first"}), 404
+            raise
+        if not isinstance(current, dict):
+            return jsonify({"error": "stored transcript is not an object"}), 500
+        if not current_etag or not etag_matches(base_etag, current_etag):
+            return _transcript_conflict_response(current_etag)
+
+        ops = data.get('ops')
+        try:
+            patched, touched = apply_transcript_patch(current, ops)
+        except TranscriptPatchError as e:
+            return jsonify({"error": str(e)}), 400
+        if "formatted" in touched and "formatted" in patched:
+            norm = _normalize_formatted_dict_for_storage(patched["formatted"])
+            if norm is None:
+                patched.pop("formatted", None)
+            else:
+                patched["formatted"] = norm
+        if "segments" in touched and not touched & {"words", "captions"}:
+            # Same as a segments-only full save: re-derive the word model, never keep a stale one.
+            w, c = _flatten_words_from_segments(patched.get("segments") or [])
+            if w is not None and c is not None:
+                patched["words"] = w
+                patched["captions"] = c
+            else:
+                patched.pop("words", None)
+                patched.pop("captions", None)
+        if not patched.get("segments") and not patched.get("words"):
+            return jsonify({"error": "segments or words required"}), 400
+
+        try:
+            result_s3_key, etag = _put_transcript_json_to_s3_with_etag(
+                user_id, input_s3_key, patched, is_medical=is_medical, if_match=current_etag
+            )
+        except ClientError as e:
+            code = (e.response or {}).get('Error', {}).get('Code', '')
+            if code in ('PreconditionFailed', 'ConditionalRequestConflict', '412', '409'):
+                return _transcript_conflict_response()
+            raise
+        return jsonify({"result_s3_key": result_s3_key, "etag": etag, "isMedical": is_medical, "applied": len(ops)})
+    except Exception as e:
+        logging.exception("patch_job_result failed")
+        return jsonify({"error": str(e)}), 500
+
+
 def _supabase_service_headers(service_key):
     return {
         "apikey": service_key,
@@ -4798,11 +4902,47 @@ def _supabase_bearer_token_from_request():
     return token or None
 
 
-def _supabase_auth_user_from_request():
-    """Return authenticated Supabase auth user payload from Bearer token, or None."""
-    token = _supabase_bearer_token_from_request()
-    if not token:
-        return None
+_supabase_token_verifier = None
+_supabase_token_verifier_lock = threading.Lock()
+
+
+def _supabase_local_jwt_enabled():
+    return _env_truthy('SUPABASE_LOCAL_JWT', True)
+
+
+def _supabase_auth_user_http_cache_sec():
+    try:
+        return max(0.0, float(os.environ.get('SUPABASE_AUTH_USER_CACHE_SEC', '60') or 60))
+    except (TypeError, ValueError):
+        return 60.0
+
+
+def _supabase_token_verifier_get():
+    """Process-wide verifier (HS256 secret and/or cached JWKS) for Supabase access tokens."""
+    global _supabase_token_verifier
+    with _supabase_token_verifier_lock:
+        if _supabase_token_verifier is None:
+            supabase_url = (os.environ.get('SUPABASE_URL') or '').rstrip('/')
+
+            def _jwks_get(url):
+                return _supabase_http_request('GET', url, timeout=4, retries=1)
+
+            _supabase_token_verifier = SupabaseTokenVerifier(
+                jwt_secret=(os.environ.get('SUPABASE_JWT_SECRET') or '').strip() or None,
+                jwks_url=(f"{supabase_url}/auth/v1/.well-known/jwks.json" if supabase_url else None),
+                issuer=(f"{supabase_url}/auth/v1" if supabase_url else None),
+                cache_size=int(os.environ.get('SUPABASE_JWT_CACHE_SIZE', '4096') or 4096),
+                http_get=_jwks_get,
+            )
+        return _supabase_token_verifier
+
+
+def _supabase_auth_user_http(token):
+    """GET /auth/v1/user (full profile). Successful lookups are cached briefly per token."""
+    verifier = _supabase_token_verifier_get()
+    cached = verifier.cache_get(token)
+    if cached is not None and cached.get('_qs_kind') == 'user':
+        return cached['user']
     supabase_url = (os.environ.get('SUPABASE_URL') or '').rstrip('/')
     service_key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
     if not supabase_url or not service_key:
@@ -4821,9 +4961,41 @@ def _supabase_auth_user_from_request():
         return None
     try:
         user_data = r_user.json()
-        return user_data if isinstance(user_data, dict) else None
     except Exception:
         return None
+    if not isinstance(user_data, dict):
+        return None
+    ttl = _supabase_auth_user_http_cache_sec()
+    if ttl > 0:
+        exp = (unverified_jwt_claims(token) or {}).get('exp')
+        expires_at = time.time() + ttl
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+        verifier.cache_put(token, {'_qs_kind': 'user', 'user': user_data}, expires_at)
+    return user_data
+
+
+def _supabase_auth_user_for_token(token, full_profile=False):
+    """Authenticated user for an access token: local JWT verification first, HTTP only as fallback.
+
+    full_profile=True forces the /auth/v1/user shape (created_at, identities, ...) that
+    access-token claims do not carry.
+    """
+    token = str(token or '').strip()
+    if not token:
+        return None
+    if not full_profile and _supabase_local_jwt_enabled():
+        claims, status = _supabase_token_verifier_get().verify(token)
+        if status == JWT_VERIFIED:
+            return supabase_user_from_claims(claims)
+        if status in (JWT_EXPIRED, JWT_INVALID):
+            return None
+    return _supabase_auth_user_http(token)
+
+
+def _supabase_auth_user_from_request(full_profile=False):
+    """Return authenticated Supabase auth user payload from Bearer token, or None."""
+    return _supabase_auth_user_for_token(_supabase_bearer_token_from_request(), full_profile=full_profile)
 
 
 def _supabase_user_id_from_request():
@@ -5078,11 +5250,7 @@ def _schedule_admin_new_user_registration_notify(auth_user):
         return
     try:
         payload = dict(auth_user)
-        threading.Thread(
-            target=_maybe_notify_admin_new_registration,
-            args=(payload,),
-            daemon=True,
-        ).start()
+        _background_tasks.submit('notifications', _maybe_notify_admin_new_registration, payload)
     except Exception as e:
         logging.warning('schedule new user registration notify failed: %s', e)
 
@@ -5169,11 +5337,7 @@ def _schedule_admin_payment_notify(**kwargs):
         payload = dict(kwargs or {})
         if not payload.get('user_id') or int(payload.get('minutes') or 0) <= 0:
             return
-        threading.Thread(
-            target=_maybe_notify_admin_payment,
-            args=(payload,),
-            daemon=True,
-        ).start()
+        _background_tasks.submit('notifications', _maybe_notify_admin_payment, payload)
         # Meta Conversions API Purchase (server-side) — same payload keys.
         _schedule_meta_capi_purchase(**payload)
     except Exception as e:
@@ -5295,11 +5459,7 @@ def _schedule_meta_capi_purchase(**kwargs):
             amount = 0.0
         if amount <= 0:
             return
-        threading.Thread(
-            target=_send_meta_capi_purchase,
-            args=(payload,),
-            daemon=True,
-        ).start()
+        _background_tasks.submit('notifications', _send_meta_capi_purchase, payload)
     except Exception as e:
         logging.warning('schedule Meta CAPI Purchase failed: %s', e)
 
@@ -5565,7 +5725,7 @@ def _user_invoice_billing_save(user_id, tax_id, city):
     _user_credits_ensure_welcome(user_id)
     # Registration email is independent of welcome_granted (DB trigger often
     # grants welcome before any app path runs). Idempotent via qs_admin_reg_notified.
-    auth_user = _supabase_auth_user_from_request()
+    auth_user = _supabase_auth_user_from_request(full_profile=True)
     if auth_user:
         _schedule_admin_new_user_registration_notify(auth_user)
     from urllib.parse import quote
@@ -5993,7 +6153,59 @@ def _probe_media_duration_local(ffmpeg_path, ffprobe_path, input_path, timeout_s
     return _probe_media_duration_ffmpeg(ffmpeg_path, input_path, timeout_sec=timeout_sec)
 
 
-def _media_duration_seconds_from_s3(bucket, s3_key, client_duration_sec=0.0):
+# Ranged head/tail probes, shared by the credit duration check and the audio-profile detector for the same
+# upload so both read the same few MB instead of separate prefix / full-object downloads. Entries are sized
+# by the bytes they hold (head, tail, metadata ranges); decode prefixes are streamed to disk, not cached.
+_media_probes = _job_state_namespace(
+    'media_probe',
+    ttl_sec=600,
+    max_entries=16,
+    max_bytes=int(_job_state_env_float('MEDIA_PROBE_CACHE_MAX_MB', 64) * 1024 * 1024),
+    sizeof=media_probe_sizeof,
+)
+
+
+def _s3_media_probe(bucket, s3_key, s3_client=None):
+    cache_key = f"{bucket}/{s3_key}"
+    probe = _media_probes.get(cache_key)
+    if probe is not None:
+        return probe
+    if s3_client is None:
+        s3_client = _s3_boto_client(bucket=bucket)
+    probe = s3_media_probe(
+        s3_client,
+        bucket,
+        s3_key,
+        head_bytes=int(_job_state_env_float('MEDIA_PROBE_HEAD_BYTES', 1024 * 1024)),
+        tail_bytes=int(_job_state_env_float('MEDIA_PROBE_TAIL_BYTES', 1024 * 1024)),
+    )
+    if probe is not None:
+        try:
+            probe.duration()  # every caller needs it; parse first so the entry is sized with its metadata ranges
+        except Exception as e:
+            logging.info("media probe failed key=%s: %s", str(s3_key)[-48:], e)
+            return None
+        _media_probes[cache_key] = probe
+    return probe
+
+
+def _media_probe_materialize(probe, s3_key, prefix_bytes):
+    """Sparse local copy (head prefix + tail + metadata ranges) for ffmpeg/ffprobe; caller unlinks."""
+    suffix = pathlib.Path(str(s3_key)).suffix.lower() or '.bin'
+    fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    try:
+        probe.materialize(tmp_path, prefix_bytes, sparse_max_bytes=media_probe_sparse_max_bytes())
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return tmp_path
+
+
+def _media_duration_seconds_from_s3(bucket, s3_key, client_duration_sec=0.0):
     """Media length in seconds from the uploaded file (container metadata), not GPU transcript."""
     bucket = str(bucket or '').strip()
     s3_key = str(s3_key or '').strip()
@@ -6009,45 +6221,49 @@ def _media_duration_seconds_from_s3(bucket, s3_key, client_duration_sec=0.0):
         logging.warning("_media_duration_seconds_from_s3 s3 client failed key=%s err=%s", s3_key[-48:], e)
         return 0.0
 
-    max_bytes = int(
-        os.environ.get('CREDITS_DURATION_PROBE_MAX_BYTES', str(220 * 1024 * 1024))
-        or (220 * 1024 * 1024)
-    )
-    try:
-        ho = s3_client.head_object(Bucket=bucket, Key=s3_key)
-        content_len = int(ho.get('ContentLength') or 0)
-    except Exception:
-        content_len = 0
-
-    # MP4/MOV often store duration in moov at file end — download full object when small enough.
-    if content_len > 0 and content_len <= max_bytes:
-        suffix = pathlib.Path(s3_key).suffix.lower() or '.bin'
-        fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+    # Container metadata from ranged head/tail GETs (moov / Xing / RIFF / EBML) — no decode, a few MB at most.
+    probe = _s3_media_probe(bucket, s3_key, s3_client=s3_client)
+    content_len = probe.size if probe is not None else 0
+    if probe is not None:
         try:
-            os.close(fd)
-            s3_client.download_file(bucket, s3_key, tmp_path)
-            duration = _probe_media_duration_local(
-                ffmpeg_path, ffprobe_path, tmp_path, timeout_sec=probe_timeout
+            duration, container, basis = probe.duration()
+            if 0 < duration <= 86400:
+                logging.info(
+                    "credit_duration_probe ranged ok key_suffix=%s sec=%.1f container=%s basis=%s fetched=%s",
+                    s3_key[-48:],
+                    duration,
+                    container,
+                    basis,
+                    probe.bytes_fetched,
+                )
+                return float(duration)
+            # Containers we do not parse (ogg/flac/avi/…): ffprobe the sparse head+tail copy.
+            tmp_path = _media_probe_materialize(
+                probe, s3_key, int(_job_state_env_float('MEDIA_PROBE_FFPROBE_PREFIX_BYTES', 4 * 1024 * 1024))
             )
-            if duration > 0:
+            try:
+                duration = _probe_media_duration_local(
+                    ffmpeg_path, ffprobe_path, tmp_path, timeout_sec=probe_timeout
+                )
+            finally:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            if 0 < duration <= 86400:
                 logging.info(
-                    "credit_duration_probe s3_download ok key_suffix=%s sec=%.1f bytes=%s",
+                    "credit_duration_probe ranged_ffprobe ok key_suffix=%s sec=%.1f fetched=%s",
                     s3_key[-48:],
                     duration,
-                    content_len,
+                    probe.bytes_fetched,
                 )
                 return float(duration)
         except Exception as e:
             logging.warning(
-                "_media_duration_seconds_from_s3 download probe failed key=%s err=%s",
+                "_media_duration_seconds_from_s3 ranged probe failed key=%s err=%s",
                 s3_key[-48:],
                 e,
             )
-        finally:
-            try:
-                os.unlink(tmp_path)
-            except OSError:
-                pass
 
     try:
         src_url = s3_client.generate_presigned_url(
@@ -6072,6 +6288,40 @@ def _media_duration_seconds_from_s3(bucket, s3_key, client_duration_sec=0.0):
             e,
         )
 
+    # Last resort (ffmpeg without TLS and an unparseable container): full download when small enough.
+    max_bytes = int(
+        os.environ.get('CREDITS_DURATION_PROBE_MAX_BYTES', str(220 * 1024 * 1024))
+        or (220 * 1024 * 1024)
+    )
+    if 0 < content_len <= max_bytes:
+        suffix = pathlib.Path(s3_key).suffix.lower() or '.bin'
+        fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+        try:
+            os.close(fd)
+            s3_client.download_file(bucket, s3_key, tmp_path)
+            duration = _probe_media_duration_local(
+                ffmpeg_path, ffprobe_path, tmp_path, timeout_sec=probe_timeout
+            )
+            if duration > 0:
+                logging.info(
+                    "credit_duration_probe s3_download ok key_suffix=%s sec=%.1f bytes=%s",
+                    s3_key[-48:],
+                    duration,
+                    content_len,
+                )
+                return float(duration)
+        except Exception as e:
+            logging.warning(
+                "_media_duration_seconds_from_s3 download probe failed key=%s err=%s",
+                s3_key[-48:],
+                e,
+            )
+        finally:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
     try:
         client_duration_sec = float(client_duration_sec or 0)
     except (TypeError, ValueError):
@@ -6707,6 +6957,7 @@ def _s3_copy_then_delete(bucket, src_key, dst_key):
         raise
     try:
         s3_client.delete_object(Bucket=bucket, Key=src)
+        _transcript_cache.invalidate(bucket, src)
     except Exception:
         logging.warning("claim: copied %s -> %s but source delete failed", src[-80:], dst[-80:])
     return True
@@ -7001,14 +7252,12 @@ def _finalize_claimed_anonymous_job(
         display_name=display_name,
     )
 
-    pinfo = dict(pending_job_info.get(job_id) or {})
-    pinfo.update({
+    pinfo = _merge_pending_job_info(job_id, {
         "input_s3_key": new_input,
         "transcription_s3_key": new_input,
         "user_id": user_id,
         "bucket": bucket,
     })
-    pending_job_info[job_id] = pinfo
 
     job_md = existing.get('metadata') if isinstance(existing, dict) else None
     duration_sec = _resolve_claim_credit_duration_sec(
@@ -7022,8 +7271,7 @@ def _finalize_claimed_anonymous_job(
         result_s3_key=new_result,
     )
     if duration_sec > 0:
-        pinfo['credit_file_duration_sec'] = float(duration_sec)
-        pending_job_info[job_id] = pinfo
+        pinfo = _merge_pending_job_info(job_id, {'credit_file_duration_sec': float(duration_sec)})
         _stash_deferred_credit_context(job_id, user_id, new_input, pending_info=pinfo)
 
     credit_info = _charge_job_credits(
@@ -7435,6 +7683,8 @@ def _delete_s3_keys_batch(keys, s3_client=None):
                 Delete={"Objects": [{"Key": k} for k in chunk], "Quiet": True}
             )
             deleted_count += len(res.get("Deleted") or [])
+            for k in chunk:
+                _transcript_cache.invalidate(bucket, k)
         except Exception:
             # Best effort cleanup; continue deleting DB row even if some objects fail.
             continue
@@ -7482,8 +7732,8 @@ def _recording_direct_keys_from_row(row):
     return keys
 
 
-def _supabase_fetch_jobs_for_delete(supabase_url, headers, user_id, job_ids):
-    """Fetch job rows for delete in chunks (PostgREST id=in.(...))."""
+def _supabase_fetch_jobs_for_delete(supabase_url, headers, user_id, job_ids, select='id,input_s3_key,result_s3_key,metadata'):
+    """Fetch job rows for delete (or bulk export) in chunks (PostgREST id=in.(...))."""
     rows = []
     ids = [str(j).strip() for j in (job_ids or []) if str(j).strip()]
     if not ids:
@@ -7494,7 +7744,7 @@ def _supabase_fetch_jobs_for_delete(supabase_url, headers, user_id, job_ids):
         get_url = (
             f"{supabase_url}/rest/v1/jobs"
             f"?id=in.({in_list})&user_id=eq.{user_id}"
-            f"&select=id,input_s3_key,result_s3_key,metadata"
+            f"&select={select}"
         )
         r_get = requests.get(get_url, headers=headers, timeout=30)
         if r_get.status_code != 200:
@@ -7625,6 +7875,144 @@ def recordings_bulk_delete():
         return jsonify({"error": str(e), "deleted": False}), 500
 
 
+BULK_EXPORT_FORMATS = ('docx', 'srt', 'txt', 'json')
+BULK_EXPORT_MAX_JOBS = 500
+
+
+def _bulk_export_clean_text(transcript):
+    fmt = transcript.get('formatted') if isinstance(transcript.get('formatted'), dict) else {}
+    clean = str(fmt.get('clean_transcript') or '').strip()
+    if clean:
+        return clean
+    return '\n'.join(
+        str((s or {}).get('text') or '').strip()
+        for s in (transcript.get('segments') or [])
+        if isinstance(s, dict) and str(s.get('text') or '').strip()
+    ).strip()
+
+
+def _bulk_export_render(fmt, transcript, input_s3_key, is_medical):
+    """Bytes of one export format for a stored transcript, or None when it has nothing to export."""
+    if fmt == 'json':
+        return json.dumps(transcript, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if fmt == 'srt':
+        segments = [s for s in (transcript.get('segments') or []) if isinstance(s, dict)]
+        return _segments_to_srt_text(segments).encode('utf-8') if segments else None
+    clean = _bulk_export_clean_text(transcript)
+    if not clean:
+        return None
+    if fmt == 'txt':
+        # Plain TXT has no direction metadata; RLM per line so Hebrew opens RTL (same as the client export).
+        if re.search('[\u0590-\u05FF]', clean):
+            clean = '\n'.join(('\u200f' + line) if line.strip() else line for line in clean.split('\n'))
+        return clean.encode('utf-8')
+    lines = _docx_body_lines_from_clean_transcript(clean)
+    artifact, _origin = _export_artifacts.get_or_build(
+        export_key('docx', lines),
+        lambda: _build_rtl_docx(lines),
+        source=input_s3_key,
+        persistent=not is_medical,
+        content_type=_DOCX_MIMETYPE,
+    )
+    return artifact.body
+
+
+def _bulk_export_entries(user_id, rows, formats):
+    """(name, bytes) ZIP entries for job rows; transcripts are fetched concurrently and emitted as they land.
+
+    Failures never abort the stream (headers are long gone): they are listed in a trailing _errors.txt.
+    """
+    used = set()
+    errors = []
+
+    def _load(row):
+        input_key = str(row.get('input_s3_key') or '').strip()
+        if not input_key:
+            return None
+        return _get_transcript_json_from_s3(user_id, input_key, is_medical=_is_medical_s3_key(input_key))
+
+    workers = max(1, int(os.environ.get('BULK_EXPORT_CONCURRENCY', '8') or 8))
+    for row, transcript, err in map_unordered(_load, rows, max_workers=workers):
+        input_key = str(row.get('input_s3_key') or '').strip()
+        metadata = row.get('metadata') if isinstance(row.get('metadata'), dict) else {}
+        stem = safe_entry_stem(
+            metadata.get('display_name') or os.path.splitext(os.path.basename(input_key))[0] or row.get('id')
+        )
+        if err is not None or not isinstance(transcript, dict):
+            if err is not None:
+                logging.warning("bulk export: transcript fetch failed job_id=%s: %s", row.get('id'), err)
+            errors.append(f"{stem} ({row.get('id')}): transcript not available")
+            continue
+        is_medical = _is_medical_s3_key(input_key)
+        for fmt in formats:
+            try:
+                data = _bulk_export_render(fmt, transcript, input_key, is_medical)
+            except Exception as e:
+                logging.warning("bulk export: %s failed job_id=%s: %s", fmt, row.get('id'), e)
+                data = None
+            if data is None:
+                errors.append(f"{stem}.{fmt} ({row.get('id')}): nothing to export")
+                continue
+            yield unique_entry_name(f"{stem}.{fmt}", used), data
+    if errors:
+        yield unique_entry_name('_errors.txt', used), ('\n'.join(errors) + '\n').encode('utf-8')
+
+
+@app.route('/api/recordings/export', methods=['POST'])
+def recordings_bulk_export():
+    """Export many recordings as one ZIP, streamed entry by entry (never buffered whole).
+
+    Body (JSON, or a form post so the browser streams the download to disk):
+    userId, jobIds (array or comma-separated), formats (subset of docx/srt/txt/json; default docx).
+    """
+    try:
+        data = request.get_json(silent=True) or request.form.to_dict() or {}
+        user_id = str(data.get('userId') or data.get('user_id') or '').strip()
+        job_ids = data.get('jobIds') or data.get('job_ids') or data.get('ids') or []
+        formats = data.get('formats') or ['docx']
+        if isinstance(job_ids, str):
+            job_ids = job_ids.split(',')
+        if isinstance(formats, str):
+            formats = formats.split(',')
+        if not isinstance(job_ids, list) or not isinstance(formats, list):
+            return jsonify({"error": "jobIds and formats must be arrays"}), 400
+        ids = list(dict.fromkeys(str(j or '').strip() for j in job_ids if str(j or '').strip()))
+        fmts = list(dict.fromkeys(str(f or '').strip().lower() for f in formats if str(f or '').strip()))
+        if not user_id or not ids:
+            return jsonify({"error": "userId and jobIds required"}), 400
+        if len(ids) > BULK_EXPORT_MAX_JOBS:
+            return jsonify({"error": f"Too many jobIds (max {BULK_EXPORT_MAX_JOBS} per request)"}), 400
+        bad = [f for f in fmts if f not in BULK_EXPORT_FORMATS]
+        if bad or not fmts:
+            return jsonify({"error": f"formats must be a subset of {', '.join(BULK_EXPORT_FORMATS)}"}), 400
+
+        supabase_url = os.environ.get('SUPABASE_URL', '').rstrip('/')
+        service_key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
+        if not supabase_url or not service_key:
+            return jsonify({"error": "Server not configured for export"}), 503
+        rows = _supabase_fetch_jobs_for_delete(
+            supabase_url, _supabase_service_headers(service_key), user_id, ids, select='id,input_s3_key,metadata'
+        )
+        # Keep the caller's order so the fetch pool starts with the recordings listed first.
+        order = {jid: i for i, jid in enumerate(ids)}
+        rows = sorted((r for r in rows if isinstance(r, dict) and r.get('id')), key=lambda r: order.get(str(r['id']), len(order)))
+        if not rows:
+            return jsonify({"error": "Recording not found"}), 404
+
+        filename = f"recordings-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.zip"
+        headers = {
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': 'no-store',
+            'X-Accel-Buffering': 'no',
+            'X-Export-Count': str(len(rows)),
+        }
+        body = stream_zip(_bulk_export_entries(user_id, rows, fmts))
+        return Response(stream_with_context(body), mimetype='application/zip', headers=headers)
+    except Exception as e:
+        logging.exception("recordings_bulk_export failed")
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route('/recording/<file_id>/rename', methods=['POST'])
 def recording_rename(file_id):
     """Rename a recording display name (stored in jobs.metadata.display_name)."""
@@ -8095,7 +8483,7 @@ def api_user_credits():
 def api_user_credits_ensure_welcome():
     """Ensure the one-time welcome credit pack exists for the signed-in user."""
     try:
-        auth_user = _supabase_auth_user_from_request()
+        auth_user = _supabase_auth_user_from_request(full_profile=True)
         if not auth_user:
             return jsonify({"error": "Authorization required"}), 401
         user_id = str(auth_user.get('id') or auth_user.get('user', {}).get('id') or '').strip()
@@ -8583,17 +8971,17 @@ import time  # Ensure time is imported at the top of your file
 # - "run_accepted": RunPod /run returned 200/201/202 (container should start soon)
 # - "triggered": app_transcribe.py has started and called /api/gpu_started
 # - "failed": RunPod /run failed or warmup/trigger crashed
-pending_trigger = {}  # job_id -> "queued" | "run_accepted" | "triggered" | "failed" (local cache; Supabase jobs row is source of truth)
-pending_trigger_at = {}  # job_id -> time when set to "queued" (for stale detection)
+pending_trigger = _handshake_namespace('pending_trigger')  # job_id -> "queued" | "run_accepted" | "triggered" | "failed" (local cache; Supabase jobs row is source of truth)
+pending_trigger_at = _handshake_namespace('pending_trigger_at')  # job_id -> time when set to "queued" (for stale detection)
 # Cold GPU workers often take 2–4+ minutes before /api/gpu_started. Retrying earlier
 # double-submits /run for the same job_id (two RunPod workers, two Demucs passes).
 STALE_QUEUED_SEC = int(os.environ.get("STALE_QUEUED_SEC", "360") or 360)
 # So gpu_callback can save raw JSON even when RunPod does not echo input: job_id -> { input_s3_key, user_id, task, language }
-pending_job_info = {}  # job_id -> {"input_s3_key": str, "user_id": str | None, "task": str, "language": str}
+pending_job_info = _handshake_namespace('pending_job_info')  # job_id -> {"input_s3_key": str, "user_id": str | None, "task": str, "language": str}
 # Billing context kept until client finishes GPT + summary (see /api/charge_job_credits).
-pending_credit_charge_context = {}  # job_id -> { user_id, input_s3_key, bucket, credit_file_duration_sec, ... }
-vocal_separation_jobs = {}  # job_id -> pending RunPod CPU vocal separation + trigger handoff
-audio_preprocess_jobs = {}  # job_id -> pending RunPod CPU loudnorm preprocessing + GPU handoff
+pending_credit_charge_context = _job_state_namespace('pending_credit_charge_context')  # job_id -> { user_id, input_s3_key, bucket, credit_file_duration_sec, ... }
+vocal_separation_jobs = _handshake_namespace('vocal_separation_jobs')  # job_id -> pending RunPod CPU vocal separation + trigger handoff
+audio_preprocess_jobs = _handshake_namespace('audio_preprocess_jobs')  # job_id -> pending RunPod CPU loudnorm preprocessing + GPU handoff
 _medical_learn_async_jobs = {}  # learn_job_id -> {status, result|error, started_at}
 _medical_learn_async_lock = threading.Lock()
 MEDICAL_LEARN_ASYNC_TTL_SEC = 3600
@@ -8644,19 +9032,38 @@ def _medical_endpoint_status_payload():
     }
 
 
-job_timings = {}  # job_id -> {"trigger_sec": float, "trigger_completed_at": float}
-gpu_started_at = {}  # job_id -> when worker called /api/gpu_started (container running)
-upload_complete = {}  # job_id -> True when trigger_processing called (upload done); worker polls until this
+job_timings = _job_state_namespace('job_timings')  # job_id -> {"trigger_sec": float, "trigger_completed_at": float}
+gpu_started_at = _handshake_namespace('gpu_started_at')  # job_id -> when worker called /api/gpu_started (container running)
+upload_complete = _handshake_namespace('upload_complete')  # job_id -> True when trigger_processing called (upload done); worker polls until this
 
 # Trigger pipeline + timing fields shared across Gunicorn workers (stored in jobs.metadata.qs_trigger JSONB).
 _QS_TRIGGER_META_KEY = "qs_trigger"
 
 # Avoid a Supabase round-trip on every poll (trigger_status + check_status each hit DB). TTL seconds; set 0 to disable.
-_job_poll_row_cache = {}  # runpod_job_id -> (time.time(), row dict)
+_job_poll_row_cache = _job_state_namespace('job_poll_row', ttl_sec=600, max_entries=5000)  # runpod_job_id -> (time.time(), row dict)
 # Anonymous / pre-claim jobs have no jobs row — remember misses so polls stay fast.
-_job_row_missing_until = {}  # runpod_job_id -> monotonic deadline
-_job_result_s3_missing_until = {}  # runpod_job_id -> monotonic deadline
-_MERGE_QS_TRIGGER_NO_ROW_LOGGED = set()
+_job_row_missing_until = _job_state_namespace('job_row_missing', ttl_sec=600, max_entries=5000)  # runpod_job_id -> monotonic deadline
+_job_result_s3_missing_until = _job_state_namespace('job_result_s3_missing', ttl_sec=600, max_entries=5000)  # runpod_job_id -> monotonic deadline
+_MERGE_QS_TRIGGER_NO_ROW_LOGGED = _job_state_namespace('merge_qs_trigger_no_row_logged', ttl_sec=3600, max_entries=5000)
+
+_JOB_IN_FLIGHT_TRIGGER_STATES = frozenset({"queued", "run_accepted", "triggered", "preprocessing"})
+
+
+def _job_state_in_flight(job_id):
+    """True while a job still waits on its GPU callback (never evicted from job state).
+
+    Runs under the JobStateStore lock, so it only reads process-local state: ``peek`` on a
+    shared handshake namespace returns the last value this worker saw, without a round trip.
+    """
+    if pending_trigger.peek(job_id) not in _JOB_IN_FLIGHT_TRIGGER_STATES:
+        return False
+    cached = job_results_cache.peek(job_id)
+    if isinstance(cached, dict) and str(cached.get("status") or "").strip().lower() in ("completed", "failed"):
+        return False
+    return True
+
+
+_job_state.set_in_flight_predicate(_job_state_in_flight)
 
 
 def _job_poll_row_cache_ttl_sec():
@@ -8682,15 +9089,16 @@ def _get_job_poll_row(runpod_job_id, db_timeout=None):
     jid = str(runpod_job_id)
     ttl = _job_poll_row_cache_ttl_sec()
     if ttl <= 0:
-        return _get_job_row_by_runpod_job_id(jid, select="status,metadata", timeout=db_timeout)
+        row = _get_job_row_by_runpod_job_id(jid, select="status,metadata", timeout=db_timeout)
+        return _qs_trigger_pending_overlay(jid, row)
     now = time.time()
     hit = _job_poll_row_cache.get(jid)
     if hit and (now - hit[0]) < ttl:
-        return hit[1]
+        return _qs_trigger_pending_overlay(jid, hit[1])
     row = _get_job_row_by_runpod_job_id(jid, select="status,metadata", timeout=db_timeout)
     if row:
         _job_poll_row_cache[jid] = (now, row)
-    return row
+    return _qs_trigger_pending_overlay(jid, row)
 
 
 def _last_callback_gpt_path():
@@ -8698,10 +9106,68 @@ def _last_callback_gpt_path():
     return os.path.join(tempfile.gettempdir(), "qs_last_callback_gpt.json")
 
 
-def _get_job_row_by_runpod_job_id(runpod_job_id, select="id,status,metadata", timeout=None):
-    """Fetch one jobs row by runpod_job_id. Best-effort; returns None if missing or misconfigured."""
+def _postgrest_in_value(value):
+    """Double-quoted PostgREST in.(...) list element."""
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _fetch_job_rows_by_runpod_job_ids(runpod_job_ids, select, timeout=None):
+    """One GET for many runpod_job_ids -> {runpod_job_id: row}.
+
+    Each id is matched both plain and in its legacy double-quoted form (the old
+    per-id lookup retried eq."<id>"); a plain match wins.
+    """
     from urllib.parse import quote
 
+    supabase_url = (os.environ.get("SUPABASE_URL") or "").rstrip("/")
+    service_key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+    if not supabase_url or not service_key or not runpod_job_ids:
+        return {}
+    cols = [c.strip() for c in str(select or "").split(",") if c.strip()]
+    fetch_cols = cols if "runpod_job_id" in cols else cols + ["runpod_job_id"]
+    values = []
+    for jid in runpod_job_ids:
+        values.append(_postgrest_in_value(jid))
+        values.append(_postgrest_in_value(f'"{jid}"'))
+    in_list = quote("(" + ",".join(values) + ")", safe="")
+    url = f"{supabase_url}/rest/v1/jobs?runpod_job_id=in.{in_list}&select={','.join(fetch_cols)}"
+    headers = {
+        "apikey": service_key,
+        "Authorization": f"Bearer {service_key}",
+        "Accept": "application/json",
+    }
+    r = _supabase_http_request('GET', url, headers=headers, timeout=timeout if timeout is not None else 6)
+    if r.status_code != 200 or not r.text:
+        raise RuntimeError(f"jobs batch lookup HTTP {r.status_code}")
+    rows = r.json()
+    wanted = set(str(j) for j in runpod_job_ids)
+    out = {}
+    for row in rows if isinstance(rows, list) else []:
+        if not isinstance(row, dict):
+            continue
+        raw = str(row.get("runpod_job_id") or "")
+        plain = raw[1:-1] if len(raw) >= 2 and raw[0] == raw[-1] == '"' else raw
+        if plain not in wanted or (plain in out and raw != plain):
+            continue
+        if "runpod_job_id" not in cols:
+            row = {k: v for k, v in row.items() if k != "runpod_job_id"}
+        out[plain] = row
+    return out
+
+
+_job_row_loader = JobRowLoader(
+    _fetch_job_rows_by_runpod_job_ids,
+    batch_window_sec=job_row_batch_window_sec(),
+    max_batch=job_row_max_batch(),
+)
+
+
+def _get_job_row_by_runpod_job_id(runpod_job_id, select="id,status,metadata", timeout=None):
+    """Fetch one jobs row by runpod_job_id. Best-effort; returns None if missing or misconfigured.
+
+    Goes through _job_row_loader: concurrent lookups of the same row share one request and
+    lookups arriving within a few ms are batched into one in.(...) query.
+    """
     supabase_url = (os.environ.get("SUPABASE_URL") or "").rstrip("/")
     service_key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
     if not supabase_url or not service_key or not runpod_job_id:
@@ -8710,36 +9176,56 @@ def _get_job_row_by_runpod_job_id(runpod_job_id, select="id,status,metadata", ti
     miss_until = _job_row_missing_until.get(jid)
     if miss_until and time.monotonic() < miss_until:
         return None
-    req_timeout = timeout if timeout is not None else 6
-    rj = quote(jid, safe="")
-    rj_quoted = quote(f'"{jid}"', safe="")
-    headers = {
-        "apikey": service_key,
-        "Authorization": f"Bearer {service_key}",
-        "Accept": "application/json",
-    }
-    for rj_try in (rj, rj_quoted):
-        url = f"{supabase_url}/rest/v1/jobs?runpod_job_id=eq.{rj_try}&select={select}&limit=1"
-        try:
-            r = _supabase_http_request('GET', url, headers=headers, timeout=req_timeout)
-            if r.status_code == 200 and r.text:
-                rows = r.json()
-                if isinstance(rows, list) and rows and isinstance(rows[0], dict):
-                    _job_row_missing_until.pop(jid, None)
-                    return rows[0]
-        except Exception as e:
-            logging.warning("_get_job_row_by_runpod_job_id: GET failed for %s: %s", runpod_job_id, e)
+    row = _job_row_loader.load(jid, select, timeout=timeout if timeout is not None else 6)
+    if row is not None:
+        _job_row_missing_until.pop(jid, None)
+        return row
     # Guest uploads (and any job before createJobOnUpload) have no row — cache the miss.
     _job_row_missing_until[jid] = time.monotonic() + _job_row_missing_cache_ttl_sec()
     return None
 
 
+_QS_TRIGGER_URGENT_STATUSES = frozenset(("triggered", "failed"))
+
+
 def _merge_job_qs_trigger(runpod_job_id, merge_qs_trigger, update_job_status=None):
-    """Read jobs row, merge merge_qs_trigger into metadata.qs_trigger, PATCH by id. Service role; best-effort.
+    """Merge merge_qs_trigger into metadata.qs_trigger now (after any queued updates for the job).
 
     Pipeline states (queued, run_accepted, triggered, failed) go only into metadata.qs_trigger.trigger_status —
     do not write them to jobs.status: Postgres uses an enum (e.g. processing/completed) that rejects those strings.
     """
+    _qs_trigger_queue.enqueue(runpod_job_id, merge_qs_trigger, update_job_status, sync=True)
+
+
+def _merge_job_qs_trigger_async(runpod_job_id, merge_qs_trigger, update_job_status=None):
+    """Queue a qs_trigger merge; updates for one job within the flush interval become one PATCH."""
+    _qs_trigger_queue.enqueue(
+        runpod_job_id,
+        merge_qs_trigger,
+        update_job_status,
+        urgent=update_job_status in _QS_TRIGGER_URGENT_STATUSES,
+    )
+
+
+def _qs_trigger_pending_overlay(runpod_job_id, row):
+    """Row copy with queued-but-unwritten qs_trigger fields applied (read-your-writes for pollers)."""
+    fields, status = _qs_trigger_queue.pending(runpod_job_id)
+    if not row or (not fields and status is None):
+        return row
+    md = dict(row.get("metadata") if isinstance(row.get("metadata"), dict) else {})
+    qt = dict(md.get(_QS_TRIGGER_META_KEY) if isinstance(md.get(_QS_TRIGGER_META_KEY), dict) else {})
+    qt.update(fields)
+    if status is not None:
+        qt["trigger_status"] = status
+    md[_QS_TRIGGER_META_KEY] = qt
+    return {**row, "metadata": md}
+
+
+def _patch_job_qs_trigger(runpod_job_id, merge_qs_trigger, update_job_status=None, at=None):
+    """Read jobs row, merge into metadata.qs_trigger, PATCH by id. Service role; best-effort.
+
+    Only called from _qs_trigger_queue, which serializes writes per job.
+    """
     try:
         row = _get_job_row_by_runpod_job_id(runpod_job_id, select="id,metadata,status")
         if not row or not row.get("id"):
@@ -8757,7 +9243,7 @@ def _merge_job_qs_trigger(runpod_job_id, merge_qs_trigger, update_job_status=Non
         qt = dict(md.get(_QS_TRIGGER_META_KEY) if isinstance(md.get(_QS_TRIGGER_META_KEY), dict) else {})
         if merge_qs_trigger:
             qt.update(merge_qs_trigger)
-        qt["at"] = time.time()
+        qt["at"] = at or time.time()
         if update_job_status is not None:
             qt["trigger_status"] = update_job_status
         md[_QS_TRIGGER_META_KEY] = qt
@@ -8780,6 +9266,14 @@ def _merge_job_qs_trigger(runpod_job_id, merge_qs_trigger, update_job_status=Non
         logging.warning("_merge_job_qs_trigger: %s", e)
 
 
+_qs_trigger_queue = WriteBehindQueue(
+    _patch_job_qs_trigger,
+    flush_interval_sec=qs_trigger_flush_interval_sec(),
+    flushers=int(os.environ.get('QS_TRIGGER_FLUSHERS', '4') or 4),
+)
+atexit.register(_qs_trigger_queue.drain)
+
+
 def _resolve_trigger_status_for_poll(job_id):
     """Merge in-memory and Supabase trigger status for /api/trigger_status polling."""
     mem = pending_trigger.get(job_id)
@@ -8859,14 +9353,10 @@ def _get_trigger_state(job_id, row=None):
 def _set_trigger_state(job_id, status, async_persist=True, **extra):
     """Persist trigger pipeline to metadata.qs_trigger (cross-worker). pending_* remains in-memory cache."""
     payload = dict(extra)
+    if status:
+        _publish_job_event(job_id, 'trigger', status='trigger_failed' if status == 'failed' else status)
     if async_persist:
-        def _run():
-            try:
-                _merge_job_qs_trigger(job_id, payload, update_job_status=status)
-            except Exception as e:
-                logging.warning("_set_trigger_state persist failed job_id=%s: %s", job_id, e)
-
-        threading.Thread(target=_run, daemon=True).start()
+        _merge_job_qs_trigger_async(job_id, payload, update_job_status=status)
         return
     _merge_job_qs_trigger(job_id, payload, update_job_status=status)
 
@@ -8894,8 +9384,8 @@ def _get_trigger_timings(job_id, db_timeout=None, row=None):
 
 
 def _update_trigger_timings(job_id, **updates):
-    """Merge timing fields into metadata.qs_trigger without changing jobs.status."""
-    _merge_job_qs_trigger(job_id, updates, update_job_status=None)
+    """Merge timing fields into metadata.qs_trigger without changing jobs.status (write-behind)."""
+    _merge_job_qs_trigger_async(job_id, updates, update_job_status=None)
 
 
 def _mark_upload_complete(job_id):
@@ -8916,27 +9406,23 @@ def _mark_upload_complete(job_id):
 
 
 def _persist_upload_and_trigger_async(job_id, trigger_status="triggered"):
-    """Persist upload/trigger to Supabase off the request thread (avoids gateway timeouts)."""
-    def _run():
-        _mark_upload_complete(job_id)
-        _set_trigger_state(job_id, trigger_status)
-    t = threading.Thread(target=_run, daemon=True)
-    t.start()
+    """Queue upload-complete + trigger state as one write-behind update (avoids gateway timeouts)."""
+    upload_complete[job_id] = True
+    _set_trigger_state(job_id, trigger_status, upload_complete=True, upload_complete_at=time.time())
 
 
 def _persist_upload_complete_async(job_id):
     """Persist upload-complete only (preserve existing trigger status)."""
-    def _run():
-        _mark_upload_complete(job_id)
-    t = threading.Thread(target=_run, daemon=True)
-    t.start()
+    _background_tasks.submit('critical', _mark_upload_complete, job_id)
 
 
 def _persist_gpu_started_async(job_id, started_at, user_id=None, trigger_completed_at=None):
     """RunPod worker callback must return in <10s; persist timings + trigger state off-thread."""
+    # qs_trigger timing + state coalesce into one queued PATCH; jobs timing columns stay off-thread.
+    _set_trigger_state(job_id, "triggered", gpu_started_at=started_at)
+
     def _run():
         try:
-            _update_trigger_timings(job_id, gpu_started_at=started_at)
             if trigger_completed_at is not None and not _is_medical_session_warmup_job(job_id):
                 wakeup_sec = started_at - float(trigger_completed_at)
                 _update_job_timings(
@@ -8945,11 +9431,11 @@ def _persist_gpu_started_async(job_id, started_at, user_id=None, trigger_complet
                     runpod_wakeup_sec=wakeup_sec,
                     gpu_started_at=started_at,
                 )
-            _set_trigger_state(job_id, "triggered")
         except Exception as e:
             logging.warning("_persist_gpu_started_async job_id=%s: %s", job_id, e)
 
-    threading.Thread(target=_run, daemon=True).start()
+    if trigger_completed_at is not None:
+        _background_tasks.submit('critical', _run, label='persist_gpu_started')
 
 
 def _set_last_callback_for_gpt(job_id: str, at: float, user_id: str = None) -> None:
@@ -9139,9 +9625,7 @@ def _get_json_object_from_s3_key(s3_key, user_id=None):
         return None
     try:
         s3_client = _s3_boto_client(bucket=bucket)
-        resp = s3_client.get_object(Bucket=bucket, Key=key)
-        raw = resp['Body'].read().decode('utf-8')
-        data = json.loads(raw)
+        data = _transcript_cache.get_json(s3_client, bucket, key)
         return data if isinstance(data, dict) else None
     except ClientError as e:
         code = (e.response or {}).get('Error', {}).get('Code', '')
@@ -9191,26 +9675,7 @@ def _completed_job_payload_from_db(runpod_job_id):
             "result": {"result_s3_key": result_s3_key},
         }
 
-    segments = transcript.get("segments") if isinstance(transcript.get("segments"), list) else []
-    payload = {
-        "jobId": runpod_job_id,
-        "status": "completed",
-        "result_s3_key": result_s3_key,
-        "result": {
-            "segments": segments,
-            "result_s3_key": result_s3_key,
-        },
-        "segments": segments,
-    }
-    if isinstance(transcript.get("formatted"), dict):
-        payload["formatted"] = transcript["formatted"]
-        payload["result"]["formatted"] = transcript["formatted"]
-    if isinstance(transcript.get("words"), list):
-        payload["words"] = transcript["words"]
-        payload["result"]["words"] = transcript["words"]
-    if isinstance(transcript.get("captions"), list):
-        payload["captions"] = transcript["captions"]
-        payload["result"]["captions"] = transcript["captions"]
+    payload = completed_job_payload(runpod_job_id, transcript, result_s3_key)
     job_results_cache[runpod_job_id] = payload
     return payload
 
@@ -9248,25 +9713,7 @@ def _completed_job_payload_from_s3_convention(runpod_job_id):
         segments = transcript.get("segments") if isinstance(transcript.get("segments"), list) else []
         if not segments and not transcript.get("words") and not transcript.get("formatted"):
             continue
-        payload = {
-            "jobId": jid,
-            "status": "completed",
-            "result_s3_key": key,
-            "result": {
-                "segments": segments,
-                "result_s3_key": key,
-            },
-            "segments": segments,
-        }
-        if isinstance(transcript.get("formatted"), dict):
-            payload["formatted"] = transcript["formatted"]
-            payload["result"]["formatted"] = transcript["formatted"]
-        if isinstance(transcript.get("words"), list):
-            payload["words"] = transcript["words"]
-            payload["result"]["words"] = transcript["words"]
-        if isinstance(transcript.get("captions"), list):
-            payload["captions"] = transcript["captions"]
-            payload["result"]["captions"] = transcript["captions"]
+        payload = completed_job_payload(jid, transcript, key)
         job_results_cache[jid] = payload
         _job_result_s3_missing_until.pop(jid, None)
         logging.info("check_status recovered completed job from S3 job_id=%s key=%s", jid, key[-100:])
@@ -9390,12 +9837,61 @@ def trigger_gpu_job(job_id, s3_key, num_speakers, language, task):
 
 # --- Add this to app.py ---
 
+def _client_wants_columnar_words():
+    fmt = request.args.get('words_format') or request.headers.get('X-Words-Format') or ''
+    return fmt.strip().lower() == 'columnar'
+
+
+def _job_payload_legacy_shape():
+    """Old clients that read result.segments / result.words: ?payload_shape=legacy, X-Payload-Shape or env."""
+    try:
+        shape = request.args.get('payload_shape') or request.headers.get('X-Payload-Shape') or ''
+    except RuntimeError:
+        shape = ''
+    if shape:
+        return shape.strip().lower() == 'legacy'
+    return _env_truthy('JOB_PAYLOAD_LEGACY_SHAPE', False)
+
+
+def _job_payload_shaped(payload):
+    """Transcript arrays once at the top level, or mirrored under ``result`` for legacy clients."""
+    return expand_job_payload(payload) if _job_payload_legacy_shape() else dedupe_job_payload(payload)
+
+
+def _job_payload_for_client(payload):
+    """Shape for this client; opt-in (?words_format=columnar / X-Words-Format): word timings as parallel arrays."""
+    payload = _job_payload_shaped(payload)
+    if _client_wants_columnar_words():
+        return to_columnar_payload(payload)
+    return payload
+
+
+def _job_payload_response(job_id, payload, version=0, status=200):
+    """Serve a completed payload from cached bytes with a strong ETag (304 on If-None-Match).
+
+    ``version`` is the job_results_cache write version; 0 serializes without caching.
+    """
+    variant = ('legacy' if _job_payload_legacy_shape() else 'single') + (
+        ':columnar' if _client_wants_columnar_words() else ''
+    )
+    serialized = _job_payload_bytes.get(job_id, version, variant, lambda: _job_payload_for_client(payload))
+    body, etag, encoding = serialized.representation(request.accept_encodings['gzip'] > 0)
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+    if etag_matches(request.headers.get('If-None-Match'), serialized.etag):
+        return Response(status=304, headers=headers)
+    if encoding:
+        # Already gzipped: flask-compress leaves responses with Content-Encoding alone.
+        headers['Content-Encoding'] = encoding
+    return Response(body, status=status, mimetype='application/json', headers=headers)
+
+
 @app.route('/api/check_status/<job_id>', methods=['GET'])
 def check_job_status(job_id):
     # Never return a hard-coded fake transcript here.
     # check_status should only return actual cached result if available.
-    if job_id in job_results_cache:
-        return jsonify(job_results_cache[job_id])
+    cached_result, version = job_results_cache.get_versioned(job_id)
+    if cached_result is not None:
+        return _job_payload_response(job_id, cached_result, version)
 
     # Skip Supabase when we already know this guest/pre-claim job has no row.
     jid = str(job_id or "").strip()
@@ -9406,13 +9902,13 @@ def check_job_status(job_id):
         completed_payload = _completed_job_payload_from_db(job_id)
         if completed_payload:
             logging.info("check_status recovered completed job from DB/S3 job_id=%s", job_id)
-            return jsonify(completed_payload), 200
+            return _job_payload_response(job_id, completed_payload)
 
     # Always probe R2 by convention. Completion may live only in another worker's
     # memory cache; guest jobs have no DB row until claim.
     s3_payload = _completed_job_payload_from_s3_convention(job_id)
     if s3_payload:
-        return jsonify(s3_payload), 200
+        return _job_payload_response(job_id, s3_payload)
 
     # If trigger failed, surface it (merge DB + memory so stale warmup "failed" does not win over retry).
     status, _ = _resolve_trigger_status_for_poll(job_id)
@@ -9447,6 +9943,108 @@ def check_job_status(job_id):
     return jsonify({"jobId": job_id, "status": "processing"}), 202
 
 
+def _job_events_long_poll_sec():
+    try:
+        return min(55.0, max(1.0, float(os.environ.get('JOB_EVENTS_LONG_POLL_SEC', '25') or 25)))
+    except (TypeError, ValueError):
+        return 25.0
+
+
+def _job_events_stream_max_sec():
+    try:
+        return max(10.0, float(os.environ.get('JOB_EVENTS_STREAM_MAX_SEC', '300') or 300))
+    except (TypeError, ValueError):
+        return 300.0
+
+
+def _job_event_current(job_id):
+    """Latest bus snapshot, seeded from in-memory state only (never Supabase / R2)."""
+    snap = _job_events.snapshot(job_id)
+    if snap:
+        return snap
+    cached = job_results_cache.get(job_id)
+    if isinstance(cached, dict):
+        status = str(cached.get('status') or 'completed').strip().lower()
+        return {"job_id": job_id, "version": 0, "event": "result", "status": status,
+                "terminal": status in ("completed", "failed"), "has_result": True}
+    mem = pending_trigger.get(job_id)
+    return {"job_id": job_id, "version": 0, "event": "trigger" if mem else None,
+            "status": ('trigger_failed' if mem == 'failed' else mem) or "unknown", "terminal": False}
+
+
+def _job_event_request_version(job_id, header_name):
+    known = version_from_etag(request.headers.get(header_name), job_id)
+    if known is None and request.args.get('since') not in (None, ''):
+        known = version_from_etag(request.args.get('since'), job_id)
+    return known
+
+
+@app.route('/api/job_status_wait/<job_id>', methods=['GET'])
+def job_status_wait(job_id):
+    """Long-poll status channel: If-None-Match with the last ETag parks until the job changes.
+
+    Returns 304 when nothing changed within JOB_EVENTS_LONG_POLL_SEC. Completed jobs carry
+    has_result=true; fetch the payload once from /api/check_status.
+    """
+    jid = str(job_id or '').strip()
+    if not jid:
+        return jsonify({"error": "job_id required"}), 400
+    known = _job_event_request_version(jid, 'If-None-Match')
+    snap = _job_event_current(jid)
+    version = int(snap.get('version') or 0)
+    if known is not None and version <= known and not snap.get('terminal'):
+        snap = _job_events.wait(jid, known, _job_events_long_poll_sec()) or snap
+        version = int(snap.get('version') or 0)
+    etag = etag_for(jid, version)
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if known is not None and version <= known:
+        return Response(status=304, headers=headers)
+    resp = jsonify(snap)
+    resp.headers.update(headers)
+    return resp, 200
+
+
+@app.route('/api/job_events/<job_id>', methods=['GET'])
+def job_events_stream(job_id):
+    """Server-Sent Events status channel (resumes from Last-Event-ID); ends after a terminal event."""
+    jid = str(job_id or '').strip()
+    if not jid:
+        return jsonify({"error": "job_id required"}), 400
+    last = _job_event_request_version(jid, 'Last-Event-ID')
+    heartbeat_sec = 15.0
+    deadline = time.time() + _job_events_stream_max_sec()
+
+    def _frame(snap):
+        v = int(snap.get('version') or 0)
+        return f"id: {jid}:{v}\nevent: job_event\ndata: {json.dumps(snap, ensure_ascii=False)}\n\n"
+
+    def gen():
+        yield "retry: 3000\n\n"
+        snap = _job_event_current(jid)
+        version = int(snap.get('version') or 0)
+        if last is None or version > last:
+            yield _frame(snap)
+            if snap.get('terminal'):
+                return
+        else:
+            version = last
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            nxt = _job_events.wait(jid, version, min(heartbeat_sec, remaining))
+            if nxt and int(nxt.get('version') or 0) > version:
+                version = int(nxt.get('version') or 0)
+                yield _frame(nxt)
+                if nxt.get('terminal'):
+                    return
+            else:
+                yield ": keepalive\n\n"
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(stream_with_context(gen()), mimetype='text/event-stream', headers=headers)
+
+
 @app.route('/api/debug_job/<job_id>', methods=['GET'])
 def debug_job(job_id):
     """Inspect server-side job state for troubleshooting stuck jobs."""
@@ -11416,12 +12014,7 @@ def api_medical_training_learn():
                     "status": "running",
                     "started_at": time.time(),
                 }
-            t = threading.Thread(
-                target=_medical_training_learn_worker,
-                args=(learn_job_id, dict(data)),
-                daemon=True,
-            )
-            t.start()
+            _background_tasks.submit('gpt', _medical_training_learn_worker, learn_job_id, dict(data))
             return jsonify({"ok": True, "async": True, "learn_job_id": learn_job_id}), 202
         result = _execute_medical_training_learn(data)
         return jsonify(result), 200
@@ -11461,12 +12054,7 @@ def api_medical_training_preview():
                     "status": "running",
                     "started_at": time.time(),
                 }
-            t = threading.Thread(
-                target=_medical_training_preview_worker,
-                args=(preview_job_id, dict(data)),
-                daemon=True,
-            )
-            t.start()
+            _background_tasks.submit('gpt', _medical_training_preview_worker, preview_job_id, dict(data))
             return jsonify({"ok": True, "async": True, "preview_job_id": preview_job_id}), 202
         result = _execute_medical_training_preview(data)
         return jsonify(result), 200
@@ -11555,6 +12143,22 @@ def api_medical_training_reset():
         return jsonify({"error": str(e)}), 500
 
 
+def _export_artifact_response(key, build, download_name, mimetype, source=None, persistent=True):
+    """Serve an export from the artifact cache: 304 when If-None-Match carries its key, else the bytes."""
+    headers = {'ETag': f'"{key}"', 'Cache-Control': 'private, no-cache'}
+    if etag_matches(request.headers.get('If-None-Match'), key):
+        headers['X-Export-Cache'] = 'not-modified'
+        return Response(status=304, headers=headers)
+    artifact, origin = _export_artifacts.get_or_build(
+        key, build, source=source, persistent=persistent, content_type=mimetype
+    )
+    from flask import send_file
+    resp = send_file(BytesIO(artifact.body), as_attachment=True, download_name=download_name, mimetype=mimetype)
+    resp.headers.update(headers)
+    resp.headers['X-Export-Cache'] = origin
+    return resp
+
+
 @app.route('/api/docx_force_rtl', methods=['POST'])
 def api_docx_force_rtl():
     """Receive a DOCX file and return a RTL/right-aligned DOCX."""
@@ -11565,18 +12169,36 @@ def api_docx_force_rtl():
         filename = str(uploaded.filename or 'document.docx')
         if not filename.lower().endswith('.docx'):
             return jsonify({"error": "Only .docx is supported"}), 400
-        raw = uploaded.read()
-        if not raw:
+        src = uploaded.stream
+        src.seek(0, os.SEEK_END)
+        if not src.tell():
             return jsonify({"error": "Empty file"}), 400
-        fixed = _force_docx_rtl_bytes(raw)
-        from flask import send_file
-        out = BytesIO(fixed)
+        size = src.tell()
+        src.seek(0)
+        if size <= _EXPORT_CACHE_MAX_INPUT_BYTES:
+            # Same upload -> same output: repeats are served from the artifact cache (memory only, uploads may be PHI).
+            def _build():
+                out = BytesIO()
+                force_docx_rtl(src, out)
+                return out.getvalue()
+
+            return _export_artifact_response(
+                bytes_export_key('docx_rtl', src), _build, filename, _DOCX_MIMETYPE, persistent=False
+            )
+        # Parts are patched as they stream through; the output spills to disk past 32 MiB.
+        out = tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024)
+        try:
+            force_docx_rtl(src, out)
+        except Exception:
+            out.close()
+            raise
         out.seek(0)
+        from flask import send_file
         return send_file(
             out,
             as_attachment=True,
             download_name=filename,
-            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+            mimetype=_DOCX_MIMETYPE
         )
     except Exception as e:
         logging.warning("docx_force_rtl failed: %s", e)
@@ -11833,16 +12455,14 @@ def api_export_docx():
             lines = _docx_body_lines_from_clean_transcript(clean)
             dl_name = filename + '.docx'
 
-        docx_bytes = _build_rtl_docx(lines)
-
-        from flask import send_file
-        out = BytesIO(docx_bytes)
-        out.seek(0)
-        resp = send_file(
-            out,
-            as_attachment=True,
-            download_name=dl_name,
-            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+        # The DOCX is a pure function of its body lines: key the artifact cache on them.
+        resp = _export_artifact_response(
+            export_key('docx', lines),
+            lambda: _build_rtl_docx(lines),
+            dl_name,
+            _DOCX_MIMETYPE,
+            source=str(data.get('input_s3_key') or data.get('s3Key') or '').strip() or None,
+            persistent=not _request_json_is_medical(data),
         )
         resp.headers['X-Docx-Format-Source'] = format_source
         return resp
@@ -11955,7 +12575,7 @@ def _schedule_post_summary_formatting(
             cached['result'] = result_dict
             cached['result_s3_key'] = result_s3_key
             job_results_cache[job_id] = cached
-            socketio.emit('job_status_update', cached, room=job_id)
+            _emit_job_status_update(job_id, cached)
             logging.info(
                 "gpu_callback: post-summary formatting done job_id=%s clean_chars=%s "
                 "segments=%s changed=%s mode=%s sec=%.2f",
@@ -11973,7 +12593,7 @@ def _schedule_post_summary_formatting(
                 err,
             )
 
-    threading.Thread(target=_worker, daemon=True).start()
+    _background_tasks.submit('gpt', _worker, label='post_summary_formatting')
 
 
 def _record_completed_medical_usage(
@@ -12184,7 +12804,7 @@ def _finalize_gpu_callback_background(job_id, data, segments, result, input_s3_k
             job_results_cache[job_id] = data
             # Deliver formatted ASAP so the client can skip a second GPT pass.
             try:
-                socketio.emit('job_status_update', data, room=job_id)
+                _emit_job_status_update(job_id, data)
             except Exception as early_emit_err:
                 logging.warning(
                     "gpu_callback: early formatted emit failed job_id=%s: %s",
@@ -12212,7 +12832,7 @@ def _finalize_gpu_callback_background(job_id, data, segments, result, input_s3_k
             "error": "Failed to save result on server",
         }
         job_results_cache[job_id] = fail_payload
-        socketio.emit('job_status_update', fail_payload, room=job_id)
+        _emit_job_status_update(job_id, fail_payload)
         _cleanup_audio_preprocess_intermediate(job_id, pending_info)
         return
 
@@ -12284,7 +12904,7 @@ def _finalize_gpu_callback_background(job_id, data, segments, result, input_s3_k
             refreshed['transcript_persisted'] = True
             refreshed['server_gpt_pending'] = False
             job_results_cache[job_id] = refreshed
-            socketio.emit('job_status_update', refreshed, room=job_id)
+            _emit_job_status_update(job_id, refreshed)
             seg_n = len(refreshed.get('segments') or [])
             logging.info(
                 "gpu_callback: re-emitted job_status_update after S3 persist job_id=%s segments=%s",
@@ -12345,13 +12965,9 @@ def gpu_callback():
             "error": callback_error or "Transcription failed on worker",
         }
         job_results_cache[job_id] = fail_payload
-        socketio.emit('job_status_update', fail_payload, room=job_id)
+        _emit_job_status_update(job_id, fail_payload)
         logging.error("gpu_callback failure job_id=%s error=%s", job_id, fail_payload.get("error"))
-        threading.Thread(
-            target=_cleanup_audio_preprocess_intermediate,
-            args=(job_id, failed_pending),
-            daemon=True,
-        ).start()
+        _background_tasks.submit('critical', _cleanup_audio_preprocess_intermediate, job_id, failed_pending, priority=5)
         return jsonify({"ok": True}), 200
 
     pending = pending_job_info.pop(job_id, None)
@@ -12412,27 +13028,25 @@ def gpu_callback():
             data['result']['server_gpt_pending'] = True
 
     job_results_cache[job_id] = data
-    socketio.emit('job_status_update', data, room=job_id)
+    _emit_job_status_update(job_id, data)
     if job_id in pending_trigger and pending_trigger.get(job_id) != "failed":
         pending_trigger[job_id] = "triggered"
 
     public_base = _public_base_url(request)
-    t = threading.Thread(
-        target=_finalize_gpu_callback_background,
-        kwargs={
-            "job_id": job_id,
-            "data": data,
-            "segments": segments,
-            "result": result,
-            "input_s3_key": input_s3_key,
-            "user_id": user_id,
-            "t0": t0,
-            "public_base": public_base,
-            "pending_info": pending,
-        },
-        daemon=True,
+    _background_tasks.submit(
+        'critical',
+        _finalize_gpu_callback_background,
+        job_id=job_id,
+        data=data,
+        segments=segments,
+        result=result,
+        input_s3_key=input_s3_key,
+        user_id=user_id,
+        t0=t0,
+        public_base=public_base,
+        pending_info=pending,
+        priority=0,
     )
-    t.start()
 
     ack_ms = int((time.time() - t0) * 1000)
     logging.info("gpu_callback ack job_id=%s segments=%s ack_ms=%s", job_id, len(segments), ack_ms)
@@ -12453,17 +13067,18 @@ def on_join(data):
         print(f"Client joined room: {room}")
 
         # CHECK MAILBOX: Is the result already waiting?
-        if room in job_results_cache:
+        cached_result = job_results_cache.get(room)
+        if cached_result is not None:
             print(f"Found cached result for {room}, sending now!")
             # Send it to this specific user who just reconnected
-            socketio.emit('job_status_update', job_results_cache[room], room=request.sid)
+            socketio.emit('job_status_update', _job_payload_shaped(cached_result), room=request.sid)
             return
         # Cross-worker guest jobs: completion may only exist in R2 on this instance.
         try:
             s3_payload = _completed_job_payload_from_s3_convention(room)
             if s3_payload:
                 print(f"Found S3 result for {room}, sending now!")
-                socketio.emit('job_status_update', s3_payload, room=request.sid)
+                socketio.emit('job_status_update', _job_payload_shaped(s3_payload), room=request.sid)
                 return
         except Exception as join_s3_err:
             logging.debug("join S3 recovery failed room=%s: %s", room, join_s3_err)
@@ -12524,7 +13139,7 @@ def simulate_completion(jid, run_diarization):
     job_results_cache[jid] = mock_data
 
     # Send the result to the frontend
-    socketio.emit('job_status_update', mock_data, room=jid)
+    _emit_job_status_update(jid, mock_data)
     print(f"🔮 SIMULATION COMPLETE: Room {jid} | Diarization Output: {run_diarization}")
 
 
@@ -13496,8 +14111,7 @@ def _submit_medical_sagemaker_session_warmup(user_id, public_base=None, force=Fa
         else:
             logging.warning("Medical session SageMaker warmup failed job_id=%s", job_id)
 
-    t = threading.Thread(target=_run, daemon=True)
-    t.start()
+    _background_tasks.submit('watchers', _run, label='medical_session_warmup')
     logging.info(
         "medical_session_warmup user=%s started job=%s endpoint=%s callback_base=%s",
         safe_user[:12],
@@ -13665,25 +14279,23 @@ def api_medical_complete_stream_transcription():
 
     _stash_deferred_credit_context(job_id, user_id, s3_key, pending_info=pending_job_info.get(job_id))
     job_results_cache[job_id] = payload
-    socketio.emit('job_status_update', payload, room=job_id)
+    _emit_job_status_update(job_id, payload)
 
     public_base = _public_base_url(request)
-    t = threading.Thread(
-        target=_finalize_gpu_callback_background,
-        kwargs={
-            'job_id': job_id,
-            'data': payload,
-            'segments': segments,
-            'result': payload.get('result') or {},
-            'input_s3_key': s3_key,
-            'user_id': user_id,
-            't0': t0,
-            'public_base': public_base,
-            'pending_info': pending_job_info.get(job_id),
-        },
-        daemon=True,
+    _background_tasks.submit(
+        'critical',
+        _finalize_gpu_callback_background,
+        job_id=job_id,
+        data=payload,
+        segments=segments,
+        result=payload.get('result') or {},
+        input_s3_key=s3_key,
+        user_id=user_id,
+        t0=t0,
+        public_base=public_base,
+        pending_info=pending_job_info.get(job_id),
+        priority=0,
     )
-    t.start()
 
     logging.info(
         'medical stream transcription complete job_id=%s segments=%s chars=%s',
@@ -13975,9 +14587,7 @@ def _start_trigger_if_configured(
     t_queued = time.time()
     pending_trigger_at[job_id] = t_queued
     _set_trigger_state(job_id, "queued", queued_at=t_queued)
-    t = threading.Thread(target=_trigger_gpu, args=(job_id, payload, endpoint_id, api_key))
-    t.daemon = True
-    t.start()
+    _background_tasks.submit('critical', _trigger_gpu, job_id, payload, endpoint_id, api_key, priority=0)
     logging.info("Trigger started at sign-s3 (before upload) for %s", job_id)
 
 
@@ -14235,11 +14845,7 @@ def _queue_audio_preprocess_on_runpod(
         cpu_endpoint_id,
         runpod_run_id,
     )
-    threading.Thread(
-        target=_watch_runpod_audio_preprocess,
-        args=(job_id,),
-        daemon=True,
-    ).start()
+    _background_tasks.submit('watchers', _watch_runpod_audio_preprocess, job_id)
 
 
 def _publish_audio_preprocess_worker_handoff(job_id, trigger_payload):
@@ -14428,8 +15034,7 @@ def _queue_vocal_separation_on_runpod(job_id, bucket, source_s3_key, vocals_s3_k
         runpod_run_id,
         (vocals_s3_key[-80:] if isinstance(vocals_s3_key, str) and len(vocals_s3_key) > 80 else vocals_s3_key),
     )
-    t = threading.Thread(target=_watch_runpod_vocal_separation, args=(job_id,), daemon=True)
-    t.start()
+    _background_tasks.submit('watchers', _watch_runpod_vocal_separation, job_id)
     if _env_flag_true('RUNPOD_CPU_SCALE_ON_VOCAL_SEPARATION'):
         try:
             from runpod_endpoint_workers import set_runpod_endpoint_min_workers
@@ -14555,13 +15160,11 @@ def _preprocess_music_vocals_then_trigger(job_id, payload, endpoint_id, api_key,
             _set_trigger_state(job_id, "failed")
             return
         trigger_payload = _apply_vocal_separation_failure(trigger_payload, source_s3_key, str(e))
-        pinfo = dict(pending_job_info.get(job_id) or {})
-        pinfo.update({
+        _merge_pending_job_info(job_id, {
             'input_s3_key': source_s3_key,
             'transcription_s3_key': source_s3_key,
             'transcription_options': (trigger_payload.get('input') or {}).get('transcription_options') or {},
         })
-        pending_job_info[job_id] = pinfo
     _finish_vocal_separation_and_trigger_gpu(job_id, trigger_payload, endpoint_id, api_key)
 
 
@@ -14581,6 +15184,7 @@ def gpu_started():
     gpu_started_at[job_id] = started_at
     if job_id in pending_trigger and pending_trigger.get(job_id) != "failed":
         pending_trigger[job_id] = "triggered"
+    _publish_job_event(job_id, 'gpu_started', status='triggered', gpu_started_at=started_at)
     pending = pending_job_info.get(job_id, {})
     user_id = pending.get("user_id") or _extract_user_id_from_s3_key((pending.get("input_s3_key") or ""))
     mem_timings = job_timings.get(job_id) or {}
@@ -14757,11 +15361,11 @@ def trigger_processing():
         if is_medical and job_id:
             medical_duration_sec = _client_media_duration_from_request(data)
             if medical_duration_sec > 0:
-                pinfo = dict(pending_job_info.get(job_id) or {})
-                pinfo['credit_file_duration_sec'] = medical_duration_sec
-                pinfo['user_id'] = authenticated_medical_user
-                pinfo['input_s3_key'] = s3_key
-                pending_job_info[job_id] = pinfo
+                _merge_pending_job_info(job_id, {
+                    'credit_file_duration_sec': medical_duration_sec,
+                    'user_id': authenticated_medical_user,
+                    'input_s3_key': s3_key,
+                })
         if SIMULATION_MODE and not _simulation_uses_sagemaker_async():
             print("🔮 SIMULATION: Skipping RunPod Trigger")
             if job_id:
@@ -14772,11 +15376,7 @@ def trigger_processing():
                 # R2 simulation: real upload succeeded, but no RunPod/SageMaker — finish locally.
                 if _simulation_use_r2_storage():
                     run_diarization = bool(data.get('diarization', False))
-                    threading.Thread(
-                        target=simulate_completion,
-                        args=(job_id, run_diarization),
-                        daemon=True,
-                    ).start()
+                    _background_tasks.submit('watchers', simulate_completion, job_id, run_diarization)
                     logging.info(
                         "SIMULATION R2: queued local simulate_completion job_id=%s diarization=%s",
                         job_id,
@@ -14832,12 +15432,11 @@ def trigger_processing():
                 "transcription_options": transcription_options or {},
             }
             public_base = _public_base_url(request)
-            t = threading.Thread(
-                target=_submit_simulation_job,
-                args=(job_id, s3_key, task, language, diarization, is_medical, target_bucket, public_base, transcription_options),
-                daemon=True,
+            _background_tasks.submit(
+                'watchers',
+                _submit_simulation_job,
+                job_id, s3_key, task, language, diarization, is_medical, target_bucket, public_base, transcription_options,
             )
-            t.start()
             return jsonify({
                 "status": "started",
                 "job_id": job_id,
@@ -14887,25 +15486,22 @@ def trigger_processing():
             if not already_submitted:
                 public_base = _public_base_url(request)
                 diarization = data.get('diarization', False)
-                t = threading.Thread(
-                    target=_submit_sagemaker_async_job,
-                    kwargs={
-                        "job_id": job_id,
-                        "s3_key": s3_key,
-                        "task": task,
-                        "language": language,
-                        "diarization": diarization,
-                        "is_medical": True,
-                        "bucket": target_bucket,
-                        "public_base": public_base,
-                        "transcription_options": transcription_options,
-                        "for_simulation": False,
-                        "warmup_only": False,
-                        "upload_already_complete": True,
-                    },
-                    daemon=True,
+                _background_tasks.submit(
+                    'watchers',
+                    _submit_sagemaker_async_job,
+                    job_id=job_id,
+                    s3_key=s3_key,
+                    task=task,
+                    language=language,
+                    diarization=diarization,
+                    is_medical=True,
+                    bucket=target_bucket,
+                    public_base=public_base,
+                    transcription_options=transcription_options,
+                    for_simulation=False,
+                    warmup_only=False,
+                    upload_already_complete=True,
                 )
-                t.start()
             pending_trigger[job_id] = "triggered"
             pending_trigger_at[job_id] = time.time()
             _set_trigger_state(job_id, "triggered", async_persist=False, queued_at=pending_trigger_at[job_id])
@@ -15030,12 +15626,11 @@ def trigger_processing():
                 )
                 pending_trigger[job_id] = "preprocessing"
                 _set_trigger_state(job_id, "preprocessing")
-                t = threading.Thread(
-                    target=_preprocess_music_vocals_then_trigger,
-                    args=(job_id, payload, endpoint_id, api_key, target_bucket, s3_key, vocals_s3_key),
-                    daemon=True,
+                _background_tasks.submit(
+                    'watchers',
+                    _preprocess_music_vocals_then_trigger,
+                    job_id, payload, endpoint_id, api_key, target_bucket, s3_key, vocals_s3_key,
                 )
-                t.start()
             elif use_audio_preprocess:
                 _set_worker_handoff(
                     job_id,
@@ -15048,20 +15643,17 @@ def trigger_processing():
                 )
                 pending_trigger[job_id] = "preprocessing"
                 _set_trigger_state(job_id, "preprocessing")
-                t = threading.Thread(
-                    target=_preprocess_audio_then_trigger,
-                    args=(
-                        job_id,
-                        payload,
-                        endpoint_id,
-                        api_key,
-                        target_bucket,
-                        s3_key,
-                        audio_preprocessed_s3_key,
-                    ),
-                    daemon=True,
+                _background_tasks.submit(
+                    'watchers',
+                    _preprocess_audio_then_trigger,
+                    job_id,
+                    payload,
+                    endpoint_id,
+                    api_key,
+                    target_bucket,
+                    s3_key,
+                    audio_preprocessed_s3_key,
                 )
-                t.start()
             else:
                 _set_worker_handoff(
                     job_id,
@@ -15101,9 +15693,7 @@ def trigger_processing():
             pending_trigger[job_id] = "triggered"
             _set_trigger_state(job_id, "triggered")
             if not SIMULATION_MODE:
-                t = threading.Thread(target=simulate_completion, args=(job_id, diarization))
-                t.daemon = True
-                t.start()
+                _background_tasks.submit('watchers', simulate_completion, job_id, diarization)
             return jsonify({
                 "status": "started",
                 "runpod_id": "sim_id_123",
@@ -15155,10 +15745,13 @@ def trigger_processing():
             ),
             "audio_preprocessed_s3_key": audio_preprocessed_s3_key,
         }
-        if credit_reserve.get('required_minutes'):
-            pending_job_info[job_id]['credit_required_minutes'] = float(credit_reserve['required_minutes'])
-        if credit_reserve.get('file_duration_seconds'):
-            pending_job_info[job_id]['credit_file_duration_sec'] = float(credit_reserve['file_duration_seconds'])
+        if credit_reserve.get('required_minutes') or credit_reserve.get('file_duration_seconds'):
+            credit_fields = {}
+            if credit_reserve.get('required_minutes'):
+                credit_fields['credit_required_minutes'] = float(credit_reserve['required_minutes'])
+            if credit_reserve.get('file_duration_seconds'):
+                credit_fields['credit_file_duration_sec'] = float(credit_reserve['file_duration_seconds'])
+            _merge_pending_job_info(job_id, credit_fields)
         _set_worker_handoff(
             job_id,
             options_finalized=True,
@@ -15175,30 +15768,25 @@ def trigger_processing():
         pending_trigger_at[job_id] = t_queued
         _set_trigger_state(job_id, "queued", queued_at=t_queued)
         if use_music_vocal_preprocess:
-            t = threading.Thread(
-                target=_preprocess_music_vocals_then_trigger,
-                args=(job_id, payload, endpoint_id, api_key, target_bucket, s3_key, vocals_s3_key)
+            _background_tasks.submit(
+                'watchers',
+                _preprocess_music_vocals_then_trigger,
+                job_id, payload, endpoint_id, api_key, target_bucket, s3_key, vocals_s3_key,
             )
         elif use_audio_preprocess:
-            t = threading.Thread(
-                target=_preprocess_audio_then_trigger,
-                args=(
-                    job_id,
-                    payload,
-                    endpoint_id,
-                    api_key,
-                    target_bucket,
-                    s3_key,
-                    audio_preprocessed_s3_key,
-                ),
+            _background_tasks.submit(
+                'watchers',
+                _preprocess_audio_then_trigger,
+                job_id,
+                payload,
+                endpoint_id,
+                api_key,
+                target_bucket,
+                s3_key,
+                audio_preprocessed_s3_key,
             )
         else:
-            t = threading.Thread(
-                target=_trigger_gpu,
-                args=(job_id, payload, endpoint_id, api_key)
-            )
-        t.daemon = True
-        t.start()
+            _background_tasks.submit('critical', _trigger_gpu, job_id, payload, endpoint_id, api_key, priority=0)
 
         # Return "started" so first/cold run shows "Triggering processing..." not "Wait in line..."
         return jsonify({
@@ -15297,23 +15885,20 @@ def retry_trigger():
             info.pop('sagemaker_error', None)
             pending_job_info[job_id] = info
             public_base = _public_base_url(request)
-            t = threading.Thread(
-                target=_submit_sagemaker_async_job,
-                kwargs={
-                    "job_id": job_id,
-                    "s3_key": s3_key,
-                    "task": task,
-                    "language": language,
-                    "diarization": False,
-                    "is_medical": True,
-                    "bucket": info.get("bucket"),
-                    "public_base": public_base,
-                    "transcription_options": info.get("transcription_options") or {},
-                    "for_simulation": False,
-                },
-                daemon=True,
+            _background_tasks.submit(
+                'watchers',
+                _submit_sagemaker_async_job,
+                job_id=job_id,
+                s3_key=s3_key,
+                task=task,
+                language=language,
+                diarization=False,
+                is_medical=True,
+                bucket=info.get("bucket"),
+                public_base=public_base,
+                transcription_options=info.get("transcription_options") or {},
+                for_simulation=False,
             )
-            t.start()
             return jsonify({
                 "status": "retry_started",
                 "job_id": job_id,
@@ -15362,12 +15947,7 @@ def retry_trigger():
         pending_trigger[job_id] = "queued"
         pending_trigger_at[job_id] = t_queued
         _set_trigger_state(job_id, "queued", queued_at=t_queued)
-        t = threading.Thread(
-            target=_trigger_gpu,
-            args=(job_id, payload, endpoint_id, api_key)
-        )
-        t.daemon = True
-        t.start()
+        _background_tasks.submit('critical', _trigger_gpu, job_id, payload, endpoint_id, api_key, priority=0)
         print(f"🔄 Retry trigger started for job {job_id}")
         return jsonify({"status": "retry_started", "job_id": job_id}), 202
     except Exception as e:
@@ -15388,7 +15968,176 @@ def get_simulation_mode():
 
 
 # --- BURN SUBTITLES (SERVER-SIDE ON KOYEB) ---
-burn_tasks = {}  # task_id -> { status, output_s3_key?, error? }
+def _burn_task_backend():
+    """Where burn task records live: the shared state backend (STATE_BACKEND) or a SQLite file at BURN_TASKS_PATH.
+
+    Neither set (dev shells, tests importing the app): process memory, so nothing is resumed from a
+    shared temp file left by some other run.
+    """
+    if _shared_state.shared:
+        return _shared_state
+    path = (os.environ.get('BURN_TASKS_PATH') or '').strip()
+    if not path:
+        return MemoryStateBackend()
+    try:
+        return SQLiteStateBackend(path)
+    except Exception as e:
+        logging.error("Burn task store %s unavailable, using memory: %s", path, e)
+        return MemoryStateBackend()
+
+
+# task_id -> { status, stage, mode, percent?, eta_sec?, output_s3_key?, error?, ...inputs for a local resume }
+burn_tasks = BurnTaskStore(_burn_task_backend(), ttl_sec=_job_state_env_float('BURN_TASK_TTL_SEC', 7 * 24 * 3600))
+_burn_slots = HostSlots(
+    (os.environ.get('BURN_SLOTS_DIR') or '').strip() or tempfile.gettempdir(),
+    int(_job_state_env_float('BURN_MAX_CONCURRENT_PER_HOST', 2)),
+)
+_BURN_WORKER_ID = new_owner_id()
+_BURN_LEASE_SEC = _job_state_env_float('BURN_LEASE_SEC', 120)
+_BURN_PROGRESS_WRITE_SEC = _job_state_env_float('BURN_PROGRESS_WRITE_SEC', 2.0)
+_BURN_MAX_ATTEMPTS = int(_job_state_env_float('BURN_MAX_ATTEMPTS', 2))
+# Segment-parallel burn: BURN_PARALLEL_WORKERS ffmpeg processes (1 = single pass, 0 = CPUs / threads each).
+# Off until scripts/bench_burn_parallel.py has been run on the burn hosts for 10/30/60-minute inputs
+# (wall clock plus SSIM/PSNR against the single pass); opt in per host after that.
+_BURN_PARALLEL_THREADS = max(1, int(_job_state_env_float('BURN_PARALLEL_THREADS', 2)))
+# Streamed I/O: ffmpeg reads a presigned URL and the output is uploaded in parts while it encodes.
+_BURN_STREAMED_IO = _env_truthy('BURN_STREAMED_IO', True)
+# Identical burn requests share one task / finished output (keyed by input ETag, captions and style).
+_BURN_DEDUPE = _env_truthy('BURN_DEDUPE', True)
+_BURN_PARALLEL_WORKERS = int(_job_state_env_float('BURN_PARALLEL_WORKERS', 1)) or max(1, (os.cpu_count() or 1) // _BURN_PARALLEL_THREADS)
+
+
+def _burn_public_status(task_id, record):
+    """Status payload for polls and push events. Queued and running both read 'processing' (older clients poll on it)."""
+    status = str(record.get('status') or BURN_PROCESSING)
+    out = {
+        "task_id": task_id,
+        "status": BURN_PROCESSING if status == BURN_QUEUED else status,
+        "stage": record.get('stage') or status,
+        "mode": record.get('mode'),
+    }
+    for k in ('percent', 'eta_sec', 'fps', 'speed', 'timeout_sec'):
+        if record.get(k) is not None:
+            out[k] = record[k]
+    if status == BURN_FAILED:
+        out["error"] = record.get('error') or 'Unknown error'
+    return out
+
+
+def _burn_task_update(task_id, **fields):
+    """Merge fields into the durable record and push the new state to Socket.IO / SSE / long-poll subscribers."""
+    record = burn_tasks.update(task_id, **fields)
+    if record:
+        pub = _burn_public_status(task_id, record)
+        pub.pop('task_id', None)
+        _publish_job_event(task_id, 'burn', **pub)
+    return record
+
+
+def _burn_task_renew(task_id, **fields):
+    return _burn_task_update(
+        task_id, lease_owner=_BURN_WORKER_ID, lease_until=time.time() + _BURN_LEASE_SEC, **fields
+    )
+
+
+def _burn_status_payload(task_id, record):
+    """_burn_public_status plus, once completed, the output key and a presigned download URL."""
+    out = _burn_public_status(task_id, record)
+    output_s3_key = record.get('output_s3_key')
+    if out["status"] == BURN_COMPLETED and output_s3_key:
+        bucket = os.environ.get('S3_BUCKET')
+        out["output_s3_key"] = output_s3_key
+        out["output_url"] = _s3_boto_client(bucket=bucket).generate_presigned_url(
+            'get_object',
+            Params={'Bucket': bucket, 'Key': output_s3_key},
+            ExpiresIn=3600
+        )
+        out["download_name"] = "video_with_subtitles.mp4"
+    return out
+
+
+def _burn_object_etag(s3_client, bucket, key):
+    try:
+        return s3_client.head_object(Bucket=bucket, Key=key).get('ETag') or None
+    except Exception:
+        return None
+
+
+def _burn_dedupe_hit(s3_client, bucket, dedupe_key, user_id):
+    """(payload, http_status) when an identical burn is running or finished with its output intact, else None.
+
+    Outputs share a friendly per-input key, so a later burn with other captions may have replaced the object:
+    a finished burn only counts while the object still has the ETag recorded when it was uploaded.
+    """
+    record = burn_tasks.find_duplicate(dedupe_key)
+    if record is None:
+        return None
+    if record.get('status') != BURN_COMPLETED:
+        return dict(_burn_public_status(record['task_id'], record), deduplicated=True), 202
+    output_s3_key = record.get('output_s3_key')
+    etag = _burn_object_etag(s3_client, bucket, output_s3_key) if output_s3_key else None
+    if not etag or etag != record.get('output_etag'):
+        return None
+    task_id = str(uuid.uuid4())
+    cached = burn_tasks.create(
+        task_id,
+        status=BURN_COMPLETED,
+        stage=BURN_COMPLETED,
+        mode='cache',
+        user_id=user_id,
+        output_s3_key=output_s3_key,
+        output_etag=etag,
+        source_task_id=record['task_id'],
+        percent=100.0,
+        eta_sec=0.0,
+        finished_at=time.time(),
+    )
+    return dict(_burn_status_payload(task_id, cached), deduplicated=True), 200
+
+
+class _BurnHeartbeat:
+    """Throttled progress + lease writes from ffmpeg / S3 transfer callbacks (which fire many times a second)."""
+
+    def __init__(self, task_id, stage, total_bytes=None):
+        self.task_id = task_id
+        self.stage = stage
+        self.total = total_bytes
+        self.done = 0
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def _due(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last < _BURN_PROGRESS_WRITE_SEC:
+                return False
+            self._last = now
+            return True
+
+    def transferred(self, n):
+        """boto3 transfer Callback."""
+        with self._lock:
+            self.done += n
+        if self._due():
+            pct = round(min(100.0, 100.0 * self.done / self.total), 1) if self.total else None
+            _burn_task_renew(self.task_id, stage=self.stage, percent=pct, eta_sec=None, fps=None, speed=None)
+
+    def ffmpeg(self, snap):
+        if self._due(force=bool(snap.get('done'))):
+            _burn_task_renew(
+                self.task_id,
+                stage=self.stage,
+                percent=snap.get('percent'),
+                eta_sec=snap.get('eta_sec'),
+                fps=snap.get('fps'),
+                speed=snap.get('speed'),
+            )
+
+    def cancelled(self):
+        """Cancel check for waits / the ffmpeg watchdog; also keeps the lease alive through silent stretches."""
+        if self._due():
+            _burn_task_renew(self.task_id)
+        return burn_tasks.cancel_requested(self.task_id)
 
 def _resolve_ffmpeg():
     """Return an executable ffmpeg path.
@@ -15899,6 +16648,24 @@ def _segments_to_srt_text(segments, max_chars_per_line=None):
     return "\n".join(rows) + ("\n" if rows else "")
 
 
+def _subtitle_text(fmt, segments, subtitle_style=None, portrait=False, subtitle_color=None, max_chars_per_line=None, source=None):
+    """ASS (fmt='ass') or SRT text for segments, built once per content + options via the export cache.
+
+    Memory tier only: burn paths upload the text per task anyway.
+    """
+    # Keyed on the whole segment list: hashing it costs a fraction of a build, and picking out only
+    # the fields the builders read would cost more than the build itself.
+    if fmt == 'ass':
+        style = subtitle_style or 'tiktok'
+        key = export_key('ass', segments, {'style': style, 'portrait': bool(portrait), 'color': subtitle_color})
+        build = lambda: _build_ass(segments, style, portrait=portrait, subtitle_color=subtitle_color).encode('utf-8')
+    else:
+        key = export_key('srt', segments, {'max_chars_per_line': max_chars_per_line})
+        build = lambda: _segments_to_srt_text(segments, max_chars_per_line=max_chars_per_line).encode('utf-8')
+    artifact, _origin = _export_artifacts.get_or_build(key, build, source=source, persistent=False)
+    return artifact.body.decode('utf-8')
+
+
 def _extract_user_id_from_s3_key(s3_key: str):
     """Best-effort user id from keys like users/{id}/... or raw-audio/users/{id}/..."""
     try:
@@ -15948,11 +16715,13 @@ def _queue_burn_task_on_runpod(task_id, input_s3_key, segments, user_id, callbac
     subtitle_ext = 'ass' if prefer_ass else 'srt'
     subtitle_s3_key = f"users/{user_id}/tmp/subtitles/{task_id}.{subtitle_ext}"
     if prefer_ass:
-        subtitle_text = _build_ass(segments, subtitle_style or 'tiktok', portrait=is_portrait, subtitle_color=subtitle_color)
+        subtitle_text = _subtitle_text(
+            'ass', segments, subtitle_style, portrait=is_portrait, subtitle_color=subtitle_color, source=input_s3_key
+        )
         subtitle_content_type = "text/x-ssa; charset=utf-8"
     else:
         max_chars = 14 if (subtitle_style == 'tiktok' and is_portrait) else (27 if subtitle_style == 'tiktok' else 9999)
-        subtitle_text = _segments_to_srt_text(segments, max_chars_per_line=max_chars)
+        subtitle_text = _subtitle_text('srt', segments, max_chars_per_line=max_chars, source=input_s3_key)
         subtitle_content_type = "application/x-subrip; charset=utf-8"
     s3_client.put_object(
         Bucket=bucket,
@@ -16032,102 +16801,256 @@ def _queue_burn_task_on_runpod(task_id, input_s3_key, segments, user_id, callbac
             raise RuntimeError(f"RunPod movie dispatch failed after {max_attempts} attempts: {last_err}")
         raise RuntimeError(f"RunPod movie dispatch failed after {max_attempts} attempts")
 
-    burn_tasks[task_id] = {
-        'status': 'processing',
-        'mode': 'runpod',
-        'subtitle_format': subtitle_ext,
-        'output_s3_key': output_s3_key,
-        'subtitle_s3_key': subtitle_s3_key,
-        'safe_name': safe_name
-    }
+    try:
+        runpod_job_id = (r.json() or {}).get('id')
+    except Exception:
+        runpod_job_id = None
+    _burn_task_update(
+        task_id,
+        status=BURN_PROCESSING,
+        stage='dispatched',
+        mode='runpod',
+        runpod_job_id=runpod_job_id,
+        subtitle_format=subtitle_ext,
+        output_s3_key=output_s3_key,
+        subtitle_s3_key=subtitle_s3_key,
+        safe_name=safe_name,
+    )
+
+def _burn_local_subtitles(segments, subtitle_style=None, is_portrait=False, subtitle_color=None, input_s3_key=None):
+    """(format, text) for a local burn: styled ASS, else plain SRT."""
+    if subtitle_style in ('tiktok', 'clean', 'cinematic'):
+        return 'ass', _subtitle_text(
+            'ass', segments, subtitle_style, portrait=is_portrait, subtitle_color=subtitle_color, source=input_s3_key
+        )
+
+    def to_srt_ts(s):
+        h = int(s // 3600)
+        m = int((s % 3600) // 60)
+        sec = s % 60
+        return f"{h:02d}:{m:02d}:{int(sec):02d},{int((sec % 1) * 1000):03d}"
+
+    rows = []
+    for i, seg in enumerate(segments):
+        start = seg.get('start', 0)
+        end = seg.get('end', start + 1)
+        text = (seg.get('text') or '').replace('\n', ' ')
+        rows.append(f"{i + 1}\n{to_srt_ts(start)} --> {to_srt_ts(end)}\n{text}\n\n")
+    return 'srt', ''.join(rows)
+
+
+def _burn_streamed(task_id, s3_client, bucket, input_s3_key, out_keys, burn, duration_sec):
+    """Pipelined burn: ffmpeg reads a presigned URL and its (fragmented MP4) output is uploaded in parts while it encodes.
+
+    Returns (result, out_key). (None, None) when ffmpeg produced no output at all (e.g. a build without TLS,
+    or the upload could not start) so the caller falls back to download -> burn -> upload.
+    """
+    try:
+        url = s3_client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': bucket, 'Key': input_s3_key},
+            ExpiresIn=int(min(7 * 86400, 2 * burn_timeout_sec(duration_sec) + 3600)),
+        )
+    except Exception as e:
+        logging.warning("burn %s: presign failed, using download: %s", task_id, e)
+        return None, None
+    upload = None
+    for key in out_keys:
+        try:
+            upload = StreamingMultipartUpload(
+                s3_client, bucket, key,
+                part_size=int(_job_state_env_float('BURN_UPLOAD_PART_MB', 8) * 1024 * 1024),
+                max_concurrency=int(_job_state_env_float('BURN_UPLOAD_CONCURRENCY', 4)),
+                extra_args={'ContentType': 'video/mp4'},
+            )
+            break
+        except Exception as e:
+            logging.warning("burn %s: multipart upload to %s could not start: %s", task_id, key, e)
+    if upload is None:
+        return None, None
+    result = burn(url, output_sink=upload.write)
+    if not result.ok:
+        upload.abort()
+        if result.reason == 'failed' and upload.bytes_written == 0:
+            logging.warning("burn %s: streamed ffmpeg produced no output, using download: %s",
+                            task_id, (result.stderr_tail or '')[-300:])
+            return None, None
+        return result, None
+    _burn_task_renew(task_id, stage='uploading', percent=None, eta_sec=None, fps=None, speed=None)
+    try:
+        upload.complete()
+    except Exception as e:
+        upload.abort()
+        return FfmpegResult(result.returncode, 'failed', f'Upload failed: {e}', result.progress), None
+    return result, upload.key
+
+
+# Local burns handed to this process's media queue and not finished yet (the orphan scan skips them).
+_burn_local_tasks = set()
+_burn_local_lock = threading.Lock()
 
-def _run_burn_task(task_id, input_s3_key, segments, user_id, subtitle_style=None, is_portrait=False, notify_email=None, job_id=None, subtitle_color=None):
-    """Background task: download from S3, check duration limit, burn subtitles, upload to S3, optional email."""
+
+def _submit_local_burn(task_id):
+    with _burn_local_lock:
+        _burn_local_tasks.add(task_id)
+    if _background_tasks.submit('media', _run_local_burn, task_id):
+        return True
+    with _burn_local_lock:
+        _burn_local_tasks.discard(task_id)
+    return False
+
+
+def _run_local_burn(task_id):
+    try:
+        _run_burn_task(task_id)
+    finally:
+        with _burn_local_lock:
+            _burn_local_tasks.discard(task_id)
+
+
+def _run_burn_task(task_id):
+    """Background task: wait for a host slot, download from S3, burn with ffmpeg progress, upload, optional email.
+
+    Every input lives in the durable task record, so a task orphaned by a restart can be resumed as is.
+    """
+    record = burn_tasks.get(task_id)
+    if not record or record.get('status') in BURN_TERMINAL_STATUSES:
+        return
+    if record.get('lease_owner') not in (None, _BURN_WORKER_ID) and float(record.get('lease_until') or 0) >= time.time():
+        # Another worker resumed it while it waited in our queue past its lease.
+        return
     bucket = os.environ.get('S3_BUCKET')
     s3_client = _s3_boto_client(bucket=bucket)
+    input_s3_key = record.get('input_s3_key')
+    user_id = record.get('user_id')
+    notify_email = record.get('notify_email')
+    beat = _BurnHeartbeat(task_id, 'queued')
     try:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            ext = '.mp4'
-            if input_s3_key:
-                for e in ('.mp4', '.mov', '.webm', '.m4v', '.mkv', '.avi'):
-                    if input_s3_key.lower().endswith(e):
-                        ext = e
-                        break
-            video_path = os.path.join(tmpdir, 'input' + ext)
-            s3_client.download_file(bucket, input_s3_key, video_path)
-
+        _burn_task_renew(task_id, attempts=int(record.get('attempts') or 0) + 1)
+        with _burn_slots.acquire(should_stop=beat.cancelled, poll_sec=2.0) as got_slot:
+            if not got_slot or burn_tasks.cancel_requested(task_id):
+                _burn_task_update(task_id, status=BURN_CANCELLED, stage=BURN_CANCELLED)
+                return
             ffmpeg_path = _resolve_ffmpeg()
             if not (os.path.isfile(ffmpeg_path) or shutil.which(ffmpeg_path)):
-                burn_tasks[task_id] = {'status': 'failed', 'error': 'ffmpeg not found. Install ffmpeg, set FFMPEG_PATH, or add it to PATH.'}
-                return
-            use_ass = subtitle_style in ('tiktok', 'clean', 'cinematic')
-            if use_ass:
-                ass_content = _build_ass(segments, subtitle_style or 'tiktok', portrait=is_portrait, subtitle_color=subtitle_color)
-                subs_path = os.path.join(tmpdir, 'subtitles.ass')
-                with open(subs_path, 'w', encoding='utf-8') as f:
-                    f.write(ass_content)
-            else:
-                def to_srt_ts(s):
-                    h = int(s // 3600)
-                    m = int((s % 3600) // 60)
-                    sec = s % 60
-                    return f"{h:02d}:{m:02d}:{int(sec):02d},{int((sec % 1) * 1000):03d}"
-                subs_path = os.path.join(tmpdir, 'subtitles.srt')
-                with open(subs_path, 'w', encoding='utf-8') as f:
-                    for i, seg in enumerate(segments):
-                        start = seg.get('start', 0)
-                        end = seg.get('end', start + 1)
-                        text = (seg.get('text') or '').replace('\n', ' ')
-                        f.write(f"{i + 1}\n{to_srt_ts(start)} --> {to_srt_ts(end)}\n{text}\n\n")
-
-            out_path = os.path.join(tmpdir, 'output.mp4')
-            subs_escaped = subs_path.replace('\\', '/').replace(':', '\\:').replace("'", "\\'")
-            filter_name = 'ass' if use_ass else 'subtitles'
-            vf = f"{filter_name}='{subs_escaped}'"
-            cmd = [
-                ffmpeg_path, '-y', '-i', video_path,
-                '-vf', vf,
-                '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '23',
-                '-c:a', 'aac', '-b:a', '128k',
-                '-pix_fmt', 'yuv420p', '-movflags', '+faststart',
-                out_path
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
-            if result.returncode != 0:
-                burn_tasks[task_id] = {'status': 'failed', 'error': (result.stderr or 'ffmpeg failed')[-500:]}
-                return
-            if not os.path.exists(out_path):
-                burn_tasks[task_id] = {'status': 'failed', 'error': 'No output file'}
+                _burn_task_update(task_id, status=BURN_FAILED, error='ffmpeg not found. Install ffmpeg, set FFMPEG_PATH, or add it to PATH.')
                 return
-
             # Friendly base name from input key (e.g. job_123_video.mp4 -> job_123_video)
             base_name = "video"
             if input_s3_key:
                 base_name = os.path.splitext(os.path.basename(input_s3_key))[0] or "video"
             safe_name = "".join(c for c in base_name if c.isalnum() or c in (' ', '-', '_'))[:80].strip() or "video"
-            out_key_friendly = f"users/{user_id}/output/{safe_name}_with_subtitles.mp4"
-            out_key_fallback = f"users/{user_id}/output/burn_{task_id}.mp4"
-            try:
-                s3_client.upload_file(out_path, bucket, out_key_friendly, ExtraArgs={'ContentType': 'video/mp4'})
-                out_key = out_key_friendly
-            except Exception:
-                out_key = out_key_fallback
-                s3_client.upload_file(out_path, bucket, out_key, ExtraArgs={'ContentType': 'video/mp4'})
-            burn_tasks[task_id] = {'status': 'completed', 'output_s3_key': out_key}
-
-            if notify_email:
-                try:
-                    presigned = s3_client.generate_presigned_url(
-                        'get_object',
-                        Params={'Bucket': bucket, 'Key': out_key},
-                        ExpiresIn=86400
+            out_keys = (f"users/{user_id}/output/{safe_name}_with_subtitles.mp4", f"users/{user_id}/output/burn_{task_id}.mp4")
+            with tempfile.TemporaryDirectory() as tmpdir:
+                out_path = os.path.join(tmpdir, 'output.mp4')
+
+                def burn(src, **kwargs):
+                    # Each ffmpeg's timeout scales with its media duration (client hint, else probed); a stall kills it sooner.
+                    return burn_engine.burn_subtitles(
+                        ffmpeg_path,
+                        src,
+                        record.get('subtitle_format'),
+                        record.get('subtitle_text') or '',
+                        out_path,
+                        workdir=tmpdir,
+                        ffprobe=_resolve_ffprobe(),
+                        workers=_BURN_PARALLEL_WORKERS,
+                        threads_per_worker=_BURN_PARALLEL_THREADS,
+                        min_chunk_sec=_job_state_env_float('BURN_PARALLEL_MIN_CHUNK_SEC', 30),
+                        duration_sec=record.get('duration_sec'),
+                        on_progress=beat.ffmpeg,
+                        should_cancel=beat.cancelled,
+                        stall_sec=_job_state_env_float('BURN_STALL_TIMEOUT_SEC', 180),
+                        **kwargs
                     )
-                    _send_burn_ready_email(notify_email, presigned, safe_name)
-                except Exception as e:
-                    logging.warning("Notify email failed: %s", e)
+
+                result, out_key = None, None
+                if _BURN_STREAMED_IO:
+                    beat = _BurnHeartbeat(task_id, 'burning')
+                    _burn_task_renew(task_id, status=BURN_PROCESSING, stage='burning', percent=0.0, io='streamed', started_at=time.time())
+                    result, out_key = _burn_streamed(task_id, s3_client, bucket, input_s3_key, out_keys, burn, record.get('duration_sec'))
+                if result is None:
+                    ext = '.mp4'
+                    if input_s3_key:
+                        for e in ('.mp4', '.mov', '.webm', '.m4v', '.mkv', '.avi'):
+                            if input_s3_key.lower().endswith(e):
+                                ext = e
+                                break
+                    video_path = os.path.join(tmpdir, 'input' + ext)
+                    try:
+                        size = int(s3_client.head_object(Bucket=bucket, Key=input_s3_key).get('ContentLength') or 0)
+                    except Exception:
+                        size = 0
+                    beat = _BurnHeartbeat(task_id, 'downloading', total_bytes=size or None)
+                    _burn_task_renew(task_id, status=BURN_PROCESSING, stage='downloading', percent=0.0, io='file', started_at=time.time())
+                    s3_client.download_file(bucket, input_s3_key, video_path, Callback=beat.transferred)
+                    if burn_tasks.cancel_requested(task_id):
+                        _burn_task_update(task_id, status=BURN_CANCELLED, stage=BURN_CANCELLED)
+                        return
+                    beat = _BurnHeartbeat(task_id, 'burning')
+                    _burn_task_renew(task_id, stage='burning', percent=0.0)
+                    result = burn(video_path)
+                if result.reason == 'cancelled':
+                    _burn_task_update(task_id, status=BURN_CANCELLED, stage=BURN_CANCELLED)
+                    return
+                if not result.ok:
+                    error = {
+                        'timeout': 'ffmpeg timed out',
+                        'stalled': 'ffmpeg stopped making progress',
+                    }.get(result.reason) or (result.stderr_tail or 'ffmpeg failed')[-500:]
+                    _burn_task_update(task_id, status=BURN_FAILED, error=error)
+                    return
+                if out_key is None:
+                    if not os.path.exists(out_path):
+                        _burn_task_update(task_id, status=BURN_FAILED, error='No output file')
+                        return
+                    beat = _BurnHeartbeat(task_id, 'uploading', total_bytes=os.path.getsize(out_path) or None)
+                    _burn_task_renew(task_id, stage='uploading', percent=0.0, eta_sec=None, fps=None, speed=None)
+                    extra = {'ContentType': 'video/mp4'}
+                    try:
+                        s3_client.upload_file(out_path, bucket, out_keys[0], ExtraArgs=extra, Callback=beat.transferred)
+                        out_key = out_keys[0]
+                    except Exception:
+                        out_key = out_keys[1]
+                        s3_client.upload_file(out_path, bucket, out_key, ExtraArgs=extra, Callback=beat.transferred)
+                _burn_task_update(
+                    task_id, status=BURN_COMPLETED, stage=BURN_COMPLETED, output_s3_key=out_key,
+                    output_etag=_burn_object_etag(s3_client, bucket, out_key),
+                    percent=100.0, eta_sec=0.0, subtitle_text=None, finished_at=time.time(),
+                )
+
+                if notify_email:
+                    try:
+                        presigned = s3_client.generate_presigned_url(
+                            'get_object',
+                            Params={'Bucket': bucket, 'Key': out_key},
+                            ExpiresIn=86400
+                        )
+                        _send_burn_ready_email(notify_email, presigned, safe_name)
+                    except Exception as e:
+                        logging.warning("Notify email failed: %s", e)
     except Exception as e:
         logging.exception("burn task failed")
-        burn_tasks[task_id] = {'status': 'failed', 'error': str(e)}
+        _burn_task_update(task_id, status=BURN_FAILED, error=str(e))
+
+
+def _resume_orphaned_burn_task(task_id, record):
+    """Re-queue a local burn whose worker died (lease expired); give up after BURN_MAX_ATTEMPTS starts."""
+    with _burn_local_lock:
+        if task_id in _burn_local_tasks:
+            return False  # still waiting in this process's media queue; its lease is renewed once it starts
+    if int(record.get('attempts') or 0) >= _BURN_MAX_ATTEMPTS or not _burn_allow_local_fallback():
+        _burn_task_update(task_id, status=BURN_FAILED, error='Burn interrupted by a server restart')
+        return False
+    if not burn_tasks.claim(task_id, _BURN_WORKER_ID, lease_sec=_BURN_LEASE_SEC):
+        return False
+    # Queued before the submit: once submitted, the media worker may already be writing processing/burning.
+    _burn_task_update(task_id, status=BURN_QUEUED, stage='queued')
+    if not _submit_local_burn(task_id):
+        _burn_task_update(task_id, status=BURN_FAILED, error='Burn queue is full')
+        return False
+    logging.info("Resumed orphaned burn task %s (attempt %s)", task_id, int(record.get('attempts') or 0) + 1)
+    return True
 
 
 @app.route('/api/burn_subtitles_server', methods=['POST'])
@@ -16149,8 +17072,45 @@ def burn_subtitles_server():
         if not input_s3_key.startswith(f"users/{user_id}/"):
             return jsonify({"error": "Access denied"}), 403
 
+        try:
+            duration_sec = float(data.get('duration_seconds') or 0) or None
+        except (TypeError, ValueError):
+            duration_sec = None
+
+        # Same input object + captions + style as a running or finished burn: share it instead of re-encoding.
+        bucket = os.environ.get('S3_BUCKET')
+        dedupe_key = None
+        if _BURN_DEDUPE:
+            s3_client = _s3_boto_client(bucket=bucket)
+            input_etag = _burn_object_etag(s3_client, bucket, input_s3_key)
+            if input_etag:
+                dedupe_key = burn_dedupe_key(
+                    user_id, input_etag, segments,
+                    subtitle_style=subtitle_style, subtitle_color=subtitle_color, is_portrait=is_portrait,
+                )
+                hit = _burn_dedupe_hit(s3_client, bucket, dedupe_key, user_id)
+                if hit is not None:
+                    return jsonify(hit[0]), hit[1]
+
         task_id = str(uuid.uuid4())
-        burn_tasks[task_id] = {'status': 'processing'}
+        burn_tasks.create(
+            task_id,
+            status=BURN_QUEUED,
+            stage='queued',
+            user_id=user_id,
+            input_s3_key=input_s3_key,
+            job_id=job_id,
+            duration_sec=duration_sec,
+            lease_owner=_BURN_WORKER_ID,
+            lease_until=time.time() + _BURN_LEASE_SEC,
+        )
+        if dedupe_key:
+            owner = burn_tasks.claim_duplicate(dedupe_key, task_id)
+            if owner != task_id:
+                # An identical request got in first (double click, second tab): follow its task.
+                burn_tasks.discard(task_id)
+                record = burn_tasks.get(owner) or {'status': BURN_PROCESSING}
+                return jsonify(dict(_burn_public_status(owner, record), deduplicated=True)), 202
 
         if _burn_use_runpod(force_local=force_local_burn):
             public_base = _public_base_url(request)
@@ -16177,7 +17137,7 @@ def burn_subtitles_server():
             except Exception as e:
                 logging.warning("RunPod burn dispatch failed: %s", e)
                 if not _burn_allow_local_fallback():
-                    burn_tasks[task_id] = {'status': 'failed', 'mode': 'runpod', 'error': f'RunPod dispatch failed: {e}'}
+                    _burn_task_update(task_id, status=BURN_FAILED, mode='runpod', error=f'RunPod dispatch failed: {e}')
                     return jsonify({
                         "task_id": task_id,
                         "status": "failed",
@@ -16187,27 +17147,36 @@ def burn_subtitles_server():
                     }), 503
 
         if not _burn_allow_local_fallback():
-            burn_tasks[task_id] = {
-                'status': 'failed',
-                'mode': 'runpod',
-                'error': 'RunPod burn CPU endpoint is required',
-            }
+            _burn_task_update(task_id, status=BURN_FAILED, mode='runpod', error='RunPod burn CPU endpoint is required')
             return jsonify({
                 "error": "Subtitle burn runs on RunPod CPU, not on Koyeb.",
                 "detail": "Set RUNPOD_CPU_ENDPOINT_ID (or RUNPOD_MOVIE_ENDPOINT_ID) and RUNPOD_API_KEY on Koyeb.",
                 "endpoint_hint": _runpod_burn_endpoint_id() or None,
             }), 503
 
-        # Local fallback (simulation / explicit dev only)
-        t = threading.Thread(
-            target=_run_burn_task,
-            args=(task_id, input_s3_key, segments, user_id),
-            kwargs={'subtitle_style': subtitle_style, 'is_portrait': is_portrait, 'notify_email': notify_email, 'job_id': job_id, 'subtitle_color': subtitle_color}
+        # Local fallback (simulation / explicit dev only). The record holds the rendered subtitles so the
+        # task can be resumed after a restart without the request body.
+        subtitle_format, subtitle_text = _burn_local_subtitles(
+            segments, subtitle_style, is_portrait=is_portrait, subtitle_color=subtitle_color, input_s3_key=input_s3_key
         )
-        t.daemon = True
-        t.start()
-        burn_tasks[task_id]['mode'] = 'local'
-        return jsonify({"task_id": task_id, "status": "processing", "mode": "local"}), 202
+        _burn_task_update(
+            task_id,
+            mode='local',
+            subtitle_format=subtitle_format,
+            subtitle_text=subtitle_text,
+            notify_email=notify_email,
+            timeout_sec=burn_timeout_sec(duration_sec),
+        )
+        if not _submit_local_burn(task_id):
+            _burn_task_update(task_id, status=BURN_FAILED, error='Burn queue is full')
+            return jsonify({"task_id": task_id, "status": "failed", "error": "Burn queue is full, try again later"}), 503
+        return jsonify({
+            "task_id": task_id,
+            "status": "processing",
+            "stage": "queued",
+            "mode": "local",
+            "timeout_sec": burn_timeout_sec(duration_sec),
+        }), 202
     except Exception as e:
         logging.exception("burn_subtitles_server")
         return jsonify({"error": str(e)}), 500
@@ -16241,21 +17210,32 @@ def burn_subtitles_callback():
         output_s3_key = _pick(['output_s3_key', 'outputS3Key'])
         error_text = _pick(['error', 'message']) or ''
 
-        info = burn_tasks.get(task_id) or {}
+        if burn_tasks.get(task_id) is None:
+            # Dispatched before records were durable, or expired: keep accepting the worker's report.
+            burn_tasks.create(task_id, status=BURN_PROCESSING, mode='runpod')
         if status_raw in ('completed', 'done', 'success', 'succeeded'):
-            info['status'] = 'completed'
+            fields = {'status': BURN_COMPLETED, 'stage': BURN_COMPLETED, 'percent': 100.0, 'eta_sec': 0.0}
             if output_s3_key:
-                info['output_s3_key'] = output_s3_key
-            burn_tasks[task_id] = info
+                fields['output_s3_key'] = output_s3_key
+                bucket = os.environ.get('S3_BUCKET')
+                fields['output_etag'] = _burn_object_etag(_s3_boto_client(bucket=bucket), bucket, output_s3_key)
+            info = _burn_task_update(task_id, **fields)
         elif status_raw in ('failed', 'error'):
-            info['status'] = 'failed'
-            info['error'] = str(error_text or 'RunPod burn failed')
-            burn_tasks[task_id] = info
+            info = _burn_task_update(task_id, status=BURN_FAILED, error=str(error_text or 'RunPod burn failed'))
         else:
-            info['status'] = 'processing'
-            burn_tasks[task_id] = info
+            # Workers may report progress on intermediate callbacks (same fields as the local ffmpeg runner).
+            progress = {}
+            for k in ('percent', 'eta_sec', 'fps', 'speed'):
+                try:
+                    v = _pick([k])
+                    if v is not None:
+                        progress[k] = float(v)
+                except (TypeError, ValueError):
+                    pass
+            stage = str(_pick(['stage']) or 'burning')
+            info = _burn_task_update(task_id, status=BURN_PROCESSING, stage=stage, **progress)
 
-        return jsonify({"ok": True, "task_id": task_id, "status": burn_tasks[task_id].get('status')}), 200
+        return jsonify({"ok": True, "task_id": task_id, "status": (info or {}).get('status')}), 200
     except Exception as e:
         logging.exception("burn_subtitles_callback")
         return jsonify({"error": str(e)}), 500
@@ -16367,7 +17347,10 @@ def vocal_separation_callback():
 
 @app.route('/api/burn_subtitles_status', methods=['GET'])
 def burn_subtitles_status():
-    """Poll burn task status. When completed, returns output_url (presigned)."""
+    """Poll burn task status (stage, percent, eta_sec, fps, speed). When completed, returns output_url (presigned).
+
+    Progress is also pushed as 'job_event' to the Socket.IO room named by the task id and on /api/job_events/<task_id>.
+    """
     try:
         task_id = request.args.get('task_id')
         if not task_id:
@@ -16375,28 +17358,51 @@ def burn_subtitles_status():
         info = burn_tasks.get(task_id)
         if not info:
             return jsonify({"status": "not_found"}), 404
-        status = info.get('status', 'processing')
-        out = {"task_id": task_id, "status": status}
-        if status == 'failed':
-            out["error"] = info.get('error', 'Unknown error')
-        if status == 'completed':
-            output_s3_key = info.get('output_s3_key')
-            if output_s3_key:
-                out["output_s3_key"] = output_s3_key
-                s3_client = _s3_boto_client(bucket=os.environ.get('S3_BUCKET'))
-                url = s3_client.generate_presigned_url(
-                    'get_object',
-                    Params={'Bucket': os.environ.get('S3_BUCKET'), 'Key': output_s3_key},
-                    ExpiresIn=3600
-                )
-                out["output_url"] = url
-                out["download_name"] = "video_with_subtitles.mp4"
-        return jsonify(out), 200
+        return jsonify(_burn_status_payload(task_id, info)), 200
     except Exception as e:
         logging.exception("burn_subtitles_status")
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/api/burn_subtitles_cancel', methods=['POST'])
+def burn_subtitles_cancel():
+    """Cancel a burn: queued tasks stop before starting, local ffmpeg is killed, RunPod jobs get a cancel request."""
+    try:
+        data = request.get_json(silent=True) or {}
+        task_id = str(data.get('task_id') or data.get('taskId') or '').strip()
+        user_id = str(data.get('userId') or data.get('user_id') or '').strip()
+        if not task_id or not user_id:
+            return jsonify({"error": "task_id and userId required"}), 400
+        info = burn_tasks.get(task_id)
+        if not info:
+            return jsonify({"status": "not_found"}), 404
+        if str(info.get('user_id') or '') != user_id:
+            return jsonify({"error": "Access denied"}), 403
+        if info.get('status') in BURN_TERMINAL_STATUSES:
+            return jsonify(_burn_public_status(task_id, info)), 200
+        burn_tasks.request_cancel(task_id)
+        if info.get('mode') == 'runpod' and info.get('runpod_job_id'):
+            endpoint_id = _runpod_burn_endpoint_id()
+            api_key = (RUNPOD_API_KEY or "").strip()
+            if endpoint_id and api_key:
+                try:
+                    requests.post(
+                        f"https://api.runpod.ai/v2/{endpoint_id}/cancel/{info['runpod_job_id']}",
+                        headers={"Authorization": f"Bearer {api_key}"},
+                        timeout=10,
+                    )
+                except Exception as e:
+                    logging.warning("RunPod burn cancel failed task_id=%s: %s", task_id, e)
+        if info.get('mode') != 'local' or info.get('status') == BURN_QUEUED:
+            # Nothing local to interrupt (RunPod, or not started yet): the record is final now.
+            # A running local burn sees the flag within a second and records the cancel itself.
+            info = _burn_task_update(task_id, status=BURN_CANCELLED, stage=BURN_CANCELLED) or info
+        return jsonify(_burn_public_status(task_id, info)), 200
+    except Exception as e:
+        logging.exception("burn_subtitles_cancel")
+        return jsonify({"error": str(e)}), 500
+
+
 # --- BURN SUBTITLES (LEGACY: in-request, for small files) ---
 # Supported video extensions for burn (ffmpeg can read/write these)
 BURN_VIDEO_EXTENSIONS = ('.mp4', '.mov', '.webm', '.m4v', '.mkv', '.avi')
@@ -16409,6 +17415,10 @@ BURN_VIDEO_MIMES = {
     '.avi': 'video/x-msvideo',
 }
 
+class _LegacyBurnError(Exception):
+    """ffmpeg failure inside a legacy burn build; args[0] is the JSON error payload."""
+
+
 @app.route('/api/burn_subtitles', methods=['POST'])
 def burn_subtitles():
     """Legacy direct upload burn — disabled in production; use /api/burn_subtitles_server (RunPod CPU)."""
@@ -16455,36 +17465,50 @@ def burn_subtitles():
         with tempfile.TemporaryDirectory() as tmpdir:
             video_path = os.path.join(tmpdir, 'input' + ext)
             video_file.save(video_path)
+            out_path = os.path.join(tmpdir, 'output' + out_ext)
+            mimetype = BURN_VIDEO_MIMES.get(out_ext, 'video/mp4')
 
-            # ASS burn respects subtitle color/style (VTT via ffmpeg defaulted to white).
-            ass_content = _build_ass(segments, subtitle_style, portrait=is_portrait_burn, subtitle_color=subtitle_color)
-            subs_path = os.path.join(tmpdir, 'subtitles.ass')
-            with open(subs_path, 'w', encoding='utf-8') as f:
-                f.write(ass_content)
+            def build():
+                # ASS burn respects subtitle color/style (VTT via ffmpeg defaulted to white).
+                ass_content = _subtitle_text('ass', segments, subtitle_style, portrait=is_portrait_burn, subtitle_color=subtitle_color)
+                subs_path = os.path.join(tmpdir, 'subtitles.ass')
+                with open(subs_path, 'w', encoding='utf-8') as f:
+                    f.write(ass_content)
+                cmd = [
+                    ffmpeg_path, '-y', '-i', video_path,
+                    '-vf', burn_engine.subtitle_filter('ass', subs_path),
+                    '-c:a', 'copy',
+                    out_path
+                ]
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+                if result.returncode != 0:
+                    raise _LegacyBurnError({"error": "ffmpeg failed", "stderr": result.stderr})
+                if not os.path.exists(out_path):
+                    raise _LegacyBurnError({"error": "ffmpeg did not produce output"})
+                with open(out_path, 'rb') as f:
+                    return f.read()
 
-            out_path = os.path.join(tmpdir, 'output' + out_ext)
-            subs_escaped = subs_path.replace('\\', '/').replace(':', '\\:').replace("'", "\\'")
-            vf = f"ass='{subs_escaped}'"
-            cmd = [
-                ffmpeg_path, '-y', '-i', video_path,
-                '-vf', vf,
-                '-c:a', 'copy',
-                out_path
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-            if result.returncode != 0:
-                return jsonify({"error": "ffmpeg failed", "stderr": result.stderr}), 500
-            if not os.path.exists(out_path):
-                return jsonify({"error": "ffmpeg did not produce output"}), 500
+            try:
+                # Small uploads only: a repeat (refresh, double click) is served from memory, and identical
+                # requests in flight wait for one encode. Larger files would crowd out the export cache.
+                if _BURN_DEDUPE and os.path.getsize(video_path) <= _EXPORT_CACHE_MAX_INPUT_BYTES:
+                    with open(video_path, 'rb') as fh:
+                        source = bytes_export_key('burn_upload', fh) + out_ext
+                    key = burn_dedupe_key(
+                        None, source, segments,
+                        subtitle_style=subtitle_style, subtitle_color=subtitle_color, is_portrait=is_portrait_burn,
+                    )
+                    artifact, _origin = _export_artifacts.get_or_build(key, build, persistent=False, content_type=mimetype)
+                    out_bytes = artifact.body
+                else:
+                    out_bytes = build()
+            except _LegacyBurnError as e:
+                return jsonify(e.args[0]), 500
 
             from flask import send_file
             from io import BytesIO
-            mimetype = BURN_VIDEO_MIMES.get(out_ext, 'video/mp4')
             download_name = 'video_with_subtitles' + out_ext
-            with open(out_path, 'rb') as f:
-                out_data = BytesIO(f.read())
-            out_data.seek(0)
-            return send_file(out_data, as_attachment=True, download_name=download_name, mimetype=mimetype)
+            return send_file(BytesIO(out_bytes), as_attachment=True, download_name=download_name, mimetype=mimetype)
     except subprocess.TimeoutExpired:
         return jsonify({"error": "Processing timed out"}), 500
     except Exception as e:
@@ -16623,6 +17647,42 @@ def health_check():
     return "OK", 200
 
 
+def _runtime_stats_payload():
+    return {
+        "s3_clients": _s3_client_registry.stats(),
+        "job_state": _job_state.stats(),
+        "shared_state": _shared_state.stats(),
+        "job_events": _job_events.stats(),
+        "supabase_jwt": _supabase_token_verifier_get().stats(),
+        "job_row_loader": _job_row_loader.stats(),
+        "qs_trigger_queue": _qs_trigger_queue.stats(),
+        "background_tasks": _background_tasks.stats(),
+        "media_probe": media_probe_stats(),
+        "transcript_cache": _transcript_cache.stats(),
+        "job_payload_bytes": _job_payload_bytes.stats(),
+        "export_artifacts": _export_artifacts.stats(),
+        "burn_tasks": {**burn_tasks.stats(), "slots": _burn_slots.stats()},
+    }
+
+
+@app.route('/api/debug_runtime_stats', methods=['GET'])
+def debug_runtime_stats():
+    """Process-local cache / pool counters for capacity troubleshooting (no secrets)."""
+    try:
+        return jsonify(_runtime_stats_payload()), 200
+    except Exception as e:
+        logging.exception("debug_runtime_stats failed")
+        return jsonify({"error": str(e)}), 500
+
+
+# Local burns orphaned by a previous process (deploy / crash) continue here once their lease runs out:
+# rescanned for the life of the process, since a restart comes back while the old leases are still live.
+if burn_tasks.durable:
+    _background_tasks.submit(
+        'watchers', watch_orphaned_burn_tasks, burn_tasks, _resume_orphaned_burn_task,
+        interval_sec=max(5.0, _BURN_LEASE_SEC / 2), stop=_background_tasks.stopping, label='burn_orphan_watch',
+    )
+
 logging.info(
     "GPT postprocess: %s (DISABLE_GPT / GPT_DISABLED) | VAD force_disable=%s force_enable=%s",
     "DISABLED" if _gpt_disabled() else "enabled",
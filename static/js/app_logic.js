@@ -3582,10 +3582,60 @@ async function qsPollCheckStatusOnce(jobId) {
     }
 }
 
+/** Close the SSE status stream opened by qsStartJobEventStream (if any). */
+function qsStopJobEventStream() {
+    if (window._jobEventSource) {
+        try { window._jobEventSource.close(); } catch (_) {}
+    }
+    window._jobEventSource = null;
+    window._jobEventsStreamJobId = null;
+}
+
+/** Push status channel (/api/job_events): while it is open, interval polling backs off to a rare safety check. */
+function qsStartJobEventStream(jobId) {
+    qsStopJobEventStream();
+    if (typeof window.EventSource !== 'function') return;
+    const jid = String(jobId || '').trim();
+    if (!jid) return;
+    let es;
+    try {
+        es = new EventSource(`/api/job_events/${encodeURIComponent(jid)}`);
+    } catch (_) {
+        return;
+    }
+    window._jobEventSource = es;
+    es.onopen = () => {
+        if (window._jobEventSource === es) window._jobEventsStreamJobId = jid;
+    };
+    es.onerror = () => {
+        // EventSource reconnects on its own (Last-Event-ID); poll normally until it is back.
+        if (window._jobEventSource === es) window._jobEventsStreamJobId = null;
+    };
+    es.addEventListener('job_event', (ev) => {
+        if (window._pollingJobId !== jid) {
+            qsStopJobEventStream();
+            return;
+        }
+        let snap = null;
+        try { snap = JSON.parse(ev.data); } catch (_) { return; }
+        if (!snap) return;
+        if (snap.status === 'trigger_failed') {
+            window._jobEventsForceTick = true;
+        }
+        if (snap.terminal || snap.has_result) {
+            qsStopJobEventStream();
+            void qsPollCheckStatusOnce(jid);
+        }
+    });
+}
+
 /** Start polling check_status and trigger_status for a job (used after trigger and on retry). */
 window.startJobStatusPolling = function(jobId) {
     if (window._checkStatusPollInterval) clearInterval(window._checkStatusPollInterval);
     window._pollingJobId = jobId;
+    qsStartJobEventStream(jobId);
+    // With the push stream open, only every Nth tick hits the server (safety net for missed events).
+    const streamSafetyEveryNPolls = 10;
     // Multi-instance: completion often arrives via R2 on another worker — poll faster than 9s.
     const pollMs = 3000;
     const triggerStatusEveryNPolls = 4;
@@ -3626,11 +3676,17 @@ window.startJobStatusPolling = function(jobId) {
         if (activeNow && activeNow !== jobId) {
             if (window._checkStatusPollInterval) clearInterval(window._checkStatusPollInterval);
             window._checkStatusPollInterval = null;
+            qsStopJobEventStream();
+            return;
+        }
+        const forceTick = !!window._jobEventsForceTick;
+        window._jobEventsForceTick = false;
+        if (!forceTick && window._jobEventsStreamJobId === jobId && polls % streamSafetyEveryNPolls !== 0) {
             return;
         }
         const isHe = typeof document.documentElement.lang !== 'undefined' && String(document.documentElement.lang).toLowerCase().startsWith('he');
         try {
-            if (polls % triggerStatusEveryNPolls === 0) {
+            if (forceTick || polls % triggerStatusEveryNPolls === 0) {
                 const tsRes = await fetch(`/api/trigger_status?job_id=${encodeURIComponent(jobId)}`);
                 if (tsRes.ok) {
                     const ts = await tsRes.json();
@@ -7424,6 +7480,8 @@ async function initPersonalPage() {
     const selectAllInput = document.getElementById('personal-select-all');
     const bulkCountEl = document.getElementById('personal-bulk-count');
     const bulkDeleteBtn = document.getElementById('personal-bulk-delete-btn');
+    const bulkExportBtn = document.getElementById('personal-bulk-export-btn');
+    const bulkExportFormat = document.getElementById('personal-bulk-export-format');
 
     const openDeleteConfirm = (fileName, count = 1) => new Promise((resolve) => {
         const existing = document.getElementById('recording-delete-overlay');
@@ -7510,6 +7568,40 @@ async function initPersonalPage() {
 
     const deleteRecordingRows = async (file) => deleteRecordingRowsBulk([file]);
 
+    /**
+     * Bulk export via /api/recordings/export (one streamed ZIP).
+     * Posted as a form into a hidden iframe so the browser writes the download to disk as it arrives
+     * instead of holding the whole archive in a fetch() blob. One job id per UI row (grouped duplicates
+     * share a transcript name, exporting each would only add "(2)" copies).
+     */
+    const exportRecordingRowsBulk = (fileList, formats) => {
+        const jobIds = (fileList || []).map((f) => String(f.file_id || '').trim()).filter(Boolean);
+        if (!jobIds.length) return;
+        let frame = document.getElementById('personal-bulk-export-frame');
+        if (!frame) {
+            frame = document.createElement('iframe');
+            frame.id = 'personal-bulk-export-frame';
+            frame.name = 'personal-bulk-export-frame';
+            frame.hidden = true;
+            document.body.appendChild(frame);
+        }
+        const form = document.createElement('form');
+        form.method = 'POST';
+        form.action = '/api/recordings/export';
+        form.target = frame.name;
+        form.hidden = true;
+        [['userId', user.id], ['jobIds', jobIds.join(',')], ['formats', formats || 'docx']].forEach(([name, value]) => {
+            const input = document.createElement('input');
+            input.type = 'hidden';
+            input.name = name;
+            input.value = value;
+            form.appendChild(input);
+        });
+        document.body.appendChild(form);
+        form.submit();
+        form.remove();
+    };
+
     const syncBulkBar = () => {
         // Drop selections that are no longer in the current list.
         const known = new Set(files.map((f) => f.file_id));
@@ -7526,6 +7618,10 @@ async function initPersonalPage() {
             bulkDeleteBtn.disabled = n === 0;
             bulkDeleteBtn.textContent = n > 1 ? `Delete selected (${n})` : 'Delete selected';
         }
+        if (bulkExportBtn) {
+            bulkExportBtn.disabled = n === 0;
+            bulkExportBtn.textContent = n > 1 ? `Export selected (${n})` : 'Export selected';
+        }
         if (selectAllInput) {
             const visibleCount = filtered.length;
             const allVisibleSelected = visibleCount > 0 && selectedVisible.length === visibleCount;
@@ -7792,6 +7888,20 @@ async function initPersonalPage() {
         });
     }
 
+    if (bulkExportBtn) {
+        bulkExportBtn.addEventListener('click', () => {
+            const toExport = files.filter((f) => selectedIds.has(f.file_id));
+            if (!toExport.length) return;
+            exportRecordingRowsBulk(toExport, bulkExportFormat ? bulkExportFormat.value : 'docx');
+            if (typeof showStatus === 'function') {
+                showStatus(
+                    toExport.length === 1 ? 'Preparing export…' : `Preparing export of ${toExport.length} recordings…`,
+                    false
+                );
+            }
+        });
+    }
+
     document.addEventListener('click', (e) => {
         if (!openMenuId) return;
         if (e.target.closest('.personal-more-wrap')) return;
@@ -8362,6 +8472,34 @@ async function updateJobStatus(dbId, status, resultPayload = null) {
     if (error) console.error('updateJobStatus:', error);
 }
 
+/**
+ * POST /api/save_job_result with the etag of this tab's last save of the same transcript as base_etag,
+ * so an edit saved meanwhile from another tab answers 409 instead of being overwritten.
+ * Records the etag of each successful save; the response body is left unread for the caller.
+ */
+window._qsTranscriptEtags = window._qsTranscriptEtags || {};
+async function qsSaveJobResult(body) {
+    const s3Key = String((body && (body.input_s3_key || body.s3Key)) || '').trim();
+    const baseEtag = s3Key ? window._qsTranscriptEtags[s3Key] : '';
+    const res = await fetch('/api/save_job_result', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(baseEtag ? { ...body, base_etag: baseEtag } : body)
+    });
+    if (res.ok && s3Key) {
+        try {
+            const data = await res.clone().json();
+            if (data && data.etag) window._qsTranscriptEtags[s3Key] = data.etag;
+        } catch (_) {}
+    } else if (res.status === 409) {
+        console.warn('[save] transcript changed since this tab loaded it; not overwritten', { s3Key });
+        if (typeof showStatus === 'function') {
+            showStatus(typeof window.t === 'function' ? window.t('transcript_save_conflict') : 'This transcript was changed elsewhere. Reload it before saving again.', true);
+        }
+    }
+    return res;
+}
+
 /**
  * After a successful /api/save_job_result, persist result_s3_key on the jobs row.
  * When the row pointed at another job's JSON (e.g. stale runpod id), downloads and ?open= would otherwise keep loading the wrong file.
@@ -9903,19 +10041,15 @@ async function qsPersistFormattedDocToS3() {
         const s3Key = (typeof currentJobInputS3KeyHint === 'function' ? currentJobInputS3KeyHint() : '') ||
             String(localStorage.getItem('lastS3Key') || '').trim();
         if (!user || !s3Key || !(window.currentSegments || []).length) return;
-        const saveFmtRes = await fetch('/api/save_job_result', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                userId: user.id,
-                input_s3_key: s3Key,
-                segments: window.currentSegments,
-                words: window.currentWords || undefined,
-                captions: window.currentCaptions || undefined,
-                formatted: window.currentFormattedDoc,
-                stage: 'gpt',
-                isMedical: typeof effectiveIsMedicalForFormatting === 'function' ? effectiveIsMedicalForFormatting() : false
-            })
+        const saveFmtRes = await qsSaveJobResult({
+            userId: user.id,
+            input_s3_key: s3Key,
+            segments: window.currentSegments,
+            words: window.currentWords || undefined,
+            captions: window.currentCaptions || undefined,
+            formatted: window.currentFormattedDoc,
+            stage: 'gpt',
+            isMedical: typeof effectiveIsMedicalForFormatting === 'function' ? effectiveIsMedicalForFormatting() : false
         });
         if (saveFmtRes.ok) {
             await syncJobResultS3KeyFromSaveResponse(saveFmtRes, localStorage.getItem('lastJobDbId'));
@@ -11381,9 +11515,13 @@ window.downloadFile = async function(type, bypassUser = null, options = {}) {
             logMovieStage('Task accepted', { taskId });
 
             const pollInterval = 2500;
-            const maxWait = 600000;
+            // The server scales its burn timeout with the media duration; wait a little longer than it does.
+            const serverTimeoutSec = Number(burnData.timeout_sec) || (durationSec ? 120 + durationSec * 3 : 0);
+            const maxWait = Math.max(600000, (serverTimeoutSec + 300) * 1000);
             const start = Date.now();
-            let statusJson = { status: 'processing' };
+            // An identical earlier burn (same video, captions and style) comes back completed right away.
+            let statusJson = burnData.status === 'completed' && burnData.output_url ? burnData : { status: 'processing' };
+            if (burnData.deduplicated) logMovieStage('Burn deduplicated', { status: burnData.status });
             let pollCount = 0;
             const tPollStart = Date.now();
             logMovieStage('Polling burn status started', { pollIntervalMs: pollInterval, maxWaitMs: maxWait });
@@ -11395,6 +11533,18 @@ window.downloadFile = async function(type, bypassUser = null, options = {}) {
                 }
                 const statusRes = await fetch(`/api/burn_subtitles_status?task_id=${encodeURIComponent(taskId)}`);
                 statusJson = statusRes.ok ? await statusRes.json() : {};
+                const realPct = Number(statusJson.percent);
+                if (statusJson.status === 'processing' && statusJson.stage === 'burning' && Number.isFinite(realPct)) {
+                    // Real ffmpeg progress replaces the simulated ramp.
+                    if (burnProgressTimer) {
+                        clearInterval(burnProgressTimer);
+                        burnProgressTimer = null;
+                    }
+                    const pct = Math.max(1, Math.min(99, Math.round(realPct)));
+                    if (mainBtn) mainBtn.innerText = creatingMovieText + ' ' + pct + '%';
+                    if (progressBar) progressBar.style.width = pct + '%';
+                    setBurnProgress(pct, encodingMsg);
+                }
             }
             logMovieStage('Polling burn status ended', {
                 finalStatus: statusJson && statusJson.status ? statusJson.status : 'unknown',
@@ -11406,6 +11556,11 @@ window.downloadFile = async function(type, bypassUser = null, options = {}) {
                 logMovieStage('Burn failed', { error: statusJson.error || 'Burn failed' });
                 throw new Error(statusJson.error || "Burn failed");
             }
+            if (statusJson.status === 'cancelled') {
+                stopBurnProgress(false);
+                logMovieStage('Burn cancelled');
+                throw new Error("Burn cancelled");
+            }
             if (statusJson.status === 'completed' && statusJson.output_url) {
                 stopBurnProgress(true);
                 movieBurnCompleted = true;
@@ -11662,9 +11817,13 @@ window.downloadFile = async function(type, bypassUser = null, options = {}) {
                 if (baseFmt[k] != null) formattedForServer[k] = String(baseFmt[k] || '');
             }
             const t0 = performance.now();
+            // Server answers 304 when this export's bytes are unchanged (ETag = content hash).
+            const prevExport = (window._qsDocxExportCache || {})[kind];
+            const exportHeaders = { 'Content-Type': 'application/json' };
+            if (prevExport && prevExport.etag) exportHeaders['If-None-Match'] = prevExport.etag;
             const res = await fetch('/api/export_docx', {
                 method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
+                headers: exportHeaders,
                 body: JSON.stringify({
                     kind,
                     text: textForServer,
@@ -11672,13 +11831,14 @@ window.downloadFile = async function(type, bypassUser = null, options = {}) {
                     formatted: formattedForServer,
                     allow_gpt_fallback: false,
                     filename: docBase,
+                    input_s3_key: window._qsInputS3KeyForGpt || undefined,
                     isMedical: typeof isMedicalModeEnabled === 'function' ? isMedicalModeEnabled() : false,
                     professionalSpecialty: typeof qsMedicalProfessionalSpecialty === 'function'
                         ? qsMedicalProfessionalSpecialty()
                         : ''
                 })
             });
-            if (!res.ok) {
+            if (!res.ok && !(res.status === 304 && prevExport)) {
                 const err = await res.json().catch(() => ({}));
                 throw new Error(err.error || res.statusText || 'export failed');
             }
@@ -11690,7 +11850,17 @@ window.downloadFile = async function(type, bypassUser = null, options = {}) {
                         'Check [word-edit] open-in-app / [export] hydrate logs; S3 JSON may lack formatted after an old save.'
                 );
             }
-            const blob = await res.blob();
+            let blob;
+            if (res.status === 304) {
+                blob = prevExport.blob;
+            } else {
+                blob = await res.blob();
+                const etag = res.headers.get('ETag');
+                if (etag) {
+                    window._qsDocxExportCache = window._qsDocxExportCache || {};
+                    window._qsDocxExportCache[kind] = { etag, blob };
+                }
+            }
             const delivered = await deliverBlobToUser(blob, dlName);
             if (!delivered) {
                 const fallbackOk = await downloadBlobAsFileOnly(blob, dlName);
@@ -18797,19 +18967,15 @@ document.addEventListener('DOMContentLoaded', () => {
                     const medForSave = (typeof isMedicalModeEnabled === 'function' && isMedicalModeEnabled()) ||
                         (typeof isMedicalLayoutRawAudioKey === 'function' && isMedicalLayoutRawAudioKey(s3Key));
                     if (user && s3Key && window.currentSegments.length) {
-                        const res = await fetch('/api/save_job_result', {
-                            method: 'POST',
-                            headers: { 'Content-Type': 'application/json' },
-                            body: JSON.stringify({
-                                userId: user.id,
-                                input_s3_key: s3Key,
-                                segments: window.currentSegments,
-                                words: window.currentWords || undefined,
-                                captions: window.currentCaptions || undefined,
-                                formatted: window.currentFormattedDoc || undefined,
-                                stage: 'gpt',
-                                isMedical: medForSave
-                            })
+                        const res = await qsSaveJobResult({
+                            userId: user.id,
+                            input_s3_key: s3Key,
+                            segments: window.currentSegments,
+                            words: window.currentWords || undefined,
+                            captions: window.currentCaptions || undefined,
+                            formatted: window.currentFormattedDoc || undefined,
+                            stage: 'gpt',
+                            isMedical: medForSave
                         });
                         const data = res.ok ? await res.json() : {};
                         if (data.result_s3_key) {
@@ -19506,14 +19672,10 @@ function groupSegmentsBySpeaker(segments, enableGlue = true) {
                         const dbId = localStorage.getItem('lastJobDbId');
                         const s3Key = localStorage.getItem('lastS3Key');
                         if (user && dbId && s3Key) {
-                            const res = await fetch('/api/save_job_result', {
-                                method: 'POST',
-                                headers: { 'Content-Type': 'application/json' },
-                                body: JSON.stringify({
-                                    userId: user.id,
-                                    input_s3_key: s3Key,
-                                    segments: window.currentSegments
-                                })
+                            const res = await qsSaveJobResult({
+                                userId: user.id,
+                                input_s3_key: s3Key,
+                                segments: window.currentSegments
                             });
                             const data = res.ok ? await res.json() : {};
                             if (data.result_s3_key) {
@@ -19552,16 +19714,12 @@ function groupSegmentsBySpeaker(segments, enableGlue = true) {
                         const dbId = localStorage.getItem('lastJobDbId');
                         const s3Key = localStorage.getItem('lastS3Key');
                         if (user && dbId && s3Key) {
-                            const res = await fetch('/api/save_job_result', {
-                                method: 'POST',
-                                headers: { 'Content-Type': 'application/json' },
-                                body: JSON.stringify({
-                                    userId: user.id,
-                                    input_s3_key: s3Key,
-                                    segments: window.currentSegments,
-                                    words: window.currentWords,
-                                    captions: window.currentCaptions
-                                })
+                            const res = await qsSaveJobResult({
+                                userId: user.id,
+                                input_s3_key: s3Key,
+                                segments: window.currentSegments,
+                                words: window.currentWords,
+                                captions: window.currentCaptions
                             });
                             const data = res.ok ? await res.json() : {};
                             if (data.result_s3_key) {
@@ -19744,20 +19902,16 @@ function groupSegmentsBySpeaker(segments, enableGlue = true) {
                     const dbId = localStorage.getItem('lastJobDbId');
                     const s3Key = localStorage.getItem('lastS3Key');
                     if (user && dbId && s3Key) {
-                        const res = await fetch('/api/save_job_result', {
-                            method: 'POST',
-                            headers: { 'Content-Type': 'application/json' },
-                            body: JSON.stringify({
-                                userId: user.id,
-                                input_s3_key: s3Key,
-                                segments: window.currentSegments
-                            })
+                        const res = await qsSaveJobResult({
+                            userId: user.id,
+                            input_s3_key: s3Key,
+                            segments: window.currentSegments
                         });
                         const data = res.ok ? await res.json() : {};
                         if (data.result_s3_key) {
                             updateJobStatus(dbId, 'processed', { result_s3_key: data.result_s3_key });
                         }
-                        if (typeof showStatus === 'function') showStatus(typeof window.t === 'function' ? window.t('changes_saved') : 'Changes saved', false);
+                        if (res.ok && typeof showStatus === 'function') showStatus(typeof window.t === 'function' ? window.t('changes_saved') : 'Changes saved', false);
                     }
                 } catch (_) { /* ignore */ }
             })();
@@ -63,6 +63,7 @@ window.translations = {
         status_failed: "נכשל",
         status_uploaded: "הועלה",
         changes_saved: "השינויים נשמרו",
+        transcript_save_conflict: "התמלול שונה במקום אחר. טען אותו מחדש לפני שמירה נוספת.",
         personal_renamed: "השם עודכן",
         no_files_yet: "אין עדיין תמלולים. העלה קובץ בעמוד הבית להתחלה.",
         get_file: "קבל קובץ",
@@ -481,6 +482,7 @@ window.translations = {
         status_failed: "Failed",
         status_uploaded: "Uploaded",
         changes_saved: "Changes saved",
+        transcript_save_conflict: "This transcript was changed elsewhere. Reload it before saving again.",
         personal_renamed: "Name updated",
         footer_legal: "Legal",
         footer_copyright: "© 2026 QuickScribe. All rights reserved.",
@@ -0,0 +1,279 @@
+"""Offline verification of Supabase access tokens with a bounded claims cache.
+
+Every authenticated API call used to round-trip to ``/auth/v1/user``. Supabase
+access tokens are JWTs, so most requests can be authenticated locally:
+
+- HS256 with the project's JWT secret (``SUPABASE_JWT_SECRET``)
+- RS256 / ES256 against the project JWKS
+  (``{SUPABASE_URL}/auth/v1/.well-known/jwks.json``), when the optional
+  ``cryptography`` package is installed
+
+Decoded claims are cached (LRU, keyed by a token digest) until the token
+expires. Tokens that cannot be verified offline (unknown key, no secret,
+signature mismatch from a misconfigured secret) are reported as
+``unverifiable`` so the caller can fall back to the HTTP lookup.
+
+Local verification cannot see server-side session revocation; a signed-out
+token stays valid until its ``exp`` (Supabase default: one hour).
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+    from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+
+    _HAVE_CRYPTOGRAPHY = True
+except ImportError:  # optional: asymmetric keys then fall back to /auth/v1/user
+    _HAVE_CRYPTOGRAPHY = False
+
+
+VERIFIED = "ok"
+EXPIRED = "expired"
+INVALID = "invalid"
+UNVERIFIABLE = "unverifiable"
+
+_ALLOWED_ALGS = frozenset({"HS256", "RS256", "ES256"})
+
+
+def _b64url_decode(part: str) -> bytes:
+    pad = "=" * (-len(part) % 4)
+    return base64.urlsafe_b64decode(part + pad)
+
+
+def _b64url_int(part: str) -> int:
+    return int.from_bytes(_b64url_decode(part), "big")
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(str(token or "").encode("utf-8")).hexdigest()
+
+
+def unverified_claims(token: str) -> Optional[Dict[str, Any]]:
+    """Decode the payload without checking the signature (for cache TTLs only)."""
+    try:
+        parts = str(token or "").split(".")
+        if len(parts) != 3:
+            return None
+        payload = json.loads(_b64url_decode(parts[1]))
+        return payload if isinstance(payload, dict) else None
+    except (ValueError, TypeError):
+        return None
+
+
+def user_from_claims(claims: Dict[str, Any]) -> Dict[str, Any]:
+    """Subset of the /auth/v1/user payload that can be rebuilt from access-token claims."""
+    return {
+        "id": str(claims.get("sub") or ""),
+        "aud": claims.get("aud"),
+        "role": claims.get("role"),
+        "email": claims.get("email") or "",
+        "phone": claims.get("phone") or "",
+        "app_metadata": claims.get("app_metadata") if isinstance(claims.get("app_metadata"), dict) else {},
+        "user_metadata": claims.get("user_metadata") if isinstance(claims.get("user_metadata"), dict) else {},
+        "is_anonymous": bool(claims.get("is_anonymous")),
+        "session_id": claims.get("session_id"),
+        "_qs_auth_source": "jwt",
+    }
+
+
+class SupabaseTokenVerifier:
+    def __init__(
+        self,
+        *,
+        jwt_secret: Optional[str] = None,
+        jwks_url: Optional[str] = None,
+        issuer: Optional[str] = None,
+        audience: str = "authenticated",
+        leeway_sec: float = 30.0,
+        cache_size: int = 4096,
+        jwks_ttl_sec: float = 600.0,
+        http_get: Optional[Callable[..., Any]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._secret = (jwt_secret or "").encode("utf-8") or None
+        self._jwks_url = jwks_url or None
+        self._issuer = (issuer or "").rstrip("/") or None
+        self._audience = audience
+        self._leeway = float(leeway_sec)
+        self._cache_size = max(1, int(cache_size))
+        self._jwks_ttl = float(jwks_ttl_sec)
+        self._http_get = http_get
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._jwks: Dict[str, Dict[str, Any]] = {}
+        self._jwks_fetched_at = 0.0
+        self._counters = {"hits": 0, "verified": 0, "expired": 0, "invalid": 0, "unverifiable": 0, "jwks_fetches": 0}
+
+    # -- cache ---------------------------------------------------------------
+
+    def cache_get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = token_digest(token)
+        with self._lock:
+            item = self._cache.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if self._clock() >= expires_at:
+                self._cache.pop(key, None)
+                return None
+            self._cache.move_to_end(key)
+            self._counters["hits"] += 1
+            return value
+
+    def cache_put(self, token: str, value: Dict[str, Any], expires_at: float) -> None:
+        key = token_digest(token)
+        with self._lock:
+            self._cache[key] = (value, float(expires_at))
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    # -- verification ----------------------------------------------------------
+
+    def verify(self, token: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        """Return (claims, VERIFIED) or (None, EXPIRED | INVALID | UNVERIFIABLE)."""
+        cached = self.cache_get(token)
+        if cached is not None and cached.get("_qs_kind") == "claims":
+            return cached["claims"], VERIFIED
+        claims, status = self._verify_uncached(token)
+        self._count({VERIFIED: "verified", EXPIRED: "expired", INVALID: "invalid"}.get(status, "unverifiable"))
+        if status == VERIFIED:
+            self.cache_put(token, {"_qs_kind": "claims", "claims": claims}, float(claims["exp"]))
+        return claims, status
+
+    def _verify_uncached(self, token: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        parts = str(token or "").split(".")
+        if len(parts) != 3:
+            return None, INVALID
+        try:
+            header = json.loads(_b64url_decode(parts[0]))
+            claims = json.loads(_b64url_decode(parts[1]))
+            signature = _b64url_decode(parts[2])
+        except (ValueError, TypeError):
+            return None, INVALID
+        if not isinstance(header, dict) or not isinstance(claims, dict):
+            return None, INVALID
+        alg = str(header.get("alg") or "")
+        if alg not in _ALLOWED_ALGS:
+            return None, INVALID if alg.lower() == "none" else UNVERIFIABLE
+        signing_input = f"{parts[0]}.{parts[1]}".encode("ascii")
+
+        sig_ok = self._check_signature(alg, header.get("kid"), signing_input, signature)
+        if sig_ok is None:
+            return None, UNVERIFIABLE
+        if not sig_ok:
+            # A wrong/rotated secret must not lock users out: let the server decide.
+            return None, UNVERIFIABLE
+
+        now = self._clock()
+        try:
+            exp = float(claims.get("exp"))
+        except (TypeError, ValueError):
+            return None, INVALID
+        if now > exp + self._leeway:
+            return None, EXPIRED
+        nbf = claims.get("nbf")
+        if isinstance(nbf, (int, float)) and now + self._leeway < float(nbf):
+            return None, INVALID
+        if self._issuer and str(claims.get("iss") or "").rstrip("/") != self._issuer:
+            return None, INVALID
+        aud = claims.get("aud")
+        auds = aud if isinstance(aud, list) else [aud]
+        if self._audience and self._audience not in auds:
+            return None, INVALID
+        # anon / service_role keys are signed by the same secret but are not user sessions.
+        if claims.get("role") != "authenticated" or not str(claims.get("sub") or "").strip():
+            return None, INVALID
+        return claims, VERIFIED
+
+    def _check_signature(self, alg: str, kid: Any, signing_input: bytes, signature: bytes) -> Optional[bool]:
+        if alg == "HS256":
+            if not self._secret:
+                return None
+            expected = hmac.new(self._secret, signing_input, hashlib.sha256).digest()
+            return hmac.compare_digest(expected, signature)
+        if not _HAVE_CRYPTOGRAPHY:
+            return None
+        jwk = self._jwk_for(str(kid or ""), alg)
+        if jwk is None:
+            return None
+        try:
+            if alg == "RS256":
+                pub = rsa.RSAPublicNumbers(_b64url_int(jwk["e"]), _b64url_int(jwk["n"])).public_key()
+                pub.verify(signature, signing_input, padding.PKCS1v15(), hashes.SHA256())
+                return True
+            if alg == "ES256":
+                if len(signature) != 64:
+                    return False
+                pub = ec.EllipticCurvePublicNumbers(
+                    _b64url_int(jwk["x"]), _b64url_int(jwk["y"]), ec.SECP256R1()
+                ).public_key()
+                der = encode_dss_signature(
+                    int.from_bytes(signature[:32], "big"), int.from_bytes(signature[32:], "big")
+                )
+                pub.verify(der, signing_input, ec.ECDSA(hashes.SHA256()))
+                return True
+        except InvalidSignature:
+            return False
+        except (KeyError, ValueError, TypeError) as e:
+            logging.warning("supabase jwk unusable kid=%s: %s", kid, e)
+            return None
+        return None
+
+    def _jwk_for(self, kid: str, alg: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            jwk = self._jwks.get(kid)
+            age = self._clock() - self._jwks_fetched_at
+        # Refetch when the set is stale, or for an unknown kid (key rotation) at most every 30 s.
+        if age >= self._jwks_ttl or (jwk is None and age >= 30.0):
+            self._refresh_jwks()
+            with self._lock:
+                jwk = self._jwks.get(kid)
+        if jwk is not None and str(jwk.get("alg") or alg) != alg:
+            return None
+        return jwk
+
+    def _refresh_jwks(self) -> None:
+        if not self._jwks_url or self._http_get is None:
+            return
+        self._jwks_fetched_at = self._clock()
+        try:
+            r = self._http_get(self._jwks_url)
+            if getattr(r, "status_code", 0) != 200:
+                return
+            body = r.json() if getattr(r, "text", "") else {}
+            keys = {str(k.get("kid") or ""): k for k in (body.get("keys") or []) if isinstance(k, dict)}
+        except Exception as e:
+            logging.warning("supabase jwks fetch failed: %s", e)
+            return
+        with self._lock:
+            self._jwks = keys
+            self._counters["jwks_fetches"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                "cached_tokens": len(self._cache),
+                "jwks_keys": len(self._jwks),
+                "hs256": bool(self._secret),
+                "asymmetric": _HAVE_CRYPTOGRAPHY and bool(self._jwks_url),
+            }
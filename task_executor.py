@@ -0,0 +1,260 @@
+"""Bounded background task executor with named queues.
+
+siteapp used to start a fresh daemon thread for every piece of background
+work (GPU callback finalization, trigger persistence, notification e-mails,
+RunPod watchers, ...). A burst of callbacks therefore meant an unbounded
+number of threads. :class:`TaskExecutor` routes that work through named
+queues instead; each queue has
+
+- a concurrency cap (worker threads are started lazily and retire when idle),
+- priorities (lower number runs first; FIFO within a priority),
+- a pending limit with an overflow policy: ``"caller"`` runs the task in the
+  submitting thread (backpressure, nothing is lost) and ``"reject"`` drops it,
+- counters for queue length, wait time and run time.
+
+:meth:`TaskExecutor.shutdown` stops accepting new work and waits for queued
+and running tasks, so a worker restart does not drop persistence work that
+was already accepted. Later submissions run inline only on queues marked
+``inline_on_shutdown`` (short, must-not-lose persistence); every other queue
+rejects them, so a slow job cannot start inside a request during the
+graceful window. Long-lived tasks (pollers,
+watchers) wait on :attr:`TaskExecutor.stopping` so they end with the drain
+instead of holding it for its whole timeout.
+"""
+
+from __future__ import annotations
+
+import atexit
+import heapq
+import itertools
+import logging
+import os
+import signal
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+OVERFLOW_CALLER = "caller"
+OVERFLOW_REJECT = "reject"
+
+
+class QueueConfig:
+    __slots__ = ("name", "max_workers", "max_pending", "overflow", "default_priority", "idle_sec", "inline_on_shutdown")
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_workers: int,
+        max_pending: int = 0,
+        overflow: str = OVERFLOW_CALLER,
+        default_priority: int = 5,
+        idle_sec: float = 30.0,
+        inline_on_shutdown: bool = False,
+    ) -> None:
+        if overflow not in (OVERFLOW_CALLER, OVERFLOW_REJECT):
+            raise ValueError(f"unknown overflow policy: {overflow}")
+        self.name = name
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(0, int(max_pending))  # 0 = unbounded
+        self.overflow = overflow
+        self.default_priority = int(default_priority)
+        self.idle_sec = float(idle_sec)
+        self.inline_on_shutdown = bool(inline_on_shutdown)
+
+    @classmethod
+    def from_env(cls, name: str, **defaults: Any) -> "QueueConfig":
+        """TASK_QUEUE_<NAME>_WORKERS / TASK_QUEUE_<NAME>_MAX_PENDING override the defaults."""
+        prefix = f"TASK_QUEUE_{name.upper()}_"
+        for env_key, field in (("WORKERS", "max_workers"), ("MAX_PENDING", "max_pending")):
+            raw = (os.environ.get(prefix + env_key) or "").strip()
+            if raw:
+                try:
+                    defaults[field] = int(raw)
+                except ValueError:
+                    logging.warning("ignoring invalid %s%s=%r", prefix, env_key, raw)
+        return cls(name, **defaults)
+
+
+class _Task:
+    __slots__ = ("fn", "args", "kwargs", "label", "submitted_at")
+
+    def __init__(self, fn: Callable[..., Any], args: tuple, kwargs: dict, label: str, submitted_at: float) -> None:
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.label = label
+        self.submitted_at = submitted_at
+
+
+class _Queue:
+    def __init__(self, config: QueueConfig) -> None:
+        self.config = config
+        self.heap: List[tuple] = []
+        self.workers = 0
+        self.idle = 0
+        self.active = 0
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "ran_inline": 0}
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.run_total = 0.0
+        self.run_max = 0.0
+        self.max_depth = 0
+
+
+class TaskExecutor:
+    def __init__(self, queues: List[QueueConfig], *, clock: Callable[[], float] = time.monotonic) -> None:
+        self._cond = threading.Condition(threading.Lock())
+        self._queues: Dict[str, _Queue] = {q.name: _Queue(q) for q in queues}
+        self._seq = itertools.count()
+        self._clock = clock
+        self._accepting = True
+        # Set when shutdown starts (SIGTERM or exit): loops running as tasks pass it as their stop event.
+        self.stopping = threading.Event()
+
+    def submit(
+        self,
+        queue: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        priority: Optional[int] = None,
+        label: Optional[str] = None,
+        **kwargs: Any,
+    ) -> bool:
+        """Schedule ``fn(*args, **kwargs)``. Returns False only when the task was rejected."""
+        q = self._queues[queue]
+        task = _Task(fn, args, kwargs, label or getattr(fn, "__name__", "task"), self._clock())
+        prio = q.config.default_priority if priority is None else int(priority)
+        with self._cond:
+            q.counters["submitted"] += 1
+            inline = not self._accepting
+            if inline and not q.config.inline_on_shutdown:
+                q.counters["rejected"] += 1
+                logging.warning("task queue %s is shutting down: dropped %s", queue, task.label)
+                return False
+            if not inline and q.config.max_pending and len(q.heap) >= q.config.max_pending:
+                if q.config.overflow == OVERFLOW_REJECT:
+                    q.counters["rejected"] += 1
+                    logging.warning("task queue %s full (%d pending): dropped %s", queue, len(q.heap), task.label)
+                    return False
+                inline = True
+            if inline:
+                q.counters["ran_inline"] += 1
+            else:
+                heapq.heappush(q.heap, (prio, next(self._seq), task))
+                q.max_depth = max(q.max_depth, len(q.heap))
+                if q.idle > 0:
+                    self._cond.notify_all()
+                if len(q.heap) > q.idle and q.workers < q.config.max_workers:
+                    q.workers += 1
+                    threading.Thread(target=self._worker, args=(q,), name=f"task-{queue}", daemon=True).start()
+        if inline:
+            self._run(q, task)
+        return True
+
+    def shutdown(self, timeout: float = 20.0) -> bool:
+        """Stop accepting work and wait for queued/running tasks. True when fully drained."""
+        deadline = self._clock() + max(0.0, float(timeout))
+        self.stopping.set()
+        with self._cond:
+            self._accepting = False
+            self._cond.notify_all()
+            while any(q.heap or q.active for q in self._queues.values()):
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    pending = {n: len(q.heap) + q.active for n, q in self._queues.items() if q.heap or q.active}
+                    logging.warning("task executor shutdown timed out; unfinished=%s", pending)
+                    return False
+                self._cond.wait(min(remaining, 0.5))
+        return True
+
+    def stop_accepting(self) -> None:
+        self.stopping.set()
+        with self._cond:
+            self._accepting = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            out: Dict[str, Any] = {"accepting": self._accepting, "queues": {}}
+            for name, q in self._queues.items():
+                done = q.counters["completed"] + q.counters["failed"]
+                out["queues"][name] = {
+                    **q.counters,
+                    "pending": len(q.heap),
+                    "max_pending_seen": q.max_depth,
+                    "active": q.active,
+                    "workers": q.workers,
+                    "max_workers": q.config.max_workers,
+                    "wait_ms_avg": round(1000 * q.wait_total / done, 2) if done else 0.0,
+                    "wait_ms_max": round(1000 * q.wait_max, 2),
+                    "run_ms_avg": round(1000 * q.run_total / done, 2) if done else 0.0,
+                    "run_ms_max": round(1000 * q.run_max, 2),
+                }
+            return out
+
+    # -- internals -------------------------------------------------------------
+
+    def _run(self, q: _Queue, task: _Task) -> None:
+        start = self._clock()
+        with self._cond:
+            q.active += 1
+        ok = True
+        try:
+            task.fn(*task.args, **task.kwargs)
+        except Exception:
+            ok = False
+            logging.exception("background task %s failed (queue=%s)", task.label, q.config.name)
+        finally:
+            end = self._clock()
+            wait, run = start - task.submitted_at, end - start
+            with self._cond:
+                q.active -= 1
+                q.counters["completed" if ok else "failed"] += 1
+                q.wait_total += wait
+                q.wait_max = max(q.wait_max, wait)
+                q.run_total += run
+                q.run_max = max(q.run_max, run)
+                self._cond.notify_all()
+
+    def _worker(self, q: _Queue) -> None:
+        while True:
+            with self._cond:
+                retire_at = self._clock() + q.config.idle_sec
+                while not q.heap:
+                    remaining = retire_at - self._clock()
+                    if remaining <= 0:
+                        q.workers -= 1
+                        return
+                    q.idle += 1
+                    self._cond.wait(remaining)
+                    q.idle -= 1
+                _prio, _seq, task = heapq.heappop(q.heap)
+            self._run(q, task)
+
+
+def install_shutdown_hooks(executor: TaskExecutor, timeout: float = 20.0) -> None:
+    """Drain ``executor`` at interpreter exit and stop queueing new work on SIGTERM.
+
+    The previous SIGTERM handler (e.g. gunicorn's graceful worker exit) is
+    still called; during the graceful window new tasks run inline on
+    ``inline_on_shutdown`` queues and are rejected elsewhere.
+    """
+    atexit.register(executor.shutdown, timeout)
+    try:
+        previous = signal.getsignal(signal.SIGTERM)
+    except (ValueError, AttributeError):
+        return
+
+    def _on_sigterm(signum, frame):
+        executor.stop_accepting()
+        if callable(previous):
+            previous(signum, frame)
+        elif previous == signal.SIG_DFL:
+            raise SystemExit(128 + signum)
+
+    try:
+        signal.signal(signal.SIGTERM, _on_sigterm)
+    except ValueError:
+        # Not the main thread (e.g. imported from a worker thread in tests).
+        pass
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Unit tests for streaming audio-profile energy statistics."""
+
+from __future__ import annotations
+
+import math
+import random
+import unittest
+from array import array
+
+import audio_profile
+from audio_profile import EnergyAccumulator, window_variances
+
+
+def _reference_rms(samples, frame):
+    peak = max(abs(x) for x in samples)
+    norm = [x / peak for x in samples]
+    out = []
+    for i in range(0, len(norm), frame):
+        chunk = norm[i:i + frame]
+        out.append(math.sqrt(sum(x * x for x in chunk) / len(chunk)))
+    return out
+
+
+def _pcm(n, seed=1):
+    rnd = random.Random(seed)
+    samples = array("f", [rnd.uniform(-0.6, 0.6) * (1 + math.sin(i / 900.0)) for i in range(n)])
+    return samples, samples.tobytes()
+
+
+class EnergyAccumulatorTests(unittest.TestCase):
+    def _check(self, chunk_size):
+        samples, pcm = _pcm(16000 * 2 + 777)  # trailing partial window + odd chunking
+        acc = EnergyAccumulator(sr=16000)
+        for i in range(0, len(pcm), chunk_size):
+            acc.feed(pcm[i:i + chunk_size])
+        acc.finish()
+        expected = _reference_rms(list(samples), acc.frame)
+        got = acc.rms_values()
+        self.assertEqual(len(got), len(expected))
+        for a, b in zip(got, expected):
+            self.assertAlmostEqual(a, b, places=6)
+        self.assertEqual(acc.samples, len(samples))
+
+    def test_matches_reference_memoryview(self):
+        saved = audio_profile._np
+        audio_profile._np = None
+        try:
+            self._check(4099)
+        finally:
+            audio_profile._np = saved
+
+    @unittest.skipIf(audio_profile._np is None, "numpy not installed")
+    def test_matches_reference_numpy(self):
+        self._check(65536)
+
+    def test_silence_has_no_windows(self):
+        acc = EnergyAccumulator()
+        acc.feed(bytes(4 * 16000))
+        acc.finish()
+        self.assertEqual(acc.rms_values(), [])
+        self.assertEqual(acc.peak, 0.0)
+
+    def test_window_variances(self):
+        flat = [0.5] * 100
+        var, post, tail = window_variances(flat, skip_intro_sec=5.0)
+        self.assertAlmostEqual(var, 0.0)
+        self.assertAlmostEqual(post, 0.0)
+        self.assertAlmostEqual(tail, 0.0)
+        var, post, tail = window_variances([0.1, 0.9] * 3, skip_intro_sec=5.0)
+        self.assertIsNone(post)  # intro covers every window
+        self.assertIsNone(tail)  # only 3 tail windows
+        self.assertAlmostEqual(var, 0.16)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Unit tests for the streaming bulk-export helpers."""
+
+from __future__ import annotations
+
+import io
+import threading
+import time
+import unittest
+import zipfile
+
+from bulk_export import map_unordered, safe_entry_stem, stream_zip, unique_entry_name
+
+
+class MapUnorderedTests(unittest.TestCase):
+    def test_yields_in_completion_order_with_errors(self):
+        def fetch(n):
+            if n == 3:
+                raise ValueError("missing")
+            time.sleep(0.05 if n == 0 else 0)
+            return n * 10
+
+        out = list(map_unordered(fetch, range(5), max_workers=5))
+        self.assertEqual(sorted(item for item, _r, _e in out), [0, 1, 2, 3, 4])
+        self.assertEqual(out[-1][:2], (0, 0))
+        errors = {item: type(err) for item, _r, err in out if err is not None}
+        self.assertEqual(errors, {3: ValueError})
+
+    def test_outstanding_work_is_bounded_by_the_consumer(self):
+        started = []
+        lock = threading.Lock()
+
+        def fetch(n):
+            with lock:
+                started.append(n)
+            return n
+
+        gen = map_unordered(fetch, range(100), max_workers=3)
+        next(gen)
+        time.sleep(0.05)
+        # One result consumed: at most the first window plus its refill were ever submitted.
+        self.assertLessEqual(len(started), 6)
+        gen.close()
+        time.sleep(0.05)
+        self.assertLessEqual(len(started), 6)
+
+
+class ZipStreamTests(unittest.TestCase):
+    def test_archive_is_valid_and_emitted_per_entry(self):
+        entries = [("a.txt", "שלום".encode("utf-8") * 1000), ("b.json", b"{}"), ("c.docx", b"\x00" * 10)]
+        chunks = list(stream_zip(iter(entries)))
+        self.assertEqual(len(chunks), len(entries) + 1)
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual([(n, zf.read(n)) for n in zf.namelist()], entries)
+
+    def test_entries_are_consumed_lazily(self):
+        consumed = []
+
+        def entries():
+            for i in range(3):
+                consumed.append(i)
+                yield f"{i}.txt", b"x"
+
+        gen = stream_zip(entries())
+        next(gen)
+        self.assertEqual(consumed, [0])
+
+
+class EntryNameTests(unittest.TestCase):
+    def test_safe_stem_and_unique_names(self):
+        self.assertEqual(safe_entry_stem('../a/b:c?.mp4 '), "a_b_c_.mp4")
+        self.assertEqual(safe_entry_stem("  "), "recording")
+        self.assertEqual(len(safe_entry_stem("א" * 500)), 120)
+        used = set()
+        names = [unique_entry_name(n, used) for n in ("שיחה.docx", "שיחה.docx", "Notes", "notes", "שיחה.docx")]
+        self.assertEqual(names, ["שיחה.docx", "שיחה (2).docx", "Notes", "notes (2)", "שיחה (3).docx"])
+
+
+if __name__ == "__main__":
+    unittest.main()
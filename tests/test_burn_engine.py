@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Unit tests for the segment-parallel subtitle burn engine."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from burn_engine import MediaInfo, burn_subtitles, parse_keyframes, plan_chunks, split_subtitles
+from test_burn_queue import _FAKE_FFMPEG_PIPED, _fake_popen
+
+_ASS = """[Script Info]
+PlayResX: 1280
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:01.00,0:00:04.00,Default,,0,0,0,,{\\an2}שלום, עולם
+Dialogue: 0,0:00:08.50,0:00:12.25,Default,,0,0,0,,straddles
+Dialogue: 0,0:00:15.00,0:00:16.00,Default,,0,0,0,,late
+"""
+
+_SRT = """1
+00:00:01,000 --> 00:00:04,000
+first
+line two
+
+2
+00:00:08,500 --> 00:00:12,250
+straddles
+"""
+
+
+class PlanTests(unittest.TestCase):
+    def test_keyframes_from_packet_flags(self):
+        csv = "1.000000,K__\n1.040000,___\n3.000000,K_\nN/A,K_\n0.500000,K_\n"
+        self.assertEqual(parse_keyframes(csv, start_sec=1.0), [0.0, 2.0])
+
+    def test_cuts_snap_to_nearest_keyframes(self):
+        keyframes = [float(k) for k in range(0, 600, 7)]
+        ranges = plan_chunks(keyframes, 600.0, workers=2, chunks_per_worker=2)
+        self.assertEqual(ranges, [(0.0, 147.0), (147.0, 301.0), (301.0, 448.0), (448.0, 600.0)])
+
+    def test_short_or_keyframe_poor_inputs_stay_whole(self):
+        self.assertEqual(plan_chunks([10.0, 20.0], 45.0, workers=8), [(0.0, 45.0)])
+        self.assertEqual(plan_chunks([0.0], 600.0, workers=8), [(0.0, 600.0)])
+        # One usable keyframe: two chunks, not a sliver.
+        self.assertEqual(plan_chunks([0.0, 299.0, 599.5], 600.0, workers=4), [(0.0, 299.0), (299.0, 600.0)])
+
+    def test_unprobed_keyframes_cut_at_even_splits(self):
+        self.assertEqual(plan_chunks(None, 100.0, workers=2, min_chunk_sec=20),
+                         [(0.0, 25.0), (25.0, 50.0), (50.0, 75.0), (75.0, 100.0)])
+
+
+class SplitSubtitleTests(unittest.TestCase):
+    def test_ass_cues_are_clipped_and_shifted(self):
+        first, second = split_subtitles("ass", _ASS, [(0.0, 10.0), (10.0, 20.0)])
+        self.assertIn("PlayResX: 1280", second)
+        self.assertIn("Format: Layer", second)
+        self.assertIn("Dialogue: 0,0:00:01.00,0:00:04.00,Default,,0,0,0,,{\\an2}שלום, עולם", first)
+        self.assertIn("Dialogue: 0,0:00:08.50,0:00:10.00,Default,,0,0,0,,straddles", first)
+        self.assertNotIn("late", first)
+        dialogues = [line for line in second.splitlines() if line.startswith("Dialogue:")]
+        self.assertEqual(dialogues, [
+            "Dialogue: 0,0:00:00.00,0:00:02.25,Default,,0,0,0,,straddles",
+            "Dialogue: 0,0:00:05.00,0:00:06.00,Default,,0,0,0,,late",
+        ])
+
+    def test_srt_cues_are_renumbered(self):
+        first, second = split_subtitles("srt", _SRT, [(0.0, 9.0), (9.0, 20.0)])
+        self.assertEqual(first, "1\n00:00:01,000 --> 00:00:04,000\nfirst\nline two\n\n"
+                                "2\n00:00:08,500 --> 00:00:09,000\nstraddles\n\n")
+        self.assertEqual(second, "1\n00:00:00,000 --> 00:00:03,250\nstraddles\n\n")
+
+
+class BurnTests(unittest.TestCase):
+    def _recording_popen(self, calls, code=0):
+        fake = _fake_popen(2, code=code)
+
+        def popen(argv, **kw):
+            calls.append(argv[4:])
+            if argv[3] == "pipe:2":
+                return subprocess.Popen([sys.executable, "-c", _FAKE_FFMPEG_PIPED], **kw)
+            return fake(argv, **kw)
+
+        return popen
+
+    def test_parallel_chunks_then_stream_copy_join(self):
+        info = MediaInfo(120.0, 0.0, True, [0.0, 40.0, 61.0, 80.0])
+        calls, snaps = [], []
+        with tempfile.TemporaryDirectory() as d:
+            result = burn_subtitles(
+                "ffmpeg", "in.mp4", "ass", _ASS, os.path.join(d, "out.mp4"), workdir=d, workers=2,
+                min_chunk_sec=20, probe=lambda _p: info, on_progress=snaps.append, popen=self._recording_popen(calls),
+            )
+            self.assertTrue(result.ok)
+            seeks = sorted((c[c.index("-ss") + 1], c[c.index("-t") + 1]) for c in calls if "-ss" in c)
+            self.assertEqual(seeks, [("0.000000", "40.000000"), ("40.000000", "21.000000"),
+                                     ("61.000000", "19.000000"), ("80.000000", "40.000000")])
+            self.assertTrue(any("-vn" in c for c in calls))
+            join = calls[-1]
+            self.assertEqual(join[join.index("-f") + 1], "concat")
+            self.assertEqual(join[join.index("-c") + 1], "copy")
+            with open(os.path.join(d, "chunks.txt"), encoding="utf-8") as f:
+                self.assertEqual(len(f.read().splitlines()), 4)
+            with open(os.path.join(d, "chunk000.ass"), encoding="utf-8") as f:
+                self.assertIn("straddles", f.read())
+        self.assertEqual(snaps[-1]["percent"], 100.0)
+        self.assertEqual(result.progress["chunks"], 4)
+        self.assertTrue(all(s["percent"] <= 100.0 for s in snaps))
+
+    def test_single_pass_without_probe_and_failure_reporting(self):
+        calls = []
+        with tempfile.TemporaryDirectory() as d:
+            result = burn_subtitles("ffmpeg", "in.mp4", "srt", _SRT, os.path.join(d, "out.mp4"), workdir=d,
+                                    workers=4, probe=lambda _p: None, popen=self._recording_popen(calls))
+            self.assertTrue(result.ok)
+            self.assertEqual(len(calls), 1)
+            self.assertTrue(calls[0][calls[0].index("-vf") + 1].startswith("subtitles="))
+            self.assertEqual(result.progress["chunks"], 1)
+
+            info = MediaInfo(120.0, 0.0, False, [0.0, 60.0])
+            calls.clear()
+            result = burn_subtitles("ffmpeg", "in.mp4", "srt", _SRT, os.path.join(d, "out.mp4"), workdir=d,
+                                    workers=2, probe=lambda _p: info, popen=self._recording_popen(calls, code=1))
+            self.assertEqual(result.reason, "failed")
+            self.assertFalse(any("concat" in c for c in calls))
+
+    def test_url_input_and_piped_output(self):
+        url = "https://r2.example/users/u/a.mp4?X-Amz-Signature=abc"
+        for probe in (lambda _p: None, lambda _p: MediaInfo(120.0, 0.0, False, None)):
+            calls, out = [], bytearray()
+            with tempfile.TemporaryDirectory() as d:
+                burn_subtitles("ffmpeg", url, "ass", _ASS, None, workdir=d, workers=2, min_chunk_sec=20,
+                               probe=probe, output_sink=out.extend, popen=self._recording_popen(calls))
+            reads = [c for c in calls if url in c]
+            self.assertTrue(reads)
+            self.assertTrue(all(c[c.index(url) - 1] == "-i" and "-reconnect" in c for c in reads))
+            final = calls[-1]
+            self.assertEqual(final[-3:], ["-f", "mp4", "pipe:1"])
+            self.assertEqual(len(out), 400000)
+            self.assertIn("+frag_keyframe+empty_moov+default_base_moof", final)
+
+
+if __name__ == "__main__":
+    unittest.main()
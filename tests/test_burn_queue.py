@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""Unit tests for durable burn tasks, host slots and ffmpeg progress parsing."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from burn_queue import (
+    CANCELLED,
+    COMPLETED,
+    FAILED,
+    PROCESSING,
+    QUEUED,
+    BurnTaskStore,
+    FfmpegProgress,
+    HostSlots,
+    burn_dedupe_key,
+    burn_timeout_sec,
+    run_ffmpeg,
+    watch_orphans,
+)
+from shared_state import MemoryStateBackend, SQLiteStateBackend
+
+# Stand-in for ffmpeg: banner with Duration on stderr, then -progress blocks on stdout.
+_FAKE_FFMPEG = r"""
+import sys, time
+blocks, delay, code = int(sys.argv[1]), float(sys.argv[2]), int(sys.argv[3])
+sys.stderr.write("Input #0, mov,mp4\n  Duration: 00:00:10.00, start: 0.000000, bitrate: 1 kb/s\n")
+sys.stderr.flush()
+for i in range(1, blocks + 1):
+    last = i == blocks
+    print(f"frame={i * 25}\nfps=50.0\nout_time_us={i * 1000000}\nout_time=00:00:{i:02d}.000000\nspeed=2.0x")
+    print("progress=" + ("end" if last else "continue"), flush=True)
+    time.sleep(delay)
+sys.exit(code)
+"""
+
+
+# Piped output: the MP4 bytes on stdout, the progress report on stderr between log lines.
+_FAKE_FFMPEG_PIPED = r"""
+import sys
+sys.stderr.write("  Duration: 00:00:04.00, start: 0.000000, bitrate: 1 kb/s\n")
+for i in range(1, 5):
+    sys.stdout.buffer.write(bytes([i]) * 100000)
+    sys.stdout.flush()
+    sys.stderr.write(f"out_time_us={i * 1000000}\nspeed=1.0x\nprogress={'end' if i == 4 else 'continue'}\n")
+    sys.stderr.flush()
+sys.stderr.write("[mp4 @ 0x1] muxing done\n")
+"""
+
+
+def _fake_popen(blocks, delay=0.0, code=0):
+    def popen(argv, **kw):
+        assert argv[1:4] == ["-nostats", "-progress", "pipe:1"]
+        return subprocess.Popen([sys.executable, "-c", _FAKE_FFMPEG, str(blocks), str(delay), str(code)], **kw)
+
+    return popen
+
+
+class BurnTaskStoreTests(unittest.TestCase):
+    def test_records_survive_a_new_store_on_the_same_file(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "burn.sqlite3")
+            store = BurnTaskStore(SQLiteStateBackend(path))
+            store.create("t1", mode="local", input_s3_key="users/u/a.mp4")
+            store.update("t1", status=PROCESSING, percent=40.0)
+            again = BurnTaskStore(SQLiteStateBackend(path))
+            self.assertTrue(again.durable)
+            self.assertEqual(again.get("t1")["percent"], 40.0)
+            self.assertEqual(again.get("t1")["input_s3_key"], "users/u/a.mp4")
+
+    def test_terminal_records_are_final(self):
+        store = BurnTaskStore(MemoryStateBackend())
+        store.create("t1", mode="runpod")
+        store.update("t1", status=CANCELLED)
+        store.update("t1", status=COMPLETED, output_s3_key="x")
+        self.assertEqual(store.get("t1")["status"], CANCELLED)
+        self.assertIsNone(store.update("missing", status=COMPLETED))
+
+    def test_terminal_status_survives_a_racing_write_from_another_worker(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state.sqlite3")
+            slow = threading.Event()
+
+            def slow_clock():  # stretches worker A's read-modify-write
+                if slow.is_set():
+                    time.sleep(0.2)
+                return time.time()
+
+            worker_a = BurnTaskStore(SQLiteStateBackend(path), clock=slow_clock)
+            worker_b = BurnTaskStore(SQLiteStateBackend(path))
+            worker_a.create("t1", status=PROCESSING, mode="local")
+            slow.set()
+            progress = threading.Thread(target=worker_a.update, args=("t1",), kwargs={"percent": 40.0})
+            progress.start()
+            time.sleep(0.05)  # A has read the record and is about to write it back
+            worker_b.update("t1", status=CANCELLED, error="Cancelled")
+            progress.join()
+            self.assertEqual(worker_b.get("t1")["status"], CANCELLED)
+
+    def test_cancel_flag_is_independent_of_record_writes(self):
+        store = BurnTaskStore(MemoryStateBackend())
+        store.create("t1")
+        store.request_cancel("t1")
+        store.update("t1", percent=10.0)
+        self.assertTrue(store.cancel_requested("t1"))
+        self.assertFalse(store.cancel_requested("t2"))
+
+    def test_orphans_and_claims(self):
+        now = [1000.0]
+        store = BurnTaskStore(MemoryStateBackend(clock=lambda: now[0]), clock=lambda: now[0])
+        store.create("live", mode="local", status=PROCESSING, lease_until=1100.0, lease_owner="a")
+        store.create("dead", mode="local", status=PROCESSING, lease_until=900.0, lease_owner="a")
+        store.create("queued", mode="local", status=QUEUED)
+        store.create("remote", mode="runpod", status=PROCESSING)
+        self.assertEqual(sorted(t for t, _r in store.orphaned()), ["dead", "queued"])
+        self.assertFalse(store.claim("live", "b"))
+        self.assertTrue(store.claim("dead", "b"))
+        self.assertEqual(store.get("dead")["lease_owner"], "b")
+        self.assertEqual(sorted(t for t, _r in store.orphaned()), ["queued"])
+
+    def test_only_one_worker_takes_an_orphan(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state.sqlite3")
+            stores = [BurnTaskStore(SQLiteStateBackend(path)) for _ in range(4)]
+            stores[0].create("dead", mode="local", status=PROCESSING, lease_until=time.time() - 5, lease_owner="gone")
+            results = {}
+            threads = [
+                threading.Thread(target=lambda i=i: results.__setitem__(i, stores[i % 4].claim("dead", f"w{i}")))
+                for i in range(8)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            winners = [i for i, won in results.items() if won]
+            self.assertEqual(len(winners), 1)
+            self.assertEqual(stores[0].get("dead")["lease_owner"], f"w{winners[0]}")
+            self.assertTrue(stores[1].claim("dead", f"w{winners[0]}"))  # renewing our own lease
+
+    def test_watcher_resumes_a_task_whose_lease_was_live_at_startup(self):
+        now = [1000.0]
+        store = BurnTaskStore(MemoryStateBackend(clock=lambda: now[0]), clock=lambda: now[0])
+        # The previous process renewed this lease right before the restart.
+        store.create("t1", mode="local", status=PROCESSING, lease_until=1110.0, lease_owner="old")
+        store.create("t2", mode="local", status=PROCESSING, lease_until=5000.0, lease_owner="old")
+        resumed, sleeps = [], []
+        stop = threading.Event()
+
+        def resume(task_id, record):
+            resumed.append((task_id, now[0]))
+            store.claim(task_id, "new", lease_sec=120.0)
+            stop.set()
+
+        def sleep(sec):
+            sleeps.append(sec)
+            now[0] += sec
+
+        watch_orphans(store, resume, interval_sec=60.0, stop=stop, sleep=sleep)
+        # Nothing at start-up; one interval, then a wake-up just past the lease.
+        self.assertEqual(resumed, [("t1", 1111.0)])
+        self.assertEqual(sleeps, [60.0, 51.0])
+        self.assertEqual(store.get("t1")["lease_owner"], "new")
+        self.assertEqual(store.orphaned(), [])
+
+    def test_duplicates_follow_the_live_task(self):
+        store = BurnTaskStore(MemoryStateBackend())
+        store.create("a", status=QUEUED)
+        self.assertEqual(store.claim_duplicate("k", "a"), "a")
+        store.create("b", status=QUEUED)
+        self.assertEqual(store.claim_duplicate("k", "b"), "a")
+        store.update("a", status=COMPLETED, output_s3_key="users/u/output/x.mp4")
+        self.assertEqual(store.find_duplicate("k")["output_s3_key"], "users/u/output/x.mp4")
+        # The caller rejected that output (object replaced): a new task takes the key over.
+        self.assertEqual(store.claim_duplicate("k", "b"), "b")
+        store.create("c", status=QUEUED)
+        store.create("d", status=QUEUED)
+        store.claim_duplicate("k2", "c")
+        store.update("c", status=FAILED)
+        self.assertIsNone(store.find_duplicate("k2"))
+        self.assertEqual(store.claim_duplicate("k2", "d"), "d")
+        store.discard("d")
+        self.assertIsNone(store.find_duplicate("k2"))
+
+    def test_concurrent_identical_burns_share_one_owner(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "state.sqlite3")
+            stores = [BurnTaskStore(SQLiteStateBackend(path)) for _ in range(4)]
+            owners = {}
+
+            def request(i):
+                store = stores[i % 4]
+                store.create(f"t{i}", status=QUEUED, mode="local", lease_until=time.time() + 60)
+                owners[i] = store.claim_duplicate("same-burn", f"t{i}")
+
+            threads = [threading.Thread(target=request, args=(i,)) for i in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(len(set(owners.values())), 1)
+            self.assertEqual(stores[0].find_duplicate("same-burn")["task_id"], owners[0])
+
+    def test_stale_duplicates_are_replaced(self):
+        now = [1000.0]
+        store = BurnTaskStore(MemoryStateBackend(clock=lambda: now[0]), clock=lambda: now[0])
+        store.create("local", status=PROCESSING, mode="local", lease_until=1120.0)
+        store.create("remote", status=PROCESSING, mode="runpod", duration_sec=100.0)  # timeout 600 s
+        store.claim_duplicate("k1", "local")
+        store.claim_duplicate("k2", "remote")
+        now[0] = 1100.0
+        self.assertEqual(store.find_duplicate("k1")["task_id"], "local")
+        self.assertEqual(store.find_duplicate("k2")["task_id"], "remote")
+
+        now[0] = 1200.0  # the local lease ran out (worker gone, never resumed)
+        self.assertIsNone(store.find_duplicate("k1"))
+        store.create("retry1", status=QUEUED, mode="local", lease_until=1320.0)
+        self.assertEqual(store.claim_duplicate("k1", "retry1"), "retry1")
+        # A callback keeps the RunPod task live; silence past its timeout does not.
+        store.update("remote", percent=50.0)
+        now[0] = 1700.0
+        self.assertEqual(store.find_duplicate("k2")["task_id"], "remote")
+        now[0] = 1900.0
+        self.assertIsNone(store.find_duplicate("k2"))
+        store.create("retry2", status=QUEUED, mode="runpod")
+        self.assertEqual(store.claim_duplicate("k2", "retry2"), "retry2")
+        self.assertEqual(store.get("remote")["status"], PROCESSING)
+
+    def test_dedupe_key_ignores_ui_noise_only(self):
+        segs = [{"id": 7, "start": 1.00001, "end": 2.5, "text": " שלום ", "words": [], "selected": True}]
+        ints = [{"start": 1, "end": 2.5, "text": "שלום"}]
+        same = [{"start": 1.0, "end": 2.5, "text": "שלום", "speaker": None}]
+        style = dict(subtitle_style="tiktok", subtitle_color="yellow", is_portrait=False)
+        key = burn_dedupe_key("u1", '"etag1"', segs, **style)
+        self.assertEqual(key, burn_dedupe_key("u1", '"etag1"', same, **style))
+        self.assertEqual(key, burn_dedupe_key("u1", '"etag1"', ints, **style))
+        self.assertNotEqual(key, burn_dedupe_key("u2", '"etag1"', same, **style))
+        self.assertNotEqual(key, burn_dedupe_key("u1", '"etag2"', same, **style))
+        self.assertNotEqual(key, burn_dedupe_key("u1", '"etag1"', [dict(same[0], text="שלום!")], **style))
+        self.assertNotEqual(key, burn_dedupe_key("u1", '"etag1"', same, **dict(style, subtitle_color="white")))
+        self.assertNotEqual(key, burn_dedupe_key("u1", '"etag1"', same, **dict(style, is_portrait=True)))
+
+
+class HostSlotsTests(unittest.TestCase):
+    def test_limit_is_shared_between_instances(self):
+        with tempfile.TemporaryDirectory() as d:
+            a, b = HostSlots(d, 1), HostSlots(d, 1)
+            with a.acquire() as got:
+                self.assertTrue(got)
+                with b.acquire(should_stop=lambda: True) as other:
+                    self.assertFalse(other)
+            with b.acquire(should_stop=lambda: True) as other:
+                self.assertTrue(other)
+
+
+class FfmpegProgressTests(unittest.TestCase):
+    def test_percent_eta_and_probed_duration(self):
+        clock = [0.0]
+        progress = FfmpegProgress(clock=lambda: clock[0])
+        progress.note_stderr("  Duration: 00:01:40.00, start: 0.000000, bitrate: 1 kb/s")
+        self.assertEqual(progress.duration_sec, 100.0)
+        for line in ("frame=250", "fps=25.0", "out_time_us=25000000", "speed=2.5x"):
+            self.assertIsNone(progress.feed(line))
+        clock[0] = 10.0
+        snap = progress.feed("progress=continue")
+        self.assertEqual((snap["percent"], snap["eta_sec"], snap["fps"], snap["frame"]), (25.0, 30.0, 25.0, 250))
+        # No speed: ETA from wall-clock rate (50 media s in 20 s -> 50 remaining in 20 s).
+        progress.feed("speed=N/A")
+        progress.feed("out_time=00:00:50.000000")
+        clock[0] = 20.0
+        snap = progress.feed("progress=continue")
+        self.assertEqual((snap["percent"], snap["eta_sec"], snap["speed"]), (50.0, 20.0, None))
+        self.assertEqual(progress.feed("progress=end")["percent"], 100.0)
+
+    def test_timeout_scales_with_duration(self):
+        self.assertEqual(burn_timeout_sec(None), 600.0)
+        self.assertEqual(burn_timeout_sec(60), 600.0)
+        self.assertEqual(burn_timeout_sec(3600), 120.0 + 3 * 3600)
+        self.assertEqual(burn_timeout_sec(10 * 3600), 6 * 3600.0)
+
+
+class RunFfmpegTests(unittest.TestCase):
+    def test_reports_progress_until_done(self):
+        snaps = []
+        result = run_ffmpeg(["ffmpeg", "-i", "in.mp4", "out.mp4"], on_progress=snaps.append, popen=_fake_popen(4))
+        self.assertTrue(result.ok)
+        self.assertEqual([s["percent"] for s in snaps], [10.0, 20.0, 30.0, 100.0])
+        self.assertIn("Duration", result.stderr_tail)
+
+    def test_output_sink_gets_stdout_and_progress_moves_to_stderr(self):
+        def popen(argv, **kw):
+            assert argv[1:4] == ["-nostats", "-progress", "pipe:2"] and "text" not in kw
+            return subprocess.Popen([sys.executable, "-c", _FAKE_FFMPEG_PIPED], **kw)
+
+        out, snaps = bytearray(), []
+        result = run_ffmpeg(["ffmpeg", "pipe:1"], output_sink=out.extend, on_progress=snaps.append, popen=popen)
+        self.assertTrue(result.ok)
+        self.assertEqual(bytes(out), b"".join(bytes([i]) * 100000 for i in range(1, 5)))
+        self.assertEqual([s["percent"] for s in snaps], [25.0, 50.0, 75.0, 100.0])
+        self.assertIn("muxing done", result.stderr_tail)
+        self.assertNotIn("out_time_us", result.stderr_tail)
+
+        def broken_sink(_block):
+            raise OSError("upload failed")
+
+        result = run_ffmpeg(["ffmpeg", "pipe:1"], output_sink=broken_sink, popen=popen)
+        self.assertEqual(result.reason, "failed")
+        self.assertIn("upload failed", result.stderr_tail)
+
+    def test_failure_cancel_and_stall(self):
+        self.assertEqual(run_ffmpeg(["ffmpeg"], popen=_fake_popen(1, code=1)).reason, "failed")
+        t0 = time.monotonic()
+        result = run_ffmpeg(
+            ["ffmpeg"], should_cancel=lambda: time.monotonic() - t0 > 0.3, poll_sec=0.05, popen=_fake_popen(100, 0.1)
+        )
+        self.assertEqual(result.reason, "cancelled")
+        self.assertLess(time.monotonic() - t0, 5)
+        result = run_ffmpeg(["ffmpeg"], stall_sec=0.3, poll_sec=0.05, popen=_fake_popen(2, 5.0))
+        self.assertEqual(result.reason, "stalled")
+
+
+if __name__ == "__main__":
+    unittest.main()
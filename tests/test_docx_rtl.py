@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Unit tests for the streaming DOCX RTL patcher (checked against the previous regex implementation)."""
+
+from __future__ import annotations
+
+import re
+import unittest
+import zipfile
+from unittest import mock
+from io import BytesIO
+
+from docx_rtl import _BodyPatcher, _StylesPatcher, _whole_tags, force_docx_rtl_bytes, patch_xml_stream, patch_xml_text
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def _legacy_force_docx_rtl_bytes(docx_bytes):
+    """The regex patcher this module replaced (reference for byte-identical part contents)."""
+    _BIDI = '<w:bidi w:val="1"/>'
+    _JC = '<w:jc w:val="right"/>'
+    _RTL_RUN = '<w:rtl w:val="1"/>'
+
+    def _strip(tag, xml):
+        xml = re.sub(r'<' + tag + r'(?:\s[^/]*)*/>', '', xml)
+        xml = re.sub(r'<' + tag + r'(?:\s[^>]*)?>.*?</' + tag + r'>', '', xml, flags=re.DOTALL)
+        return xml
+
+    def _patch_ppr_inner(inner):
+        inner = _strip('w:bidi', inner)
+        inner = _strip('w:jc', inner)
+        m = re.match(r'(\s*<w:pStyle\b[^/]*/>\s*)', inner)
+        if m:
+            return m.group(0) + _BIDI + _JC + inner[m.end():]
+        return _BIDI + _JC + inner
+
+    def _patch_rpr_inner(inner):
+        if '<w:rtl' not in inner:
+            return inner + _RTL_RUN
+        return inner
+
+    def patch_body_xml(xml):
+        xml = re.sub(r'<w:pPr>(.*?)</w:pPr>', lambda m: '<w:pPr>' + _patch_ppr_inner(m.group(1)) + '</w:pPr>', xml, flags=re.DOTALL)
+        xml = xml.replace('<w:pPr/>', '<w:pPr>' + _BIDI + _JC + '</w:pPr>')
+        xml = re.sub(r'<w:rPr>(.*?)</w:rPr>', lambda m: '<w:rPr>' + _patch_rpr_inner(m.group(1)) + '</w:rPr>', xml, flags=re.DOTALL)
+        xml = xml.replace('<w:rPr/>', '<w:rPr>' + _RTL_RUN + '</w:rPr>')
+        return xml
+
+    def patch_styles_xml(xml):
+        def _fix_style(m):
+            block = m.group(0)
+            if '<w:pPr>' in block:
+                block = re.sub(r'<w:pPr>(.*?)</w:pPr>', lambda pm: '<w:pPr>' + _patch_ppr_inner(pm.group(1)) + '</w:pPr>', block, flags=re.DOTALL)
+                block = block.replace('<w:pPr/>', '<w:pPr>' + _BIDI + _JC + '</w:pPr>')
+            else:
+                block = block.replace('</w:style>', '<w:pPr>' + _BIDI + _JC + '</w:pPr></w:style>')
+            return block
+
+        xml = re.sub(r'<w:style\b[^>]*w:type="paragraph"[^>]*>.*?</w:style>', _fix_style, xml, flags=re.DOTALL)
+
+        def _fix_defaults(m):
+            block = m.group(0)
+            if '<w:pPrDefault' in block:
+                if '<w:pPr>' in block:
+                    block = re.sub(r'(<w:pPrDefault[^>]*>.*?)<w:pPr>(.*?)</w:pPr>',
+                                   lambda pm: pm.group(1) + '<w:pPr>' + _patch_ppr_inner(pm.group(2)) + '</w:pPr>', block, flags=re.DOTALL)
+                else:
+                    block = block.replace('</w:pPrDefault>', '<w:pPr>' + _BIDI + _JC + '</w:pPr></w:pPrDefault>')
+            else:
+                block = block.replace('</w:docDefaults>', '<w:pPrDefault><w:pPr>' + _BIDI + _JC + '</w:pPr></w:pPrDefault></w:docDefaults>')
+            if '<w:rPrDefault' in block:
+                if '<w:rPr>' in block:
+                    block = re.sub(r'(<w:rPrDefault[^>]*>.*?)<w:rPr>(.*?)</w:rPr>',
+                                   lambda rm: rm.group(1) + '<w:rPr>' + _patch_rpr_inner(rm.group(2)) + '</w:rPr>', block, flags=re.DOTALL)
+                else:
+                    block = block.replace('</w:rPrDefault>', '<w:rPr>' + _RTL_RUN + '</w:rPr></w:rPrDefault>')
+            else:
+                block = block.replace('</w:docDefaults>', '<w:rPrDefault><w:rPr>' + _RTL_RUN + '</w:rPr></w:rPrDefault></w:docDefaults>')
+            return block
+
+        return re.sub(r'<w:docDefaults>.*?</w:docDefaults>', _fix_defaults, xml, flags=re.DOTALL)
+
+    body_parts = {'word/document.xml', 'word/footnotes.xml', 'word/endnotes.xml', 'word/comments.xml'}
+    out_mem = BytesIO()
+    with zipfile.ZipFile(BytesIO(docx_bytes), 'r') as zin, zipfile.ZipFile(out_mem, 'w', compression=zipfile.ZIP_DEFLATED) as zout:
+        for item in zin.infolist():
+            data = zin.read(item.filename)
+            name = item.filename.lower()
+            if name in body_parts or (name.startswith('word/header') and name.endswith('.xml')) \
+                    or (name.startswith('word/footer') and name.endswith('.xml')):
+                data = patch_body_xml(data.decode('utf-8', errors='replace')).encode('utf-8')
+            elif name == 'word/styles.xml':
+                data = patch_styles_xml(data.decode('utf-8', errors='replace')).encode('utf-8')
+            zout.writestr(item, data)
+    return out_mem.getvalue()
+
+
+_DOCUMENT = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<w:document {W}><w:body>'
+    '<w:p><w:pPr><w:pStyle w:val="Heading1"/><w:jc w:val="left"/><w:bidi/><w:spacing w:after="0"/>'
+    '<w:rPr><w:b/></w:rPr></w:pPr><w:r><w:rPr><w:b/><w:bCs/></w:rPr><w:t>כותרת</w:t></w:r></w:p>'
+    '<w:p><w:pPr/><w:r><w:rPr/><w:t xml:space="preserve">שלום עולם </w:t></w:r><w:r><w:t>&lt;tag&gt;</w:t></w:r></w:p>'
+    '<w:p><w:pPr>\n  <w:pStyle w:val="Quote"/>\n  <w:ind w:left="720"/></w:pPr><w:r><w:rPr><w:rtl/></w:rPr><w:t>x</w:t></w:r></w:p>'
+    '<w:p><w:pPr><w:jc w:val="both"></w:jc><w:pPrChange w:id="1"><w:pPr><w:jc w:val="left"/></w:pPr></w:pPrChange></w:pPr>'
+    '<w:r><w:rPr><w:i/><w:rPrChange w:id="2"><w:rPr><w:b/></w:rPr></w:rPrChange></w:rPr><w:t>tracked</w:t></w:r></w:p>'
+    '<w:tbl><w:tblPr><w:bidiVisual/></w:tblPr><w:tr><w:tc><w:p><w:r><w:t>cell</w:t></w:r></w:p></w:tc></w:tr></w:tbl>'
+    '<w:sectPr><w:pgSz w:w="12240" w:h="15840"/></w:sectPr></w:body></w:document>'
+)
+_HEADER = f'<w:hdr {W}><w:p><w:pPr><w:pStyle w:val="Header"/></w:pPr><w:r><w:t>h</w:t></w:r></w:p></w:hdr>'
+_FOOTER = f'<w:ftr {W}><w:p><w:r><w:rPr><w:sz w:val="16"/></w:rPr><w:t>f</w:t></w:r></w:p></w:ftr>'
+_STYLES = (
+    f'<w:styles {W}><w:docDefaults><w:rPrDefault><w:rPr><w:lang w:val="en-US"/></w:rPr></w:rPrDefault></w:docDefaults>'
+    '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>'
+    '<w:style w:type="paragraph" w:styleId="Heading1"><w:name w:val="heading 1"/><w:pPr><w:keepNext/><w:jc w:val="center"/></w:pPr>'
+    '<w:rPr><w:b/></w:rPr></w:style>'
+    '<w:style w:type="character" w:styleId="Strong"><w:rPr><w:b/></w:rPr></w:style>'
+    '<w:style w:type="table" w:styleId="Grid"><w:pPr><w:spacing w:after="0"/></w:pPr></w:style>'
+    '<w:style w:type="paragraph" w:styleId="Empty"><w:pPr/></w:style>'
+    '</w:styles>'
+)
+_STYLES_NO_DEFAULTS = (
+    f'<w:styles {W}><w:docDefaults><w:pPrDefault/></w:docDefaults>'
+    '<w:style w:type="paragraph" w:styleId="Body"><w:pPr><w:bidi w:val="0"/></w:pPr></w:style></w:styles>'
+)
+
+
+def _docx(parts, stored=()):
+    buf = BytesIO()
+    with zipfile.ZipFile(buf, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, data in parts:
+            zf.writestr(name, data, compress_type=zipfile.ZIP_STORED if name in stored else zipfile.ZIP_DEFLATED)
+    return buf.getvalue()
+
+
+def _fixture(styles=_STYLES, document=_DOCUMENT):
+    return _docx([
+        ('[Content_Types].xml', '<Types/>'),
+        ('word/document.xml', document),
+        ('word/styles.xml', styles),
+        ('word/header1.xml', _HEADER),
+        ('word/footer2.xml', _FOOTER),
+        ('word/settings.xml', f'<w:settings {W}><w:pPr/></w:settings>'),
+        ('word/media/image1.png', b'\x89PNG' + bytes(range(256)) * 40),
+    ], stored=('word/media/image1.png',))
+
+
+def _entries(data):
+    with zipfile.ZipFile(BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        return [(i.filename, i.compress_type, i.date_time, zf.read(i)) for i in zf.infolist()]
+
+
+class DocxRtlTests(unittest.TestCase):
+    def assertSameAsLegacy(self, src):
+        self.assertEqual(_entries(force_docx_rtl_bytes(src)), _entries(_legacy_force_docx_rtl_bytes(src)))
+
+    def test_fixtures_match_legacy_patcher(self):
+        self.assertSameAsLegacy(_fixture())
+        self.assertSameAsLegacy(_fixture(styles=_STYLES_NO_DEFAULTS))
+        big = _DOCUMENT.replace('<w:body>', '<w:body>' + '<w:p><w:pPr><w:jc w:val="left"/></w:pPr><w:r><w:rPr><w:b/></w:rPr><w:t>מילה</w:t></w:r></w:p>' * 5000)
+        self.assertSameAsLegacy(_fixture(document=big))
+
+    def test_untouched_parts_are_copied_without_recompressing(self):
+        src = _fixture()
+        out = force_docx_rtl_bytes(src)
+        with zipfile.ZipFile(BytesIO(src)) as a, zipfile.ZipFile(BytesIO(out)) as b:
+            for name in ('word/settings.xml', 'word/media/image1.png'):
+                ia, ib = a.getinfo(name), b.getinfo(name)
+                self.assertEqual((ia.compress_type, ia.compress_size, ia.CRC), (ib.compress_type, ib.compress_size, ib.CRC))
+                self.assertEqual(a.read(name), b.read(name))
+            self.assertIn(b'<w:pPr/>', b.read('word/settings.xml'))
+
+    def test_patched_output(self):
+        body = patch_xml_text(_DOCUMENT, _BodyPatcher)
+        self.assertIn('<w:pPr><w:pStyle w:val="Heading1"/><w:bidi w:val="1"/><w:jc w:val="right"/><w:spacing w:after="0"/>'
+                      '<w:rPr><w:b/><w:rtl w:val="1"/></w:rPr></w:pPr>', body)
+        self.assertIn('<w:pPr>\n  <w:pStyle w:val="Quote"/>\n  <w:bidi w:val="1"/>', body)
+        self.assertIn('<w:rPr><w:rtl/></w:rPr>', body)
+        self.assertIn('<w:bidiVisual/>', body)
+        styles = patch_xml_text(_STYLES, _StylesPatcher)
+        self.assertIn('<w:pPrDefault><w:pPr><w:bidi w:val="1"/><w:jc w:val="right"/></w:pPr></w:pPrDefault></w:docDefaults>', styles)
+        self.assertIn('<w:style w:type="table" w:styleId="Grid"><w:pPr><w:spacing w:after="0"/></w:pPr>', styles)
+
+    def test_chunk_boundaries(self):
+        xml = '<w:p><w:pPr><w:jc w:val="left"/></w:pPr><w:r><w:t>שלום</w:t></w:r></w:p>'
+        for cut in range(1, len(xml)):
+            chunks = list(_whole_tags([xml[:cut], xml[cut:]]))
+            self.assertEqual(''.join(chunks), xml)
+            self.assertTrue(all(c.count('<') == c.count('>') for c in chunks))
+        expected = patch_xml_text(_DOCUMENT, _BodyPatcher).encode('utf-8')
+        with mock.patch('docx_rtl._CHUNK', 7):
+            out = BytesIO()
+            patch_xml_stream(BytesIO(_DOCUMENT.encode('utf-8')), out, _BodyPatcher)
+        self.assertEqual(out.getvalue(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
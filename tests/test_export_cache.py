@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Unit tests for the content-addressed export artifact cache."""
+
+from __future__ import annotations
+
+import io
+import threading
+import time
+import unittest
+
+from export_cache import ExportArtifactCache, bytes_export_key, export_artifact_sizeof, export_key
+from job_state_store import JobStateStore
+
+
+class _ClientError(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}}
+
+
+class _FakeS3:
+    def __init__(self):
+        self.objects = {}
+        self.gets = 0
+
+    def get_object(self, Bucket, Key):
+        self.gets += 1
+        if Key not in self.objects:
+            raise _ClientError("NoSuchKey")
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def put_object(self, Bucket, Key, Body, ContentType):
+        self.objects[Key] = Body
+
+
+def _store():
+    return JobStateStore().namespace("exports", ttl_sec=3600, max_entries=10, max_bytes=100_000, sizeof=export_artifact_sizeof)
+
+
+class ExportKeyTests(unittest.TestCase):
+    def test_key_is_stable_and_sensitive(self):
+        a = export_key("srt", [{"start": 0, "text": "שלום"}], {"max": 27, "b": 1})
+        self.assertEqual(a, export_key("srt", [{"start": 0, "text": "שלום"}], {"b": 1, "max": 27}))
+        self.assertTrue(a.startswith("srt-"))
+        self.assertNotEqual(a, export_key("srt", [{"start": 0, "text": "שלום!"}], {"max": 27, "b": 1}))
+        self.assertNotEqual(a, export_key("srt", [{"start": 0, "text": "שלום"}], {"max": 14, "b": 1}))
+        self.assertNotEqual(a, export_key("ass", [{"start": 0, "text": "שלום"}], {"max": 27, "b": 1}))
+        self.assertNotEqual(a, export_key("srt", [{"start": 0, "text": "שלום"}], {"max": 27, "b": 1}, version=2))
+
+    def test_bytes_key_hashes_stream_and_rewinds(self):
+        stream = io.BytesIO(b"x" * 600_000)
+        stream.seek(10)
+        key = bytes_export_key("docx_rtl", stream)
+        self.assertEqual(stream.tell(), 10)
+        self.assertEqual(key, bytes_export_key("docx_rtl", b"x" * 599_990))
+        self.assertNotEqual(key, bytes_export_key("docx_rtl", b"x" * 599_991))
+
+
+class ExportArtifactCacheTests(unittest.TestCase):
+    def test_memory_tier_builds_once(self):
+        cache = ExportArtifactCache(_store())
+        builds = []
+
+        def build():
+            builds.append(1)
+            return b"docx"
+
+        first, origin = cache.get_or_build("docx-1", build, source="users/u/a.mp4")
+        self.assertEqual((first.body, origin, first.etag), (b"docx", "build", '"docx-1"'))
+        again, origin = cache.get_or_build("docx-1", build)
+        self.assertIs(again, first)
+        self.assertEqual((origin, len(builds)), ("memory", 1))
+        self.assertFalse(cache.persistent)
+
+    def test_concurrent_requests_share_one_build(self):
+        cache = ExportArtifactCache(_store())
+        builds, results = [], []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.1)
+            return b"video"
+
+        def request():
+            artifact, origin = cache.get_or_build("burn-1", build)
+            results.append((artifact.body, origin))
+
+        threads = [threading.Thread(target=request) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(sorted(origin for _b, origin in results), ["build", "shared", "shared", "shared"])
+        self.assertEqual({body for body, _o in results}, {b"video"})
+
+        def broken():
+            time.sleep(0.05)
+            raise RuntimeError("ffmpeg failed")
+
+        errors = []
+
+        def failing():
+            try:
+                cache.get_or_build("burn-2", broken)
+            except RuntimeError as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=failing) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, ["ffmpeg failed", "ffmpeg failed"])
+        self.assertEqual(cache.get_or_build("burn-2", lambda: b"ok")[1], "build")
+
+    def test_invalidate_source_drops_only_its_entries(self):
+        cache = ExportArtifactCache(_store())
+        cache.get_or_build("docx-1", lambda: b"a", source="users/u/a.mp4")
+        cache.get_or_build("srt-1", lambda: b"b", source="users/u/a.mp4")
+        cache.get_or_build("docx-2", lambda: b"c", source="users/u/b.mp4")
+        self.assertEqual(cache.invalidate_source("users/u/a.mp4"), 2)
+        self.assertEqual(cache.invalidate_source(None), 0)
+        _a, origin = cache.get_or_build("docx-1", lambda: b"a")
+        _c, origin_other = cache.get_or_build("docx-2", lambda: b"c")
+        self.assertEqual((origin, origin_other), ("build", "memory"))
+        self.assertEqual(cache.stats()["invalidated"], 2)
+
+    def test_s3_tier_shared_across_processes(self):
+        s3 = _FakeS3()
+        worker_a = ExportArtifactCache(_store(), s3_client_factory=lambda: s3, bucket="b")
+        worker_b = ExportArtifactCache(_store(), s3_client_factory=lambda: s3, bucket="b")
+        worker_a.get_or_build("docx-1", lambda: b"bytes")
+        self.assertEqual(s3.objects, {"exports/docx-1": b"bytes"})
+        artifact, origin = worker_b.get_or_build("docx-1", lambda: self.fail("rebuilt"))
+        self.assertEqual((artifact.body, origin), (b"bytes", "s3"))
+
+    def test_non_persistent_and_oversized_skip_s3(self):
+        s3 = _FakeS3()
+        cache = ExportArtifactCache(_store(), s3_client_factory=lambda: s3, bucket="b", s3_max_bytes=4)
+        cache.get_or_build("docx-1", lambda: b"phi", persistent=False)
+        cache.get_or_build("docx-2", lambda: b"too large")
+        self.assertEqual((s3.objects, s3.gets), ({}, 1))
+
+    def test_s3_errors_fall_back_to_build(self):
+        class _Broken:
+            def get_object(self, **kw):
+                raise _ClientError("AccessDenied")
+
+            def put_object(self, **kw):
+                raise _ClientError("AccessDenied")
+
+        cache = ExportArtifactCache(_store(), s3_client_factory=_Broken, bucket="b")
+        with self.assertLogs(level="WARNING"):
+            artifact, origin = cache.get_or_build("docx-1", lambda: b"ok")
+        self.assertEqual((artifact.body, origin, cache.stats()["s3_errors"]), (b"ok", "build", 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Unit tests for the job event bus behind the push status channel."""
+
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+
+from job_events import JobEventBus, etag_for, version_from_etag
+from shared_state import MemoryStateBackend, SQLiteStateBackend
+
+
+class JobEventBusTests(unittest.TestCase):
+    def test_versions_increase_and_status_carries_forward(self):
+        bus = JobEventBus()
+        first = bus.publish("job1", "trigger", status="queued")
+        second = bus.publish("job1", "gpu_started", gpu_started_at=1.0)
+        self.assertEqual(first["version"], 1)
+        self.assertEqual(second["version"], 2)
+        self.assertEqual(second["status"], "queued")
+        self.assertFalse(second["terminal"])
+        done = bus.publish("job1", "result", status="completed", has_result=True)
+        self.assertTrue(done["terminal"])
+        self.assertEqual(bus.snapshot("job1")["version"], 3)
+
+    def test_listener_receives_copies(self):
+        bus = JobEventBus()
+        seen = []
+        bus.add_listener(seen.append)
+        bus.add_listener(lambda snap: 1 / 0)  # failing listener must not break publish
+        bus.publish("job1", "trigger", status="triggered")
+        self.assertEqual(seen[0]["status"], "triggered")
+
+    def test_wait_returns_on_publish(self):
+        bus = JobEventBus()
+        bus.publish("job1", "trigger", status="queued")
+        timer = threading.Timer(0.05, lambda: bus.publish("job1", "result", status="completed"))
+        timer.start()
+        t0 = time.time()
+        snap = bus.wait("job1", 1, timeout=2.0)
+        self.assertLess(time.time() - t0, 1.0)
+        self.assertEqual(snap["status"], "completed")
+
+    def test_wait_times_out_with_current_snapshot(self):
+        bus = JobEventBus()
+        bus.publish("job1", "trigger", status="queued")
+        snap = bus.wait("job1", 1, timeout=0.05)
+        self.assertEqual(snap["version"], 1)
+
+    def test_bounded_jobs(self):
+        bus = JobEventBus(max_jobs=2)
+        for jid in ("a", "b", "c"):
+            bus.publish(jid, "trigger", status="queued")
+        self.assertIsNone(bus.snapshot("a"))
+        self.assertEqual(bus.stats()["jobs"], 2)
+
+    def test_shared_backend_crosses_workers(self):
+        import tempfile
+        from pathlib import Path
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "s.db")
+            worker_a = JobEventBus(backend=SQLiteStateBackend(path), shared_poll_sec=0.2)
+            worker_b = JobEventBus(backend=SQLiteStateBackend(path), shared_poll_sec=0.2)
+            worker_a.publish("job1", "trigger", status="queued")
+            self.assertEqual(worker_b.snapshot("job1")["version"], 1)
+            threading.Timer(0.05, lambda: worker_a.publish("job1", "result", status="completed")).start()
+            snap = worker_b.wait("job1", 1, timeout=2.0)
+            self.assertEqual(snap["status"], "completed")
+            self.assertEqual(worker_b.publish("job1", "result", status="completed")["version"], 3)
+
+    def test_memory_backend_is_not_treated_as_shared(self):
+        bus = JobEventBus(backend=MemoryStateBackend())
+        self.assertFalse(bus.stats()["shared"])
+
+
+class EtagTests(unittest.TestCase):
+    def test_round_trip(self):
+        self.assertEqual(version_from_etag(etag_for("job1", 7), "job1"), 7)
+        self.assertEqual(version_from_etag('W/"job1:7"', "job1"), 7)
+        self.assertEqual(version_from_etag("job1:3", "job1"), 3)
+        self.assertEqual(version_from_etag("5", "job1"), 5)
+        self.assertIsNone(version_from_etag(etag_for("other", 7), "job1"))
+        self.assertIsNone(version_from_etag("", "job1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Unit tests for single-copy job payloads and the serialized payload cache."""
+
+from __future__ import annotations
+
+import gzip
+import json
+import unittest
+
+from job_payload import (
+    SHAPE_KEY,
+    JobPayloadBytesCache,
+    completed_job_payload,
+    dedupe_job_payload,
+    etag_matches,
+    expand_job_payload,
+    payload_bytes_sizeof,
+    serialize_job_payload,
+)
+from job_state_store import JobStateStore
+
+
+def _callback_payload():
+    segments = [{"start": 0.0, "end": 1.0, "text": "שלום"}]
+    words = [{"id": "w0", "text": "שלום", "start": 0.0, "end": 1.0}]
+    return {
+        "jobId": "j1",
+        "status": "completed",
+        "segments": segments,
+        "words": words,
+        "result": {"segments": segments, "words": list(words), "word_segments": [1], "server_gpt_pending": True},
+    }
+
+
+class JobPayloadShapeTests(unittest.TestCase):
+    def test_dedupe_drops_identical_and_equal_copies_and_hoists(self):
+        payload = _callback_payload()
+        out = dedupe_job_payload(payload)
+        self.assertEqual(out["result"], {"server_gpt_pending": True})
+        self.assertIs(out["segments"], payload["segments"])
+        self.assertEqual(out["word_segments"], [1])
+        self.assertEqual(out[SHAPE_KEY], "single")
+        self.assertIn("segments", payload["result"])  # input untouched
+
+    def test_dedupe_keeps_differing_result_value(self):
+        payload = _callback_payload()
+        payload["result"]["segments"] = [{"text": "other"}]
+        out = dedupe_job_payload(payload)
+        self.assertEqual(out["result"]["segments"], [{"text": "other"}])
+
+    def test_expand_restores_legacy_shape(self):
+        payload = _callback_payload()
+        legacy = expand_job_payload(dedupe_job_payload(payload))
+        self.assertNotIn(SHAPE_KEY, legacy)
+        for key in ("segments", "words", "word_segments"):
+            self.assertIs(legacy["result"][key], legacy[key])
+        self.assertTrue(legacy["result"]["server_gpt_pending"])
+
+    def test_completed_payload_emits_arrays_once(self):
+        transcript = {"segments": [{"text": "a"}], "words": [], "captions": [], "formatted": {"clean_transcript": "a"}}
+        payload = completed_job_payload("j", transcript, "users/u/output/j.json")
+        self.assertEqual(payload["result"], {"result_s3_key": "users/u/output/j.json"})
+        self.assertEqual(payload["formatted"], {"clean_transcript": "a"})
+        self.assertEqual(expand_job_payload(payload)["result"]["segments"], [{"text": "a"}])
+
+    def test_single_shape_halves_serialized_size(self):
+        payload = _callback_payload()
+        payload["segments"] = payload["result"]["segments"] = [{"text": "מילה " * 20, "start": i, "end": i + 1} for i in range(200)]
+        legacy = len(serialize_job_payload(payload, gzip_min_bytes=None).body)
+        single = len(serialize_job_payload(dedupe_job_payload(payload), gzip_min_bytes=None).body)
+        self.assertLess(single, legacy * 0.6)
+
+
+class SerializedPayloadTests(unittest.TestCase):
+    def test_body_gzip_and_etags(self):
+        s = serialize_job_payload({"text": "שלום" * 500}, gzip_min_bytes=100)
+        self.assertEqual(json.loads(s.body), {"text": "שלום" * 500})
+        self.assertEqual(gzip.decompress(s.gzip_body), s.body)
+        body, etag, enc = s.representation(True)
+        self.assertEqual((body, enc), (s.gzip_body, "gzip"))
+        self.assertNotEqual(etag, s.etag)
+        self.assertTrue(etag_matches(etag, s.etag))
+        self.assertTrue(etag_matches(f'"x", W/{s.etag}', s.etag))
+        self.assertFalse(etag_matches('"other"', s.etag))
+        self.assertEqual(s.representation(False), (s.body, s.etag, None))
+        self.assertIsNone(serialize_job_payload({"a": 1}, gzip_min_bytes=100).gzip_body)
+
+    def test_etag_is_stable_for_equal_payloads(self):
+        self.assertEqual(serialize_job_payload({"a": [1]}).etag, serialize_job_payload({"a": [1]}).etag)
+        self.assertNotEqual(serialize_job_payload({"a": [1]}).etag, serialize_job_payload({"a": [2]}).etag)
+
+
+class JobPayloadBytesCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.results = JobStateStore().namespace("job_results", ttl_sec=60)
+        store = JobStateStore().namespace("bytes", ttl_sec=60, max_bytes=100_000, sizeof=payload_bytes_sizeof)
+        self.cache = JobPayloadBytesCache(store)
+        self.builds = 0
+
+    def _get(self, job_id, variant="single"):
+        payload, version = self.results.get_versioned(job_id)
+
+        def build():
+            self.builds += 1
+            return dedupe_job_payload(payload)
+
+        return self.cache.get(job_id, version, variant, build)
+
+    def test_reuses_bytes_until_entry_is_rewritten(self):
+        self.results["j1"] = _callback_payload()
+        first = self._get("j1")
+        self.assertIs(self._get("j1"), first)
+        self.assertEqual(self.builds, 1)
+        self._get("j1", "legacy")
+        self.assertEqual(self.builds, 2)
+
+        updated = dict(self.results["j1"], status="completed", server_gpt_pending=False)
+        self.results["j1"] = updated
+        self.assertNotEqual(self._get("j1").etag, first.etag)
+        self.assertEqual(self.builds, 3)
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["builds"]), (1, 3))
+
+    def test_untracked_payload_is_not_cached(self):
+        self.cache.get("j2", 0, "single", lambda: {"a": 1})
+        self.cache.get("j2", 0, "single", lambda: {"a": 1})
+        self.assertEqual(self.cache.stats()["uncached_builds"], 2)
+        self.assertEqual(self.cache.stats()["store"]["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Unit tests for single-flight / micro-batched job row lookups."""
+
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+
+from job_row_loader import JobRowLoader
+
+
+class _FakeJobs:
+    def __init__(self, rows, delay=0.05, fail=False):
+        self.rows = rows
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, ids, select, timeout):
+        with self._lock:
+            self.calls.append((list(ids), select))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("boom")
+        return {jid: dict(self.rows[jid]) for jid in ids if jid in self.rows}
+
+
+def _parallel(fn, args):
+    results = [None] * len(args)
+
+    def run(i, a):
+        results[i] = fn(*a)
+
+    threads = [threading.Thread(target=run, args=(i, a)) for i, a in enumerate(args)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return results
+
+
+class JobRowLoaderTests(unittest.TestCase):
+    def test_concurrent_same_id_single_request(self):
+        fetch = _FakeJobs({"j1": {"id": 1, "status": "processing"}})
+        loader = JobRowLoader(fetch, batch_window_sec=0.01)
+        results = _parallel(loader.load, [("j1", "id,status")] * 8)
+        self.assertEqual(len(fetch.calls), 1)
+        self.assertTrue(all(r == {"id": 1, "status": "processing"} for r in results))
+        stats = loader.stats()
+        self.assertEqual(stats["requests"], 8)
+        self.assertEqual(stats["coalesced"], 7)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_results_are_copies(self):
+        fetch = _FakeJobs({"j1": {"id": 1}}, delay=0.02)
+        loader = JobRowLoader(fetch, batch_window_sec=0.01)
+        a, b = _parallel(loader.load, [("j1", "id")] * 2)
+        a["id"] = 99
+        self.assertEqual(b["id"], 1)
+
+    def test_distinct_ids_batched_per_select(self):
+        rows = {f"j{i}": {"id": i} for i in range(6)}
+        fetch = _FakeJobs(rows, delay=0.01)
+        loader = JobRowLoader(fetch, batch_window_sec=0.05)
+        args = [(f"j{i}", "id") for i in range(6)] + [("missing", "id"), ("j0", "metadata")]
+        results = _parallel(loader.load, args)
+        self.assertEqual([r["id"] for r in results[:6]], list(range(6)))
+        self.assertIsNone(results[6])
+        selects = sorted(c[1] for c in fetch.calls)
+        self.assertEqual(selects, ["id", "metadata"])
+        self.assertEqual(loader.stats()["batched"], 6)
+
+    def test_max_batch_splits(self):
+        rows = {f"j{i}": {"id": i} for i in range(5)}
+        fetch = _FakeJobs(rows, delay=0.01)
+        loader = JobRowLoader(fetch, batch_window_sec=0.05, max_batch=2)
+        _parallel(loader.load, [(f"j{i}", "id") for i in range(5)])
+        self.assertTrue(all(len(ids) <= 2 for ids, _ in fetch.calls))
+        self.assertEqual(sorted(j for ids, _ in fetch.calls for j in ids), sorted(rows))
+
+    def test_fetch_error_returns_none_and_counts(self):
+        loader = JobRowLoader(_FakeJobs({}, delay=0, fail=True), batch_window_sec=0)
+        self.assertIsNone(loader.load("j1", "id"))
+        self.assertEqual(loader.stats()["errors"], 1)
+        self.assertEqual(loader.stats()["in_flight"], 0)
+
+    def test_sequential_calls_refetch(self):
+        fetch = _FakeJobs({"j1": {"id": 1}}, delay=0)
+        loader = JobRowLoader(fetch, batch_window_sec=0)
+        loader.load("j1", "id")
+        loader.load("j1", "id")
+        self.assertEqual(len(fetch.calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Unit tests for the bounded job state store."""
+
+from __future__ import annotations
+
+import unittest
+
+from job_state_store import JobStateStore, json_sizeof
+
+
+class _Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class JobStateStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        self.in_flight = set()
+        self.store = JobStateStore(lambda k: k in self.in_flight, in_flight_max_age_sec=3600, clock=self.clock)
+
+    def test_dict_compatible_access(self):
+        ns = self.store.namespace("pending_trigger", ttl_sec=60)
+        ns["a"] = "queued"
+        self.assertIn("a", ns)
+        self.assertEqual(ns.get("a"), "queued")
+        self.assertEqual(ns.pop("a", None), "queued")
+        self.assertIsNone(ns.pop("a", None))
+        with self.assertRaises(KeyError):
+            ns.pop("a")
+        with self.assertRaises(KeyError):
+            ns["missing"]
+
+    def test_ttl_expiry(self):
+        ns = self.store.namespace("gpu_started_at", ttl_sec=60)
+        ns["a"] = 1.0
+        self.clock.now += 61
+        self.assertNotIn("a", ns)
+        self.assertEqual(ns.stats()["evictions"]["ttl"], 1)
+
+    def test_in_flight_survives_ttl_until_max_age(self):
+        ns = self.store.namespace("pending_job_info", ttl_sec=60)
+        ns["job"] = {"input_s3_key": "k"}
+        self.in_flight.add("job")
+        self.clock.now += 120
+        self.assertEqual(ns.get("job"), {"input_s3_key": "k"})
+        self.clock.now += 3600
+        self.assertIsNone(ns.get("job"))
+
+    def test_lru_eviction_by_entries_skips_in_flight(self):
+        ns = self.store.namespace("job_results", ttl_sec=None, max_entries=2)
+        ns["a"] = 1
+        ns["b"] = 2
+        self.in_flight.add("a")
+        ns["c"] = 3
+        self.assertIn("a", ns)
+        self.assertNotIn("b", ns)
+        self.assertIn("c", ns)
+        self.assertEqual(ns.stats()["evictions"]["lru"], 1)
+
+    def test_access_refreshes_lru_order(self):
+        ns = self.store.namespace("job_results", ttl_sec=None, max_entries=2)
+        ns["a"] = 1
+        ns["b"] = 2
+        ns.get("a")
+        ns["c"] = 3
+        self.assertEqual(sorted(ns), ["a", "c"])
+
+    def test_byte_budget(self):
+        ns = self.store.namespace("job_results", ttl_sec=None, max_bytes=200, sizeof=json_sizeof)
+        ns["a"] = {"segments": ["x" * 80]}
+        ns["b"] = {"segments": ["y" * 80]}
+        ns["c"] = {"segments": ["z" * 80]}
+        stats = ns.stats()
+        self.assertLessEqual(stats["bytes"], 200)
+        self.assertNotIn("a", ns)
+        self.assertIn("c", ns)
+
+    def test_oversized_newest_entry_is_kept(self):
+        ns = self.store.namespace("job_results", ttl_sec=None, max_bytes=10, sizeof=json_sizeof)
+        ns["big"] = {"segments": ["x" * 100]}
+        self.assertIn("big", ns)
+
+    def test_set_helpers_and_stats(self):
+        ns = self.store.namespace("transcription_email_sent", ttl_sec=60)
+        ns.add("job")
+        self.assertIn("job", ns)
+        ns.discard("job")
+        self.assertNotIn("job", ns)
+        stats = self.store.stats()
+        self.assertIn("transcription_email_sent", stats["namespaces"])
+        self.assertEqual(stats["total_entries"], 0)
+
+    def test_versioned_get_changes_on_every_write(self):
+        ns = self.store.namespace("job_results", ttl_sec=60)
+        self.assertEqual(ns.get_versioned("job"), (None, 0))
+        payload = {"status": "completed"}
+        ns["job"] = payload
+        _, v1 = ns.get_versioned("job")
+        ns["job"] = payload
+        value, v2 = ns.get_versioned("job")
+        self.assertIs(value, payload)
+        self.assertGreater(v2, v1)
+        self.clock.now += 61
+        self.assertEqual(ns.get_versioned("job", {}), ({}, 0))
+
+    def test_predicate_may_read_other_namespaces(self):
+        trigger = self.store.namespace("pending_trigger", ttl_sec=60)
+        info = self.store.namespace("pending_job_info", ttl_sec=60)
+        self.store.set_in_flight_predicate(lambda k: trigger.peek(k) == "triggered")
+        trigger["job"] = "triggered"
+        info["job"] = {"x": 1}
+        self.clock.now += 120
+        self.assertIn("job", info)
+
+
+if __name__ == "__main__":
+    unittest.main()
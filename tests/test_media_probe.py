@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Unit tests for ranged container probing (MP4/MP3/WAV/WebM)."""
+
+from __future__ import annotations
+
+import os
+import struct
+import tempfile
+import unittest
+
+import media_probe
+from media_probe import MediaProbe, media_probe_sizeof, s3_media_probe
+
+
+def _box(typ, payload):
+    return struct.pack(">I4s", 8 + len(payload), typ) + payload
+
+
+def _mvhd(timescale, duration, version=0):
+    if version == 1:
+        body = bytes([1, 0, 0, 0]) + bytes(16) + struct.pack(">IQ", timescale, duration)
+    else:
+        body = bytes(4) + bytes(8) + struct.pack(">II", timescale, duration)
+    return _box(b"mvhd", body + bytes(80))
+
+
+def _mp4(moov_at_end, mdat_bytes=5 * 1024 * 1024, version=0):
+    ftyp = _box(b"ftyp", b"isom" + bytes(4) + b"isommp41")
+    moov = _box(b"moov", _mvhd(1000, 93_500, version) + _box(b"trak", bytes(64)))
+    mdat = _box(b"mdat", bytes(mdat_bytes))
+    return ftyp + mdat + moov if moov_at_end else ftyp + moov + mdat
+
+
+def _ebml_size(n):
+    return bytes([0x01]) + n.to_bytes(7, "big")
+
+
+def _el(eid, payload):
+    return eid + _ebml_size(len(payload)) + payload
+
+
+class _Source:
+    def __init__(self, data):
+        self.data = data
+        self.calls = []
+
+    def __call__(self, start, end):
+        self.calls.append((start, end))
+        return self.data[start:end + 1]
+
+
+class MediaProbeTests(unittest.TestCase):
+    def _probe(self, data, **kw):
+        src = _Source(data)
+        kw.setdefault("head_bytes", 64 * 1024)
+        kw.setdefault("tail_bytes", 64 * 1024)
+        return MediaProbe(src, len(data), "upload.bin", **kw), src
+
+    def test_mp4_moov_front(self):
+        probe, src = self._probe(_mp4(moov_at_end=False))
+        dur, container, basis = probe.duration()
+        self.assertAlmostEqual(dur, 93.5)
+        self.assertEqual((container, basis), ("mp4", "mvhd"))
+        self.assertLess(probe.bytes_fetched, 256 * 1024)
+
+    def test_mp4_moov_at_end_uses_ranges_only(self):
+        data = _mp4(moov_at_end=True, version=1)
+        probe, src = self._probe(data)
+        dur, container, _basis = probe.duration()
+        self.assertAlmostEqual(dur, 93.5)
+        self.assertEqual(container, "mp4")
+        self.assertLess(probe.bytes_fetched, 256 * 1024)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sparse.mp4")
+            probe.materialize(path, 128 * 1024)
+            with open(path, "rb") as f:
+                local = f.read()
+        self.assertEqual(len(local), len(data))
+        self.assertEqual(local[:128 * 1024], data[:128 * 1024])
+        self.assertEqual(local[-64 * 1024:], data[-64 * 1024:])
+
+    def test_mp3_xing(self):
+        # MPEG1 layer III, 128 kbps, 44.1 kHz, stereo; Xing frame count 3000.
+        hdr = bytes([0xFF, 0xFB, 0x90, 0x00])
+        frame_len = 144 * 128000 // 44100
+        xing = hdr + bytes(32) + b"Xing" + struct.pack(">II", 1, 3000)
+        frame0 = xing + bytes(frame_len - len(xing))
+        frame = hdr + bytes(frame_len - 4)
+        id3 = b"ID3\x03\x00\x00" + bytes([0, 0, 0, 20]) + bytes(20)
+        data = id3 + frame0 + frame * 40
+        probe, _src = self._probe(data)
+        dur, container, basis = probe.duration()
+        self.assertEqual((container, basis), ("mp3", "xing"))
+        self.assertAlmostEqual(dur, 3000 * 1152 / 44100.0)
+
+    def test_mp3_cbr_estimate(self):
+        hdr = bytes([0xFF, 0xFB, 0x90, 0x00])
+        frame_len = 144 * 128000 // 44100
+        data = (hdr + bytes(frame_len - 4)) * 200
+        probe, _src = self._probe(data)
+        dur, _container, basis = probe.duration()
+        self.assertEqual(basis, "cbr")
+        self.assertAlmostEqual(dur, len(data) * 8 / 128000.0)
+
+    def test_wav(self):
+        fmt = struct.pack("<HHIIHH", 1, 1, 16000, 32000, 2, 16)
+        pcm = bytes(32000 * 3)
+        data = b"RIFF" + struct.pack("<I", 36 + len(pcm)) + b"WAVE" + b"fmt " + struct.pack("<I", 16) + fmt
+        data += b"data" + struct.pack("<I", len(pcm)) + pcm
+        probe, _src = self._probe(data)
+        self.assertAlmostEqual(probe.duration()[0], 3.0)
+
+    def test_webm_info_duration(self):
+        info = _el(b"\x2a\xd7\xb1", (1_000_000).to_bytes(3, "big")) + _el(b"\x44\x89", struct.pack(">d", 61_250.0))
+        segment = _el(b"\x15\x49\xa9\x66", info) + _el(b"\x1f\x43\xb6\x75", _el(b"\xe7", b"\x00") + bytes(4096))
+        data = _el(b"\x1a\x45\xdf\xa3", b"\x42\x82\x84webm") + _el(b"\x18\x53\x80\x67", segment)
+        probe, _src = self._probe(data)
+        self.assertEqual(probe.duration(), (61.25, "webm", "info"))
+
+    def test_webm_without_duration_uses_last_cluster(self):
+        # MediaRecorder-style: no Duration, unknown-size segment; last cluster at 42 s + 480 ms block.
+        info = _el(b"\x2a\xd7\xb1", (1_000_000).to_bytes(3, "big"))
+        block = b"\x81" + struct.pack(">h", 480) + b"\x80" + bytes(32)
+        clusters = b""
+        for tc in range(0, 42_001, 1000):
+            clusters += _el(b"\x1f\x43\xb6\x75", _el(b"\xe7", tc.to_bytes(2, "big")) + _el(b"\xa3", block) + bytes(4000))
+        segment = b"\x18\x53\x80\x67" + b"\x01\xff\xff\xff\xff\xff\xff\xff" + _el(b"\x15\x49\xa9\x66", info) + clusters
+        data = _el(b"\x1a\x45\xdf\xa3", b"\x42\x82\x84webm") + segment
+        probe, _src = self._probe(data, head_bytes=8192, tail_bytes=16384)
+        dur, container, basis = probe.duration()
+        self.assertEqual((container, basis), ("webm", "last_cluster"))
+        self.assertAlmostEqual(dur, 42.48)
+
+    def test_unknown_container(self):
+        probe, _src = self._probe(b"OggS" + bytes(1000))
+        self.assertEqual(probe.duration(), (0.0, "unknown", "unparsed"))
+
+    def test_unparsed_container_is_materialized_with_real_head_and_tail(self):
+        # Ogg-like: nothing this module parses, so ffprobe gets the sparse copy and needs both ends.
+        data = b"OggS" + bytes(range(256)) * 2048 + b"OggS\x00\x04" + bytes(range(255, -1, -1)) * 512
+        probe, src = self._probe(data, head_bytes=32 * 1024, tail_bytes=16 * 1024)
+        self.assertEqual(probe.duration()[0], 0.0)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sparse.ogg")
+            probe.materialize(path, 0)
+            with open(path, "rb") as f:
+                local = f.read()
+        self.assertEqual(len(local), len(data))
+        self.assertEqual(local[:32 * 1024], data[:32 * 1024])
+        self.assertEqual(local[-16 * 1024:], data[-16 * 1024:])
+        self.assertEqual(local[32 * 1024:-16 * 1024], bytes(len(data) - 48 * 1024))  # sparse middle
+        self.assertLessEqual(probe.bytes_fetched, 48 * 1024)
+
+    def test_large_prefix_is_streamed_not_cached(self):
+        data = _mp4(moov_at_end=True, mdat_bytes=1024 * 1024)
+        probe, src = self._probe(data)
+        probe.duration()
+        cached = media_probe_sizeof(probe)
+        self.assertLess(cached, 256 * 1024)
+        saved = media_probe.MATERIALIZE_CHUNK_BYTES
+        media_probe.MATERIALIZE_CHUNK_BYTES = 100 * 1024
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "sparse.mp4")
+                probe.materialize(path, 512 * 1024)
+                with open(path, "rb") as f:
+                    local = f.read()
+        finally:
+            media_probe.MATERIALIZE_CHUNK_BYTES = saved
+        self.assertEqual(local[:512 * 1024], data[:512 * 1024])
+        self.assertEqual(local[-64 * 1024:], data[-64 * 1024:])
+        self.assertEqual(media_probe_sizeof(probe), cached)
+        self.assertEqual(src.calls[-5:], [(s, min(s + 100 * 1024, 512 * 1024) - 1)
+                                          for s in range(64 * 1024, 512 * 1024, 100 * 1024)])
+
+    def test_profile_prefix_scales_with_duration(self):
+        probe, _src = self._probe(_mp4(moov_at_end=False, mdat_bytes=20 * 1024 * 1024))
+        prefix = probe.profile_prefix_bytes(45.0, floor=1024 * 1024, cap=48 * 1024 * 1024)
+        self.assertLess(prefix, probe.size)
+        self.assertGreaterEqual(prefix, 1024 * 1024)
+
+    def test_s3_adapter(self):
+        data = _mp4(moov_at_end=True, mdat_bytes=256 * 1024)
+
+        class _Body:
+            def __init__(self, b):
+                self.b = b
+
+            def read(self):
+                return self.b
+
+        class _S3:
+            def head_object(self, Bucket, Key):
+                return {"ContentLength": len(data)}
+
+            def get_object(self, Bucket, Key, Range):
+                start, end = Range[len("bytes="):].split("-")
+                return {"Body": _Body(data[int(start):int(end) + 1])}
+
+        probe = s3_media_probe(_S3(), "b", "k.mp4", head_bytes=4096, tail_bytes=4096)
+        self.assertAlmostEqual(probe.duration()[0], 93.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""Unit tests for the Demucs chunk splitter and the overlap-add merge."""
+
+from __future__ import annotations
+
+import array
+import math
+import os
+import contextlib
+import struct
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+import wave
+from unittest import mock
+
+import music_vocal_separator
+from music_vocal_separator import (
+    _build_demucs_command,
+    _demucs_threads_per_chunk,
+    _overlap_add_wav_files,
+    _plan_wav_chunks,
+    _read_wav_layout,
+    _run_demucs_in_process,
+    _run_demucs_once,
+    _split_wav_into_chunks,
+    _use_in_process_demucs,
+    _wav_header,
+)
+
+_RATE = 1000  # a low rate keeps the fixtures small; the code is rate-agnostic
+
+
+def _write_s16(path, samples, channels=2, rate=_RATE):
+    data = array.array("h", samples)
+    if sys.byteorder == "big":
+        data.byteswap()
+    with wave.open(path, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(data.tobytes())
+
+
+def _read_s16(path):
+    layout = _read_wav_layout(path)
+    with open(path, "rb") as f:
+        f.seek(layout["data_offset"])
+        data = array.array("h", f.read(layout["frames"] * layout["block_align"]))
+    if sys.byteorder == "big":
+        data.byteswap()
+    return layout, data
+
+
+def _tone(frames, channels=2):
+    return [int(12000 * math.sin(2 * math.pi * 5 * (i // channels) / _RATE + (i % channels)))
+            for i in range(frames * channels)]
+
+
+class PlanTests(unittest.TestCase):
+    def test_short_input_is_one_chunk(self):
+        self.assertEqual(_plan_wav_chunks(130 * _RATE, _RATE, 120), [(0, 130 * _RATE)])
+
+    def test_chunks_overlap_and_tail_is_folded_in(self):
+        ranges = _plan_wav_chunks(300 * _RATE, _RATE, 120, overlap_sec=4)
+        self.assertEqual(ranges, [(0, 120_000), (116_000, 236_000), (232_000, 300_000)])
+        ranges = _plan_wav_chunks(262 * _RATE, _RATE, 120, overlap_sec=4)
+        self.assertEqual(ranges, [(0, 120_000), (116_000, 262_000)])
+
+    def test_overlap_is_capped_at_a_quarter_chunk(self):
+        ranges = _plan_wav_chunks(200 * _RATE, _RATE, 60, overlap_sec=40)
+        self.assertEqual(ranges[1][0], 45_000)
+
+
+class SplitMergeTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_split_is_a_byte_exact_slice_with_offsets(self):
+        src = os.path.join(self.dir, "in.wav")
+        samples = _tone(300 * _RATE)
+        _write_s16(src, samples)
+        chunks = _split_wav_into_chunks(src, self.dir, 120, overlap_sec=4)
+        self.assertEqual([off for _p, off in chunks], [0.0, 116.0, 232.0])
+        for path, off in chunks:
+            layout, data = _read_s16(path)
+            self.assertEqual((layout["channels"], layout["sample_rate"]), (2, _RATE))
+            with wave.open(path, "rb") as w:  # stdlib reader agrees with the header we wrote
+                self.assertEqual(w.getnframes(), layout["frames"])
+            lo = int(off * _RATE) * 2
+            self.assertEqual(data.tolist(), samples[lo:lo + len(data)])
+
+    def test_short_input_is_not_copied(self):
+        src = os.path.join(self.dir, "in.wav")
+        _write_s16(src, _tone(40 * _RATE))
+        self.assertEqual(_split_wav_into_chunks(src, self.dir, 120, overlap_sec=4), [(src, 0.0)])
+
+    def test_merge_of_unchanged_chunks_reproduces_the_input(self):
+        src = os.path.join(self.dir, "in.wav")
+        samples = _tone(300 * _RATE)
+        _write_s16(src, samples)
+        chunks = _split_wav_into_chunks(src, self.dir, 120, overlap_sec=4)
+        out = _overlap_add_wav_files([p for p, _o in chunks], [o for _p, o in chunks],
+                                     os.path.join(self.dir, "merged.wav"))
+        _layout, merged = _read_s16(out)
+        self.assertEqual(merged.tolist(), samples)
+
+    def test_crossfade_is_smooth_across_the_overlap(self):
+        a, b = os.path.join(self.dir, "a.wav"), os.path.join(self.dir, "b.wav")
+        _write_s16(a, [10000] * 50, channels=1)
+        _write_s16(b, [-10000] * 50, channels=1)
+        out = _overlap_add_wav_files([a, b], [0.0, 0.04], os.path.join(self.dir, "m.wav"))
+        _layout, merged = _read_s16(out)
+        self.assertEqual(len(merged), 90)
+        self.assertEqual(merged[:40].tolist(), [10000] * 40)
+        self.assertEqual(merged[50:].tolist(), [-10000] * 40)
+        fade = merged[39:51].tolist()
+        self.assertEqual(fade, sorted(fade, reverse=True))
+        self.assertLess(max(abs(x - y) for x, y in zip(fade, fade[1:])), 4000)
+
+    def _stereo_crossfade(self):
+        a, b = os.path.join(self.dir, "a.wav"), os.path.join(self.dir, "b.wav")
+        tone = _tone(90)
+        _write_s16(a, tone[:120])
+        _write_s16(b, [-x for x in tone[60:]])
+        _layout, merged = _read_s16(_overlap_add_wav_files([a, b], [0.0, 0.03], os.path.join(self.dir, "m.wav")))
+        return merged.tolist()
+
+    def test_pure_python_and_numpy_crossfades_agree(self):
+        saved = music_vocal_separator._np
+        music_vocal_separator._np = None
+        try:
+            pure = self._stereo_crossfade()
+        finally:
+            music_vocal_separator._np = saved
+        self.assertEqual(len(pure), 180)
+        # Halfway through the overlap the phase-inverted copy cancels the tone.
+        self.assertLessEqual(max(abs(x) for x in pure[88:92]), 1000)
+        if saved is not None:
+            self.assertEqual(self._stereo_crossfade(), pure)
+
+    def test_float_chunks_and_gaps_stay_on_the_timeline(self):
+        fmt = struct.pack("<HHIIHH", 3, 1, _RATE, _RATE * 4, 4, 32)
+        paths = []
+        for name, value in (("a", 0.5), ("b", -0.5)):
+            path = os.path.join(self.dir, f"{name}.wav")
+            data = array.array("f", [value] * 20)
+            if sys.byteorder == "big":
+                data.byteswap()
+            with open(path, "wb") as f:
+                f.write(_wav_header(fmt, len(data) * 4) + data.tobytes())
+            paths.append(path)
+        out = _overlap_add_wav_files(paths, [0.0, 0.03], os.path.join(self.dir, "m.wav"))
+        layout = _read_wav_layout(out)
+        self.assertEqual((layout["format_tag"], layout["frames"]), (3, 50))
+        with open(out, "rb") as f:
+            f.seek(layout["data_offset"])
+            merged = array.array("f", f.read())
+        if sys.byteorder == "big":
+            merged.byteswap()
+        self.assertEqual(merged[20:30].tolist(), [0.0] * 10)
+        self.assertEqual(merged[30], -0.5)
+
+
+class DemucsRunnerTests(unittest.TestCase):
+    def setUp(self):
+        self._saved = {k: os.environ.pop(k, None) for k in (
+            "TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_IN_PROCESS", "TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_THREADS",
+            "TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_SEGMENT", "TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_DEVICE")}
+
+    def tearDown(self):
+        music_vocal_separator._DEMUCS_IN_PROCESS_STUCK = False
+        for key, value in self._saved.items():
+            os.environ.pop(key, None)
+            if value is not None:
+                os.environ[key] = value
+
+    def test_cli_command_keeps_segment_only_for_non_transformer_models(self):
+        cmd = _build_demucs_command("in.wav", "out", "mdx_extra_q")
+        self.assertEqual(cmd[1:], ["-m", "demucs", "--two-stems=vocals", "-d", "cpu", "-j", "1", "--shifts", "0",
+                                   "-n", "mdx_extra_q", "--out", "out", "--segment", "8", "in.wav"])
+        self.assertNotIn("--segment", _build_demucs_command("in.wav", "out", "htdemucs_ft"))
+
+    def test_subprocess_unless_opted_in_without_a_custom_command(self):
+        self.assertFalse(_use_in_process_demucs())
+        os.environ["TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_IN_PROCESS"] = "1"
+        self.assertFalse(_use_in_process_demucs("separate {input} {output_dir}"))
+
+    def test_in_process_needs_numpy(self):
+        os.environ["TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_IN_PROCESS"] = "1"
+        saved = music_vocal_separator._np
+        music_vocal_separator._np = None
+        try:
+            self.assertFalse(_use_in_process_demucs())
+        finally:
+            music_vocal_separator._np = saved
+
+    def test_overrunning_in_process_chunk_times_out_and_falls_back_to_the_cli(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        with tempfile.TemporaryDirectory() as out, \
+                mock.patch.object(music_vocal_separator, "_demucs_api", return_value=object()), \
+                mock.patch.object(music_vocal_separator, "_np", object()), \
+                mock.patch.object(music_vocal_separator, "_run_demucs_in_process",
+                                  side_effect=lambda *a, **k: release.wait(5)):
+            os.environ["TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_IN_PROCESS"] = "1"
+            self.assertTrue(_use_in_process_demucs())
+            started = time.monotonic()
+            with self.assertRaisesRegex(RuntimeError, "timed out"):
+                _run_demucs_once("in.wav", out, "mdx_extra_q", 0.05, None)
+            self.assertLess(time.monotonic() - started, 2)
+            self.assertFalse(_use_in_process_demucs())
+
+    def test_threads_split_cpus_across_parallel_chunks(self):
+        cpus = os.cpu_count() or 1
+        self.assertEqual(_demucs_threads_per_chunk(1), cpus)
+        self.assertEqual(_demucs_threads_per_chunk(cpus * 2), 1)
+        os.environ["TRANSCRIBE_MUSIC_VOCAL_SEPARATOR_THREADS"] = "3"
+        self.assertEqual(_demucs_threads_per_chunk(4), 3)
+
+
+def _stub_demucs_modules(np, calls):
+    """torch / demucs stand-ins: tensors are ndarrays, the "model" returns half the mix as vocals."""
+
+    class Tensor(np.ndarray):
+        def t(self):
+            return self.T
+
+        def cpu(self):
+            return self
+
+        def contiguous(self):
+            return np.ascontiguousarray(self).view(Tensor)
+
+        def numpy(self):
+            return self.view(np.ndarray)
+
+    class Model:
+        samplerate = _RATE
+        audio_channels = 2
+        sources = ["other", "vocals"]
+
+        def to(self, device):
+            calls["device"] = device
+            return self
+
+        def eval(self):
+            return self
+
+    def apply_model(model, mix, **kwargs):
+        calls["apply_model"] = kwargs
+        return np.stack([mix, mix * 0.5], axis=1).view(Tensor)
+
+    def convert_audio(wav, from_rate, to_rate, channels):
+        calls["convert_audio"] = (from_rate, to_rate, channels)
+        return np.repeat(wav, channels, axis=0).view(Tensor)
+
+    torch = types.ModuleType("torch")
+    torch.from_numpy = lambda a: a.view(Tensor)
+    torch.no_grad = contextlib.nullcontext
+    torch.set_num_threads = lambda n: calls.__setitem__("threads", n)
+    audio = types.ModuleType("demucs.audio")
+    audio.convert_audio = convert_audio
+    audio.prevent_clip = lambda wav, mode: wav
+    audio.i16_pcm = lambda wav: np.round(np.asarray(wav) * 32767).astype(np.int16).view(Tensor)
+    apply = types.ModuleType("demucs.apply")
+    apply.apply_model = apply_model
+    pretrained = types.ModuleType("demucs.pretrained")
+    pretrained.get_model = lambda name: calls.setdefault("models", []).append(name) or Model()
+    demucs = types.ModuleType("demucs")
+    demucs.audio, demucs.apply, demucs.pretrained = audio, apply, pretrained
+    return {"torch": torch, "demucs": demucs, "demucs.audio": audio, "demucs.apply": apply,
+            "demucs.pretrained": pretrained}
+
+
+@unittest.skipIf(music_vocal_separator._np is None, "numpy not installed")
+class InProcessDemucsTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = self._tmp.name
+        mvs = music_vocal_separator
+        self._saved = (mvs._DEMUCS_API, mvs._DEMUCS_API_ERROR, dict(mvs._DEMUCS_MODELS))
+        mvs._DEMUCS_API, mvs._DEMUCS_API_ERROR = None, None
+        mvs._DEMUCS_MODELS.clear()
+        self.calls = {}
+        patcher = mock.patch.dict(sys.modules, _stub_demucs_modules(mvs._np, self.calls))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        mvs = music_vocal_separator
+        mvs._DEMUCS_API, mvs._DEMUCS_API_ERROR = self._saved[:2]
+        mvs._DEMUCS_MODELS.clear()
+        mvs._DEMUCS_MODELS.update(self._saved[2])
+        self._tmp.cleanup()
+
+    def test_chunk_is_separated_into_the_cli_layout(self):
+        np = music_vocal_separator._np
+        src = os.path.join(self.dir, "chunk_0001.wav")
+        samples = _tone(200, channels=1)
+        _write_s16(src, samples, channels=1)
+
+        path = _run_demucs_in_process(src, os.path.join(self.dir, "out"), "mdx_extra_q", threads=2)
+        _run_demucs_in_process(src, os.path.join(self.dir, "out2"), "mdx_extra_q")
+
+        self.assertEqual(path, os.path.join(self.dir, "out", "mdx_extra_q", "chunk_0001", "vocals.wav"))
+        self.assertEqual(self.calls["models"], ["mdx_extra_q"])  # loaded once, reused by the second chunk
+        self.assertEqual(self.calls["threads"], 2)
+        self.assertEqual(self.calls["convert_audio"], (_RATE, _RATE, 2))
+        self.assertEqual(self.calls["apply_model"]["segment"], 8)
+        layout, data = _read_s16(path)
+        self.assertEqual((layout["format_tag"], layout["channels"], layout["sample_rate"], layout["bits"]),
+                         (1, 2, _RATE, 16))
+        self.assertEqual(layout["frames"], 200)
+        with wave.open(path, "rb") as w:
+            self.assertEqual((w.getnchannels(), w.getnframes()), (2, 200))
+        # Normalize, halve, denormalize: vocals = (x + mean) / 2, on both channels.
+        x = np.asarray(samples, dtype=np.float32) / 32768.0
+        expected = np.round((x + x.mean()) / 2 * 32767).astype(np.int16)
+        got = np.asarray(data.tolist(), dtype=np.int16).reshape(-1, 2)
+        self.assertLessEqual(int(np.abs(got[:, 0].astype(int) - expected).max()), 1)
+        self.assertEqual(got[:, 0].tolist(), got[:, 1].tolist())
+
+
+if __name__ == "__main__":
+    unittest.main()
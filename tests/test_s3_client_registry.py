@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Unit tests for the pooled S3 client registry."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from s3_client_registry import (
+    S3ClientRegistry,
+    client_key,
+    credentials_fingerprint,
+    s3_max_pool_connections,
+)
+
+
+class S3ClientRegistryTests(unittest.TestCase):
+    def test_same_key_reuses_client(self):
+        reg = S3ClientRegistry()
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return object()
+
+        key = client_key("standard", True, False, "auto", "https://r2", "abc")
+        first = reg.get(key, factory)
+        second = reg.get(key, factory)
+        self.assertIs(first, second)
+        self.assertEqual(len(calls), 1)
+        stats = reg.stats()
+        self.assertEqual(stats["builds"], 1)
+        self.assertEqual(stats["hits"], 1)
+
+    def test_accelerate_and_backend_are_distinct_keys(self):
+        reg = S3ClientRegistry()
+        a = reg.get(client_key("standard", False, False, "eu-north-1", None, "x"), object)
+        b = reg.get(client_key("standard", False, True, "eu-north-1", None, "x"), object)
+        c = reg.get(client_key("standard", True, False, "auto", "https://r2", "x"), object)
+        self.assertEqual(len({id(a), id(b), id(c)}), 3)
+
+    def test_rotated_credentials_build_new_client(self):
+        reg = S3ClientRegistry()
+        k1 = client_key("medical", False, False, "eu-north-1", None, credentials_fingerprint("A", "s1"))
+        k2 = client_key("medical", False, False, "eu-north-1", None, credentials_fingerprint("A", "s2"))
+        self.assertIsNot(reg.get(k1, object), reg.get(k2, object))
+
+    def test_stats_do_not_expose_credential_fingerprint(self):
+        reg = S3ClientRegistry()
+        reg.get(client_key("standard", True, False, "auto", "https://r2", "deadbeef"), object)
+        self.assertNotIn("deadbeef", repr(reg.stats()["keys"]))
+
+    def test_concurrent_first_use_builds_once(self):
+        reg = S3ClientRegistry()
+        calls = []
+
+        def slow_factory():
+            calls.append(1)
+            time.sleep(0.05)
+            return object()
+
+        key = client_key("standard", True, False, "auto", "https://r2", "abc")
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(reg.get(key, slow_factory))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len({id(r) for r in results}), 1)
+
+    def test_max_pool_connections_env(self):
+        with patch.dict(os.environ, {"S3_MAX_POOL_CONNECTIONS": "128"}):
+            self.assertEqual(s3_max_pool_connections(), 128)
+        with patch.dict(os.environ, {"S3_MAX_POOL_CONNECTIONS": "nope"}):
+            self.assertEqual(s3_max_pool_connections(), 50)
+        with patch.dict(os.environ, {"S3_MAX_POOL_CONNECTIONS": "0"}):
+            self.assertEqual(s3_max_pool_connections(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
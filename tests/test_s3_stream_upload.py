@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Unit tests for the streaming multipart upload."""
+
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+
+from s3_stream_upload import MIN_PART_BYTES, StreamingMultipartUpload
+
+
+class _FakeS3:
+    def __init__(self, fail_parts=(), delay=0.0):
+        self.parts = {}
+        self.completed = None
+        self.aborted = False
+        self.fail_parts = set(fail_parts)
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def create_multipart_upload(self, Bucket, Key, **kw):
+        self.create_args = kw
+        return {"UploadId": "u1"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if PartNumber in self.fail_parts:
+                raise OSError("connection reset")
+            self.parts[PartNumber] = Body
+            return {"ETag": f'"e{PartNumber}"'}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.completed = MultipartUpload["Parts"]
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted = True
+
+
+class StreamingMultipartUploadTests(unittest.TestCase):
+    def test_fixed_size_parts_in_order(self):
+        s3 = _FakeS3(delay=0.01)
+        up = StreamingMultipartUpload(s3, "b", "k", part_size=1, max_concurrency=2, extra_args={"ContentType": "video/mp4"})
+        data = bytes(range(256)) * (MIN_PART_BYTES * 5 // 2 // 256)
+        for i in range(0, len(data), 100_000):
+            up.write(data[i:i + 100_000])
+        self.assertEqual(up.complete(), len(data))
+        self.assertEqual(s3.create_args, {"ContentType": "video/mp4"})
+        self.assertEqual([p["PartNumber"] for p in s3.completed], [1, 2, 3])
+        self.assertEqual([len(s3.parts[n]) for n in (1, 2)], [MIN_PART_BYTES, MIN_PART_BYTES])
+        self.assertEqual(b"".join(s3.parts[n] for n in (1, 2, 3)), data)
+        self.assertLessEqual(s3.max_in_flight, 2)
+
+    def test_empty_stream_uploads_one_empty_part(self):
+        s3 = _FakeS3()
+        up = StreamingMultipartUpload(s3, "b", "k")
+        self.assertEqual(up.complete(), 0)
+        self.assertEqual(s3.parts, {1: b""})
+
+    def test_failed_part_surfaces_and_abort(self):
+        s3 = _FakeS3(fail_parts={1})
+        up = StreamingMultipartUpload(s3, "b", "k", retries=1)
+        up.write(b"x" * MIN_PART_BYTES)
+        with self.assertRaises(OSError):
+            up.complete()
+        up.abort()
+        self.assertTrue(s3.aborted)
+        self.assertIsNone(s3.completed)
+
+
+if __name__ == "__main__":
+    unittest.main()
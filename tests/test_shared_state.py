@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Unit tests for cross-worker state backends (memory, SQLite, Redis protocol)."""
+
+from __future__ import annotations
+
+import fnmatch
+import socketserver
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from shared_state import (
+    MemoryStateBackend,
+    RedisStateBackend,
+    SQLiteStateBackend,
+    SharedStateMapping,
+    state_backend_from_env,
+)
+
+
+class _RespStandIn(socketserver.ThreadingTCPServer):
+    """Tiny RESP2 server covering the commands RedisStateBackend issues."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _RespHandler)
+        self.data = {}
+        self.expires = {}
+        self.lock = threading.Lock()
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        n = int(line[1:-2])
+        args = []
+        for _ in range(n):
+            size = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def _bulk(self, value):
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def handle(self):
+        srv = self.server
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            cmd = args[0].upper()
+            with srv.lock:
+                now = time.time()
+                for k, exp in list(srv.expires.items()):
+                    if exp <= now:
+                        srv.data.pop(k, None)
+                        srv.expires.pop(k, None)
+                if cmd == b"GET":
+                    out = self._bulk(srv.data.get(args[1]))
+                elif cmd == b"SET":
+                    srv.data[args[1]] = args[2]
+                    srv.expires.pop(args[1], None)
+                    if len(args) >= 5 and args[3].upper() == b"PX":
+                        srv.expires[args[1]] = now + int(args[4]) / 1000.0
+                    out = b"+OK\r\n"
+                elif cmd == b"EVAL":  # only the compare-and-set script RedisStateBackend.mutate sends
+                    key, present, expected, value, px = args[3:8]
+                    cur = srv.data.get(key)
+                    swap = cur is None if present == b"0" else cur == expected
+                    if swap:
+                        srv.data[key] = value
+                        srv.expires.pop(key, None)
+                        if px != b"0":
+                            srv.expires[key] = now + int(px) / 1000.0
+                    out = b":%d\r\n" % (1 if swap else 0)
+                elif cmd == b"DEL":
+                    out = b":%d\r\n" % (1 if srv.data.pop(args[1], None) is not None else 0)
+                elif cmd == b"SCAN":
+                    pattern = args[3].decode()
+                    keys = [k for k in srv.data if fnmatch.fnmatchcase(k.decode(), pattern)]
+                    out = b"*2\r\n" + self._bulk(b"0") + b"*%d\r\n" % len(keys) + b"".join(self._bulk(k) for k in keys)
+                else:
+                    out = b"-ERR unknown command\r\n"
+            self.wfile.write(out)
+            self.wfile.flush()
+
+
+class _BackendContract:
+    def make_backend(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.backend = self.make_backend()
+
+    def test_round_trip_json(self):
+        self.backend.set("pending_job_info", "job1", {"input_s3_key": "users/u/input/a.mp3", "opts": {"vad": True}})
+        self.assertEqual(
+            self.backend.get("pending_job_info", "job1"),
+            {"input_s3_key": "users/u/input/a.mp3", "opts": {"vad": True}},
+        )
+        self.assertIsNone(self.backend.get("pending_job_info", "other"))
+
+    def test_namespaces_are_isolated(self):
+        self.backend.set("pending_trigger", "job1", "queued")
+        self.backend.set("upload_complete", "job1", True)
+        self.assertEqual(sorted(self.backend.keys("pending_trigger")), ["job1"])
+        self.assertTrue(self.backend.delete("pending_trigger", "job1"))
+        self.assertFalse(self.backend.delete("pending_trigger", "job1"))
+        self.assertTrue(self.backend.get("upload_complete", "job1"))
+
+    def test_ttl(self):
+        self.backend.set("gpu_started_at", "job1", 123.0, ttl_sec=0.05)
+        self.assertEqual(self.backend.get("gpu_started_at", "job1"), 123.0)
+        time.sleep(0.1)
+        self.assertIsNone(self.backend.get("gpu_started_at", "job1"))
+
+    def test_mutate(self):
+        bump = lambda n: (n or 0) + 1
+        self.assertEqual(self.backend.mutate("counters", "c", bump), 1)
+        self.assertEqual(self.backend.mutate("counters", "c", bump, ttl_sec=60), 2)
+        self.assertEqual(self.backend.mutate("counters", "c", lambda n: None), 2)
+        self.assertIsNone(self.backend.mutate("counters", "missing", lambda n: None))
+        self.assertEqual(self.backend.get("counters", "c"), 2)
+        self.backend.mutate("counters", "t", bump, ttl_sec=0.05)
+        time.sleep(0.1)
+        self.assertIsNone(self.backend.get("counters", "t"))
+
+    def _count_concurrently(self, backends, per_thread=25):
+        def bump(n):
+            time.sleep(0.001)  # widen the read-to-write window so a non-atomic mutate loses updates
+            return (n or 0) + 1
+
+        def work(backend):
+            for _ in range(per_thread):
+                backend.mutate("counters", "c", bump)
+
+        threads = [threading.Thread(target=work, args=(b,)) for b in backends]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return self.backend.get("counters", "c")
+
+    def test_mapping_view(self):
+        m = SharedStateMapping(self.backend, "pending_trigger", ttl_sec=60)
+        m["job1"] = "triggered"
+        self.assertIn("job1", m)
+        self.assertEqual(m.get("job1"), "triggered")
+        self.assertEqual(dict(m.items()), {"job1": "triggered"})
+        self.assertEqual(m.pop("job1"), "triggered")
+        self.assertIsNone(m.pop("job1", None))
+        self.assertNotIn("job1", m)
+
+    def test_mapping_mutate_and_local_peek(self):
+        m = SharedStateMapping(self.backend, "pending_job_info", ttl_sec=60)
+        other = SharedStateMapping(self.backend, "pending_job_info", ttl_sec=60)
+        self.assertEqual(m.mutate("job1", lambda cur: {**(cur or {}), "a": 1}), {"a": 1})
+        self.assertEqual(other.mutate("job1", lambda cur: {**(cur or {}), "b": 2}), {"a": 1, "b": 2})
+        self.assertEqual(m.get("job1"), {"a": 1, "b": 2})
+        # peek never reaches the backend: it returns what this view last saw.
+        other["job1"] = {"c": 3}
+        self.assertEqual(m.peek("job1"), {"a": 1, "b": 2})
+        self.assertIsNone(m.peek("job2"))
+        m.discard("job1")
+        self.assertIsNone(m.peek("job1"))
+
+
+class MemoryBackendTests(_BackendContract, unittest.TestCase):
+    def make_backend(self):
+        return MemoryStateBackend()
+
+
+class SQLiteBackendTests(_BackendContract, unittest.TestCase):
+    def make_backend(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        return SQLiteStateBackend(str(Path(self.tmp.name) / "state.sqlite3"))
+
+    def test_two_workers_share_one_file(self):
+        other = SQLiteStateBackend(self.backend.path)
+        self.backend.set("pending_trigger", "job1", "queued")
+        other.set("pending_trigger", "job1", "triggered")
+        self.assertEqual(self.backend.get("pending_trigger", "job1"), "triggered")
+
+    def test_mutate_is_atomic_across_connections(self):
+        backends = [self.backend] + [SQLiteStateBackend(self.backend.path) for _ in range(3)]
+        self.assertEqual(self._count_concurrently(backends), 100)
+
+
+class RedisBackendTests(_BackendContract, unittest.TestCase):
+    def make_backend(self):
+        self.server = _RespStandIn()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        host, port = self.server.server_address
+        return RedisStateBackend(f"redis://{host}:{port}/0", prefix="test:")
+
+    def test_two_clients_share_state(self):
+        host, port = self.server.server_address
+        other = RedisStateBackend(f"redis://{host}:{port}/0", prefix="test:")
+        self.backend.set("upload_complete", "job1", True)
+        self.assertTrue(other.get("upload_complete", "job1"))
+
+    def test_mutate_is_atomic_across_clients(self):
+        host, port = self.server.server_address
+        backends = [self.backend] + [RedisStateBackend(f"redis://{host}:{port}/0", prefix="test:") for _ in range(3)]
+        self.assertEqual(self._count_concurrently(backends), 100)
+
+    def test_mutate_reapplies_after_a_concurrent_write(self):
+        host, port = self.server.server_address
+        other = RedisStateBackend(f"redis://{host}:{port}/0", prefix="test:")
+        self.backend.set("tasks", "t1", {"status": "processing"})
+        seen = []
+
+        def progress(record):
+            seen.append(record["status"])
+            if len(seen) == 1:  # another worker cancels between our read and our write
+                other.set("tasks", "t1", {"status": "cancelled"})
+            return None if record["status"] == "cancelled" else {**record, "percent": 50}
+
+        self.assertEqual(self.backend.mutate("tasks", "t1", progress), {"status": "cancelled"})
+        self.assertEqual(seen, ["processing", "cancelled"])
+        self.assertEqual(other.get("tasks", "t1"), {"status": "cancelled"})
+
+
+class BackendFromEnvTests(unittest.TestCase):
+    def test_default_is_memory(self):
+        self.assertEqual(state_backend_from_env({}).name, "memory")
+
+    def test_redis_without_url_falls_back(self):
+        self.assertEqual(state_backend_from_env({"STATE_BACKEND": "redis"}).name, "memory")
+
+    def test_sqlite_path(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = state_backend_from_env({"STATE_BACKEND": "sqlite", "STATE_BACKEND_PATH": str(Path(tmp) / "s.db")})
+            self.assertEqual(backend.name, "sqlite")
+            self.assertTrue(backend.shared)
+
+
+if __name__ == "__main__":
+    unittest.main()
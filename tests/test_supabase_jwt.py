@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Unit tests for offline Supabase access-token verification."""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import unittest
+
+from supabase_jwt import (
+    EXPIRED,
+    INVALID,
+    UNVERIFIABLE,
+    VERIFIED,
+    SupabaseTokenVerifier,
+    unverified_claims,
+    user_from_claims,
+)
+
+SECRET = "test-jwt-secret"
+ISSUER = "https://proj.supabase.co/auth/v1"
+NOW = 1_800_000_000.0
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _token(claims: dict, *, secret: str = SECRET, alg: str = "HS256") -> str:
+    head = _b64(json.dumps({"alg": alg, "typ": "JWT"}).encode())
+    body = _b64(json.dumps(claims).encode())
+    signing_input = f"{head}.{body}".encode("ascii")
+    sig = hmac.new(secret.encode(), signing_input, hashlib.sha256).digest() if alg == "HS256" else b""
+    return f"{head}.{body}.{_b64(sig)}"
+
+
+def _claims(**over) -> dict:
+    base = {
+        "sub": "user-1",
+        "aud": "authenticated",
+        "role": "authenticated",
+        "iss": ISSUER,
+        "exp": NOW + 3600,
+        "email": "a@example.com",
+        "user_metadata": {"full_name": "A B"},
+    }
+    base.update(over)
+    return base
+
+
+class SupabaseTokenVerifierTests(unittest.TestCase):
+    def setUp(self):
+        self.now = NOW
+        self.verifier = SupabaseTokenVerifier(jwt_secret=SECRET, issuer=ISSUER, clock=lambda: self.now)
+
+    def test_valid_hs256_token(self):
+        claims, status = self.verifier.verify(_token(_claims()))
+        self.assertEqual(status, VERIFIED)
+        user = user_from_claims(claims)
+        self.assertEqual(user["id"], "user-1")
+        self.assertEqual(user["user_metadata"]["full_name"], "A B")
+
+    def test_expired_token(self):
+        _, status = self.verifier.verify(_token(_claims(exp=NOW - 120)))
+        self.assertEqual(status, EXPIRED)
+
+    def test_anon_and_service_role_keys_rejected(self):
+        for role in ("anon", "service_role"):
+            _, status = self.verifier.verify(_token(_claims(role=role)))
+            self.assertEqual(status, INVALID)
+
+    def test_wrong_issuer_rejected(self):
+        _, status = self.verifier.verify(_token(_claims(iss="https://other.supabase.co/auth/v1")))
+        self.assertEqual(status, INVALID)
+
+    def test_bad_signature_is_unverifiable_not_invalid(self):
+        _, status = self.verifier.verify(_token(_claims(), secret="rotated"))
+        self.assertEqual(status, UNVERIFIABLE)
+
+    def test_alg_none_is_invalid(self):
+        _, status = self.verifier.verify(_token(_claims(), alg="none"))
+        self.assertEqual(status, INVALID)
+
+    def test_no_secret_is_unverifiable(self):
+        verifier = SupabaseTokenVerifier(issuer=ISSUER, clock=lambda: self.now)
+        _, status = verifier.verify(_token(_claims()))
+        self.assertEqual(status, UNVERIFIABLE)
+
+    def test_cache_hit_until_exp(self):
+        token = _token(_claims(exp=NOW + 60))
+        self.verifier.verify(token)
+        self.verifier.verify(token)
+        stats = self.verifier.stats()
+        self.assertEqual(stats["verified"], 1)
+        self.assertEqual(stats["hits"], 1)
+        self.now = NOW + 61
+        self.assertIsNone(self.verifier.cache_get(token))
+
+    def test_cache_is_bounded(self):
+        verifier = SupabaseTokenVerifier(jwt_secret=SECRET, issuer=ISSUER, cache_size=2, clock=lambda: self.now)
+        for i in range(5):
+            verifier.verify(_token(_claims(sub=f"user-{i}")))
+        self.assertEqual(verifier.stats()["cached_tokens"], 2)
+
+    def test_unverified_claims(self):
+        self.assertEqual(unverified_claims(_token(_claims()))["sub"], "user-1")
+        self.assertIsNone(unverified_claims("not-a-jwt"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Unit tests for the bounded background task executor."""
+
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+
+from task_executor import OVERFLOW_REJECT, QueueConfig, TaskExecutor
+
+
+def _wait_until(pred, timeout=2.0):
+    deadline = time.time() + timeout
+    while not pred() and time.time() < deadline:
+        time.sleep(0.005)
+    return pred()
+
+
+class TaskExecutorTests(unittest.TestCase):
+    def test_concurrency_cap(self):
+        ex = TaskExecutor([QueueConfig("q", max_workers=3)])
+        lock = threading.Lock()
+        state = {"now": 0, "peak": 0, "done": 0}
+
+        def work():
+            with lock:
+                state["now"] += 1
+                state["peak"] = max(state["peak"], state["now"])
+            time.sleep(0.02)
+            with lock:
+                state["now"] -= 1
+                state["done"] += 1
+
+        for _ in range(12):
+            ex.submit("q", work)
+        self.assertTrue(ex.shutdown(timeout=5))
+        self.assertEqual(state["done"], 12)
+        self.assertLessEqual(state["peak"], 3)
+        self.assertLessEqual(ex.stats()["queues"]["q"]["workers"], 3)
+
+    def test_priority_order(self):
+        ex = TaskExecutor([QueueConfig("q", max_workers=1)])
+        gate = threading.Event()
+        order = []
+        ex.submit("q", gate.wait, 2)
+        _wait_until(lambda: ex.stats()["queues"]["q"]["active"] == 1)
+        ex.submit("q", order.append, "low", priority=9)
+        ex.submit("q", order.append, "high", priority=0)
+        ex.submit("q", order.append, "mid")
+        gate.set()
+        ex.shutdown(timeout=2)
+        self.assertEqual(order, ["high", "mid", "low"])
+
+    def test_overflow_caller_runs_inline(self):
+        ex = TaskExecutor([QueueConfig("q", max_workers=1, max_pending=1)])
+        gate = threading.Event()
+        ex.submit("q", gate.wait, 2)
+        _wait_until(lambda: ex.stats()["queues"]["q"]["active"] == 1)
+        ex.submit("q", lambda: None)
+        ran_in = []
+        self.assertTrue(ex.submit("q", lambda: ran_in.append(threading.current_thread())))
+        self.assertEqual(ran_in, [threading.current_thread()])
+        gate.set()
+        ex.shutdown(timeout=2)
+        self.assertEqual(ex.stats()["queues"]["q"]["ran_inline"], 1)
+
+    def test_overflow_reject(self):
+        ex = TaskExecutor([QueueConfig("n", max_workers=1, max_pending=1, overflow=OVERFLOW_REJECT)])
+        gate = threading.Event()
+        ex.submit("n", gate.wait, 2)
+        _wait_until(lambda: ex.stats()["queues"]["n"]["active"] == 1)
+        self.assertTrue(ex.submit("n", lambda: None))
+        self.assertFalse(ex.submit("n", lambda: None))
+        gate.set()
+        ex.shutdown(timeout=2)
+        self.assertEqual(ex.stats()["queues"]["n"]["rejected"], 1)
+
+    def test_failures_counted_and_shutdown_runs_inline(self):
+        ex = TaskExecutor([QueueConfig("q", max_workers=2, inline_on_shutdown=True)])
+        ex.submit("q", lambda: 1 / 0)
+        self.assertTrue(ex.shutdown(timeout=2))
+        seen = []
+        ex.submit("q", seen.append, 1)
+        self.assertEqual(seen, [1])
+        stats = ex.stats()
+        self.assertFalse(stats["accepting"])
+        self.assertEqual(stats["queues"]["q"]["failed"], 1)
+
+    def test_after_stop_only_marked_queues_run_inline(self):
+        ex = TaskExecutor([
+            QueueConfig("critical", max_workers=1, inline_on_shutdown=True),
+            QueueConfig("media", max_workers=1, max_pending=5, overflow=OVERFLOW_REJECT),
+            QueueConfig("gpt", max_workers=1),
+        ])
+        ex.stop_accepting()
+        seen = []
+        self.assertTrue(ex.submit("critical", seen.append, "persist"))
+        self.assertFalse(ex.submit("media", seen.append, "burn"))
+        self.assertFalse(ex.submit("gpt", seen.append, "postprocess"))
+        self.assertEqual(seen, ["persist"])
+        queues = ex.stats()["queues"]
+        self.assertEqual((queues["media"]["rejected"], queues["gpt"]["rejected"]), (1, 1))
+
+    def test_long_lived_tasks_stop_with_the_drain(self):
+        ex = TaskExecutor([QueueConfig("watchers", max_workers=2)])
+        ex.submit("watchers", ex.stopping.wait, 60)
+        self.assertTrue(_wait_until(lambda: ex.stats()["queues"]["watchers"]["active"] == 1))
+        started = time.monotonic()
+        self.assertTrue(ex.shutdown(timeout=5))
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    def test_idle_workers_retire(self):
+        ex = TaskExecutor([QueueConfig("q", max_workers=2, idle_sec=0.05)])
+        ex.submit("q", lambda: None)
+        self.assertTrue(_wait_until(lambda: ex.stats()["queues"]["q"]["workers"] == 0))
+
+    def test_from_env_overrides(self):
+        import os
+
+        os.environ["TASK_QUEUE_GPT_WORKERS"] = "7"
+        try:
+            cfg = QueueConfig.from_env("gpt", max_workers=2)
+        finally:
+            del os.environ["TASK_QUEUE_GPT_WORKERS"]
+        self.assertEqual(cfg.max_workers, 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Unit tests for anchored token alignment."""
+
+from __future__ import annotations
+
+import difflib
+import random
+import unittest
+
+from token_align import align_replacements, anchored_opcodes
+
+
+def _apply(ops, a, b):
+    """Rebuild b from a with the opcodes (checks they are complete and consistent)."""
+    out = []
+    pos_a = pos_b = 0
+    for tag, i1, i2, j1, j2 in ops:
+        assert (i1, j1) == (pos_a, pos_b), (tag, i1, j1, pos_a, pos_b)
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+        out.extend(b[j1:j2])
+        pos_a, pos_b = i2, j2
+    assert (pos_a, pos_b) == (len(a), len(b))
+    return out
+
+
+def _edited(n, vocab, seed):
+    rnd = random.Random(seed)
+    a = [rnd.choice(vocab) for _ in range(n)]
+    b = []
+    for tok in a:
+        r = rnd.random()
+        if r < 0.03:
+            continue
+        if r < 0.08:
+            b.append(tok + ",")
+        elif r < 0.09:
+            b.extend((tok, "new"))
+        else:
+            b.append(tok)
+    return a, b
+
+
+def _difflib_map(a, b):
+    return align_replacements(a, b, difflib.SequenceMatcher(a=a, b=b, autojunk=False).get_opcodes())
+
+
+class TokenAlignTests(unittest.TestCase):
+    def test_small_inputs_match_sequence_matcher_exactly(self):
+        rnd = random.Random(11)
+        for _ in range(500):
+            vocab = [str(k) for k in range(rnd.randint(1, 6))]
+            a = [rnd.choice(vocab) for _ in range(rnd.randint(0, 30))]
+            b = [rnd.choice(vocab) for _ in range(rnd.randint(0, 30))]
+            if rnd.random() < 0.5:  # shared prefix / suffix, where stripping used to diverge
+                edge = [rnd.choice(vocab) for _ in range(rnd.randint(1, 4))]
+                a, b = (edge + a, edge + b) if rnd.random() < 0.5 else (a + edge, b + edge)
+            expected = difflib.SequenceMatcher(a=a, b=b, autojunk=False).get_opcodes()
+            self.assertEqual(anchored_opcodes(a, b), expected, (a, b))
+
+    def test_anchored_path_is_consistent_and_agrees(self):
+        vocab = [f"t{k}" for k in range(3000)]
+        a, b = _edited(4000, vocab, seed=3)
+        ops = anchored_opcodes(a, b, direct_max=2500)
+        self.assertEqual(_apply(ops, a, b), b)
+        old, new = _difflib_map(a, b), align_replacements(a, b, ops)
+        same = sum(1 for i in range(len(a)) if old.get(i) == new.get(i))
+        self.assertGreater(same / len(a), 0.99)
+
+    def test_windowed_fallback_without_unique_tokens(self):
+        a, b = _edited(3000, ["a", "b", "c", "d", "e"], seed=5)
+        ops = anchored_opcodes(a, b, direct_max=1000, band=60)
+        self.assertEqual(_apply(ops, a, b), b)
+        matched = sum(i2 - i1 for tag, i1, i2, _j1, _j2 in ops if tag == "equal")
+        self.assertGreater(matched / len(a), 0.85)
+
+    def test_disjoint_and_empty_inputs(self):
+        self.assertEqual(_apply(anchored_opcodes(list("abcdef") * 50, list("xyz") * 80, direct_max=10, band=16),
+                                list("abcdef") * 50, list("xyz") * 80), list("xyz") * 80)
+        self.assertEqual(anchored_opcodes([], ["x"]), [("insert", 0, 0, 0, 1)])
+        self.assertEqual(align_replacements(["a", "b"], []), {0: "", 1: ""})
+        self.assertEqual(align_replacements([], ["a"]), {})
+
+    def test_replacements_merge_inserts_and_deletes(self):
+        self.assertEqual(
+            align_replacements(["a", "um", "b", "d"], ["a", "new", "b", "c", "d"]),
+            {0: "a", 1: "new", 2: "b c", 3: "d"},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
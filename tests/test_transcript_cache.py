@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Unit tests for the ETag-validated transcript cache."""
+
+from __future__ import annotations
+
+import io
+import unittest
+
+from job_state_store import JobStateStore
+from transcript_cache import TranscriptCache, transcript_entry_sizeof
+from transcript_codec import CODEC_GZIP, encode_json_body
+
+
+class _ClientError(Exception):
+    def __init__(self, code, status):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}}
+
+
+class _FakeS3:
+    def __init__(self):
+        self.objects = {}
+        self.calls = []
+
+    def write(self, key, doc, etag):
+        body, extra, _n = encode_json_body(doc, CODEC_GZIP, min_bytes=0)
+        self.objects[key] = (body, etag, extra.get("ContentEncoding"))
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None):
+        self.calls.append((Key, IfNoneMatch))
+        if Key not in self.objects:
+            raise _ClientError("NoSuchKey", 404)
+        body, etag, enc = self.objects[Key]
+        if IfNoneMatch == etag:
+            raise _ClientError("304", 304)
+        return {"Body": io.BytesIO(body), "ETag": etag, "ContentEncoding": enc}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TranscriptCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        self.store = JobStateStore().namespace("t", ttl_sec=3600, max_entries=10, max_bytes=10_000, sizeof=transcript_entry_sizeof)
+        self.cache = TranscriptCache(self.store, fresh_sec=2.0, clock=self.clock)
+        self.s3 = _FakeS3()
+
+    def test_fresh_hit_then_304_then_changed(self):
+        self.s3.write("k.json", {"segments": [1]}, '"e1"')
+        self.assertEqual(self.cache.get_json(self.s3, "b", "k.json"), {"segments": [1]})
+        self.assertEqual(self.cache.get_json(self.s3, "b", "k.json"), {"segments": [1]})
+        self.assertEqual(self.s3.calls, [("k.json", None)])  # second read was free
+
+        self.clock.now += 5
+        self.assertEqual(self.cache.get_json(self.s3, "b", "k.json"), {"segments": [1]})
+        self.assertEqual(self.s3.calls[-1], ("k.json", '"e1"'))
+
+        self.s3.write("k.json", {"segments": [2]}, '"e2"')
+        self.clock.now += 5
+        self.assertEqual(self.cache.get_json(self.s3, "b", "k.json"), {"segments": [2]})
+        stats = self.cache.stats()
+        self.assertEqual((stats["fresh_hits"], stats["not_modified"], stats["full_gets"]), (1, 1, 2))
+
+    def test_write_through_serves_next_read(self):
+        self.cache.put("b", "k.json", '"e9"', {"formatted": {"x": 1}}, 40)
+        self.assertEqual(self.cache.get_json(self.s3, "b", "k.json"), {"formatted": {"x": 1}})
+        self.assertEqual(self.s3.calls, [])
+
+    def test_callers_get_top_level_copy(self):
+        self.cache.put("b", "k.json", '"e1"', {"segments": [1]}, 10)
+        got = self.cache.get_json(self.s3, "b", "k.json")
+        got["segments"] = []
+        self.assertEqual(self.cache.get_json(self.s3, "b", "k.json"), {"segments": [1]})
+
+    def test_missing_object_propagates_and_invalidates(self):
+        self.cache.put("b", "gone.json", '"e1"', {"a": 1}, 10)
+        self.clock.now += 5
+        with self.assertRaises(_ClientError):
+            self.cache.get_json(self.s3, "b", "gone.json")
+        self.assertIsNone(self.store.get(("b", "gone.json")))
+
+    def test_byte_budget_evicts(self):
+        for i in range(4):
+            self.cache.put("b", f"k{i}.json", f'"e{i}"', {"i": i}, 4000)
+        self.assertLessEqual(self.store.stats()["bytes"], 10_000)
+        self.assertIsNone(self.store.get(("b", "k0.json")))
+
+    def test_transform_applies_to_fetched_documents(self):
+        cache = TranscriptCache(self.store, fresh_sec=2.0, clock=self.clock, transform=lambda d: {**d, "seen": True})
+        self.s3.write("k.json", {"a": 1}, '"e1"')
+        self.assertEqual(cache.get_json(self.s3, "b", "k.json"), {"a": 1, "seen": True})
+
+    def test_revalidate_skips_fresh_window_and_returns_etag(self):
+        self.s3.write("k.json", {"a": 1}, '"e1"')
+        self.assertEqual(self.cache.get_json_with_etag(self.s3, "b", "k.json"), ({"a": 1}, '"e1"'))
+        self.s3.write("k.json", {"a": 2}, '"e2"')
+        self.assertEqual(self.cache.get_json(self.s3, "b", "k.json"), {"a": 1})  # still fresh
+        self.assertEqual(self.cache.get_json_with_etag(self.s3, "b", "k.json", revalidate=True), ({"a": 2}, '"e2"'))
+
+    def test_put_without_etag_drops_entry(self):
+        self.cache.put("b", "k.json", '"e1"', {"a": 1}, 10)
+        self.cache.put("b", "k.json", None, {"a": 2}, 10)
+        self.assertIsNone(self.store.get(("b", "k.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
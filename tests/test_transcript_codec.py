@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Unit tests for the compressed transcript storage format."""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import os
+import unittest
+
+import transcript_codec
+from transcript_codec import CODEC_GZIP, CODEC_NONE, decode_json_body, encode_json_body, read_json_object
+
+_DOC = {
+    "segments": [{"start": 0.0, "end": 1.5, "text": "שלום עולם", "words": [{"word": "שלום", "start": 0.0, "end": 0.7}]}],
+    "formatted": {"clean_transcript": "שלום עולם " * 400},
+}
+
+
+class TranscriptCodecTests(unittest.TestCase):
+    def test_gzip_roundtrip_sets_encoding_metadata(self):
+        body, extra, _raw_len = encode_json_body(_DOC, CODEC_GZIP)
+        self.assertEqual(body[:2], b"\x1f\x8b")
+        self.assertEqual(extra["ContentEncoding"], "gzip")
+        self.assertEqual(extra["ContentType"], "application/json")
+        self.assertEqual(extra["Metadata"]["qs-format"], "json+gzip;v=1")
+        self.assertLess(len(body), len(json.dumps(_DOC, ensure_ascii=False).encode("utf-8")) // 5)
+        self.assertEqual(decode_json_body(body, "gzip"), _DOC)
+
+    def test_gzip_output_is_deterministic(self):
+        self.assertEqual(encode_json_body(_DOC, CODEC_GZIP)[0], encode_json_body(_DOC, CODEC_GZIP)[0])
+
+    def test_legacy_plain_objects_still_decode(self):
+        plain = json.dumps(_DOC, ensure_ascii=False).encode("utf-8")
+        self.assertEqual(decode_json_body(plain), _DOC)
+        self.assertEqual(decode_json_body(b"\xef\xbb\xbf" + plain), _DOC)
+
+    def test_sniffs_body_even_when_proxy_already_decoded(self):
+        # Header says gzip but the body arrives plain (transparently decoded upstream).
+        plain = json.dumps(_DOC, ensure_ascii=False).encode("utf-8")
+        self.assertEqual(decode_json_body(plain, "gzip"), _DOC)
+        # No header but a gzip body (e.g. metadata lost on copy).
+        self.assertEqual(decode_json_body(gzip.compress(plain)), _DOC)
+
+    def test_small_documents_stay_plain(self):
+        body, extra, _raw_len = encode_json_body({"a": 1}, CODEC_GZIP)
+        self.assertEqual(body, b'{"a": 1}')
+        self.assertNotIn("ContentEncoding", extra)
+
+    def test_env_codec_selection(self):
+        saved = os.environ.get("TRANSCRIPT_S3_CODEC")
+        try:
+            os.environ["TRANSCRIPT_S3_CODEC"] = "none"
+            _body, extra, _raw_len = encode_json_body(_DOC)
+            self.assertNotIn("ContentEncoding", extra)
+            os.environ["TRANSCRIPT_S3_CODEC"] = "zstd"
+            expected = "zstd" if transcript_codec._zstd is not None else CODEC_GZIP
+            self.assertEqual(transcript_codec.transcript_codec_from_env(), expected)
+        finally:
+            if saved is None:
+                os.environ.pop("TRANSCRIPT_S3_CODEC", None)
+            else:
+                os.environ["TRANSCRIPT_S3_CODEC"] = saved
+        self.assertEqual(encode_json_body(_DOC, CODEC_NONE)[1], {"ContentType": "application/json"})
+
+    def test_read_json_object_from_boto_response(self):
+        body, extra, _raw_len = encode_json_body(_DOC, CODEC_GZIP)
+        resp = {"Body": io.BytesIO(body), "ContentEncoding": extra["ContentEncoding"]}
+        self.assertEqual(read_json_object(resp), _DOC)
+
+    @unittest.skipIf(transcript_codec._zstd is None, "zstandard not installed")
+    def test_zstd_roundtrip(self):
+        body, extra, _raw_len = encode_json_body(_DOC, "zstd")
+        self.assertEqual(extra["ContentEncoding"], "zstd")
+        self.assertEqual(decode_json_body(body), _DOC)
+
+
+if __name__ == "__main__":
+    unittest.main()
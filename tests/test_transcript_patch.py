@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Unit tests for transcript edit operations."""
+
+from __future__ import annotations
+
+import unittest
+
+from transcript_patch import TranscriptPatchError, apply_transcript_patch
+
+
+def _doc():
+    return {
+        "segments": [{"start": 0.0, "end": 1.0, "text": "a"}, {"start": 1.0, "end": 2.0, "text": "b", "highlighted": True}],
+        "words": [{"id": "w0", "text": "a", "start": 0.0, "end": 1.0}, {"id": "w1", "text": "b", "start": 1.0, "end": 2.0}],
+        "captions": [{"id": "c0", "wordStartIndex": 0, "wordEndIndex": 1}],
+        "formatted": {"clean_transcript": "a b"},
+    }
+
+
+class TranscriptPatchTests(unittest.TestCase):
+    def test_update_and_unset_copy_on_write(self):
+        doc = _doc()
+        out, touched = apply_transcript_patch(doc, [
+            {"op": "update", "target": "segments", "index": 1, "fields": {"text": "B"}, "unset": ["highlighted"]},
+        ])
+        self.assertEqual(out["segments"][1], {"start": 1.0, "end": 2.0, "text": "B"})
+        self.assertEqual(touched, {"segments"})
+        self.assertIs(out["words"], doc["words"])
+        self.assertEqual(doc["segments"][1]["text"], "b")  # base untouched
+        self.assertIs(out["segments"][0], doc["segments"][0])
+
+    def test_splices_apply_in_order(self):
+        out, touched = apply_transcript_patch(_doc(), [
+            {"op": "splice", "target": "words", "start": 1, "delete": 1,
+             "insert": [{"id": "w1", "text": "b1", "start": 1.0, "end": 1.5}, {"id": "w2", "text": "b2", "start": 1.5, "end": 2.0}]},
+            {"op": "update", "target": "captions", "index": 0, "fields": {"wordEndIndex": 2}},
+            {"op": "splice", "target": "words", "start": 0, "delete": 1},
+        ])
+        self.assertEqual([w["text"] for w in out["words"]], ["b1", "b2"])
+        self.assertEqual(out["captions"][0]["wordEndIndex"], 2)
+        self.assertEqual(touched, {"words", "captions"})
+
+    def test_set_formatted_and_clear(self):
+        out, touched = apply_transcript_patch(_doc(), [{"op": "set_formatted", "value": {"overview": "x"}}])
+        self.assertEqual(out["formatted"], {"overview": "x"})
+        out, _ = apply_transcript_patch(_doc(), [{"op": "set_formatted", "value": None}])
+        self.assertNotIn("formatted", out)
+        self.assertEqual(touched, {"formatted"})
+
+    def test_splice_into_missing_array(self):
+        out, _ = apply_transcript_patch({"segments": []}, [
+            {"op": "splice", "target": "captions", "start": 0, "insert": [{"id": "c0", "wordStartIndex": 0, "wordEndIndex": 0}]},
+        ])
+        self.assertEqual(len(out["captions"]), 1)
+
+    def test_invalid_ops_rejected(self):
+        bad = [
+            [],
+            [{"op": "update", "target": "segments", "index": 5, "fields": {}}],
+            [{"op": "update", "target": "segments", "index": True, "fields": {}}],
+            [{"op": "splice", "target": "words", "start": 1, "delete": 5}],
+            [{"op": "splice", "target": "words", "start": 0, "insert": ["x"]}],
+            [{"op": "update", "target": "formatted", "index": 0}],
+            [{"op": "move", "target": "words"}],
+            [{"op": "set_formatted", "value": "text"}],
+        ]
+        for ops in bad:
+            with self.assertRaises(TranscriptPatchError, msg=ops):
+                apply_transcript_patch(_doc(), ops)
+        with self.assertRaises(TranscriptPatchError):
+            apply_transcript_patch(_doc(), [{"op": "set_formatted", "value": None}] * 3, max_ops=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Unit tests for the columnar word-timing transcript encoding."""
+
+from __future__ import annotations
+
+import json
+import unittest
+
+from word_columns import MARKER, from_columnar, is_columnar, to_columnar, to_columnar_payload
+
+
+def _legacy():
+    segments = [
+        {"start": 0.0, "end": 1.2, "text": "שלום עולם", "speaker": "A",
+         "words": [{"word": "שלום", "start": 0.0, "end": 0.5, "score": 0.91}, {"word": "עולם", "start": 0.6, "end": 1.2}]},
+        {"start": 2.0, "end": 2.4, "text": "כן", "words": [{"word": "כן", "start": 2.0, "end": 2.4, "highlighted": True}]},
+        {"start": 3.0, "end": 3.5, "text": "no words"},
+    ]
+    words = [
+        {"id": "w0", "text": "שלום", "start": 0.0, "end": 0.5},
+        {"id": "w1", "text": "עולם", "start": 0.6, "end": 1.2},
+        {"id": "w2", "text": "כן", "start": 2.0, "end": 2.4},
+    ]
+    captions = [{"id": "c0", "wordStartIndex": 0, "wordEndIndex": 1}, {"id": "c1", "wordStartIndex": 2, "wordEndIndex": 2}]
+    return {"segments": segments, "words": words, "captions": captions, "formatted": {"clean_transcript": "x"}}
+
+
+class WordColumnsTests(unittest.TestCase):
+    def test_roundtrip_is_lossless(self):
+        doc = _legacy()
+        col = to_columnar(doc)
+        self.assertTrue(is_columnar(col))
+        self.assertEqual(col["words"]["start"], [0, 600, 2000])
+        self.assertEqual(col["words"]["unit"], "ms")
+        self.assertNotIn("ids", col["words"])
+        self.assertEqual(col["segments"][0]["word_span"], [0, 2])
+        self.assertEqual(col["segments"][0]["word_extra"], {"0": {"score": 0.91}})
+        self.assertEqual(col["captions"], {"first": [0, 2], "last": [1, 2]})
+        self.assertEqual(from_columnar(json.loads(json.dumps(col))), doc)
+
+    def test_sub_millisecond_times_stay_seconds(self):
+        doc = _legacy()
+        doc["words"][0]["end"] = 0.5004
+        doc["segments"][0]["words"][0]["end"] = 0.5004
+        col = to_columnar(doc)
+        self.assertEqual(col["words"]["unit"], "s")
+        self.assertEqual(from_columnar(col), doc)
+
+    def test_mismatched_segment_words_stay_inline(self):
+        doc = _legacy()
+        doc["segments"][1]["words"][0]["word"] = "edited"
+        col = to_columnar(doc)
+        self.assertIn("words", col["segments"][1])
+        self.assertNotIn("word_span", col["segments"][1])
+        self.assertEqual(from_columnar(col), doc)
+
+    def test_segments_only_document(self):
+        doc = {"segments": _legacy()["segments"]}
+        col = to_columnar(doc)
+        self.assertFalse(col["words"]["flat"])
+        self.assertEqual(from_columnar(col), doc)
+
+    def test_custom_ids_and_caption_extras_preserved(self):
+        doc = _legacy()
+        doc["words"][1]["id"] = "edited-7"
+        doc["captions"][0]["style"] = {"position": "top"}
+        self.assertEqual(from_columnar(to_columnar(doc)), doc)
+
+    def test_passthrough(self):
+        self.assertEqual(from_columnar({"segments": []}), {"segments": []})
+        odd = {"words": "not a list"}
+        self.assertIs(to_columnar(odd), odd)
+        col = to_columnar(_legacy())
+        self.assertIs(to_columnar(col), col)
+        self.assertEqual(col["words_format"], MARKER)
+
+    def test_payload_result_reuses_columns(self):
+        doc = _legacy()
+        payload = {"jobId": "j", "status": "completed", **doc,
+                   "result": {"segments": doc["segments"], "words": doc["words"], "captions": doc["captions"], "result_s3_key": "k"}}
+        out = to_columnar_payload(payload)
+        self.assertIs(out["result"]["words"], out["words"])
+        self.assertEqual(out["result"]["result_s3_key"], "k")
+        self.assertEqual(from_columnar(out["result"])["words"], doc["words"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Unit tests for the per-key write-behind queue used for metadata.qs_trigger."""
+
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+
+from write_behind_queue import WriteBehindQueue
+
+
+class _Store:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.writes = []
+        self.state = {}
+        self.active = set()
+        self.overlap = False
+        self._lock = threading.Lock()
+
+    def __call__(self, key, fields, status, at):
+        with self._lock:
+            if key in self.active:
+                self.overlap = True
+            self.active.add(key)
+        time.sleep(self.delay)
+        with self._lock:
+            doc = self.state.setdefault(key, {})
+            doc.update(fields)
+            if status is not None:
+                doc["trigger_status"] = status
+            self.writes.append((key, dict(fields), status))
+            self.active.discard(key)
+
+
+class WriteBehindQueueTests(unittest.TestCase):
+    def test_updates_within_interval_coalesce(self):
+        store = _Store()
+        q = WriteBehindQueue(store, flush_interval_sec=0.05)
+        q.enqueue("j1", {"queued_at": 1.0}, "queued")
+        q.enqueue("j1", {"trigger_sec": 2.5})
+        q.enqueue("j1", {"upload_complete": True}, "run_accepted")
+        time.sleep(0.2)
+        self.assertEqual(len(store.writes), 1)
+        self.assertEqual(
+            store.state["j1"],
+            {"queued_at": 1.0, "trigger_sec": 2.5, "upload_complete": True, "trigger_status": "run_accepted"},
+        )
+        stats = q.stats()
+        self.assertEqual(stats["flushes"], 1)
+        self.assertEqual(stats["coalesced"], 2)
+        self.assertEqual(stats["depth"], 0)
+        q.close()
+
+    def test_urgent_flushes_without_waiting_interval(self):
+        store = _Store()
+        q = WriteBehindQueue(store, flush_interval_sec=5.0)
+        q.enqueue("j1", {"x": 1}, "triggered", urgent=True)
+        deadline = time.time() + 1.0
+        while not store.writes and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(store.state["j1"]["trigger_status"], "triggered")
+        q.close()
+
+    def test_sync_waits_for_in_flight_and_keeps_order(self):
+        store = _Store(delay=0.05)
+        q = WriteBehindQueue(store, flush_interval_sec=0.0)
+        q.enqueue("j1", {"step": 1}, "queued")
+        time.sleep(0.01)  # first flush is now in flight
+        q.enqueue("j1", {"step": 2}, "failed", sync=True)
+        self.assertEqual(store.state["j1"], {"step": 2, "trigger_status": "failed"})
+        self.assertEqual([w[1]["step"] for w in store.writes], [1, 2])
+        self.assertFalse(store.overlap)
+        q.close()
+
+    def test_pending_overlay_and_drain(self):
+        store = _Store()
+        q = WriteBehindQueue(store, flush_interval_sec=60.0)
+        q.enqueue("j1", {"a": 1})
+        q.enqueue("j1", {"b": 2}, "queued")
+        self.assertEqual(q.pending("j1"), ({"a": 1, "b": 2}, "queued"))
+        self.assertEqual(q.drain(), 1)
+        self.assertEqual(q.pending("j1"), ({}, None))
+        self.assertEqual(store.state["j1"]["b"], 2)
+        q.close()
+
+    def test_flush_error_is_counted(self):
+        def boom(key, fields, status, at):
+            raise RuntimeError("patch failed")
+
+        q = WriteBehindQueue(boom, flush_interval_sec=60.0)
+        q.enqueue("j1", {"a": 1}, sync=True)
+        self.assertEqual(q.stats()["errors"], 1)
+        self.assertEqual(q.stats()["in_flight"], 0)
+        q.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
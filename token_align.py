@@ -0,0 +1,254 @@
+"""Anchored, near-linear token alignment for projecting cleaned text onto timed cues.
+
+``difflib.SequenceMatcher(autojunk=False)`` over a whole transcript is
+roughly quadratic: multi-hour recordings (20k+ tokens) cost seconds of CPU
+inside a gevent worker. :func:`anchored_opcodes` returns opcodes in the same
+``(tag, i1, i2, j1, j2)`` format, computed as:
+
+1. inputs whose ``len(a) * len(b)`` is at most ``direct_max`` go straight to
+   ``SequenceMatcher`` untouched, so short transcripts align exactly as before;
+2. otherwise strip the common prefix / suffix of the current range, and send
+   a range that is now small enough to ``SequenceMatcher``;
+3. otherwise tokens occurring exactly once on each side are anchors
+   (patience diff); the longest increasing chain of anchors is extended to
+   maximal equal runs and the gaps between them are processed recursively;
+4. a large range without any unique token (very repetitive speech) is
+   aligned in overlapping windows of ``band`` tokens that follow the drift
+   between the two sides, so cost stays ``O(n * band)``.
+
+:func:`align_replacements` turns opcodes into the per-token replacement map
+used by ``_apply_clean_transcript_to_segments``.
+"""
+
+from __future__ import annotations
+
+import bisect
+import difflib
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+DEFAULT_DIRECT_MAX = 250_000
+DEFAULT_BAND = 400
+
+Block = Tuple[int, int, int]
+Opcode = Tuple[str, int, int, int, int]
+
+
+def _direct_blocks(a: Sequence[Hashable], alo: int, ahi: int, b: Sequence[Hashable], blo: int, bhi: int) -> List[Block]:
+    sm = difflib.SequenceMatcher(a=a[alo:ahi], b=b[blo:bhi], autojunk=False)
+    return [(alo + i, blo + j, n) for i, j, n in sm.get_matching_blocks() if n]
+
+
+def _unique_anchors(a: Sequence[Hashable], alo: int, ahi: int, b: Sequence[Hashable], blo: int, bhi: int) -> List[Tuple[int, int]]:
+    """Longest chain of (i, j) pairs of tokens unique on both sides, increasing in i and j."""
+    pos_a: Dict[Hashable, int] = {}
+    for i in range(alo, ahi):
+        tok = a[i]
+        pos_a[tok] = -1 if tok in pos_a else i
+    pos_b: Dict[Hashable, int] = {}
+    for j in range(blo, bhi):
+        tok = b[j]
+        if pos_a.get(tok, -1) >= 0:
+            pos_b[tok] = -1 if tok in pos_b else j
+    pairs = sorted((pos_a[tok], j) for tok, j in pos_b.items() if j >= 0)
+    if not pairs:
+        return []
+    # Patience sorting: LIS over j with back-pointers.
+    tails: List[int] = []
+    tail_idx: List[int] = []
+    prev: List[int] = [-1] * len(pairs)
+    for k, (_i, j) in enumerate(pairs):
+        pos = bisect.bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_idx.append(k)
+        else:
+            tails[pos] = j
+            tail_idx[pos] = k
+        prev[k] = tail_idx[pos - 1] if pos else -1
+    chain = []
+    k = tail_idx[-1]
+    while k >= 0:
+        chain.append(pairs[k])
+        k = prev[k]
+    chain.reverse()
+    return chain
+
+
+def _windowed_blocks(
+    a: Sequence[Hashable], alo: int, ahi: int, b: Sequence[Hashable], blo: int, bhi: int, band: int
+) -> List[Block]:
+    """Sliding-window alignment for ranges without anchors; windows restart after the last kept match."""
+    out: List[Block] = []
+    half = max(1, band // 2)
+    i, j = alo, blo
+    while i < ahi and j < bhi:
+        ie, je = min(ahi, i + band), min(bhi, j + band)
+        blocks = _direct_blocks(a, i, ie, b, j, je)
+        if ie == ahi and je == bhi:
+            out.extend(blocks)
+            break
+        if not blocks:
+            # Nothing in common here: step both sides in proportion to what is left.
+            step_b = max(1, round(half * (bhi - j) / max(1, ahi - i)))
+            i, j = min(ahi, i + half), min(bhi, j + step_b)
+            continue
+        kept = [blk for blk in blocks if blk[0] + blk[2] <= i + half and blk[1] + blk[2] <= j + half] or blocks[:1]
+        out.extend(kept)
+        last_i, last_j, last_n = kept[-1]
+        i, j = last_i + last_n, last_j + last_n
+    return out
+
+
+def anchored_matching_blocks(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+    *,
+    direct_max: int = DEFAULT_DIRECT_MAX,
+    band: int = DEFAULT_BAND,
+) -> List[Block]:
+    """Non-overlapping ``(i, j, n)`` equal runs, sorted and merged (no sentinel)."""
+    if len(a) * len(b) <= direct_max:
+        # Before any prefix / suffix stripping, which can pick different (equally long) matches.
+        return _direct_blocks(a, 0, len(a), b, 0, len(b))
+    blocks: List[Block] = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        p = 0
+        while alo + p < ahi and blo + p < bhi and a[alo + p] == b[blo + p]:
+            p += 1
+        if p:
+            blocks.append((alo, blo, p))
+            alo += p
+            blo += p
+        s = 0
+        while alo < ahi - s and blo < bhi - s and a[ahi - 1 - s] == b[bhi - 1 - s]:
+            s += 1
+        if s:
+            blocks.append((ahi - s, bhi - s, s))
+            ahi -= s
+            bhi -= s
+        if alo == ahi or blo == bhi:
+            continue
+        if (ahi - alo) * (bhi - blo) <= direct_max:
+            blocks.extend(_direct_blocks(a, alo, ahi, b, blo, bhi))
+            continue
+        anchors = _unique_anchors(a, alo, ahi, b, blo, bhi)
+        if not anchors:
+            blocks.extend(_windowed_blocks(a, alo, ahi, b, blo, bhi, band))
+            continue
+        prev_a, prev_b = alo, blo
+        for i, j in anchors:
+            if i < prev_a or j < prev_b:
+                continue  # already inside the previous anchor's extended run
+            si, sj = i, j
+            while si > prev_a and sj > prev_b and a[si - 1] == b[sj - 1]:
+                si -= 1
+                sj -= 1
+            ei, ej = i + 1, j + 1
+            while ei < ahi and ej < bhi and a[ei] == b[ej]:
+                ei += 1
+                ej += 1
+            stack.append((prev_a, si, prev_b, sj))
+            blocks.append((si, sj, ei - si))
+            prev_a, prev_b = ei, ej
+        stack.append((prev_a, ahi, prev_b, bhi))
+
+    blocks.sort()
+    merged: List[Block] = []
+    for i, j, n in blocks:
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            pi, pj, pn = merged[-1]
+            merged[-1] = (pi, pj, pn + n)
+        else:
+            merged.append((i, j, n))
+    return merged
+
+
+def opcodes_from_blocks(blocks: List[Block], len_a: int, len_b: int) -> List[Opcode]:
+    """Same construction as ``SequenceMatcher.get_opcodes``."""
+    ops: List[Opcode] = []
+    i = j = 0
+    for ai, bj, n in blocks + [(len_a, len_b, 0)]:
+        if i < ai and j < bj:
+            ops.append(("replace", i, ai, j, bj))
+        elif i < ai:
+            ops.append(("delete", i, ai, j, bj))
+        elif j < bj:
+            ops.append(("insert", i, ai, j, bj))
+        i, j = ai + n, bj + n
+        if n:
+            ops.append(("equal", ai, i, bj, j))
+    return ops
+
+
+def anchored_opcodes(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+    *,
+    direct_max: int = DEFAULT_DIRECT_MAX,
+    band: int = DEFAULT_BAND,
+) -> List[Opcode]:
+    """Drop-in for ``SequenceMatcher(a=a, b=b, autojunk=False).get_opcodes()`` in near-linear time."""
+    return opcodes_from_blocks(anchored_matching_blocks(a, b, direct_max=direct_max, band=band), len(a), len(b))
+
+
+def align_replacements(
+    orig_tokens: Sequence[str], clean_tokens: Sequence[str], opcodes: Optional[List[Opcode]] = None
+) -> Dict[int, str]:
+    """Map each original token index -> replacement string ('' means delete).
+
+    Inserted clean tokens are appended to the preceding original token (or
+    prepended to the first one); surplus tokens of a replace go to its last token.
+    """
+    replacements: Dict[int, str] = {}
+    if not orig_tokens:
+        return replacements
+    if not clean_tokens:
+        for i in range(len(orig_tokens)):
+            replacements[i] = ''
+        return replacements
+
+    if opcodes is None:
+        opcodes = anchored_opcodes(orig_tokens, clean_tokens)
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            for k in range(i2 - i1):
+                replacements[i1 + k] = clean_tokens[j1 + k]
+        elif tag == 'replace':
+            n_old = i2 - i1
+            n_new = j2 - j1
+            for k in range(n_old):
+                if k < n_new:
+                    replacements[i1 + k] = clean_tokens[j1 + k]
+                else:
+                    replacements[i1 + k] = ''
+            if n_new > n_old and n_old > 0:
+                extras = clean_tokens[j1 + n_old : j2]
+                last = i1 + n_old - 1
+                base = replacements.get(last) or ''
+                replacements[last] = (base + ' ' + ' '.join(extras)).strip()
+            elif n_new > 0 and n_old == 0 and i1 > 0:
+                extras = ' '.join(clean_tokens[j1:j2])
+                prev = i1 - 1
+                replacements[prev] = ((replacements.get(prev) or orig_tokens[prev]) + ' ' + extras).strip()
+        elif tag == 'delete':
+            for k in range(i1, i2):
+                replacements[k] = ''
+        elif tag == 'insert':
+            extras = ' '.join(clean_tokens[j1:j2])
+            if not extras:
+                continue
+            if i1 > 0:
+                prev = i1 - 1
+                base = replacements.get(prev)
+                if base is None:
+                    base = orig_tokens[prev]
+                replacements[prev] = (base + ' ' + extras).strip()
+            else:
+                # Prepend to first original token when available.
+                base = replacements.get(0)
+                if base is None:
+                    base = orig_tokens[0]
+                replacements[0] = (extras + ' ' + base).strip()
+    return replacements
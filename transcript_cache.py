@@ -0,0 +1,136 @@
+"""ETag-validated in-process cache of parsed transcript JSON objects.
+
+A single completed job reads the same transcript object many times (gpu
+callback merge of ``formatted``, ``save_job_result`` without ``formatted``,
+status recovery on polls, exports), each a full GET plus decompress and
+``json.loads``. :class:`TranscriptCache` keeps parsed documents keyed by
+``(bucket, key)`` in a bounded, byte-budgeted store:
+
+- within ``fresh_sec`` of the last validation an entry is served without any
+  request (covers back-to-back reads within one callback / save flow);
+- afterwards the read is a conditional GET with ``IfNoneMatch=<etag>``; a 304
+  costs no body transfer or parse;
+- writes go through :meth:`TranscriptCache.put` with the ETag returned by
+  ``put_object``, so the writer's next read is free.
+
+Cached documents are shared: callers get a shallow copy of the top-level dict
+and must not mutate nested lists/dicts in place (existing callers replace
+top-level keys, which is safe).
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, MutableMapping, Optional, Tuple
+
+from transcript_codec import decompress_bytes
+
+
+class TranscriptCacheEntry:
+    __slots__ = ("etag", "data", "nbytes", "checked_at")
+
+    def __init__(self, etag: str, data: Any, nbytes: int, checked_at: float) -> None:
+        self.etag = etag
+        self.data = data
+        self.nbytes = int(nbytes)
+        self.checked_at = checked_at
+
+
+def transcript_entry_sizeof(entry: Any) -> int:
+    """Byte budget counts decoded JSON text (a stable proxy for parsed size)."""
+    return int(getattr(entry, "nbytes", 0) or 0)
+
+
+def _error_code(exc: Exception) -> str:
+    response = getattr(exc, "response", None) or {}
+    code = str((response.get("Error") or {}).get("Code") or "")
+    if not code:
+        status = (response.get("ResponseMetadata") or {}).get("HTTPStatusCode")
+        code = str(status or "")
+    return code
+
+
+def _copy(data: Any) -> Any:
+    return dict(data) if isinstance(data, dict) else data
+
+
+class TranscriptCache:
+    def __init__(
+        self,
+        store: MutableMapping[Hashable, TranscriptCacheEntry],
+        *,
+        fresh_sec: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+        transform: Optional[Callable[[Any], Any]] = None,
+    ) -> None:
+        self._store = store
+        self._transform = transform
+        self._fresh_sec = max(0.0, float(fresh_sec))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {"fresh_hits": 0, "not_modified": 0, "full_gets": 0, "write_through": 0, "invalidated": 0}
+
+    def _bump(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def get_json(self, s3_client, bucket: str, key: str) -> Any:
+        """Parsed JSON for ``bucket/key``; S3 errors other than 304 propagate (e.g. NoSuchKey)."""
+        return self.get_json_with_etag(s3_client, bucket, key)[0]
+
+    def get_json_with_etag(self, s3_client, bucket: str, key: str, *, revalidate: bool = False) -> Tuple[Any, Optional[str]]:
+        """``(data, etag)``; ``revalidate`` skips the fresh window (read-modify-write callers)."""
+        cache_key = (bucket, key)
+        entry = self._store.get(cache_key)
+        now = self._clock()
+        if entry is not None and not revalidate and now - entry.checked_at < self._fresh_sec:
+            self._bump("fresh_hits")
+            return _copy(entry.data), entry.etag
+        get_kw = {"Bucket": bucket, "Key": key}
+        if entry is not None:
+            get_kw["IfNoneMatch"] = entry.etag
+        try:
+            resp = s3_client.get_object(**get_kw)
+        except Exception as e:
+            code = _error_code(e)
+            if entry is not None and code in ("304", "NotModified"):
+                entry.checked_at = now
+                self._bump("not_modified")
+                return _copy(entry.data), entry.etag
+            if code in ("NoSuchKey", "404"):
+                self.invalidate(bucket, key)
+            raise
+        raw = decompress_bytes(resp["Body"].read(), resp.get("ContentEncoding"))
+        data = json.loads(raw.decode("utf-8-sig"))
+        if self._transform is not None:
+            data = self._transform(data)
+        self._bump("full_gets")
+        etag = resp.get("ETag")
+        if etag:
+            self._store[cache_key] = TranscriptCacheEntry(etag, data, len(raw), now)
+        else:
+            self._store.pop(cache_key, None)
+        return _copy(data), etag
+
+    def put(self, bucket: str, key: str, etag: Optional[str], data: Any, nbytes: int) -> None:
+        """Write-through after a successful ``put_object`` (no ETag -> drop any stale entry)."""
+        if not etag:
+            self.invalidate(bucket, key)
+            return
+        self._store[(bucket, key)] = TranscriptCacheEntry(etag, _copy(data), nbytes, self._clock())
+        self._bump("write_through")
+
+    def invalidate(self, bucket: str, key: str) -> None:
+        if self._store.pop((bucket, key), None) is not None:
+            self._bump("invalidated")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+        out["fresh_sec"] = self._fresh_sec
+        store_stats = getattr(self._store, "stats", None)
+        if callable(store_stats):
+            out["store"] = store_stats()
+        return out
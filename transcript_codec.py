@@ -0,0 +1,122 @@
+"""Compressed, content-encoded storage format for transcript JSON objects in R2/S3.
+
+Transcript objects (segments with per-word ``words``, flat ``words`` /
+``captions`` and the GPT ``formatted`` block) are rewritten on every save and
+read back whole on status recovery and merges. Hebrew UTF-8 JSON for long
+recordings compresses roughly 5-10x.
+
+Format ``v1``:
+
+- body is the UTF-8 JSON document compressed with gzip (default) or zstd;
+- ``ContentEncoding`` is set to ``gzip`` / ``zstd`` so presigned-URL fetches
+  from the browser are decoded transparently by the HTTP stack;
+- user metadata ``qs-format`` records ``json+<codec>;v=1``.
+
+Readers never trust metadata alone: :func:`decode_json_body` sniffs magic
+bytes, so existing plain objects, gzip objects served already-decoded by a
+proxy, and new compressed objects all load through the same call.
+
+zstd needs the optional ``zstandard`` package and browser support for
+``Content-Encoding: zstd`` (not available in older Safari), so gzip stays the
+default; set ``TRANSCRIPT_S3_CODEC=zstd`` only where transcripts are read
+server-side.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import zstandard as _zstd
+except ImportError:  # optional: gzip is always available
+    _zstd = None
+
+
+FORMAT_VERSION = 1
+METADATA_KEY = "qs-format"
+CODEC_NONE = "none"
+CODEC_GZIP = "gzip"
+CODEC_ZSTD = "zstd"
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+DEFAULT_MIN_BYTES = 1024
+
+
+def transcript_codec_from_env() -> str:
+    codec = (os.environ.get("TRANSCRIPT_S3_CODEC") or CODEC_GZIP).strip().lower()
+    if codec in ("", "off", "plain", "0", "false"):
+        return CODEC_NONE
+    if codec == CODEC_ZSTD and _zstd is None:
+        logging.warning("TRANSCRIPT_S3_CODEC=zstd but zstandard is not installed; using gzip")
+        return CODEC_GZIP
+    return codec if codec in (CODEC_GZIP, CODEC_ZSTD, CODEC_NONE) else CODEC_GZIP
+
+
+def transcript_compress_min_bytes() -> int:
+    try:
+        return max(0, int(os.environ.get("TRANSCRIPT_S3_COMPRESS_MIN_BYTES", "") or DEFAULT_MIN_BYTES))
+    except (TypeError, ValueError):
+        return DEFAULT_MIN_BYTES
+
+
+def compress_bytes(raw: bytes, codec: str, level: Optional[int] = None) -> bytes:
+    if codec == CODEC_GZIP:
+        # mtime=0: identical documents produce identical bodies (stable ETags).
+        return gzip.compress(raw, compresslevel=6 if level is None else int(level), mtime=0)
+    if codec == CODEC_ZSTD:
+        if _zstd is None:
+            raise RuntimeError("zstandard is not installed")
+        return _zstd.ZstdCompressor(level=3 if level is None else int(level)).compress(raw)
+    return raw
+
+
+def encode_json_body(
+    obj: Any,
+    codec: Optional[str] = None,
+    *,
+    level: Optional[int] = None,
+    min_bytes: Optional[int] = None,
+) -> Tuple[bytes, Dict[str, Any], int]:
+    """(body, put_object kwargs, JSON byte length) for ``obj``; kwargs carry ContentType/ContentEncoding/Metadata."""
+    raw = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    codec = transcript_codec_from_env() if codec is None else codec
+    threshold = transcript_compress_min_bytes() if min_bytes is None else int(min_bytes)
+    extra: Dict[str, Any] = {"ContentType": "application/json"}
+    if codec == CODEC_NONE or len(raw) < threshold:
+        return raw, extra, len(raw)
+    body = compress_bytes(raw, codec, level)
+    extra["ContentEncoding"] = codec
+    extra["Metadata"] = {METADATA_KEY: f"json+{codec};v={FORMAT_VERSION}"}
+    return body, extra, len(raw)
+
+
+def decompress_bytes(body: bytes, content_encoding: Optional[str] = None) -> bytes:
+    """Undo gzip/zstd by magic bytes; plain bodies pass through unchanged."""
+    if body[:2] == _GZIP_MAGIC:
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    if body[:4] == _ZSTD_MAGIC:
+        if _zstd is None:
+            raise RuntimeError("object is zstd-encoded but zstandard is not installed")
+        return _zstd.ZstdDecompressor().decompressobj().decompress(body)
+    enc = (content_encoding or "").strip().lower()
+    if enc and enc not in ("identity", CODEC_GZIP, CODEC_ZSTD):
+        logging.info("decode_json_body: unknown content-encoding %r, treating as plain", enc)
+    return body
+
+
+def decode_json_body(body: bytes, content_encoding: Optional[str] = None) -> Any:
+    """Parse a stored JSON object written plain (legacy) or by :func:`encode_json_body`."""
+    raw = decompress_bytes(body or b"", content_encoding)
+    return json.loads(raw.decode("utf-8-sig"))
+
+
+def read_json_object(resp: Dict[str, Any]) -> Any:
+    """Decode a boto3 ``get_object`` response body."""
+    return decode_json_body(resp["Body"].read(), resp.get("ContentEncoding"))
@@ -0,0 +1,116 @@
+"""Segment- and word-level edit operations applied to a stored transcript.
+
+``/api/save_job_result`` takes the whole ``segments`` / ``words`` /
+``captions`` arrays on every save. ``/api/patch_job_result`` instead takes a
+list of operations against a base ETag; :func:`apply_transcript_patch`
+applies them to the current document and the server writes the result once
+(``IfMatch`` on the base ETag, so a concurrent save from another tab is
+rejected instead of silently overwritten).
+
+Operations apply in order; indices refer to the array as left by the
+previous operation::
+
+    {"op": "update", "target": "segments", "index": 12,
+     "fields": {"text": "...", "end": 41.2}, "unset": ["highlighted"]}
+    {"op": "splice", "target": "words", "start": 100, "delete": 2,
+     "insert": [{"id": "w100", "text": "...", "start": 1.0, "end": 1.4}]}
+    {"op": "set_formatted", "value": {...}}          # null clears it
+
+``target`` is one of ``segments``, ``words``, ``captions``. Untouched
+arrays keep their identity (no copy); touched ones are copied once.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Set, Tuple
+
+PATCH_TARGETS = ("segments", "words", "captions")
+DEFAULT_MAX_OPS = 5000
+
+
+class TranscriptPatchError(ValueError):
+    """Malformed or out-of-range operation (maps to HTTP 400)."""
+
+
+def _int(op: Dict[str, Any], name: str, n: int) -> int:
+    value = op.get(name)
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise TranscriptPatchError(f"op {n}: {name} must be an integer")
+    return value
+
+
+def _items(value: Any, n: int, name: str) -> List[Dict[str, Any]]:
+    if not isinstance(value, list) or not all(isinstance(v, dict) for v in value):
+        raise TranscriptPatchError(f"op {n}: {name} must be an array of objects")
+    return value
+
+
+def apply_transcript_patch(
+    doc: Dict[str, Any], ops: Any, *, max_ops: int = DEFAULT_MAX_OPS
+) -> Tuple[Dict[str, Any], Set[str]]:
+    """Patched copy of ``doc`` and the set of top-level keys the operations changed.
+
+    ``doc`` itself is never mutated. Raises :class:`TranscriptPatchError`.
+    """
+    if not isinstance(ops, list) or not ops:
+        raise TranscriptPatchError("ops must be a non-empty array")
+    if len(ops) > max_ops:
+        raise TranscriptPatchError(f"too many ops ({len(ops)} > {max_ops}); save the full transcript instead")
+    out = dict(doc)
+    touched: Set[str] = set()
+
+    def writable(target: str, n: int) -> List[Any]:
+        if target not in touched:
+            current = out.get(target)
+            if current is None:
+                current = []
+            elif not isinstance(current, list):
+                raise TranscriptPatchError(f"op {n}: {target} is not an array in the stored transcript")
+            out[target] = list(current)
+            touched.add(target)
+        return out[target]
+
+    for n, op in enumerate(ops):
+        if not isinstance(op, dict):
+            raise TranscriptPatchError(f"op {n}: must be an object")
+        kind = op.get("op")
+        if kind == "set_formatted":
+            value = op.get("value")
+            if value is None:
+                out.pop("formatted", None)
+            elif isinstance(value, dict):
+                out["formatted"] = value
+            else:
+                raise TranscriptPatchError(f"op {n}: value must be an object or null")
+            touched.add("formatted")
+            continue
+        target = op.get("target")
+        if target not in PATCH_TARGETS:
+            raise TranscriptPatchError(f"op {n}: target must be one of {', '.join(PATCH_TARGETS)}")
+        if kind == "update":
+            arr = writable(target, n)
+            index = _int(op, "index", n)
+            if not 0 <= index < len(arr):
+                raise TranscriptPatchError(f"op {n}: {target}[{index}] out of range (len {len(arr)})")
+            fields = op.get("fields") or {}
+            unset = op.get("unset") or []
+            if not isinstance(fields, dict) or not isinstance(unset, list):
+                raise TranscriptPatchError(f"op {n}: fields must be an object and unset an array")
+            if not isinstance(arr[index], dict):
+                raise TranscriptPatchError(f"op {n}: {target}[{index}] is not an object")
+            item = dict(arr[index])
+            item.update(fields)
+            for name in unset:
+                item.pop(name, None)
+            arr[index] = item
+        elif kind == "splice":
+            arr = writable(target, n)
+            start = _int(op, "start", n)
+            delete = _int(op, "delete", n) if "delete" in op else 0
+            insert = _items(op.get("insert") if "insert" in op else [], n, "insert")
+            if not 0 <= start <= len(arr) or delete < 0 or start + delete > len(arr):
+                raise TranscriptPatchError(f"op {n}: splice {start}+{delete} out of range (len {len(arr)})")
+            arr[start:start + delete] = insert
+        else:
+            raise TranscriptPatchError(f"op {n}: unknown op {kind!r}")
+    return out, touched
@@ -0,0 +1,240 @@
+"""Columnar encoding of word-level timing data in transcripts.
+
+The legacy transcript shape stores one dict per word twice: inside each
+segment (``{"word", "start", "end", ...}``) and again in the flat ``words``
+list (``{"id": "w123", "text", "start", "end"}``), plus ``captions`` as
+dicts of word-index ranges. For a two-hour recording (~20k words) those
+dicts dominate both memory and JSON size.
+
+Columnar layout (``words_format: "columnar/1"``)::
+
+    "words":    {"text": [...], "start": [...], "end": [...], "unit": "ms",
+                 "flat": true, "ids"?: [...], "extra"?: {"<i>": {...}}}
+    "captions": {"first": [...], "last": [...], "ids"?: [...], "extra"?: {...}}
+    "segments": [{..., "word_span": [first, count], "word_key"?: "text",
+                  "word_extra"?: {"<j>": {...}}}, ...]
+
+- times are integer milliseconds when every value is an exact multiple of
+  1 ms (WhisperX output is), otherwise float seconds (``unit: "s"``);
+- ids are omitted when they follow the ``w{i}`` / ``c{i}`` convention;
+- segment words point into the shared columns; any segment whose words do not
+  match the flat list exactly stays inline, so conversion is lossless.
+
+:func:`from_columnar` restores the legacy shape; both functions pass through
+documents they do not apply to.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+MARKER = "columnar/1"
+_WORD_KEYS = ("id", "text", "start", "end")
+_CAPTION_KEYS = ("id", "wordStartIndex", "wordEndIndex")
+
+
+def is_columnar(doc: Any) -> bool:
+    return isinstance(doc, dict) and doc.get("words_format") == MARKER
+
+
+def _num(v: Any) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+class _Columns:
+    def __init__(self) -> None:
+        self.text: List[Any] = []
+        self.start: List[float] = []
+        self.end: List[float] = []
+        self.ids: List[Any] = []
+        self.extra: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, text: Any, start: float, end: float, wid: Any, extra: Dict[str, Any]) -> None:
+        if extra:
+            self.extra[str(len(self.text))] = extra
+        self.text.append(text)
+        self.start.append(start)
+        self.end.append(end)
+        self.ids.append(wid)
+
+    def matches(self, i: int, text: Any, start: Any, end: Any) -> bool:
+        return i < len(self.text) and self.text[i] == text and self.start[i] == start and self.end[i] == end
+
+    def encode(self, flat: bool) -> Dict[str, Any]:
+        times = self.start + self.end
+        ms = all(round(t * 1000) / 1000.0 == t for t in times)
+        out: Dict[str, Any] = {
+            "text": self.text,
+            "start": [int(round(t * 1000)) for t in self.start] if ms else list(self.start),
+            "end": [int(round(t * 1000)) for t in self.end] if ms else list(self.end),
+            "unit": "ms" if ms else "s",
+            "flat": flat,
+        }
+        if any(wid != f"w{i}" for i, wid in enumerate(self.ids)):
+            out["ids"] = self.ids
+        if self.extra:
+            out["extra"] = self.extra
+        return out
+
+
+def to_columnar(doc: Any) -> Any:
+    """Columnar copy of a legacy transcript (returns ``doc`` unchanged when not applicable)."""
+    if not isinstance(doc, dict) or is_columnar(doc):
+        return doc
+    flat = doc.get("words")
+    segments = doc.get("segments")
+    captions = doc.get("captions")
+    if flat is not None and not isinstance(flat, list):
+        return doc
+    cols = _Columns()
+    for w in flat or []:
+        if not isinstance(w, dict) or "id" not in w or "text" not in w or not _num(w.get("start")) or not _num(w.get("end")):
+            return doc
+        extra = {k: v for k, v in w.items() if k not in _WORD_KEYS}
+        cols.add(w["text"], w["start"], w["end"], w["id"], extra)
+
+    seg_out: Optional[List[Any]] = None
+    if isinstance(segments, list):
+        seg_out = []
+        cursor = 0
+        for seg in segments:
+            words = seg.get("words") if isinstance(seg, dict) else None
+            if not isinstance(words, list) or not words or not all(isinstance(w, dict) for w in words):
+                seg_out.append(seg)
+                continue
+            word_key = "word" if "word" in words[0] else "text"
+            if not all(word_key in w and _num(w.get("start")) and _num(w.get("end")) for w in words):
+                seg_out.append(seg)
+                continue
+            if flat is None:
+                first = len(cols.text)
+                for w in words:
+                    cols.add(w[word_key], w["start"], w["end"], f"w{len(cols.text)}", {})
+            elif all(cols.matches(cursor + j, w[word_key], w["start"], w["end"]) for j, w in enumerate(words)):
+                first = cursor
+            else:
+                seg_out.append(seg)
+                continue
+            cursor = first + len(words)
+            packed = {k: v for k, v in seg.items() if k != "words"}
+            packed["word_span"] = [first, len(words)]
+            if word_key != "word":
+                packed["word_key"] = word_key
+            word_extra = {}
+            for j, w in enumerate(words):
+                extra = {k: v for k, v in w.items() if k not in (word_key, "start", "end")}
+                if extra:
+                    word_extra[str(j)] = extra
+            if word_extra:
+                packed["word_extra"] = word_extra
+            seg_out.append(packed)
+
+    out = {k: v for k, v in doc.items() if k not in ("words", "segments", "captions")}
+    out["words_format"] = MARKER
+    if flat is not None or cols.text:
+        out["words"] = cols.encode(flat is not None)
+    if seg_out is not None:
+        out["segments"] = seg_out
+    elif "segments" in doc:
+        out["segments"] = segments
+    if "captions" in doc:
+        out["captions"] = _captions_to_columns(captions)
+    return out
+
+
+def _captions_to_columns(captions: Any) -> Any:
+    if not isinstance(captions, list):
+        return captions
+    first, last, ids, extra = [], [], [], {}
+    for i, c in enumerate(captions):
+        if not isinstance(c, dict) or not all(k in c for k in _CAPTION_KEYS):
+            return captions
+        first.append(c["wordStartIndex"])
+        last.append(c["wordEndIndex"])
+        ids.append(c["id"])
+        rest = {k: v for k, v in c.items() if k not in _CAPTION_KEYS}
+        if rest:
+            extra[str(i)] = rest
+    out: Dict[str, Any] = {"first": first, "last": last}
+    if any(cid != f"c{i}" for i, cid in enumerate(ids)):
+        out["ids"] = ids
+    if extra:
+        out["extra"] = extra
+    return out
+
+
+def from_columnar(doc: Any) -> Any:
+    """Legacy-shape copy of a columnar transcript (other documents pass through)."""
+    if not is_columnar(doc):
+        return doc
+    out = {k: v for k, v in doc.items() if k not in ("words_format", "words", "segments", "captions")}
+    cols = doc.get("words") or {}
+    texts = cols.get("text") or []
+    div = 1000.0 if cols.get("unit") == "ms" else None
+    starts = [s / div for s in cols.get("start") or []] if div else list(cols.get("start") or [])
+    ends = [e / div for e in cols.get("end") or []] if div else list(cols.get("end") or [])
+    extras = cols.get("extra") or {}
+    if "words" in doc and cols.get("flat", True):
+        ids = cols.get("ids")
+        words = []
+        for i, text in enumerate(texts):
+            w = {"id": ids[i] if ids else f"w{i}", "text": text, "start": starts[i], "end": ends[i]}
+            w.update(extras.get(str(i)) or {})
+            words.append(w)
+        out["words"] = words
+    if "segments" in doc:
+        segments = doc.get("segments")
+        if isinstance(segments, list):
+            restored = []
+            for seg in segments:
+                if not isinstance(seg, dict) or "word_span" not in seg:
+                    restored.append(seg)
+                    continue
+                first, count = seg["word_span"]
+                word_key = seg.get("word_key") or "word"
+                word_extra = seg.get("word_extra") or {}
+                s = {k: v for k, v in seg.items() if k not in ("word_span", "word_key", "word_extra")}
+                seg_words = []
+                for j in range(count):
+                    i = first + j
+                    w = {word_key: texts[i], "start": starts[i], "end": ends[i]}
+                    w.update(word_extra.get(str(j)) or {})
+                    seg_words.append(w)
+                s["words"] = seg_words
+                restored.append(s)
+            segments = restored
+        out["segments"] = segments
+    if "captions" in doc:
+        caps = doc.get("captions")
+        if isinstance(caps, dict) and "first" in caps:
+            ids = caps.get("ids")
+            extra = caps.get("extra") or {}
+            restored_caps = []
+            for i, (a, b) in enumerate(zip(caps.get("first") or [], caps.get("last") or [])):
+                c = {"id": ids[i] if ids else f"c{i}", "wordStartIndex": a, "wordEndIndex": b}
+                c.update(extra.get(str(i)) or {})
+                restored_caps.append(c)
+            caps = restored_caps
+        out["captions"] = caps
+    return out
+
+
+def to_columnar_payload(payload: Any) -> Any:
+    """Columnar job payload: top-level transcript keys and the nested ``result`` copy."""
+    if not isinstance(payload, dict):
+        return payload
+    out = to_columnar(payload)
+    if out is payload:
+        return payload
+    result = payload.get("result")
+    keys = [k for k in ("segments", "words", "captions") if isinstance(result, dict) and k in result]
+    if keys:
+        if all(result[k] is payload.get(k) for k in keys) and set(keys) == {k for k in ("segments", "words", "captions") if k in payload}:
+            # result shares the top-level lists (the usual callback shape): reuse the converted columns.
+            packed = {k: v for k, v in result.items() if k not in keys}
+            packed.update({k: out[k] for k in keys})
+            packed["words_format"] = MARKER
+            out["result"] = packed
+        else:
+            out["result"] = to_columnar(result)
+    return out
@@ -0,0 +1,221 @@
+"""Per-key write-behind queue that coalesces partial updates into one flush.
+
+``metadata.qs_trigger`` is updated by read-modify-write PATCHes from many
+places (trigger state, upload/GPU timings, worker handoff). Each update used
+to run its own cycle on its own thread, so a single job could have half a
+dozen cycles racing and overwriting each other's fields.
+
+:class:`WriteBehindQueue` keeps, per key, the merged fields not yet written
+(later values win, shallow merge) plus the latest status. A pool of flusher
+threads writes each key at most once per flush interval; urgent updates
+(terminal states) are due immediately, and ``sync=True`` flushes in the
+caller's thread before returning. A key is never flushed by two threads at
+once and a newer flush for a key always starts after the older one finished,
+so updates reach the store in the order they were enqueued.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+DEFAULT_FLUSH_INTERVAL_SEC = 0.25
+
+
+def qs_trigger_flush_interval_sec() -> float:
+    """QS_TRIGGER_FLUSH_MS (default 250)."""
+    try:
+        ms = float(os.environ.get("QS_TRIGGER_FLUSH_MS", "") or DEFAULT_FLUSH_INTERVAL_SEC * 1000)
+    except (TypeError, ValueError):
+        ms = DEFAULT_FLUSH_INTERVAL_SEC * 1000
+    return max(0.0, min(ms, 10_000.0)) / 1000.0
+
+
+class _Pending:
+    __slots__ = ("fields", "status", "at", "due", "queued_at", "updates")
+
+    def __init__(self, due: float, queued_at: float) -> None:
+        self.fields: Dict[str, Any] = {}
+        self.status: Optional[str] = None
+        self.at = 0.0
+        self.due = due
+        self.queued_at = queued_at
+        self.updates = 0
+
+
+class WriteBehindQueue:
+    def __init__(
+        self,
+        flush_fn: Callable[[Hashable, Dict[str, Any], Optional[str], float], Any],
+        *,
+        flush_interval_sec: float = DEFAULT_FLUSH_INTERVAL_SEC,
+        flushers: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._flush_fn = flush_fn
+        self._interval = max(0.0, float(flush_interval_sec))
+        self._flushers = max(1, int(flushers))
+        self._clock = clock
+        self._wall = wall_clock
+        self._cond = threading.Condition(threading.Lock())
+        self._pending: "OrderedDict[Hashable, _Pending]" = OrderedDict()
+        self._inflight: Dict[Hashable, _Pending] = {}
+        self._threads: list = []
+        self._closed = False
+        self._counters = {"enqueued": 0, "flushes": 0, "errors": 0, "sync_flushes": 0}
+        self._flush_sec_total = 0.0
+        self._flush_sec_max = 0.0
+        self._delay_sec_total = 0.0
+        self._delay_sec_max = 0.0
+
+    def enqueue(
+        self,
+        key: Hashable,
+        fields: Optional[Dict[str, Any]] = None,
+        status: Optional[str] = None,
+        *,
+        urgent: bool = False,
+        sync: bool = False,
+    ) -> None:
+        now = self._clock()
+        with self._cond:
+            p = self._pending.get(key)
+            if p is None:
+                p = _Pending(now + self._interval, now)
+                self._pending[key] = p
+            if fields:
+                p.fields.update(fields)
+            if status is not None:
+                p.status = status
+            p.at = self._wall()
+            p.updates += 1
+            if urgent:
+                p.due = min(p.due, now)
+            self._counters["enqueued"] += 1
+            if not sync:
+                self._ensure_threads_locked()
+                self._cond.notify()
+        if sync:
+            self.flush(key)
+
+    def flush(self, key: Hashable) -> bool:
+        """Write ``key`` now in the caller's thread (after any in-flight flush of it)."""
+        with self._cond:
+            while key in self._inflight:
+                self._cond.wait(0.5)
+            if key not in self._pending:
+                return False
+            p = self._take_locked(key)
+            self._counters["sync_flushes"] += 1
+        self._write(key, p)
+        return True
+
+    def drain(self) -> int:
+        """Flush everything pending synchronously (shutdown / tests)."""
+        flushed = 0
+        while True:
+            with self._cond:
+                key = next((k for k in self._pending if k not in self._inflight), None)
+                if key is None and not self._inflight:
+                    return flushed
+            if key is None:
+                time.sleep(0.01)
+                continue
+            if self.flush(key):
+                flushed += 1
+
+    def pending(self, key: Hashable) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Fields/status accepted but not yet confirmed written (in flight + queued), for read-your-writes."""
+        with self._cond:
+            fields: Dict[str, Any] = {}
+            status = None
+            for p in (self._inflight.get(key), self._pending.get(key)):
+                if p is None:
+                    continue
+                fields.update(p.fields)
+                if p.status is not None:
+                    status = p.status
+            return fields, status
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            out: Dict[str, Any] = dict(self._counters)
+            out["depth"] = len(self._pending)
+            out["in_flight"] = len(self._inflight)
+            flushes = out["flushes"] or 0
+            out["coalesced"] = max(0, out["enqueued"] - flushes - out["depth"] - out["in_flight"])
+            out["flush_ms_avg"] = round(1000 * self._flush_sec_total / flushes, 2) if flushes else 0.0
+            out["flush_ms_max"] = round(1000 * self._flush_sec_max, 2)
+            out["queue_delay_ms_avg"] = round(1000 * self._delay_sec_total / flushes, 2) if flushes else 0.0
+            out["queue_delay_ms_max"] = round(1000 * self._delay_sec_max, 2)
+            out["flush_interval_ms"] = round(1000 * self._interval, 2)
+            return out
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    # -- internals -------------------------------------------------------------
+
+    def _take_locked(self, key: Hashable) -> _Pending:
+        p = self._pending.pop(key)
+        self._inflight[key] = p
+        return p
+
+    def _write(self, key: Hashable, p: _Pending) -> None:
+        t0 = self._clock()
+        try:
+            self._flush_fn(key, dict(p.fields), p.status, p.at)
+        except Exception as e:
+            logging.warning("write-behind flush failed key=%s: %s", key, e)
+            with self._cond:
+                self._counters["errors"] += 1
+        finally:
+            done = self._clock()
+            with self._cond:
+                self._inflight.pop(key, None)
+                self._counters["flushes"] += 1
+                self._flush_sec_total += done - t0
+                self._flush_sec_max = max(self._flush_sec_max, done - t0)
+                self._delay_sec_total += t0 - p.queued_at
+                self._delay_sec_max = max(self._delay_sec_max, t0 - p.queued_at)
+                self._cond.notify_all()
+
+    def _ensure_threads_locked(self) -> None:
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self._flushers and not self._closed:
+            t = threading.Thread(target=self._run, name="write-behind-flusher", daemon=True)
+            self._threads.append(t)
+            t.start()
+
+    def _next_due_locked(self) -> Tuple[Optional[Hashable], Optional[float]]:
+        now = self._clock()
+        next_due = None
+        for key, p in self._pending.items():
+            if key in self._inflight:
+                continue
+            if p.due <= now:
+                return key, None
+            next_due = p.due if next_due is None else min(next_due, p.due)
+        return None, next_due
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    key, next_due = self._next_due_locked()
+                    if key is not None:
+                        p = self._take_locked(key)
+                        break
+                    timeout = None if next_due is None else max(0.0, next_due - self._clock())
+                    self._cond.wait(timeout)
+            self._write(key, p)